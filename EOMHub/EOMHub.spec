@@ -34,6 +34,8 @@ a = Analysis(
         'src',
         'src.api',
         'src.api.tools',
+        'src.api.savings_journal',
+        'src.api.transport',
     ],
     hookspath=[],
     hooksconfig={},
@@ -76,6 +76,16 @@ interface JobDetail {
   level?: string
 }
 
+interface JobProgress {
+  seq: number
+  stage?: string | null
+  processed: number
+  total?: number | null
+  rate?: number
+  eta_sec?: number | null
+  timestamp?: number
+}
+
 interface JobResult {
   job_id: string
   tool_id: string
@@ -86,6 +96,9 @@ interface JobResult {
   stats?: JobStats
   details?: JobDetail[]
   summary?: Record<string, unknown>
+  progress?: JobProgress
+  progressTimestamp?: number
+  stalled?: boolean
 }
 
 interface TimeSavings {
@@ -687,6 +700,55 @@ function useAppController() {
     }
   }, [pendingJobIds, lastJobId, countedJobIds, jobMetaById, mergeState, updateState])
 
+  // Live progress of the current job (SSE); polling above still settles the final state.
+  const jobIsActive = jobStatus === 'pending' || jobStatus === 'running'
+  useEffect(() => {
+    if (!lastJobId || !jobIsActive || typeof EventSource === 'undefined') return
+
+    const source = new EventSource(`/api/job-events/${encodeURIComponent(lastJobId)}`)
+    source.addEventListener('progress', (event) => {
+      let ev: JobProgress
+      try {
+        ev = JSON.parse((event as MessageEvent).data) as JobProgress
+      } catch {
+        return
+      }
+      const parts = [`${ev.stage || 'Выполнение'}: ${ev.processed}${ev.total ? ` / ${ev.total}` : ''}`]
+      if (ev.rate) parts.push(`${Math.round(ev.rate * 10) / 10}/с`)
+      if (ev.eta_sec != null) parts.push(`осталось ~${Math.ceil(ev.eta_sec)} с`)
+      updateState((current) => {
+        if (current.lastJobId !== lastJobId || !current.jobResult) return current
+        const stats = current.jobResult.stats || { total: 0, processed: 0, skipped: 0, errors: 0 }
+        return {
+          ...current,
+          jobResult: {
+            ...current.jobResult,
+            progress: ev,
+            stalled: false,
+            stats: { ...stats, processed: ev.processed, total: ev.total || stats.total },
+          },
+          jobMessage: parts.join(' · '),
+        }
+      })
+    })
+    source.addEventListener('status', (event) => {
+      let res: JobResult
+      try {
+        res = JSON.parse((event as MessageEvent).data) as JobResult
+      } catch {
+        return
+      }
+      if (!res.stalled) return
+      updateState((current) =>
+        current.lastJobId === lastJobId ? { ...current, jobMessage: 'Нет прогресса больше минуты — Revit занят или задача зависла' } : current,
+      )
+    })
+    source.addEventListener('result', () => source.close())
+    source.onerror = () => source.close()
+
+    return () => source.close()
+  }, [lastJobId, jobIsActive, updateState])
+
   const runningToolIds = useMemo(() => {
     const ids = new Set<string>()
     for (const jobId of pendingJobIds) {
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Readers and writers for the append-only time-savings files.
+
+Mirrors the journal format of EOMTemplateTools.extension/lib/time_savings_journal.py
+(JSONL segment + ``<log>.idx.json`` sidecar with the last offset per tool), so
+the latest entry for a tool is one seek plus, at most, a tail read of lines
+appended after the index was written.
+
+The Hub's own savings are split the same way: small totals JSON updated
+incrementally and an append-only history JSONL read from the tail.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator, Optional
+
+import json
+import os
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+READ_BLOCK_BYTES = 64 * 1024
+HISTORY_MAX_BYTES = 256 * 1024
+HISTORY_KEEP = 100
+
+
+def _parse_line(raw: bytes) -> Optional[dict[str, Any]]:
+    line = raw.strip()
+    if not line:
+        return None
+    try:
+        data = json.loads(line.decode("utf-8"))
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def iter_entries_reversed(
+    path: str, stop_offset: int = 0, block_size: int = READ_BLOCK_BYTES
+) -> Iterator[dict[str, Any]]:
+    """Yield JSONL entries from the last to the first (not before ``stop_offset``)."""
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        while pos > stop_offset:
+            step = min(block_size, pos - stop_offset)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + tail).split(b"\n")
+            tail = lines[0]
+            for raw in reversed(lines[1:]):
+                data = _parse_line(raw)
+                if data is not None:
+                    yield data
+        data = _parse_line(tail)
+        if data is not None:
+            yield data
+
+
+def load_index(log_path: str) -> Optional[dict[str, Any]]:
+    try:
+        with open(log_path + INDEX_SUFFIX, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return None
+    if not isinstance(data.get("tools"), dict):
+        data["tools"] = {}
+    return data
+
+
+def read_last_entry(
+    log_path: str, key: str, key_fn: Optional[Callable[[Any], Any]] = None
+) -> Optional[dict[str, Any]]:
+    """Latest journal entry whose ``tool_key`` equals ``key``, or ``None``."""
+    key_fn = key_fn or (lambda value: value)
+
+    def _matches(data: dict[str, Any]) -> bool:
+        return key_fn(data.get("tool_key")) == key
+
+    index = load_index(log_path)
+    size = _file_size(log_path)
+    indexed = int(index.get("size") or 0) if index else 0
+    if index and size < indexed:
+        index, indexed = None, 0
+
+    if size > indexed:
+        for data in iter_entries_reversed(log_path, stop_offset=indexed):
+            if _matches(data):
+                return data
+        if index is None:
+            return None
+
+    ptr = index["tools"].get(key) if index else None
+    if not isinstance(ptr, dict):
+        return None
+    path = os.path.join(os.path.dirname(log_path), ptr.get("file") or os.path.basename(log_path))
+    try:
+        with open(path, "rb") as f:
+            f.seek(int(ptr.get("offset") or 0))
+            data = _parse_line(f.read(int(ptr.get("length") or 0)))
+    except Exception:
+        data = None
+    if data is not None and _matches(data):
+        return data
+    for data in iter_entries_reversed(log_path):
+        if _matches(data):
+            return data
+    return None
+
+
+def history_path(savings_file: str) -> str:
+    root, _ = os.path.splitext(savings_file)
+    return root + "_history.jsonl"
+
+
+def read_history(savings_file: str, limit: int = HISTORY_KEEP) -> list[dict[str, Any]]:
+    """Newest-first history entries from the tail of the history journal."""
+    out: list[dict[str, Any]] = []
+    for data in iter_entries_reversed(history_path(savings_file)):
+        out.append(data)
+        if len(out) >= limit:
+            break
+    return out
+
+
+def append_history(savings_file: str, item: dict[str, Any]) -> None:
+    path = history_path(savings_file)
+    if _file_size(path) >= HISTORY_MAX_BYTES:
+        # Rare compaction: keep only what the UI can show.
+        write_history(savings_file, read_history(savings_file, HISTORY_KEEP - 1))
+    with open(path, "ab") as f:
+        f.write(json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+def write_history(savings_file: str, history: list[dict[str, Any]]) -> None:
+    """Replace the history journal with ``history`` (newest first)."""
+    path = history_path(savings_file)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for item in reversed(history):
+            if isinstance(item, dict):
+                f.write(json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n")
+    os.replace(tmp_path, path)
@@ -19,6 +19,9 @@ try:
 except Exception:
     eel = None
 
+from . import savings_journal
+from . import transport
+
 
 def _expose(func):
     """Decorator shim when eel isn't available in lint/CI environments."""
@@ -107,38 +110,90 @@ def _get_status_file() -> str:
     return os.path.join(_get_temp_root(), "eom_hub_status.json")
 
 
-def _iter_status_candidates() -> list[str]:
-    """Return possible status file locations, preferring current temp root."""
-    candidates: list[str] = []
-    try:
-        temp_root = _get_temp_root()
-    except Exception:
-        temp_root = None
+SESSION_REGISTRY_FILE = "eom_hub_sessions.json"
+STATUS_SCAN_INTERVAL_SEC = 30.0
+_STATUS_SCAN_CACHE: dict[str, Any] = {"ts": 0.0, "roots": None, "paths": []}
 
-    if temp_root:
-        candidates.append(os.path.join(temp_root, "eom_hub_status.json"))
+
+def _status_roots() -> list[str]:
+    roots: list[str] = []
+    for getter in (_get_temp_root, tempfile.gettempdir):
         try:
-            for name in os.listdir(temp_root):
-                if len(name) == 36 and name.count("-") == 4:
-                    p = os.path.join(temp_root, name, "eom_hub_status.json")
-                    candidates.append(p)
+            root = getter()
         except Exception:
-            pass
+            continue
+        if root and root not in roots:
+            roots.append(root)
+    return roots
 
-    # Fallback: scan root temp for recent status files
-    try:
-        root = tempfile.gettempdir()
-        if root and root != temp_root:
-            candidates.append(os.path.join(root, "eom_hub_status.json"))
-            try:
-                for name in os.listdir(root):
-                    if len(name) == 36 and name.count("-") == 4:
-                        p = os.path.join(root, name, "eom_hub_status.json")
-                        candidates.append(p)
-            except Exception:
-                pass
-    except Exception:
-        pass
+
+def _read_session_registry() -> dict[str, dict[str, Any]]:
+    """Sessions registered by the Revit monitor (lib/hub_sessions.py)."""
+    sessions: dict[str, dict[str, Any]] = {}
+    for root in _status_roots():
+        try:
+            with open(os.path.join(root, SESSION_REGISTRY_FILE), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        entries = data.get("sessions") if isinstance(data, dict) else None
+        if not isinstance(entries, dict):
+            continue
+        for sid, record in entries.items():
+            if not isinstance(record, dict):
+                continue
+            known = sessions.get(sid)
+            if known is None or _as_float(record.get("updated")) > _as_float(known.get("updated")):
+                sessions[sid] = record
+    return sessions
+
+
+def _scan_status_dirs() -> list[str]:
+    """Status files in UUID temp subdirectories (legacy monitors), rate-limited."""
+    now = time.time()
+    roots = _status_roots()
+    if _STATUS_SCAN_CACHE["roots"] == roots and now - _STATUS_SCAN_CACHE["ts"] < STATUS_SCAN_INTERVAL_SEC:
+        return list(_STATUS_SCAN_CACHE["paths"])
+    paths: list[str] = []
+    for root in roots:
+        try:
+            names = os.listdir(root)
+        except Exception:
+            continue
+        for name in names:
+            if len(name) == 36 and name.count("-") == 4:
+                p = os.path.join(root, name, "eom_hub_status.json")
+                if os.path.exists(p):
+                    paths.append(p)
+    _STATUS_SCAN_CACHE.update({"ts": now, "roots": roots, "paths": paths})
+    return list(paths)
+
+
+def _iter_status_candidates(include_scan: bool = False) -> list[str]:
+    """Return possible status file locations, current session first.
+
+    The session registry and the well-known root files are O(1); scanning
+    temp subdirectories is only done on request (no registered session).
+    """
+    candidates: list[str] = []
+    registry = _read_session_registry()
+    current_session = (_get_session_id() or "").strip()
+    current = registry.get(current_session) if current_session else None
+    if isinstance(current, dict) and current.get("statusFile"):
+        candidates.append(str(current["statusFile"]))
+
+    for root in _status_roots():
+        candidates.append(os.path.join(root, "eom_hub_status.json"))
+
+    others = sorted(
+        (r for sid, r in registry.items() if sid != current_session and r.get("statusFile")),
+        key=lambda r: _as_float(r.get("updated")),
+        reverse=True,
+    )
+    candidates.extend(str(r["statusFile"]) for r in others)
+
+    if include_scan:
+        candidates.extend(_scan_status_dirs())
 
     # De-dup while preserving order
     seen = set()
@@ -150,37 +205,57 @@ def _iter_status_candidates() -> list[str]:
     return ordered
 
 
-def _read_latest_status_payload() -> tuple[Optional[str], Optional[dict[str, Any]]]:
-    """Read the freshest status payload available from known candidates."""
-    best_match_path: Optional[str] = None
-    best_match_payload: Optional[dict[str, Any]] = None
-    best_match_ts = -1.0
-
-    best_any_path: Optional[str] = None
-    best_any_payload: Optional[dict[str, Any]] = None
-    best_any_ts = -1.0
-
-    for status_file in _iter_status_candidates():
-        if not os.path.exists(status_file):
-            continue
+def _load_status_payloads(include_scan: bool = False) -> list[tuple[str, dict[str, Any]]]:
+    loaded: list[tuple[str, dict[str, Any]]] = []
+    for status_file in _iter_status_candidates(include_scan):
         try:
             with open(status_file, "r", encoding="utf-8") as f:
                 payload = json.load(f)
-            timestamp = float(payload.get("timestamp", 0) or 0)
-            if timestamp >= best_any_ts:
-                best_any_ts = timestamp
-                best_any_path = status_file
-                best_any_payload = payload
-            if _is_session_match(payload) and timestamp >= best_match_ts:
-                best_match_ts = timestamp
-                best_match_path = status_file
-                best_match_payload = payload
         except Exception:
             continue
+        if isinstance(payload, dict):
+            loaded.append((status_file, payload))
+    return loaded
 
-    if best_match_payload is not None:
-        return best_match_path, best_match_payload
-    return best_any_path, best_any_payload
+
+def _select_status_payloads(
+    include_scan: bool = False, max_age: Optional[float] = None
+) -> tuple[Optional[tuple[str, dict[str, Any]]], Optional[tuple[str, dict[str, Any]]]]:
+    """Freshest (session match, any) status payloads among the candidates."""
+    best_match = None
+    best_match_ts = -1.0
+    best_any = None
+    best_any_ts = -1.0
+    now = time.time()
+    for status_file, payload in _load_status_payloads(include_scan):
+        timestamp = _as_float(payload.get("timestamp", 0))
+        if max_age is not None and now - timestamp >= max_age:
+            continue
+        if timestamp >= best_any_ts:
+            best_any_ts = timestamp
+            best_any = (status_file, payload)
+        if _is_session_match(payload) and timestamp >= best_match_ts:
+            best_match_ts = timestamp
+            best_match = (status_file, payload)
+    return best_match, best_any
+
+
+def _find_status_payload(max_age: Optional[float] = None) -> Optional[tuple[str, dict[str, Any]]]:
+    best_match, best_any = _select_status_payloads(False, max_age)
+    if best_match is None:
+        # Monitor not in the registry (older build): fall back to the scan.
+        scan_match, scan_any = _select_status_payloads(True, max_age)
+        best_match = scan_match
+        best_any = best_any or scan_any
+    return best_match or best_any
+
+
+def _read_latest_status_payload() -> tuple[Optional[str], Optional[dict[str, Any]]]:
+    """Read the freshest status payload available from known candidates."""
+    found = _find_status_payload()
+    if found is None:
+        return None, None
+    return found
 
 
 def _get_runtime_temp_dir() -> str:
@@ -201,6 +276,38 @@ def _get_runtime_temp_dir() -> str:
     return _get_temp_root()
 
 
+_MONITOR_ENDPOINT: dict[str, Any] = {}
+
+
+def _send_to_monitor(payload: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """Send a request over the monitor command channel.
+
+    ``None`` means the request was not delivered and the file protocol may be
+    used. Any other value is the outcome of a delivered request (check
+    ``ok``) and must not be retried: the monitor may already have acted on it.
+    """
+    cached = _MONITOR_ENDPOINT.get("status")
+    if cached is not None:
+        response = transport.send_request(cached, payload)
+        if response is not None:
+            return response
+        # Not delivered: the monitor may have restarted on a new port.
+        _MONITOR_ENDPOINT.clear()
+
+    _, status = _read_latest_status_payload()
+    if transport.get_endpoint(status) is None:
+        return None
+    response = transport.send_request(status, payload)
+    if response is not None:
+        _MONITOR_ENDPOINT["status"] = status
+    return response
+
+
+def _monitor_error(response: dict[str, Any]) -> str:
+    error = response.get("error")
+    return f"Revit отклонил команду: {error}" if error else "Revit не подтвердил команду"
+
+
 def _get_command_file() -> str:
     _, payload = _read_latest_status_payload()
     if isinstance(payload, dict):
@@ -475,37 +582,11 @@ def get_tools_config():
 
 @_expose
 def get_revit_status():
-    checked = []
     current_session = (_get_session_id() or "").strip()
-    best_match: Optional[dict[str, Any]] = None
-    best_match_age = float("inf")
-    best_any: Optional[dict[str, Any]] = None
-    best_any_age = float("inf")
-
-    for status_file in _iter_status_candidates():
-        checked.append(status_file)
+    found = _find_status_payload(max_age=10)
+    if found is not None:
+        status_file, active = found
         log(f"get_revit_status: status_file={status_file}")
-        if os.path.exists(status_file):
-            try:
-                with open(status_file, "r", encoding="utf-8") as f:
-                    status = json.load(f)
-                age = time.time() - status.get("timestamp", 0)
-                log(f"get_revit_status: status age={age:.2f}s")
-                payload_session = str(status.get("sessionId", "") or "").strip()
-                session_ok = (not current_session) or (payload_session == current_session)
-
-                if age < 10 and session_ok and age < best_match_age:
-                    best_match_age = age
-                    best_match = status
-                if age < 10 and age < best_any_age:
-                    best_any_age = age
-                    best_any = status
-            except Exception as e:
-                log(f"get_revit_status ERROR reading {status_file}: {e}")
-                continue
-
-    active = best_match or best_any
-    if active is not None:
         return {
             "connected": True,
             "document": active.get("document"),
@@ -514,7 +595,7 @@ def get_revit_status():
             "sessionId": current_session or active.get("sessionId") or "",
         }
 
-    log(f"get_revit_status: no recent status in {len(checked)} candidates")
+    log("get_revit_status: no recent status")
     return {"connected": False, "document": None, "sessionId": _get_session_id()}
 
 
@@ -538,6 +619,19 @@ def run_tool(tool_id: str, job_id: Optional[str] = None):
     # job result files with "pending" markers (it would clobber existing state).
     try:
         if isinstance(tool_id, str) and tool_id.strip() == "cancel":
+            response = _send_to_monitor({"op": "cancel", "job_id": job_id})
+            if response is not None and not response.get("ok"):
+                log(f"Cancel refused over command channel: job_id={job_id}, response={response}")
+                return {"success": False, "job_id": job_id, "tool_id": "cancel", "error": _monitor_error(response)}
+            if response is not None:
+                log(f"Cancel sent over command channel: job_id={job_id}")
+                return {
+                    "success": True,
+                    "job_id": job_id,
+                    "tool_id": "cancel",
+                    "message": "Запрос на отмену отправлен в Revit",
+                }
+
             command_file = _get_command_file()
             if job_id:
                 command = f"run:cancel:{job_id}"
@@ -587,6 +681,16 @@ def run_tool(tool_id: str, job_id: Optional[str] = None):
     # At runtime job_id is always set here.
     assert job_id is not None
 
+    # A delivered run is never re-sent or written to the command file,
+    # even if the monitor refused it or did not answer in time.
+    response = _send_to_monitor({"op": "run", "tool_id": tool_id, "job_id": job_id})
+    if response is not None:
+        if response.get("ok"):
+            log(f"Command sent over command channel: tool_id={tool_id}, job_id={job_id}")
+            return {"success": True, "job_id": job_id, "tool_id": tool_id, "message": "Команда отправлена в Revit"}
+        log(f"Command not accepted over command channel: tool_id={tool_id}, job_id={job_id}, response={response}")
+        return {"success": False, "job_id": job_id, "tool_id": tool_id, "error": _monitor_error(response)}
+
     # Single command file (UniPlagin-style). Job ID stays in payload and results.
     command_file = _get_command_file()
     command = f"run:{tool_id}:{job_id}"
@@ -696,58 +800,74 @@ def _find_time_savings_log_entry(
         if not path or not os.path.exists(path):
             continue
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                for raw_line in f:
-                    line = raw_line.strip()
-                    if not line:
-                        continue
-                    try:
-                        entry = json.loads(line)
-                    except Exception:
-                        continue
-                    if not isinstance(entry, dict):
-                        continue
-                    if str(entry.get("tool_key", "") or "") != tool_id:
-                        continue
-
+            if job_timestamp is None:
+                # Indexed journal: one seek (plus a tail read) per file.
+                entry = savings_journal.read_last_entry(path, tool_id)
+                if isinstance(entry, dict):
                     entry_ts = _as_float(entry.get("timestamp", 0.0), 0.0)
-                    if job_timestamp is None:
-                        if entry_ts >= best_ts:
-                            best_ts = entry_ts
-                            best_entry = entry
-                    else:
-                        score = abs(entry_ts - float(job_timestamp))
-                        if score < best_score:
-                            best_score = score
-                            best_entry = entry
+                    if entry_ts >= best_ts:
+                        best_ts = entry_ts
+                        best_entry = entry
+                continue
+
+            # Entries are appended in time order: walk back from the tail until
+            # they are older than the job and only getting further away.
+            for entry in savings_journal.iter_entries_reversed(path):
+                if str(entry.get("tool_key", "") or "") != tool_id:
+                    continue
+                entry_ts = _as_float(entry.get("timestamp", 0.0), 0.0)
+                score = abs(entry_ts - float(job_timestamp))
+                if score < best_score:
+                    best_score = score
+                    best_entry = entry
+                elif entry_ts < float(job_timestamp):
+                    break
         except Exception as read_err:
             log(f"time-savings log read error: {path}: {read_err}")
 
     return best_entry
 
 
+JOB_TIMEOUT_SEC = 600
+JOB_STALL_SEC = 60
+
+
+def _validate_job_result(result: dict) -> dict:
+    """Time out pending/running jobs that stopped reporting.
+
+    The clock starts at the last progress event when the tool reports
+    progress, so a slow job that keeps reporting is never timed out; one
+    that goes quiet is flagged ``stalled`` before the hard timeout.
+    """
+    status = result.get("status")
+    if status in ["pending", "running"]:
+        timestamp = max(_as_float(result.get("timestamp", 0)), _as_float(result.get("progressTimestamp", 0)))
+        idle = time.time() - timestamp
+        if timestamp > 0 and idle > JOB_TIMEOUT_SEC:
+            result["status"] = "error"
+            result["error"] = "Превышено время ожидания (10 мин)"
+            result["message"] = "Задача остановлена по таймауту"
+        elif status == "running" and result.get("progressTimestamp") and idle > JOB_STALL_SEC:
+            result["stalled"] = True
+    return result
+
+
 @_expose
 def get_job_result(job_id: str):
+    # Live state from the monitor command channel (no file I/O).
+    live = _send_to_monitor({"op": "progress", "job_id": job_id})
+    if live is not None and live.get("ok") and isinstance(live.get("result"), dict):
+        return _validate_job_result(live["result"])
+
     # Prefer per-job result file.
     result_file = _get_result_file_for_job(job_id)
     log(f"get_job_result: job_id={job_id}, result_file={result_file}")
 
-    def _validate_and_return(result: dict) -> dict:
-        # Check for timeout (10 minutes)
-        status = result.get("status")
-        if status in ["pending", "running"]:
-            timestamp = result.get("timestamp", 0)
-            if timestamp > 0 and (time.time() - timestamp > 600):
-                result["status"] = "error"
-                result["error"] = "Превышено время ожидания (10 мин)"
-                result["message"] = "Задача остановлена по таймауту"
-        return result
-
     if os.path.exists(result_file):
         try:
             with open(result_file, "r", encoding="utf-8") as f:
                 result = json.load(f)
-            return _validate_and_return(result)
+            return _validate_job_result(result)
         except Exception as e:
             log(f"get_job_result ERROR (per-job): {e}")
             return {"job_id": job_id, "status": "error", "error": str(e)}
@@ -759,7 +879,7 @@ def get_job_result(job_id: str):
             with open(legacy_result_file, "r", encoding="utf-8") as f:
                 legacy = json.load(f)
             if legacy.get("job_id") == job_id:
-                return _validate_and_return(legacy)
+                return _validate_job_result(legacy)
         except Exception:
             pass
 
@@ -780,15 +900,51 @@ def get_job_result(job_id: str):
     return {"job_id": job_id, "status": "pending", "message": "Задача в очереди на выполнение"}
 
 
+@_expose
+def get_job_events(job_id: str, since: int = 0):
+    """Progress events after ``since`` plus the current job result.
+
+    Without the command channel there are no events; the result comes from
+    the file protocol.
+    """
+    live = _send_to_monitor({"op": "events", "job_id": job_id, "since": int(since or 0)})
+    if live is not None and live.get("ok") and isinstance(live.get("result"), dict):
+        events = live.get("events") if isinstance(live.get("events"), list) else []
+        return {"job_id": job_id, "events": events, "result": _validate_job_result(live["result"])}
+    return {"job_id": job_id, "events": [], "result": get_job_result(job_id)}
+
+
 @_expose
 def get_time_savings():
     savings_file = _get_savings_file()
+    data = _read_savings_totals(savings_file)
+    legacy_history = data.pop("history", None)
+    history = savings_journal.read_history(savings_file)
+    if not history and isinstance(legacy_history, list):
+        history = legacy_history
+    data["history"] = history
+    return _normalize_time_savings(data)
+
+
+def _read_savings_totals(savings_file: str) -> dict[str, Any]:
+    """Totals and per-tool counters; history lives in the append-only journal."""
     if os.path.exists(savings_file):
         try:
             with open(savings_file, "r", encoding="utf-8") as f:
-                return _normalize_time_savings(json.load(f))
-        except: pass
-    return {"totalSeconds": 0, "totalSecondsMin": 0, "totalSecondsMax": 0, "executed": {}, "history": []}
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+        except Exception:
+            pass
+    return {"totalSeconds": 0, "totalSecondsMin": 0, "totalSecondsMax": 0, "executed": {}}
+
+
+def _write_savings_totals(savings_file: str, data: dict[str, Any]) -> None:
+    payload = {k: v for k, v in data.items() if k != "history"}
+    tmp_path = savings_file + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, savings_file)
 
 
 def _as_float(value: Any, default: float = 0.0) -> float:
@@ -865,8 +1021,9 @@ def _parse_minutes_range(minutes: Any) -> tuple[float, float]:
 def save_time_savings(data: dict):
     savings_file = _get_savings_file()
     try:
-        with open(savings_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        _write_savings_totals(savings_file, data)
+        history = data.get("history")
+        savings_journal.write_history(savings_file, history if isinstance(history, list) else [])
         return {"success": True}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -874,7 +1031,12 @@ def save_time_savings(data: dict):
 
 @_expose
 def add_time_saving(tool_id: str, minutes: Any):
-    savings: dict[str, Any] = _normalize_time_savings(get_time_savings())
+    savings_file = _get_savings_file()
+    savings: dict[str, Any] = _read_savings_totals(savings_file)
+    legacy_history = savings.pop("history", None)
+    if isinstance(legacy_history, list) and not os.path.exists(savings_journal.history_path(savings_file)):
+        # One-off migration of the history that used to live in the totals file.
+        savings_journal.write_history(savings_file, legacy_history)
 
     # Prefer the latest time-savings measurement reported by the tool itself
     # (written by EOMTemplateTools.extension/lib/time_savings.py into jsonl).
@@ -899,31 +1061,33 @@ def add_time_saving(tool_id: str, minutes: Any):
     mn, mx = _parse_minutes_range(minutes)
     avg = (mn + mx) / 2.0
 
-    savings["executed"] = savings.get("executed", {})
-    savings["executed"][tool_id] = int(savings["executed"].get(tool_id, 0) or 0) + 1
+    executed = savings.get("executed")
+    if not isinstance(executed, dict):
+        executed = {}
+    executed[tool_id] = int(executed.get(tool_id, 0) or 0) + 1
+    savings["executed"] = executed
 
+    # Incremental totals: only the counters are rewritten, history is appended.
     savings["totalSeconds"] = _as_float(savings.get("totalSeconds", 0.0), 0.0) + (avg * 60.0)
     savings["totalSecondsMin"] = _as_float(savings.get("totalSecondsMin", 0.0), 0.0) + (mn * 60.0)
     savings["totalSecondsMax"] = _as_float(savings.get("totalSecondsMax", 0.0), 0.0) + (mx * 60.0)
 
-    history = savings.get("history", [])
-    if not isinstance(history, list):
-        history = []
-    history.insert(
-        0,
-        {
-            "tool_id": tool_id,
-            "minutes": avg,
-            "minutes_min": mn,
-            "minutes_max": mx,
-            "timestamp": time.time(),
-            "time": time.strftime("%H:%M:%S"),
-        },
-    )
-    savings["history"] = history[:100]
-
-    save_time_savings(savings)
-    return savings
+    try:
+        _write_savings_totals(savings_file, savings)
+        savings_journal.append_history(
+            savings_file,
+            {
+                "tool_id": tool_id,
+                "minutes": avg,
+                "minutes_min": mn,
+                "minutes_max": mx,
+                "timestamp": time.time(),
+                "time": time.strftime("%H:%M:%S"),
+            },
+        )
+    except Exception as e:
+        log(f"add_time_saving: failed to save: {e}")
+    return get_time_savings()
 
 
 @_expose
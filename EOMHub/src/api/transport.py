@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Loopback TCP client for the Revit monitor command channel.
+
+Mirrors EOMTemplateTools.extension/lib/hub_transport.py: one request per
+connection, newline-terminated UTF-8 JSON. The monitor publishes its port
+and token in the status file (``commandPort`` / ``commandToken``).
+
+``send_request`` returns ``None`` only when the request never reached the
+monitor (no endpoint, connection refused); only then may callers fall back
+to the file protocol. Once the request is sent, every outcome is a response
+dict: the monitor's reply (``ok`` may be false) or ``{"ok": False, ...}``
+with ``sent: True`` when no valid reply arrived in time.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import json
+import socket
+
+HOST = "127.0.0.1"
+CONNECT_TIMEOUT_SEC = 0.5
+IO_TIMEOUT_SEC = 2.0
+MAX_MESSAGE_BYTES = 1024 * 1024
+
+
+def get_endpoint(status: Optional[dict[str, Any]]) -> Optional[tuple[int, str]]:
+    """Return (port, token) advertised by the monitor status payload."""
+    if not isinstance(status, dict):
+        return None
+    try:
+        port = int(status.get("commandPort") or 0)
+    except Exception:
+        return None
+    token = status.get("commandToken")
+    if port <= 0 or not isinstance(token, str) or not token:
+        return None
+    return port, token
+
+
+def _read_message(conn: socket.socket) -> Optional[dict[str, Any]]:
+    chunks: list[bytes] = []
+    size = 0
+    while True:
+        data = conn.recv(65536)
+        if not data:
+            break
+        pos = data.find(b"\n")
+        if pos >= 0:
+            chunks.append(data[:pos])
+            break
+        chunks.append(data)
+        size += len(data)
+        if size > MAX_MESSAGE_BYTES:
+            return None
+    raw = b"".join(chunks)
+    if not raw:
+        return None
+    try:
+        payload = json.loads(raw.decode("utf-8"))
+    except Exception:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def send_request(
+    status: Optional[dict[str, Any]], payload: dict[str, Any], timeout: float = IO_TIMEOUT_SEC
+) -> Optional[dict[str, Any]]:
+    """Send one request to the monitor.
+
+    Returns ``None`` if the request could not be delivered, otherwise the
+    reply (check ``ok``); a missing or unreadable reply is ``ok: False``.
+    """
+    endpoint = get_endpoint(status)
+    if endpoint is None:
+        return None
+    port, token = endpoint
+    message = dict(payload)
+    message["token"] = token
+    data = json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+    try:
+        conn = socket.create_connection((HOST, port), CONNECT_TIMEOUT_SEC)
+    except Exception:
+        return None
+    with conn:
+        try:
+            conn.settimeout(timeout)
+            conn.sendall(data)
+        except Exception:
+            return None
+        try:
+            response = _read_message(conn)
+        except Exception as exc:
+            return {"ok": False, "sent": True, "error": f"no reply from monitor: {exc}"}
+    if not isinstance(response, dict):
+        return {"ok": False, "sent": True, "error": "no reply from monitor"}
+    return response
@@ -193,6 +193,74 @@ def api_job_result_route(job_id: str):
         return _json_response({"job_id": job_id, "status": "error", "error": str(exc)}, status_code=500)
 
 
+JOB_EVENTS_POLL_SEC = 0.2
+JOB_EVENTS_HEARTBEAT_SEC = 15.0
+
+
+def _sse(event: str, payload) -> str:
+    return f"event: {event}\ndata: {_patched_dumps(payload)}\n\n"
+
+
+def _stream_sleep(seconds: float) -> None:
+    # The eel server runs on gevent: yield to other greenlets instead of blocking.
+    try:
+        import gevent
+        gevent.sleep(seconds)
+    except Exception:
+        time.sleep(seconds)
+
+
+def _iter_job_events(job_id: str, since: int = 0, poll_sec: float = JOB_EVENTS_POLL_SEC):
+    """Server-sent events for a job: ``progress`` per event, ``result`` once terminal.
+
+    The stream also ends with an error ``result`` after ``JOB_TIMEOUT_SEC`` from
+    stream start, or after ``JOB_STALL_SEC`` while no result exists for the job
+    (unknown or never-started job), so a client is never left polling forever.
+    """
+    last_result = None
+    started = last_beat = time.time()
+    while True:
+        try:
+            payload = api_tools.get_job_events(job_id, since)
+        except Exception as exc:
+            yield _sse("result", {"job_id": job_id, "status": "error", "error": str(exc)})
+            return
+        for ev in payload.get("events") or []:
+            since = max(since, int(ev.get("seq") or 0))
+            yield _sse("progress", ev)
+        result = payload.get("result") or {}
+        status = result.get("status")
+        if status not in ("pending", "running"):
+            yield _sse("result", result)
+            return
+        if result != last_result:
+            last_result = result
+            yield _sse("status", result)
+        now = time.time()
+        known = since > 0 or status == "running" or result.get("timestamp") or result.get("progressTimestamp")
+        if now - started > api_tools.JOB_TIMEOUT_SEC:
+            yield _sse("result", {"job_id": job_id, "status": "error", "error": "Превышено время ожидания результата"})
+            return
+        if not known and now - started > api_tools.JOB_STALL_SEC:
+            yield _sse("result", {"job_id": job_id, "status": "error", "error": "Задача не найдена"})
+            return
+        if now - last_beat >= JOB_EVENTS_HEARTBEAT_SEC:
+            last_beat = now
+            yield ": keep-alive\n\n"
+        _stream_sleep(poll_sec)
+
+
+@bottle.get("/api/job-events/<job_id>")
+def api_job_events_route(job_id: str):
+    try:
+        since = int(bottle.request.query.get("since") or 0)
+    except Exception:
+        since = 0
+    bottle.response.content_type = "text/event-stream; charset=utf-8"
+    bottle.response.set_header("Cache-Control", "no-cache")
+    return _iter_job_events(job_id, since)
+
+
 @bottle.post("/api/run-tool")
 def api_run_tool_route():
     try:
@@ -1023,28 +1023,22 @@ def start_command_monitor(start_thread=True):
             except Exception:
                 pass
 
+            try:
+                import time_savings_journal
+            except Exception:
+                return None
+
+            # Indexed journal: one seek per file instead of parsing the whole log.
             last_entry = None
             for path in candidates:
                 try:
                     if not path or not _os.path.exists(path):
                         continue
-                    with io.open(path, 'r', encoding='utf-8') as f:
-                        for raw in f:
-                            line = raw.strip()
-                            if not line:
-                                continue
-                            try:
-                                entry = _json.loads(line)
-                            except Exception:
-                                continue
-                            if not isinstance(entry, dict):
-                                continue
-                            try:
-                                entry_tool = entry.get('tool_key')
-                            except Exception:
-                                entry_tool = None
-                            if entry_tool == tool_key:
-                                last_entry = entry
+                    entry = time_savings_journal.read_last_entry(path, tool_key)
+                    if not isinstance(entry, dict):
+                        continue
+                    if last_entry is None or float(entry.get('timestamp') or 0) >= float(last_entry.get('timestamp') or 0):
+                        last_entry = entry
                 except Exception:
                     continue
 
@@ -1070,6 +1064,87 @@ def start_command_monitor(start_thread=True):
 
             return summary if summary else None
 
+        # Last known result per job, served over the command channel so Hub
+        # does not have to poll result files.
+        job_states = {}
+        job_states_order = []
+        job_states_lock = _threading.Lock()
+
+        def remember_job_state(job_id, payload):
+            if not job_id or not isinstance(payload, dict):
+                return
+            try:
+                key = _to_unicode(job_id)
+                with job_states_lock:
+                    if key not in job_states:
+                        job_states_order.append(key)
+                    job_states[key] = dict(payload)
+                    while len(job_states_order) > 100:
+                        job_states.pop(job_states_order.pop(0), None)
+            except Exception:
+                pass
+
+        def get_job_state(job_id):
+            try:
+                with job_states_lock:
+                    state = job_states.get(_to_unicode(job_id))
+                return dict(state) if state is not None else None
+            except Exception:
+                return None
+
+        # Progress events per job (lib/hub_progress.py), numbered by the monitor
+        # so the sequence stays monotonic across reporters of one job.
+        job_events = {}
+        job_events_seq = [0]
+        job_progress_written = {}
+
+        def progress_sink(job_id, events):
+            if not job_id or not events:
+                return
+            key = _to_unicode(job_id)
+            with job_states_lock:
+                buf = job_events.setdefault(key, [])
+                for ev in events:
+                    job_events_seq[0] += 1
+                    item = dict(ev)
+                    item["seq"] = job_events_seq[0]
+                    buf.append(item)
+                del buf[:-500]
+                for stale in [k for k in job_events if k not in job_states and k != key]:
+                    job_events.pop(stale, None)
+                last = dict(buf[-1])
+                state = dict(job_states.get(key) or {})
+            if state.get("status") not in (None, "pending", "running"):
+                return
+            now = _time.time()
+            stats = dict(state.get("stats") or {})
+            stats["processed"] = last.get("processed") or 0
+            stats["total"] = last.get("total") or 0
+            state.update({
+                "status": "running",
+                "job_id": job_id,
+                "stats": stats,
+                "progress": last,
+                "progressTimestamp": now,
+            })
+            state.setdefault("tool_id", last.get("tool_id"))
+            state.setdefault("timestamp", now)
+            # Result file for the file-protocol fallback, at most once a second.
+            if now - job_progress_written.get(key, 0.0) >= 1.0:
+                job_progress_written[key] = now
+                write_job_result_json(job_id, state)
+            else:
+                remember_job_state(job_id, state)
+
+        def get_job_events(job_id, since=0):
+            try:
+                since = int(since or 0)
+            except Exception:
+                since = 0
+            with job_states_lock:
+                buf = job_events.get(_to_unicode(job_id)) or []
+                return [dict(ev) for ev in buf if ev.get("seq", 0) > since]
+
         def write_result_json(payload):
             """Write legacy result JSON atomically (eom_hub_result.json)."""
             try:
@@ -1095,6 +1170,7 @@ def start_command_monitor(start_thread=True):
 
         def write_job_result_json(job_id, payload):
             """Write per-job result JSON (eom_hub_result_{job_id}.json)."""
+            remember_job_state(job_id, payload)
             try:
                 if not job_id:
                     return
@@ -1407,6 +1483,8 @@ def start_command_monitor(start_thread=True):
             "revitVersion": None,
         }
 
+        transport_state = {"port": None, "token": None}
+
         def write_status():
             """Write status file for Hub.
 
@@ -1436,6 +1514,8 @@ def start_command_monitor(start_thread=True):
                     "sessionId": session_id,
                     "commandFile": COMMAND_FILE,
                     "resultFile": RESULT_FILE,
+                    "commandPort": transport_state.get("port"),
+                    "commandToken": transport_state.get("token"),
                     "timestamp": _time.time(),
                 }
 
@@ -1450,9 +1530,33 @@ def start_command_monitor(start_thread=True):
                         f.close()
                     except Exception:
                         pass
+                register_session(status)
             except Exception:
                 pass
 
+        # Session registry (lib/hub_sessions.py): lets Hub find this session's
+        # status file directly instead of scanning TEMP subdirectories. It is
+        # rewritten only when the endpoint changes, plus a periodic refresh.
+        registry_state = {"record": None, "written": 0.0}
+
+        def register_session(status):
+            record = {
+                "statusFile": STATUS_FILE,
+                "tempDir": TEMP_DIR,
+                "commandPort": status.get("commandPort"),
+                "pid": _os.getpid(),
+            }
+            now = _time.time()
+            if record == registry_state["record"] and now - registry_state["written"] < 60.0:
+                return
+            try:
+                import hub_sessions
+                if hub_sessions.register_session(ROOT_TEMP_DIR or TEMP_DIR, session_id, record):
+                    registry_state["record"] = record
+                    registry_state["written"] = now
+            except Exception as e:
+                debug_log(u"Session registry update failed: " + _to_unicode(e))
+
         try:
             string_types = (basestring,)
         except Exception:
@@ -2122,6 +2226,98 @@ def start_command_monitor(start_thread=True):
 
         debug_log(u"Monitor started")
 
+        wake = _threading.Event()
+        poll_interval = [0.5]
+
+        def raise_event():
+            try:
+                event.Raise()
+                needs_raise[0] = False
+            except Exception:
+                needs_raise[0] = True
+                wake.set()
+
+        def handle_transport_request(message):
+            """Command channel request from Hub (see lib/hub_transport.py)."""
+            op = message.get("op")
+            job_id = message.get("job_id")
+            if op == "run":
+                tool_id = message.get("tool_id")
+                if not tool_id:
+                    return {"ok": False, "error": "tool_id required"}
+                cmd = u"run:{0}:{1}".format(_to_unicode(tool_id), _to_unicode(job_id or u""))
+                if message.get("mode"):
+                    cmd += u":" + _to_unicode(message.get("mode"))
+                remember_job_state(job_id, {
+                    "status": "pending",
+                    "message": u"Команда поставлена в очередь",
+                    "tool_id": tool_id,
+                    "job_id": job_id,
+                    "stats": {"processed": 0, "skipped": 0, "errors": 0, "total": 0},
+                    "timestamp": _time.time(),
+                })
+                handled, should_raise = _dispatch_command(cmd)
+                if should_raise:
+                    raise_event()
+                return {"ok": bool(handled), "job_id": job_id}
+            if op == "cancel":
+                cmd = u"run:cancel:{0}".format(_to_unicode(job_id)) if job_id else u"cancel"
+                handled, _ = _dispatch_command(cmd)
+                return {"ok": bool(handled), "job_id": job_id}
+            if op == "status":
+                with active_job_lock:
+                    active = dict(active_job)
+                with pending_lock:
+                    pending = len(pending_jobs)
+                status = dict(_status_cache)
+                status.update({"sessionId": session_id, "tempDir": TEMP_DIR, "timestamp": _time.time()})
+                return {"ok": True, "status": status, "activeJob": active, "pending": pending}
+            if op == "progress":
+                return {"ok": True, "job_id": job_id, "result": get_job_state(job_id)}
+            if op == "events":
+                return {
+                    "ok": True,
+                    "job_id": job_id,
+                    "events": get_job_events(job_id, message.get("since")),
+                    "result": get_job_state(job_id),
+                }
+            return {"ok": False, "error": u"unknown op"}
+
+        if start_thread:
+            try:
+                import hub_transport
+                old_server = getattr(sys, "eom_hub_command_server", None)
+                if old_server is not None:
+                    try:
+                        old_server.stop()
+                    except Exception:
+                        pass
+                server = hub_transport.CommandServer(handle_transport_request, log=debug_log)
+                server.start()
+                sys.eom_hub_command_server = server
+                transport_state["port"] = server.port
+                transport_state["token"] = server.token
+                try:
+                    import hub_progress
+                    hub_progress.set_progress_sink(progress_sink)
+                except Exception as e:
+                    debug_log(u"Progress sink unavailable: " + _to_unicode(e))
+
+                # Fallback file protocol: wake on file system events instead of
+                # polling every 0.5 s; the loop still rescans on the status tick.
+                watcher = hub_transport.start_file_watcher(TEMP_DIR, u"eom_hub_command*.txt", wake.set)
+                if watcher is not None:
+                    old_watcher = getattr(sys, "eom_hub_command_watcher", None)
+                    if old_watcher is not None:
+                        try:
+                            old_watcher.EnableRaisingEvents = False
+                        except Exception:
+                            pass
+                    sys.eom_hub_command_watcher = watcher
+                    poll_interval[0] = 5.0
+            except Exception as e:
+                debug_log(u"Command channel unavailable, using files only: " + _to_unicode(e))
+
         def monitor():
             debug_log(u"Monitor thread running")
             loop_count = [0]
@@ -2135,7 +2331,7 @@ def start_command_monitor(start_thread=True):
                         pass
                      
                     # Update status every 5 seconds
-                    if now - last_status[0] > 5:
+                    if now - last_status[0] >= 5:
                         write_status()
                         last_status[0] = now
                      
@@ -2161,11 +2357,7 @@ def start_command_monitor(start_thread=True):
                                         except Exception:
                                             pass
                                     if should_raise:
-                                        try:
-                                            event.Raise()
-                                            needs_raise[0] = False
-                                        except Exception:
-                                            needs_raise[0] = True
+                                        raise_event()
                     except Exception as e:
                         debug_log(u"ERROR reading COMMAND_FILE: " + _to_unicode(e))
 
@@ -2200,11 +2392,7 @@ def start_command_monitor(start_thread=True):
 
                                 handled, should_raise = _dispatch_command(cmd)
                                 if should_raise:
-                                    try:
-                                        event.Raise()
-                                        needs_raise[0] = False
-                                    except Exception:
-                                        needs_raise[0] = True
+                                    raise_event()
 
                             except Exception as e:
                                 debug_log(u"ERROR reading cmd file: " + _to_unicode(e))
@@ -2228,9 +2416,16 @@ def start_command_monitor(start_thread=True):
                 except Exception as e:
                     debug_log(u"ERROR in monitor: " + _to_unicode(e))
                 try:
-                    _time.sleep(0.5)
+                    # Sleep until a command/file event, the next status tick, or
+                    # the short retry interval while an event raise is pending.
+                    if needs_raise[0]:
+                        wait_sec = 0.5
+                    else:
+                        wait_sec = min(poll_interval[0], max(0.1, last_status[0] + 5.0 - _time.time()))
+                    wake.wait(wait_sec)
+                    wake.clear()
                 except Exception:
-                    pass
+                    _time.sleep(0.5)
 
         if start_thread:
             thread = _threading.Thread(target=monitor)
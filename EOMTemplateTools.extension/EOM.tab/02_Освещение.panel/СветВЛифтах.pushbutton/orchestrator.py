@@ -4,10 +4,13 @@ import re
 
 from pyrevit import DB, forms, revit
 import config_loader
+import hub_progress
 import link_reader
 import magic_context
 import placement_engine
 import socket_utils
+import tagged_registry
+import wall_index
 from utils_revit import alert, find_nearest_level, set_comments, trace, tx
 from utils_units import mm_to_ft
 from constants import LIGHT_LIFT_SHAFT_TAG
@@ -31,6 +34,19 @@ from adapters import (
 )
 
 
+def _walls_in_bbox_xy(doc, bbox_min, bbox_max):
+    """Стены документа, чей XY-габарит пересекает bbox (через WallSegmentIndex)."""
+    index = wall_index.get_wall_index(doc)
+    if index is None:
+        return []
+    try:
+        x0, x1 = sorted((float(bbox_min.X), float(bbox_max.X)))
+        y0, y1 = sorted((float(bbox_min.Y), float(bbox_max.Y)))
+    except Exception:
+        return [e.wall for e in index.entries]
+    return [e.wall for e in index.in_box(x0, y0, x1, y1)]
+
+
 def find_host_wall_in_bbox_near_point(doc, pt, bbox_min, bbox_max, max_dist_ft):
     if doc is None or pt is None or bbox_min is None or bbox_max is None:
         return None, None, None
@@ -48,12 +64,7 @@ def find_host_wall_in_bbox_near_point(doc, pt, bbox_min, bbox_max, max_dist_ft):
     if tie_eps <= 0.0:
         tie_eps = 1e-6
 
-    try:
-        col = DB.FilteredElementCollector(doc).OfCategory(DB.BuiltInCategory.OST_Walls).WhereElementIsNotElementType()
-    except Exception:
-        return None, None, None
-
-    for w in col:
+    for w in _walls_in_bbox_xy(doc, bbox_min, bbox_max):
         try:
             loc = getattr(w, 'Location', None)
             curve = loc.Curve if loc and hasattr(loc, 'Curve') else None
@@ -142,7 +153,12 @@ def find_link_wall_in_bbox_near_point(link_doc, pt_link, bbox_min, bbox_max, max
     if tie_eps <= 0.0:
         tie_eps = 1e-6
 
-    for w in link_reader.iter_elements_by_category(link_doc, DB.BuiltInCategory.OST_Walls, limit=limit, level_id=None):
+    if limit is None:
+        walls = _walls_in_bbox_xy(link_doc, bbox_min, bbox_max)
+    else:
+        walls = link_reader.iter_elements_by_category(link_doc, DB.BuiltInCategory.OST_Walls, limit=limit, level_id=None)
+
+    for w in walls:
         try:
             loc = getattr(w, 'Location', None)
             curve = loc.Curve if loc and hasattr(loc, 'Curve') else None
@@ -830,6 +846,13 @@ def _collect_existing_tagged_instances(host_doc, tag_value):
     out = []
     if host_doc is None or not tag_value:
         return out
+    elems = tagged_registry.find_tagged(host_doc, tag_value)
+    if elems is not None:
+        for e in elems:
+            p = _instance_point(e)
+            if p is not None:
+                out.append((e, p))
+        return out
     try:
         provider = DB.ParameterValueProvider(DB.ElementId(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS))
         try:
@@ -1576,6 +1599,7 @@ def open_debug_plans(uidoc, doc, created_elems):
 
 def run_placement(doc, output, script_module):
     trace('Place_Lights_LiftShaft: start')
+    wall_index.invalidate_wall_index(doc)
     output.print_md('# Размещение светильников в шахтах лифта')
     output.print_md('Документ (ЭОМ): `{0}`'.format(doc.Title))
     output.print_md('Алгоритм: `liftshaft-v2026.02.18.13`')
@@ -1931,11 +1955,15 @@ def run_placement(doc, output, script_module):
     floor_level_splits_added = 0
     floor_levels_interpolated_by_number = 0
 
+    progress = hub_progress.progress_reporter('lights_elevator')
+    progress.stage('shafts', total=len(shafts))
     with forms.ProgressBar(title='ЭОМ: Поиск шахт лифта', cancellable=True, step=1) as pb:
         pb.max_value = len(shafts)
         for i, sh in enumerate(shafts):
             pb.update_progress(i + 1, pb.max_value)
+            progress.update(i + 1)
             if pb.cancelled:
+                progress.close()
                 return
 
             center = sh.get('center')
@@ -2649,6 +2677,7 @@ def run_placement(doc, output, script_module):
     batches = list(chunks(points, batch_size))
     # Keep one wall side per shaft column to avoid "every other floor" visual alternation.
     preferred_wall_xy_by_col = {}
+    progress.stage('place', total=len(points))
     with forms.ProgressBar(title='ЭОМ: Размещение светильников (шахта лифта)', cancellable=True, step=1) as pb2:
         pb2.max_value = len(batches)
         for i, batch in enumerate(batches):
@@ -2731,7 +2760,7 @@ def run_placement(doc, output, script_module):
                             face_n_link = None
                             if is_wall_symbol and link_inst is not None:
                                 try:
-                                    link_ref, proj_pt_link, face_n_link = socket_utils._get_linked_wall_face_ref_and_point(
+                                    link_ref, proj_pt_link, face_n_link = socket_utils.probe_linked_wall_face(
                                         wall_link, link_inst, pt_link
                                     )
                                 except Exception:
@@ -2853,6 +2882,8 @@ def run_placement(doc, output, script_module):
 
                     created_count += 1
                     created_elems.append(inst)
+            progress.update(step=len(batch))
+    progress.close()
 
     # Validate persisted instances after transactions (guard against rolled-back creations).
     persisted = []
@@ -2944,6 +2975,9 @@ def run_placement(doc, output, script_module):
                 except Exception:
                     continue
 
+    # Replaced instances drop out of the registry via IsValidObject.
+    tagged_registry.note_created(doc, created_elems)
+
     output.print_md('---')
     output.print_md('Размещено светильников: **{0}**'.format(created_count))
     if replaced_existing_count:
@@ -4,6 +4,9 @@ import math
 from pyrevit import DB
 from utils_units import mm_to_ft
 import constants
+import param_reader
+import room_boundary
+import spatial_hash
 
 SQFT_TO_SQM = 0.092903
 
@@ -25,89 +28,17 @@ OUTSIDE_APARTMENT_KEYWORDS = [
     u'тамбур', u'шлюз',
 ]
 
-def _are_collinear(p1, p2, p3, tolerance=0.01):
-    """Check if three points are collinear."""
-    # Vector p1 -> p2
-    v1x = p2.X - p1.X
-    v1y = p2.Y - p1.Y
-    
-    # Vector p2 -> p3
-    v2x = p3.X - p2.X
-    v2y = p3.Y - p2.Y
-    
-    # Cross product (2D)
-    cross = v1x * v2y - v1y * v2x
-    return abs(cross) < tolerance
-
-def _simplify_polygon(pts):
-    """Remove collinear vertices from polygon."""
-    if not pts or len(pts) < 3:
-        return pts
-        
-    # Filter very close points first
-    unique_pts = []
-    if pts:
-        unique_pts.append(pts[0])
-        for i in range(1, len(pts)):
-            prev = unique_pts[-1]
-            curr = pts[i]
-            dist = prev.DistanceTo(curr)
-            if dist > 0.01: # 0.01 ft ~ 3mm
-                unique_pts.append(curr)
-                
-        # Check wrap around (first and last)
-        if len(unique_pts) > 1 and unique_pts[0].DistanceTo(unique_pts[-1]) < 0.01:
-            unique_pts.pop()
-            
-    if len(unique_pts) < 3:
-        return unique_pts
-
-    # Remove collinear
-    # Iterate multiple times until stable (simplistic approach)
-    for _ in range(3):
-        to_keep = []
-        n = len(unique_pts)
-        if n < 3: break
-        
-        for i in range(n):
-            p_prev = unique_pts[i-1]
-            p_curr = unique_pts[i]
-            p_next = unique_pts[(i+1) % n]
-            
-            if not _are_collinear(p_prev, p_curr, p_next):
-                to_keep.append(p_curr)
-        
-        if len(to_keep) == len(unique_pts):
-            break
-        unique_pts = to_keep
-        
-    return unique_pts
-
-
 def _get_room_boundary_points(room):
     """Get outer boundary loop points for room. Returns list of XYZ or None."""
     if room is None:
         return None
     try:
-        opts = DB.SpatialElementBoundaryOptions()
-        seglists = room.GetBoundarySegments(opts)
-        if not seglists or len(seglists) == 0:
+        rb = room_boundary.get_room_boundary(room)
+        if not rb:
             return None
-        
-        # Get first (outer) loop points
-        pts = []
-        for s in seglists[0]:
-            try:
-                c = s.GetCurve()
-                if c:
-                    pts.append(c.GetEndPoint(0))
-            except Exception:
-                continue
-        
-        # Simplify polygon (remove collinear points)
-        if pts:
-            pts = _simplify_polygon(pts)
-            
+
+        # First (outer) loop without collinear points, cached per room
+        pts = rb.simplified_points(0)
         return pts if len(pts) >= 3 else None
     except Exception:
         return None
@@ -255,26 +186,7 @@ def norm(s):
 
 
 def get_param_as_string(elem, bip=None, name=None):
-    if elem is None:
-        return u''
-    p = None
-    try:
-        if bip is not None:
-            p = elem.get_Parameter(bip)
-    except Exception:
-        p = None
-    if p is None and name:
-        try:
-            p = elem.LookupParameter(name)
-        except Exception:
-            p = None
-    if p is None:
-        return u''
-    try:
-        s = p.AsString()
-        return s if s is not None else u''
-    except Exception:
-        return u''
+    return param_reader.get_string(elem, bip=bip, name=name)
 
 
 def room_name(room):
@@ -668,10 +580,14 @@ def get_room_centers_multi(room):
 
 
 def is_too_close(p, existing_points, tolerance_ft=1.5):
+    """existing_points: list of XYZ or spatial_hash.SpatialHash (radius query)."""
     tol2 = tolerance_ft * tolerance_ft
     # Vertical tolerance to distinguish levels (~600mm)
     z_tol = 2.0
 
+    if isinstance(existing_points, spatial_hash.SpatialHash):
+        return existing_points.has_near_point(p, tolerance_ft, z_tol=z_tol)
+
     for ex in existing_points:
         # Check Z first (optimization for multi-story)
         if abs(float(p.Z) - float(ex.Z)) > z_tol:
@@ -689,7 +605,7 @@ def is_too_close(p, existing_points, tolerance_ft=1.5):
 def filter_duplicate_rooms(rooms):
     """Filter out rooms that are effectively duplicates (same location)."""
     unique_rooms = []
-    seen_locs = []
+    seen_locs = spatial_hash.SpatialHash(2.0)
     seen_keys = set()
 
     for r in rooms:
@@ -711,15 +627,9 @@ def filter_duplicate_rooms(rooms):
         if not p:
             continue
 
-        is_dup = False
-        for sl in seen_locs:
-            if is_too_close(p, [sl], tolerance_ft=2.0):
-                is_dup = True
-                break
-
-        if not is_dup:
+        if not is_too_close(p, seen_locs, tolerance_ft=2.0):
             unique_rooms.append(r)
-            seen_locs.append(p)
+            seen_locs.add_point(p)
 
     return unique_rooms
 
@@ -6,6 +6,9 @@ from pyrevit import DB
 from utils_revit import alert, set_comments, tx, find_nearest_level, trace
 from utils_units import mm_to_ft
 import link_reader
+import room_boundary
+import spatial_hash
+import wall_index
 import adapters
 import domain
 try:
@@ -29,106 +32,23 @@ from domain import (
 )
 
 
-def _project_point_to_curve_xy(curve, point_xyz):
-    if curve is None or point_xyz is None:
-        return None, None
-    try:
-        base_z = float(curve.GetEndPoint(0).Z)
-        p2 = DB.XYZ(float(point_xyz.X), float(point_xyz.Y), base_z)
-        ir = curve.Project(p2)
-        if not ir:
-            return None, None
-        proj = ir.XYZPoint
-        d = float(ir.Distance)
-        return proj, d
-    except Exception:
-        return None, None
-
-
-def _find_nearest_wall_in_doc(doc, point_xyz, max_dist_ft):
+def _find_nearest_wall(doc, point_xyz, max_dist_ft):
     if doc is None or point_xyz is None:
         return None, None
-
-    best_wall = None
-    best_proj = None
-    best_d = None
     try:
-        walls = DB.FilteredElementCollector(doc).OfCategory(DB.BuiltInCategory.OST_Walls).WhereElementIsNotElementType()
+        index = wall_index.get_wall_index(doc)
+        wall, proj, _ = index.nearest(point_xyz, max_dist_ft, z_pad_ft=4.0)
     except Exception:
         return None, None
+    return wall, proj
 
-    for wall in walls:
-        try:
-            try:
-                bb = wall.get_BoundingBox(None)
-            except Exception:
-                bb = None
-            if bb is not None:
-                z_min = float(min(bb.Min.Z, bb.Max.Z)) - 4.0
-                z_max = float(max(bb.Min.Z, bb.Max.Z)) + 4.0
-                if float(point_xyz.Z) < z_min or float(point_xyz.Z) > z_max:
-                    continue
 
-            loc = getattr(wall, 'Location', None)
-            curve = loc.Curve if loc and hasattr(loc, 'Curve') else None
-            if curve is None:
-                continue
-            proj, d = _project_point_to_curve_xy(curve, point_xyz)
-            if proj is None or d is None:
-                continue
-            if max_dist_ft is not None and d > float(max_dist_ft):
-                continue
-            if best_wall is None or d < best_d:
-                best_wall = wall
-                best_proj = proj
-                best_d = d
-        except Exception:
-            continue
-
-    return best_wall, best_proj
+def _find_nearest_wall_in_doc(doc, point_xyz, max_dist_ft):
+    return _find_nearest_wall(doc, point_xyz, max_dist_ft)
 
 
 def _find_nearest_wall_in_link(link_doc, point_link, max_dist_ft):
-    if link_doc is None or point_link is None:
-        return None, None
-
-    best_wall = None
-    best_proj = None
-    best_d = None
-    try:
-        walls = DB.FilteredElementCollector(link_doc).OfCategory(DB.BuiltInCategory.OST_Walls).WhereElementIsNotElementType()
-    except Exception:
-        return None, None
-
-    for wall in walls:
-        try:
-            try:
-                bb = wall.get_BoundingBox(None)
-            except Exception:
-                bb = None
-            if bb is not None:
-                z_min = float(min(bb.Min.Z, bb.Max.Z)) - 4.0
-                z_max = float(max(bb.Min.Z, bb.Max.Z)) + 4.0
-                if float(point_link.Z) < z_min or float(point_link.Z) > z_max:
-                    continue
-
-            loc = getattr(wall, 'Location', None)
-            curve = loc.Curve if loc and hasattr(loc, 'Curve') else None
-            if curve is None:
-                continue
-            proj, d = _project_point_to_curve_xy(curve, point_link)
-            if proj is None or d is None:
-                continue
-            if max_dist_ft is not None and d > float(max_dist_ft):
-                continue
-            if best_wall is None or d < best_d:
-                best_wall = wall
-                best_proj = proj
-                best_d = d
-        except Exception:
-            continue
-
-    return best_wall, best_proj
+    return _find_nearest_wall(link_doc, point_link, max_dist_ft)
 
 
 def _build_link_ref_direction(link_transform, link_wall, face_n_link):
@@ -201,7 +121,7 @@ def _prepare_wall_placement(doc, link_doc, link_inst, link_transform, p_link, in
         link_ref = None
         face_n_link = None
         try:
-            link_ref, proj_face_link, face_n_link = su._get_linked_wall_face_ref_and_point(
+            link_ref, proj_face_link, face_n_link = su.probe_linked_wall_face(
                 wall_link, link_inst, (proj_link or p_link)
             )
         except Exception:
@@ -318,47 +238,34 @@ def _find_room_boundary_point_near_anchor(room, anchor_link_pt):
     """Return boundary point/tangent nearest to anchor in link coordinates."""
     if room is None or anchor_link_pt is None:
         return None, None
-    try:
-        opts = DB.SpatialElementBoundaryOptions()
-        seglists = room.GetBoundarySegments(opts)
-    except Exception:
-        seglists = None
-    if not seglists:
+    rb = room_boundary.get_room_boundary(room)
+    if not rb:
         return None, None
 
     best_pt = None
     best_tg = None
     best_d = None
-    for segs in seglists:
-        if not segs:
+    for curve in rb.curves():
+        try:
+            base_z = float(curve.GetEndPoint(0).Z)
+            p2 = DB.XYZ(float(anchor_link_pt.X), float(anchor_link_pt.Y), base_z)
+            ir = curve.Project(p2)
+        except Exception:
+            ir = None
+        if not ir:
             continue
-        for seg in segs:
-            try:
-                curve = seg.GetCurve()
-            except Exception:
-                curve = None
-            if curve is None:
-                continue
-            try:
-                base_z = float(curve.GetEndPoint(0).Z)
-                p2 = DB.XYZ(float(anchor_link_pt.X), float(anchor_link_pt.Y), base_z)
-                ir = curve.Project(p2)
-            except Exception:
-                ir = None
-            if not ir:
-                continue
+        try:
+            proj = ir.XYZPoint
+            d = float(ir.Distance)
+        except Exception:
+            continue
+        if best_pt is None or d < best_d:
+            best_pt = proj
+            best_d = d
             try:
-                proj = ir.XYZPoint
-                d = float(ir.Distance)
+                best_tg = _curve_tangent_xy_at_point(curve, proj)
             except Exception:
-                continue
-            if best_pt is None or d < best_d:
-                best_pt = proj
-                best_d = d
-                try:
-                    best_tg = _curve_tangent_xy_at_point(curve, proj)
-                except Exception:
-                    best_tg = None
+                best_tg = None
 
     return best_pt, best_tg
 
@@ -1222,6 +1129,7 @@ def run_placement(doc, uidoc, output, script_module):
     output.print_md('Документ (ЭОМ): `{0}`'.format(doc.Title))
 
     trace('Place_Lights_RoomCenters: start')
+    wall_index.invalidate_wall_index(doc)
 
     def _build_result(placed, skipped_ext, skipped_dup, skipped_wall, skipped_anchor, skipped_symbol):
         skipped_total = skipped_ext + skipped_dup + skipped_wall + skipped_anchor + skipped_symbol
@@ -1437,7 +1345,8 @@ def run_placement(doc, uidoc, output, script_module):
         doc.Regenerate()
 
     # Pre-collect ALL existing lights (not just current type) to prevent overlap with anything
-    existing_centers = adapters.collect_existing_lights_centers(doc, tolerance_ft=1.5)
+    existing_centers = spatial_hash.SpatialHash.from_points(
+        adapters.collect_existing_lights_centers(doc, tolerance_ft=1.5), cell_ft=1.5)
 
     # Collect rooms
     rooms_raw = []
@@ -1766,7 +1675,7 @@ def run_placement(doc, uidoc, output, script_module):
                 except Exception:
                     pass
                 # Add to existing list to prevent duplicates within same run
-                existing_centers.append(placement_point)
+                existing_centers.add_point(placement_point)
                 count += 1
 
         output.print_md('**Готово.** Размещено светильников: {0}'.format(count))
@@ -3,6 +3,8 @@ import math
 
 from pyrevit import DB
 
+import room_separation_index
+import wall_graph
 from domain import mm_to_ft
 
 
@@ -105,11 +107,10 @@ def find_adjacent_wall(current_wall, link_doc, link_transform, direction):
         # Tolerance for direction alignment (cos of 5 degrees ~ 0.996)
         dir_tolerance = 0.99
 
-        # Search for walls in the link
-        walls = DB.FilteredElementCollector(link_doc) \
-            .OfCategory(DB.BuiltInCategory.OST_Walls) \
-            .WhereElementIsNotElementType() \
-            .ToElements()
+        # Only walls with an endpoint at the search point (link wall graph)
+        graph = wall_graph.get_wall_graph(link_doc)
+        walls = [edge.wall for edge, _ in graph.collinear_at(
+            search_point.X, search_point.Y, wall_dir.X, wall_dir.Y, tolerance, dir_tolerance)]
 
         for wall in walls:
             if wall.Id == current_wall.Id:
@@ -223,6 +224,16 @@ def _is_point_in_room_host(room, point_host, link_transform):
         return None
 
 
+def _link_walls_near(link_doc, link_transform, point_host, radius):
+    """Стены связи, ось которых проходит не дальше radius от точки (host coords), по графу стен."""
+    try:
+        point_link = link_transform.Inverse.OfPoint(point_host)
+    except Exception:
+        point_link = point_host
+    graph = wall_graph.get_wall_graph(link_doc)
+    return [edge.wall for edge in graph.walls_near(point_link.X, point_link.Y, radius)]
+
+
 def _get_connected_wall_candidates(current_wall, joint_point, link_doc, link_transform, preferred_dir, visited_ids, allow_backward=False):
     """Ищет стены, примыкающие к узлу (joint_point), и ориентирует их от узла наружу.
 
@@ -239,10 +250,7 @@ def _get_connected_wall_candidates(current_wall, joint_point, link_doc, link_tra
         segment_tolerance = mm_to_ft(120)
         min_length = mm_to_ft(100)
 
-        walls = DB.FilteredElementCollector(link_doc) \
-            .OfCategory(DB.BuiltInCategory.OST_Walls) \
-            .WhereElementIsNotElementType() \
-            .ToElements()
+        walls = _link_walls_near(link_doc, link_transform, joint_point, max(endpoint_tolerance, segment_tolerance))
 
         for wall in walls:
             try:
@@ -432,95 +440,38 @@ def get_room_separation_lines(link_doc, room, link_transform):
         if not room_bb:
             return separation_lines
 
-        # Собираем все Room Separation Lines
-        collector = DB.FilteredElementCollector(link_doc) \
-            .OfCategory(DB.BuiltInCategory.OST_RoomSeparationLines) \
-            .WhereElementIsNotElementType()
-
-        for elem in collector:
+        # Линии разделения связи из индекса (геометрия читается один раз на связь).
+        # Центр линии должен лежать в BB комнаты, расширенном на 100мм.
+        tolerance = mm_to_ft(100)
+        index = room_separation_index.get_room_separation_index(link_doc)
+
+        for line in index.in_box(
+            room_bb.Min.X - tolerance,
+            room_bb.Min.Y - tolerance,
+            room_bb.Max.X + tolerance,
+            room_bb.Max.Y + tolerance,
+        ):
             try:
-                # Получаем геометрию линии
-                geom = elem.get_Geometry(DB.Options())
-                if not geom:
-                    continue
-
-                for geom_obj in geom:
-                    if isinstance(geom_obj, DB.Line):
-                        p0 = geom_obj.GetEndPoint(0)
-                        p1 = geom_obj.GetEndPoint(1)
-
-                        # Проверяем, находится ли линия рядом с комнатой
-                        # Расширяем BB комнаты на 100мм для поиска
-                        tolerance = mm_to_ft(100)
-
-                        line_center = DB.XYZ(
-                            (p0.X + p1.X) / 2,
-                            (p0.Y + p1.Y) / 2,
-                            (p0.Z + p1.Z) / 2
-                        )
-
-                        # Проверяем, что центр линии в пределах BB комнаты (с допуском)
-                        if (room_bb.Min.X - tolerance <= line_center.X <= room_bb.Max.X + tolerance and
-                            room_bb.Min.Y - tolerance <= line_center.Y <= room_bb.Max.Y + tolerance):
-
-                            # Трансформируем точки
-                            p0_t = link_transform.OfPoint(p0)
-                            p1_t = link_transform.OfPoint(p1)
-                            center_t = link_transform.OfPoint(line_center)
-
-                            dx = p1_t.X - p0_t.X
-                            dy = p1_t.Y - p0_t.Y
-                            length = math.sqrt(dx * dx + dy * dy)
-
-                            if length > mm_to_ft(300):  # Минимум 300мм
-                                direction = DB.XYZ(dx / length, dy / length, 0)
-
-                                separation_lines.append({
-                                    "line_start": p0_t,
-                                    "line_end": p1_t,
-                                    "line_center": center_t,
-                                    "line_direction": direction,
-                                    "line_length": length,
-                                    "element": elem,
-                                })
-
-                    elif isinstance(geom_obj, DB.GeometryInstance):
-                        # Иногда геометрия обёрнута в GeometryInstance
-                        inst_geom = geom_obj.GetInstanceGeometry()
-                        for sub_obj in inst_geom:
-                            if isinstance(sub_obj, DB.Line):
-                                p0 = sub_obj.GetEndPoint(0)
-                                p1 = sub_obj.GetEndPoint(1)
-
-                                tolerance = mm_to_ft(100)
-                                line_center = DB.XYZ(
-                                    (p0.X + p1.X) / 2,
-                                    (p0.Y + p1.Y) / 2,
-                                    (p0.Z + p1.Z) / 2
-                                )
-
-                                if (room_bb.Min.X - tolerance <= line_center.X <= room_bb.Max.X + tolerance and
-                                    room_bb.Min.Y - tolerance <= line_center.Y <= room_bb.Max.Y + tolerance):
-
-                                    p0_t = link_transform.OfPoint(p0)
-                                    p1_t = link_transform.OfPoint(p1)
-                                    center_t = link_transform.OfPoint(line_center)
-
-                                    dx = p1_t.X - p0_t.X
-                                    dy = p1_t.Y - p0_t.Y
-                                    length = math.sqrt(dx * dx + dy * dy)
-
-                                    if length > mm_to_ft(300):
-                                        direction = DB.XYZ(dx / length, dy / length, 0)
-
-                                        separation_lines.append({
-                                            "line_start": p0_t,
-                                            "line_end": p1_t,
-                                            "line_center": center_t,
-                                            "line_direction": direction,
-                                            "line_length": length,
-                                            "element": elem,
-                                        })
+                # Трансформируем точки
+                p0_t = link_transform.OfPoint(line.p0)
+                p1_t = link_transform.OfPoint(line.p1)
+                center_t = link_transform.OfPoint(line.center)
+
+                dx = p1_t.X - p0_t.X
+                dy = p1_t.Y - p0_t.Y
+                length = math.sqrt(dx * dx + dy * dy)
+
+                if length > mm_to_ft(300):  # Минимум 300мм
+                    direction = DB.XYZ(dx / length, dy / length, 0)
+
+                    separation_lines.append({
+                        "line_start": p0_t,
+                        "line_end": p1_t,
+                        "line_center": center_t,
+                        "line_direction": direction,
+                        "line_length": length,
+                        "element": line.element,
+                    })
             except Exception:
                 continue
 
@@ -540,10 +491,7 @@ def find_wall_near_point(link_doc, link_transform, point, search_radius_mm=500):
     try:
         search_radius = mm_to_ft(search_radius_mm)
 
-        walls = DB.FilteredElementCollector(link_doc) \
-            .OfCategory(DB.BuiltInCategory.OST_Walls) \
-            .WhereElementIsNotElementType() \
-            .ToElements()
+        walls = _link_walls_near(link_doc, link_transform, point, search_radius)
 
         closest_wall = None
         closest_dist = float('inf')
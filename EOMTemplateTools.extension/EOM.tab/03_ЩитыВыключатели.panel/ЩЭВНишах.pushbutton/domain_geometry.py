@@ -4,26 +4,14 @@ import math
 
 from pyrevit import DB
 
+import geom2d
+import room_boundary
 from utils_units import mm_to_ft
 
 
 def _closest_point_on_segment_xy(px, py, ax, ay, bx, by):
     try:
-        abx = float(bx) - float(ax)
-        aby = float(by) - float(ay)
-        apx = float(px) - float(ax)
-        apy = float(py) - float(ay)
-        denom = abx * abx + aby * aby
-        if denom <= 1e-12:
-            return float(ax), float(ay), 0.0
-        t = (apx * abx + apy * aby) / denom
-        if t < 0.0:
-            t = 0.0
-        elif t > 1.0:
-            t = 1.0
-        qx = float(ax) + abx * t
-        qy = float(ay) + aby * t
-        return qx, qy, float(t)
+        return geom2d.closest_point_on_segment(float(px), float(py), float(ax), float(ay), float(bx), float(by))
     except Exception:
         return float(ax), float(ay), 0.0
 
@@ -32,26 +20,17 @@ def _get_room_boundary_segments(room):
     if room is None:
         return []
     try:
-        opts = DB.SpatialElementBoundaryOptions()
-        try:
-            opts.SpatialElementBoundaryLocation = DB.SpatialElementBoundaryLocation.Finish
-        except Exception:
-            pass
-        seglists = room.GetBoundarySegments(opts)
+        opts = room_boundary.boundary_options(DB.SpatialElementBoundaryLocation.Finish)
     except Exception:
-        seglists = None
-    if not seglists:
+        opts = None
+    rb = room_boundary.get_room_boundary(room, opts)
+    if not rb:
         return []
 
     segs = []
-    for seglist in seglists:
-        if not seglist:
-            continue
+    for seglist in rb.loops:
         for seg in seglist:
-            try:
-                crv = seg.GetCurve()
-            except Exception:
-                crv = None
+            crv = seg.curve
             if crv is None:
                 continue
             try:
@@ -61,11 +40,7 @@ def _get_room_boundary_segments(room):
                 continue
             if p0 is None or p1 is None:
                 continue
-            try:
-                eid = seg.ElementId
-            except Exception:
-                eid = None
-            segs.append((p0, p1, eid))
+            segs.append((p0, p1, seg.ElementId))
     return segs
 
 
@@ -21,7 +21,10 @@ import re
 from pyrevit import DB
 from pyrevit import script
 
+import param_reader
 import placement_engine
+import spatial_hash
+import tagged_registry
 from domain import norm_type_key, variant_prefix_key, is_panel_module_variant_param_name
 
 
@@ -225,40 +228,8 @@ def _find_param_by_norm(elem, pname):
     Returns:
         Parameter или None
     """
-    if elem is None or not pname:
-        return None
-
-    # Попытка точного совпадения
-    try:
-        p = elem.LookupParameter(pname)
-        if p is not None:
-            return p
-    except Exception:
-        p = None
-
-    # Поиск по нормализованному имени
-    key = norm_type_key(pname)
-    if not key:
-        return None
-
-    try:
-        params = getattr(elem, 'Parameters', None)
-        if params is None:
-            return None
-        for p2 in params:
-            try:
-                d = getattr(p2, 'Definition', None)
-                n = getattr(d, 'Name', None) if d is not None else None
-            except Exception:
-                n = None
-            if not n:
-                continue
-            if norm_type_key(n) == key:
-                return p2
-    except Exception:
-        return None
-
-    return None
+    # Имя параметра (точное, затем нормализованное) запоминается для связей
+    return param_reader.find_param(elem, pname, norm_type_key)
 
 
 def _param_checked(elem, pname):
@@ -1565,7 +1536,8 @@ def _try_adjust_host_offset(inst, delta_ft):
 def _collect_existing_tagged_points(host_doc, tag):
     """Собрать точки уже размещенных элементов с заданным тегом в Comments.
 
-    Использует parameter filter для быстрого поиска.
+    Берёт элементы из реестра AUTO_EOM (lib/tagged_registry.py); теги без
+    AUTO_EOM ищутся parameter filter.
 
     Args:
         host_doc: Document
@@ -1580,6 +1552,14 @@ def _collect_existing_tagged_points(host_doc, tag):
     if not t:
         return pts
 
+    tagged = tagged_registry.find_tagged(host_doc, tag, instances_only=False)
+    if tagged is not None:
+        for e in tagged:
+            p = spatial_hash.instance_point(e)
+            if p:
+                pts.append(p)
+        return pts
+
     try:
         provider = DB.ParameterValueProvider(DB.ElementId(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS))
         evaluator = DB.FilterStringContains()
@@ -1624,6 +1604,10 @@ def _collect_existing_tagged_instances(host_doc, tag):
     if not t:
         return insts
 
+    tagged = tagged_registry.find_tagged(host_doc, tag)
+    if tagged is not None:
+        return tagged
+
     try:
         provider = DB.ParameterValueProvider(DB.ElementId(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS))
         evaluator = DB.FilterStringContains()
@@ -1658,6 +1642,8 @@ def _find_near_instance(pt, insts, r_ft):
     """
     if pt is None or not insts or not r_ft or float(r_ft) <= 1e-9:
         return None
+    if isinstance(insts, spatial_hash.SpatialHash):
+        return insts.first_near_point(pt, float(r_ft))
     rr = float(r_ft)
     for e in insts:
         try:
@@ -1683,6 +1669,8 @@ def _find_near_instances(pt, insts, r_ft):
     """
     if pt is None or not insts or not r_ft or float(r_ft) <= 1e-9:
         return []
+    if isinstance(insts, spatial_hash.SpatialHash):
+        return insts.near_point(pt, float(r_ft))
     rr = float(r_ft)
     res = []
     for e in insts:
@@ -1709,6 +1697,8 @@ def _is_near_existing(pt, existing_pts, radius_ft):
     """
     if pt is None or not existing_pts or radius_ft is None:
         return False
+    if isinstance(existing_pts, spatial_hash.SpatialHash):
+        return existing_pts.has_near_point(pt, float(radius_ft))
     r = float(radius_ft)
     for p in existing_pts:
         try:
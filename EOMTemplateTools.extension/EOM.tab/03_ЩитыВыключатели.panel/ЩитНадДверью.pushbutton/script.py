@@ -12,6 +12,8 @@ import config_loader
 import link_reader
 import magic_context
 import placement_engine
+import spatial_hash
+import tagged_registry
 from utils_revit import alert, ensure_symbol_active, find_nearest_level, log_exception, set_comments, set_mark, tx
 from time_savings import report_time_saved
 from utils_units import mm_to_ft
@@ -2532,12 +2534,20 @@ def _try_flip_facing_to_dir(inst, desired_dir_host, origin_pt=None):
 
 
 def _collect_existing_tagged_points(host_doc, tag):
-    """Collect points for already tagged panels using parameter filters (faster than scanning all instances)."""
+    """Collect points for already tagged panels (tagged registry; parameter filter for non-AUTO_EOM tags)."""
     pts = []
     t = _norm(tag)
     if not t:
         return pts
 
+    tagged = tagged_registry.find_tagged(host_doc, tag, instances_only=False)
+    if tagged is not None:
+        for e in tagged:
+            p = spatial_hash.instance_point(e)
+            if p:
+                pts.append(p)
+        return pts
+
     try:
         provider = DB.ParameterValueProvider(DB.ElementId(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS))
         evaluator = DB.FilterStringContains()
@@ -2573,6 +2583,10 @@ def _collect_existing_tagged_instances(host_doc, tag):
     if not t:
         return insts
 
+    tagged = tagged_registry.find_tagged(host_doc, tag)
+    if tagged is not None:
+        return tagged
+
     try:
         provider = DB.ParameterValueProvider(DB.ElementId(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS))
         evaluator = DB.FilterStringContains()
@@ -2602,6 +2616,8 @@ def _collect_existing_tagged_instances(host_doc, tag):
 def _find_near_instance(pt, insts, r_ft):
     if pt is None or not insts or not r_ft or float(r_ft) <= 1e-9:
         return None
+    if isinstance(insts, spatial_hash.SpatialHash):
+        return insts.first_near_point(pt, float(r_ft))
     rr = float(r_ft)
     for e in insts:
         try:
@@ -2623,6 +2639,8 @@ def _find_near_instances(pt, insts, r_ft):
     """Return list of instances within radius from point."""
     if pt is None or not insts or not r_ft or float(r_ft) <= 1e-9:
         return []
+    if isinstance(insts, spatial_hash.SpatialHash):
+        return insts.near_point(pt, float(r_ft))
     rr = float(r_ft)
     res = []
     for e in insts:
@@ -3431,6 +3449,8 @@ def _bbox_from_element_ids(doc, ids, pad_ft=60.0, limit=500):
 def _is_near_existing(pt, existing_pts, radius_ft):
     if pt is None or not existing_pts or radius_ft is None:
         return False
+    if isinstance(existing_pts, spatial_hash.SpatialHash):
+        return existing_pts.has_near_point(pt, float(radius_ft))
     r = float(radius_ft)
     for p in existing_pts:
         try:
@@ -3927,16 +3947,13 @@ def _prepare_door_geometry(link_inst, link_doc, door, transform, offset_ft):
 def _place_or_update_panels(link_inst, link_doc, target_doors, symbol, variant_candidate, is_point,
                             comment_tag, offset_ft, recess_ft, dedupe_mm, dedupe_ft, batch_size, max_place):
     comment_value = '{0}:PANEL_SHK'.format(comment_tag)
-    existing_insts = _collect_existing_tagged_instances(doc, comment_value)
-    existing_pts = []
-    for e in existing_insts or []:
-        try:
-            loc = getattr(e, 'Location', None)
-            p = loc.Point if loc and hasattr(loc, 'Point') else None
-        except Exception:
-            p = None
-        if p is not None:
-            existing_pts.append(p)
+    # Dedupe indexes over panels placed by earlier runs (lib/spatial_hash.py);
+    # updated as panels are replaced and created below.
+    index_cell_ft = max(float(dedupe_ft or 0.0), 1.0)
+    existing_insts = spatial_hash.SpatialHash.from_instances(
+        _collect_existing_tagged_instances(doc, comment_value), cell_ft=index_cell_ft)
+    existing_pts = spatial_hash.SpatialHash.from_points(
+        [spatial_hash.instance_point(e) for e in existing_insts.items()], cell_ft=index_cell_ft)
 
     t = link_reader.get_total_transform(link_inst)
     host_levels = _collect_host_levels_sorted(doc)
@@ -4027,20 +4044,13 @@ def _place_or_update_panels(link_inst, link_doc, target_doors, symbol, variant_c
                                 except Exception:
                                     p_old = None
                                 if p_old is not None and rr > 1e-9:
-                                    for i in range(len(existing_pts) - 1, -1, -1):
-                                        try:
-                                            pp = existing_pts[i]
-                                            if pp is not None and float(pp.DistanceTo(p_old)) <= rr:
-                                                existing_pts.pop(i)
-                                                break
-                                        except Exception:
-                                            continue
+                                    existing_pts.pop_near_point(p_old, rr)
                                 try:
                                     doc.Delete(e.Id)
                                 except Exception:
                                     pass
                                 try:
-                                    existing_insts.remove(e)
+                                    existing_insts.discard(e)
                                 except Exception:
                                     pass
 
@@ -4059,14 +4069,7 @@ def _place_or_update_panels(link_inst, link_doc, target_doors, symbol, variant_c
                             try:
                                 rr = float(mm_to_ft(10) or 0.0)
                                 if rr > 1e-9:
-                                    for i in range(len(existing_pts) - 1, -1, -1):
-                                        try:
-                                            pp = existing_pts[i]
-                                            if pp is not None and float(pp.DistanceTo(p_old)) <= rr:
-                                                existing_pts.pop(i)
-                                                break
-                                        except Exception:
-                                            continue
+                                    existing_pts.pop_near_point(p_old, rr)
                             except Exception:
                                 pass
                         try:
@@ -4075,7 +4078,7 @@ def _place_or_update_panels(link_inst, link_doc, target_doors, symbol, variant_c
                         except Exception:
                             pass
                         try:
-                            existing_insts.remove(existing)
+                            existing_insts.discard(existing)
                         except Exception:
                             pass
                         existing = None
@@ -4231,13 +4234,16 @@ def _place_or_update_panels(link_inst, link_doc, target_doors, symbol, variant_c
                         set_mark(inst, 'APT-{0}-SHK'.format(aptnum))
 
                     if p_host is not None:
-                        existing_pts.append(p_host)
+                        existing_pts.add_point(p_host)
                     try:
-                        existing_insts.append(inst)
+                        existing_insts.add_point(spatial_hash.instance_point(inst), inst)
                     except Exception:
                         pass
                     created += 1
 
+    # Created and updated panels (comments re-read) go into the tagged registry.
+    tagged_registry.note_created(doc, existing_insts.items())
+
     return {
         'created': created,
         'updated': updated,
@@ -72,6 +72,8 @@ from pyrevit import script
 import config_loader
 import link_reader
 import placement_engine
+import spatial_hash
+import tagged_registry
 from utils_revit import alert, ensure_symbol_active, log_exception, set_comments, set_mark, tx
 from time_savings import report_time_saved
 from utils_units import mm_to_ft
@@ -1757,16 +1759,13 @@ def main():
     output.print_md('Дверей найдено: **{0}** (просканировано={1})'.format(len(target_doors), di))
 
     comment_value = '{0}:PANEL_SHK'.format(comment_tag)
-    existing_insts = _collect_existing_tagged_instances(doc, comment_value)
-    existing_pts = []
-    for e in existing_insts or []:
-        try:
-            loc = getattr(e, 'Location', None)
-            p = loc.Point if loc and hasattr(loc, 'Point') else None
-        except Exception:
-            p = None
-        if p is not None:
-            existing_pts.append(p)
+    # Dedupe indexes over panels placed by earlier runs (lib/spatial_hash.py);
+    # updated as panels are replaced and created below.
+    index_cell_ft = max(float(dedupe_ft or 0.0), 1.0)
+    existing_insts = spatial_hash.SpatialHash.from_instances(
+        _collect_existing_tagged_instances(doc, comment_value), cell_ft=index_cell_ft)
+    existing_pts = spatial_hash.SpatialHash.from_points(
+        [spatial_hash.instance_point(e) for e in existing_insts.items()], cell_ft=index_cell_ft)
 
     t = link_reader.get_total_transform(link_inst)
 
@@ -1905,21 +1904,14 @@ def main():
                                     p_old = None
 
                                 if p_old is not None and rr > 1e-9:
-                                    for i in range(len(existing_pts) - 1, -1, -1):
-                                        try:
-                                            pp = existing_pts[i]
-                                            if pp is not None and float(pp.DistanceTo(p_old)) <= rr:
-                                                existing_pts.pop(i)
-                                                break
-                                        except Exception:
-                                            continue
+                                    existing_pts.pop_near_point(p_old, rr)
 
                                 try:
                                     doc.Delete(e.Id)
                                 except Exception:
                                     pass
                                 try:
-                                    existing_insts.remove(e)
+                                    existing_insts.discard(e)
                                 except Exception:
                                     pass
 
@@ -1942,14 +1934,7 @@ def main():
                                 try:
                                     rr = float(mm_to_ft(10) or 0.0)
                                     if rr > 1e-9:
-                                        for i in range(len(existing_pts) - 1, -1, -1):
-                                            try:
-                                                pp = existing_pts[i]
-                                                if pp is not None and float(pp.DistanceTo(p_old)) <= rr:
-                                                    existing_pts.pop(i)
-                                                    break
-                                            except Exception:
-                                                continue
+                                        existing_pts.pop_near_point(p_old, rr)
                                 except Exception:
                                     pass
                             try:
@@ -1958,7 +1943,7 @@ def main():
                             except Exception:
                                 pass
                             try:
-                                existing_insts.remove(existing)
+                                existing_insts.discard(existing)
                             except Exception:
                                 pass
                             existing = None
@@ -2106,13 +2091,16 @@ def main():
                         set_mark(inst, 'APT-{0}-SHK'.format(aptnum))
 
                     if p_host is not None:
-                        existing_pts.append(p_host)
+                        existing_pts.add_point(p_host)
                     try:
-                        existing_insts.append(inst)
+                        existing_insts.add_point(spatial_hash.instance_point(inst), inst)
                     except Exception:
                         pass
                     created += 1
 
+    # Created and updated panels (comments re-read) go into the tagged registry.
+    tagged_registry.note_created(doc, existing_insts.items())
+
     output.print_md('---')
     output.print_md('Создано щитов: **{0}**'.format(created))
     if updated:
@@ -71,7 +71,7 @@ def get_all_linked_rooms(link_doc, level_ids=None):
 
 
 def collect_radiator_points(link_doc):
-    return su._collect_radiator_points(link_doc)
+    return su.collect_fixture_points(link_doc, kinds=('radiator',))['radiator']
 
 
 def get_total_transform(link_inst):
@@ -197,7 +197,7 @@ def calculate_allowed_path(
         is_outer_boundary = False
         try:
             if wall_filter.get('exterior_by_geom', True):
-                is_outer_boundary = bool(su.is_room_outer_boundary_segment(link_doc, room, c))
+                is_outer_boundary = bool(su.is_room_outer_boundary_segment(link_doc, room, c, opts=boundary_opts))
         except Exception:
             is_outer_boundary = False
         if su.is_curtain_wall(wall):
@@ -67,8 +67,8 @@ class SocketDomainPort(object):
     def is_wall_element(self, elem):
         return self._is_wall_element(elem)
 
-    def is_room_outer_boundary_segment(self, link_doc, room, curve, probe_mm=200.0):
-        return self._is_room_outer_boundary_segment(link_doc, room, curve, probe_mm=probe_mm)
+    def is_room_outer_boundary_segment(self, link_doc, room, curve, probe_mm=200.0, opts=None):
+        return self._is_room_outer_boundary_segment(link_doc, room, curve, probe_mm=probe_mm, opts=opts)
 
     def is_curtain_wall(self, wall):
         return self._is_curtain_wall(wall)
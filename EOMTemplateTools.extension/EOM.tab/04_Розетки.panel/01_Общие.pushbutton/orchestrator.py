@@ -14,12 +14,17 @@ except ImportError:
     if lib_path not in sys.path:
         sys.path.append(lib_path)
     import socket_utils as su
+import room_boundary
 from utils_revit import alert, log_exception
 from utils_units import mm_to_ft
+import wall_index
+from hub_progress import progress_reporter
 
 
 def run(doc, output):
     output.print_md('# 01. Розетки: Общие (жилые/коридоры)')
+    # Индекс стен хоста строится один раз на запуск (strict_hosting)
+    wall_index.invalidate_wall_index(doc)
 
     rules = adapters.get_rules()
     comment_tag = rules.get('comment_tag', constants.COMMENT_TAG_DEFAULT)
@@ -192,12 +197,15 @@ def run(doc, output):
     sp_cache = {}
     pending = []
     created = 0
-    boundary_opts = DB.SpatialElementBoundaryOptions()
+    boundary_opts = room_boundary.boundary_options()
 
+    progress = progress_reporter()
+    progress.stage('rooms', total=len(rooms))
     with adapters.create_progress_bar('01. Общие розетки...', len(rooms)) as pb:
         for i, r in enumerate(rooms):
             if pb.cancelled: break
             pb.update_progress(i, pb.max_value)
+            progress.update(i)
 
             txt_r = su._room_text(r)
             is_hallway_room = domain.is_hallway(txt_r, hallway_rx)
@@ -309,6 +317,7 @@ def run(doc, output):
                     )
                     created += c0
                     pending = []
+    progress.close()
 
     if pending:
         c0, _, _, _, _, _, _ = adapters.place_socket_batch(
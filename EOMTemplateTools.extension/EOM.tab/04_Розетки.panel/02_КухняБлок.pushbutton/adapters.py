@@ -38,16 +38,9 @@ def get_all_linked_rooms(link_doc, limit, level_ids=None):
     return su._get_all_linked_rooms(link_doc, limit=limit, level_ids=level_ids)
 
 
-def collect_sinks_points(link_doc, rules):
-    return su._collect_sinks_points(link_doc, rules)
-
-
-def collect_stoves_points(link_doc, rules):
-    return su._collect_stoves_points(link_doc, rules)
-
-
-def collect_fridges_points(link_doc, rules):
-    return su._collect_fridges_points(link_doc, rules)
+def collect_kitchen_fixture_points(link_doc, rules):
+    """{'sink': [...], 'stove': [...], 'fridge': [...]} from one fixture catalog pass."""
+    return su.collect_fixture_points(link_doc, rules, kinds=('sink', 'stove', 'fridge'))
 
 
 def _try_get_room_at_point(doc_, pt):
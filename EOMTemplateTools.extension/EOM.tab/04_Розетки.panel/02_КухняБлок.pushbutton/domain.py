@@ -3,6 +3,7 @@
 import math
 from pyrevit import DB
 from utils_units import mm_to_ft
+import segment_index
 import socket_utils as su
 
 
@@ -166,11 +167,31 @@ def try_get_room_at_point(doc_, pt):
     return None
 
 
-def nearest_segment(pt, segs):
+def nearest_segment(pt, segs, accept=None):
+    """Ближайший к точке отрезок (p0, p1, wall), проекция и расстояние в плане.
+
+    accept(i) -> bool ограничивает выбор отрезками segs[i].
+    """
+    if pt is None or not segs:
+        return None, None, None
+    try:
+        idx = segment_index.room_segment_index(segs).nearest(float(pt.X), float(pt.Y), accept=accept)[0]
+    except Exception:
+        return _nearest_segment_scan(pt, segs, accept)
+    if idx is None:
+        return None, None, None
+    p0, p1, wall = segs[idx]
+    proj = closest_point_on_segment_xy(pt, p0, p1)
+    return (p0, p1, wall), proj, dist_xy(pt, proj)
+
+
+def _nearest_segment_scan(pt, segs, accept=None):
     best = None
     best_proj = None
     best_d = None
-    for p0, p1, wall in segs or []:
+    for i, (p0, p1, wall) in enumerate(segs or []):
+        if accept is not None and not accept(i):
+            continue
         proj = closest_point_on_segment_xy(pt, p0, p1)
         if proj is None:
             continue
@@ -3,6 +3,7 @@
 import domain
 from pyrevit import DB
 from utils_units import mm_to_ft
+import segment_index
 import socket_utils as su
 
 DEFAULT_SKIP_EXTERIOR_WALLS = True
@@ -247,35 +248,31 @@ def _nearest_segment_smart(pt, segs, other_pt=None):
     if not align_dir:
         return best_any, proj_any, dist_any
 
-    # Filter aligned
-    aligned_segs = []
-    for s in segs:
-        p0, p1, wall = s
+    # Nearest among aligned (parallel-ish) walls, via the room's segment index
+    try:
+        index = segment_index.room_segment_index(segs)
+        ax, ay = float(align_dir.X), float(align_dir.Y)
+    except Exception:
+        return best_any, proj_any, dist_any
+
+    def _aligned(i):
+        d = index.direction(i)
+        return d is not None and abs(d[0] * ax + d[1] * ay) > 0.5
+
+    best_aligned, proj_aligned, dist_aligned = domain.nearest_segment(pt, segs, accept=_aligned)
+    if dist_aligned is not None:
         try:
-            v_seg = p1 - p0
-            v_seg_xy = DB.XYZ(v_seg.X, v_seg.Y, 0)
-            if v_seg_xy.GetLength() < 1e-6: continue
-            v_seg_norm = v_seg_xy.Normalize()
-            dot = v_seg_norm.DotProduct(align_dir)
-            if abs(dot) > 0.5: # Parallel-ish
-                aligned_segs.append(s)
-        except: continue
-        
-    if aligned_segs:
-        best_aligned, proj_aligned, dist_aligned = domain.nearest_segment(pt, aligned_segs)
-        if dist_aligned is not None:
-            try:
-                tol = float(mm_to_ft(300))
-            except Exception:
-                tol = 0.0
-            try:
-                da = float(dist_any) if dist_any is not None else None
-            except Exception:
-                da = None
+            tol = float(mm_to_ft(300))
+        except Exception:
+            tol = 0.0
+        try:
+            da = float(dist_any) if dist_any is not None else None
+        except Exception:
+            da = None
 
-            # Prefer aligned wall only if it's not significantly worse than the closest one.
-            if da is None or float(dist_aligned) <= (float(da) + float(tol)):
-                return best_aligned, proj_aligned, dist_aligned
+        # Prefer aligned wall only if it's not significantly worse than the closest one.
+        if da is None or float(dist_aligned) <= (float(da) + float(tol)):
+            return best_aligned, proj_aligned, dist_aligned
 
     return best_any, proj_any, dist_any
 
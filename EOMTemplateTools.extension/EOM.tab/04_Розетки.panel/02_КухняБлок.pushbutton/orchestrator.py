@@ -11,6 +11,7 @@ import logic as kup
 from utils_revit import alert, log_exception, tx
 from utils_units import mm_to_ft
 import socket_utils as su
+from hub_progress import progress_reporter
 
 
 doc = revit.doc
@@ -80,25 +81,13 @@ def _collect_kitchen_unit_elements_by_room(link_doc, rules):
         DB.BuiltInCategory.OST_DetailComponents,
     ]
 
+    catalog = su.get_fixture_catalog(link_doc)
+    matcher = su._keyword_matcher(unit_keys)
     elems = []
     for bic in bics:
-        try:
-            col = DB.FilteredElementCollector(link_doc).OfCategory(bic).WhereElementIsNotElementType()
-        except Exception:
-            continue
-        for e in col:
-            try:
-                t = su._elem_text(e)
-            except Exception:
-                t = u''
-            if not t:
-                continue
-            try:
-                if not su._text_has_any_keyword(t, unit_keys):
-                    continue
-            except Exception:
-                continue
-            elems.append(e)
+        for item in catalog.items(bic):
+            if matcher.match(item.text, item.tokens):
+                elems.append(item.element)
 
     by_room = {}
     for e in elems:
@@ -435,9 +424,10 @@ def run(doc, output):
     raw_rooms = su._get_all_linked_rooms(link_doc, limit=int(rules.get('scan_limit_rooms', 200) or 200), level_ids=level_ids)
 
     # --- sinks/stoves detection ---
-    sinks_all = adapters.collect_sinks_points(link_doc, rules)
-    stoves_all = adapters.collect_stoves_points(link_doc, rules)
-    fridges_all = adapters.collect_fridges_points(link_doc, rules)
+    fixtures = adapters.collect_kitchen_fixture_points(link_doc, rules)
+    sinks_all = fixtures['sink']
+    stoves_all = fixtures['stove']
+    fridges_all = fixtures['fridge']
     fridges_all.extend(_collect_fridge_by_visibility_param(link_doc))
 
     unit_elems_by_room = _collect_kitchen_unit_elements_by_room(link_doc, rules)
@@ -492,11 +482,14 @@ def run(doc, output):
     created = created_face = created_wp = created_pt = 0
     skipped = 0
 
+    progress = progress_reporter()
+    progress.stage('rooms', total=len(rooms))
     with forms.ProgressBar(title='02. Кухня Блок + Периметр (4шт)...', cancellable=True) as pb:
         pb.max_value = len(rooms)
         for i, room in enumerate(rooms):
             if pb.cancelled: break
             pb.update_progress(i, pb.max_value)
+            progress.update(i)
 
             segs = adapters._get_wall_segments(room, link_doc)
             segs = kup.filter_room_wall_segments(
@@ -698,6 +691,7 @@ def run(doc, output):
                 if len(pending_general) >= batch_size:
                     c, cf, cwp, cpt, _, _, _ = su._place_socket_batch(doc, link_inst, t, pending_general, sym_flags, sp_cache, comment_value_general)
                     created += c; pending_general = []
+    progress.close()
 
     if pending_unit:
         c, _, _, _, _, _, _ = su._place_socket_batch(doc, link_inst, t, pending_unit, sym_flags, sp_cache, comment_value_unit)
@@ -82,18 +82,15 @@ def collect_fixture_candidates(link_doc, keywords, categories, fixture_kind='wm'
     if not link_doc:
         return fixtures
     key_norms = [su._norm(k) for k in (keywords or []) if k]
+    # Element texts are built once per link and shared by all fixture kinds.
+    catalog = su.get_fixture_catalog(link_doc)
     for bic in categories:
-        try:
-            collector = DB.FilteredElementCollector(link_doc).OfCategory(bic).WhereElementIsNotElementType()
-        except Exception:
-            continue
-        for elem in collector:
+        for item in catalog.items(bic):
             try:
-                label = su._elem_text(elem)
-                norm_label = su._norm(label)
-                if key_norms and not any(k in norm_label for k in key_norms):
+                if key_norms and not any(k in item.text for k in key_norms):
                     continue
-                center = su._inst_center_point(elem)
+                elem = item.element
+                center = item.point()
                 if not center:
                     continue
                 bbox = domain.get_2d_bbox(elem)
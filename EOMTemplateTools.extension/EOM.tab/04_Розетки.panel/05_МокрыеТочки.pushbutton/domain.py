@@ -2,7 +2,11 @@
 
 import math
 from pyrevit import DB
+import geom2d
+import room_boundary
+import segment_index
 import socket_utils as su
+import tagged_registry
 import constants
 from utils_units import mm_to_ft, ft_to_mm
 
@@ -33,32 +37,18 @@ def fixture_priority(kind):
     return 5
 
 
-def get_room_boundary_segments_2d(room, boundary_opts):
+def get_room_boundary_segments_2d(room, boundary_opts=None):
     segs_2d = []
     if room is None:
         return segs_2d
-    try:
-        seglists = room.GetBoundarySegments(boundary_opts)
-    except Exception:
+    rb = room_boundary.get_room_boundary(room, boundary_opts)
+    loop = rb.longest_loop() if rb else None
+    if not loop:
         return segs_2d
-    if not seglists:
-        return segs_2d
-
-    def _total_length(segs):
-        total = 0.0
-        for seg in segs:
-            try:
-                curve = seg.GetCurve()
-                if curve:
-                    total += float(curve.Length)
-            except Exception:
-                pass
-        return total
 
-    loop = max(seglists, key=_total_length)
     for seg in loop:
         try:
-            curve = seg.GetCurve()
+            curve = seg.curve
             if curve is None:
                 continue
             wall = room.Document.GetElement(seg.ElementId)
@@ -105,89 +95,51 @@ def get_2d_bbox(element):
 
 
 def segments_intersect(p1, p2, p3, p4, tol=1e-9):
-    r = DB.XYZ(p2.X - p1.X, p2.Y - p1.Y, 0.0)
-    s = DB.XYZ(p4.X - p3.X, p4.Y - p3.Y, 0.0)
-    denom = r.X * s.Y - r.Y * s.X
-    if abs(denom) < tol:
+    ok, t, u, hit = geom2d.segments_intersect(
+        float(p1.X), float(p1.Y), float(p2.X), float(p2.Y),
+        float(p3.X), float(p3.Y), float(p4.X), float(p4.Y), tol=tol
+    )
+    if not ok:
         return False, None, None, None
-    qp = DB.XYZ(p3.X - p1.X, p3.Y - p1.Y, 0.0)
-    t = (qp.X * s.Y - qp.Y * s.X) / denom
-    u = (qp.X * r.Y - qp.Y * r.X) / denom
-    if -tol <= t <= 1.0 + tol and -tol <= u <= 1.0 + tol:
-        ix = p1.X + r.X * t
-        iy = p1.Y + r.Y * t
-        return True, t, u, DB.XYZ(ix, iy, p1.Z)
-    return False, None, None, None
+    return True, t, u, DB.XYZ(hit[0], hit[1], p1.Z)
 
 
 def closest_point_on_segment_xy(pt, a, b):
     if pt is None or a is None or b is None:
         return None
-    abx = float(b.X) - float(a.X)
-    aby = float(b.Y) - float(a.Y)
-    denom = abx * abx + aby * aby
-    if denom <= 1e-12:
+    ax, ay = float(a.X), float(a.Y)
+    if (float(b.X) - ax) ** 2 + (float(b.Y) - ay) ** 2 <= 1e-12:
         return None
-    apx = float(pt.X) - float(a.X)
-    apy = float(pt.Y) - float(a.Y)
-    t = (apx * abx + apy * aby) / denom
-    if t < 0.0:
-        t = 0.0
-    elif t > 1.0:
-        t = 1.0
-    return DB.XYZ(float(a.X) + abx * t, float(a.Y) + aby * t, float(pt.Z))
+    qx, qy, _ = geom2d.closest_point_on_segment(float(pt.X), float(pt.Y), ax, ay, float(b.X), float(b.Y))
+    return DB.XYZ(qx, qy, float(pt.Z))
 
 
 def raycast_to_walls(origin_pt, directions, wall_segments, max_distance_ft):
+    """Ближайшее пересечение каждого луча со стенами (через XY-индекс отрезков)."""
     hits = []
     if not wall_segments or not directions or max_distance_ft is None:
         return hits
     max_dist = float(max_distance_ft)
+    index = segment_index.room_segment_index(wall_segments)
+    ox, oy = float(origin_pt.X), float(origin_pt.Y)
     for dir_vec in directions:
-        dir_xy = DB.XYZ(dir_vec.X, dir_vec.Y, 0.0)
-        try:
-            length = dir_xy.GetLength()
-        except Exception:
-            length = None
-        if not length or length <= 1e-6:
+        dx, dy = float(dir_vec.X), float(dir_vec.Y)
+        length = math.sqrt(dx * dx + dy * dy)
+        if length <= 1e-6:
             continue
-        dir_unit = dir_xy.Normalize()
-        ray_end = DB.XYZ(
-            origin_pt.X + dir_unit.X * max_dist,
-            origin_pt.Y + dir_unit.Y * max_dist,
-            origin_pt.Z
-        )
-        best_hit = None
-        for p1, p2, wall in wall_segments:
-            ok, t_ray, _, hit_pt = segments_intersect(origin_pt, ray_end, p1, p2)
-            if not ok or t_ray is None or hit_pt is None:
-                continue
-            if t_ray < 0.0:
-                continue
-            dist = t_ray * max_dist
-            if dist <= 1e-6:
-                continue
-            if dist > max_dist + 1e-6:
-                continue
-            wall_vec = DB.XYZ(p2.X - p1.X, p2.Y - p1.Y, 0.0)
-            try:
-                wall_len = wall_vec.GetLength()
-            except Exception:
-                wall_len = None
-            if not wall_len or wall_len <= 1e-6:
-                continue
-            wall_dir = wall_vec.Normalize()
-            if best_hit is None or dist < best_hit['distance']:
-                best_hit = {
-                    'distance': dist,
-                    'point': DB.XYZ(hit_pt.X, hit_pt.Y, origin_pt.Z),
-                    'wall': wall,
-                    'wall_dir': wall_dir,
-                    'seg_p1': p1,
-                    'seg_p2': p2
-                }
-        if best_hit:
-            hits.append(best_hit)
+        idx, dist, hit_xy = index.raycast(ox, oy, dx / length, dy / length, max_dist)
+        if idx is None:
+            continue
+        p1, p2, wall = wall_segments[idx]
+        wall_dir = index.direction(idx)
+        hits.append({
+            'distance': dist,
+            'point': DB.XYZ(hit_xy[0], hit_xy[1], origin_pt.Z),
+            'wall': wall,
+            'wall_dir': DB.XYZ(wall_dir[0], wall_dir[1], 0.0),
+            'seg_p1': p1,
+            'seg_p2': p2
+        })
     return hits
 
 
@@ -485,8 +437,7 @@ def get_wall_segments(room, link_doc):
     if room is None or link_doc is None:
         return segs
     try:
-        opts = DB.SpatialElementBoundaryOptions()
-        seglist = su._get_room_outer_boundary_segments(room, opts)
+        seglist = su._get_room_outer_boundary_segments(room)
     except Exception:
         seglist = None
     if not seglist:
@@ -753,14 +704,31 @@ def collect_tagged_instances(host_doc, tag_value):
     if host_doc is None or not tag_value:
         return ids, elems, pts
 
-    for bic in (
+    bics = (
         DB.BuiltInCategory.OST_ElectricalFixtures,
         DB.BuiltInCategory.OST_ElectricalEquipment,
         DB.BuiltInCategory.OST_GenericModel,
         DB.BuiltInCategory.OST_SpecialityEquipment,
         DB.BuiltInCategory.OST_MechanicalEquipment,
         DB.BuiltInCategory.OST_Furniture,
-    ):
+    )
+    tagged = tagged_registry.find_tagged(host_doc, tag_value, categories=bics, case_sensitive=True)
+    if tagged is not None:
+        for e in tagged:
+            try:
+                ids.add(int(e.Id.IntegerValue))
+            except Exception:
+                pass
+            elems.append(e)
+            try:
+                pt = su._inst_center_point(e)
+            except Exception:
+                pt = None
+            if pt:
+                pts.append(pt)
+        return ids, elems, pts
+
+    for bic in bics:
         try:
             col = (
                 DB.FilteredElementCollector(host_doc)
@@ -15,10 +15,14 @@ except ImportError:
     import socket_utils as su
 from utils_revit import alert, log_exception, tx
 from utils_units import mm_to_ft, ft_to_mm
+import wall_index
+from hub_progress import progress_reporter
 
 
 def run(doc, output):
     output.print_md('# 05. Санузлы/Ванные/Постирочные')
+    # Индекс стен хоста строится один раз на запуск (strict_hosting)
+    wall_index.invalidate_wall_index(doc)
 
     rules = adapters.get_rules()
     cfg = adapters.get_config()
@@ -190,12 +194,15 @@ def run(doc, output):
         except: rnm = u''
         skipped_details.append({'room_id': rid, 'room_name': rnm, 'reason': reason, 'details': details or u''})
 
+    progress = progress_reporter()
+    progress.stage('rooms', total=len(rooms))
     with forms.ProgressBar(title='05. Санузлы...', cancellable=True) as pb:
         pb.max_value = len(rooms)
         for i, room in enumerate(rooms):
             if pb.cancelled:
                 break
             pb.update_progress(i, pb.max_value)
+            progress.update(i)
 
             segs = domain.get_wall_segments(room, link_doc)
             if not segs:
@@ -294,6 +301,7 @@ def run(doc, output):
                     created_wp += int(cwp)
                     created_pt += int(cpt)
                     pending = []
+    progress.close()
 
     if pending:
         c, cf, cwp, cpt, _snf, _snp, _cver = su._place_socket_batch(
@@ -15,10 +15,14 @@ except ImportError:
     import socket_utils as su
 from utils_revit import alert, log_exception
 from utils_units import mm_to_ft
+import wall_index
+from hub_progress import progress_reporter
 
 
 def run(doc, output):
     output.print_md('# 06. Розетки: Слаботочка (домофон + роутер)')
+    # Индекс стен хоста строится один раз на запуск (strict_hosting)
+    wall_index.invalidate_wall_index(doc)
 
     rules = adapters.get_rules()
     cfg = adapters.get_config()
@@ -190,12 +194,15 @@ def run(doc, output):
     # Diagnostics for apartment-aware recovery quality in real projects.
     low_voltage_debug = bool(rules.get('low_voltage_debug', True))
 
+    progress = progress_reporter()
+    progress.stage('rooms', total=len(rooms))
     with forms.ProgressBar(title='06. Слаботочка...', cancellable=True) as pb:
         pb.max_value = len(rooms)
         for i, room in enumerate(rooms):
             if pb.cancelled:
                 break
             pb.update_progress(i, pb.max_value)
+            progress.update(i)
 
             base_z = su._room_level_elevation_ft(room, link_doc)
 
@@ -340,6 +347,7 @@ def run(doc, output):
                 except Exception:
                     log_exception()
                 pending = []
+    progress.close()
 
     if pending:
         try:
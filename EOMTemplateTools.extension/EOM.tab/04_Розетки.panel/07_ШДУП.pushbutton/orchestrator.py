@@ -13,10 +13,13 @@ except ImportError:
         sys.path.append(lib_path)
     import socket_utils as su
 from utils_units import mm_to_ft
+import wall_index
 
 
 def run(doc, output):
     output.print_md('# 07. ШДУП: Ванные')
+    # Индекс стен хоста строится один раз на запуск (strict_hosting)
+    wall_index.invalidate_wall_index(doc)
 
     rules = adapters.get_rules()
     cfg = adapters.get_config()
@@ -357,6 +357,7 @@ def main():
         magic_context.SELECTED_LINK = None
         magic_context.SELECTED_LINKS = []
         magic_context.SELECTED_LEVELS = []
+        link_reader.flush_link_geometry_caches()
 
 
 if __name__ == '__main__':
@@ -67,6 +67,9 @@ def load_rules(path=None):
         'dedupe_radius_mm': 500,
         'max_place_count': 200,
         'batch_size': 25,
+        # Параллельный расчёт геометрии по помещениям (room_executor): thread | process | serial.
+        'parallel_mode': 'thread',
+        'parallel_workers': 0,
         'scan_limit_rooms': 500,
         'scan_limit_doors': 500,
         'apartment_param_names': [u'Квартира', u'Номер квартиры', u'ADSK_Номер квартиры', u'ADSK_Номер_квартиры', u'Apartment', u'Flat'],
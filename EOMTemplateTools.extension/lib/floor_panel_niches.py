@@ -11,6 +11,8 @@ import re
 
 from pyrevit import DB
 
+import param_reader
+
 
 # Номера квартир, которые являются известными плейсхолдерами / не-квартирами в наших проектах.
 # Можно переопределить через env переменную `EOM_APT_INVALID_NUMBERS` (разделитель: запятая/пробел).
@@ -56,25 +58,7 @@ def _norm(value):
 
 
 def _get_param_as_string(elem, bip=None, name=None):
-    if elem is None:
-        return u""
-    param = None
-    try:
-        if bip is not None:
-            param = elem.get_Parameter(bip)
-    except Exception:
-        param = None
-    if param is None and name:
-        try:
-            param = elem.LookupParameter(name)
-        except Exception:
-            param = None
-    if param is None:
-        return u""
-    try:
-        return param.AsString() or u""
-    except Exception:
-        return u""
+    return param_reader.get_string(elem, bip=bip, name=name)
 
 
 def room_text(room):
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""Плоская геометрия на компактных данных (без DB.XYZ в горячих циклах).
+
+Каждое обращение к XYZ.X под IronPython пересекает границу .NET; здесь
+координаты переводятся один раз при извлечении (`Loop.of`, `loop_of`) в
+массивы array('d'), а все вычисления идут на float.
+
+    loop = geom2d.loop_of(boundary_pts)          # XYZ или кортежи (x, y[, z])
+    geom2d.point_in_poly(x, y, loop)
+    geom2d.min_dist_to_loop(x, y, loop)          # (d, (qx, qy))
+"""
+
+from array import array
+
+
+def _xy(p):
+    try:
+        return float(p.X), float(p.Y)
+    except AttributeError:
+        return float(p[0]), float(p[1])
+
+
+class Loop(object):
+    """Замкнутый контур: вершины в массивах xs, ys (порядок входа)."""
+
+    __slots__ = ('xs', 'ys')
+
+    def __init__(self, xs=None, ys=None):
+        self.xs = xs if xs is not None else array('d')
+        self.ys = ys if ys is not None else array('d')
+
+    @classmethod
+    def of(cls, pts):
+        """Контур из XYZ / кортежей; Loop возвращается как есть."""
+        if isinstance(pts, cls):
+            return pts
+        loop = cls()
+        for p in pts or []:
+            try:
+                x, y = _xy(p)
+            except Exception:
+                continue
+            loop.xs.append(x)
+            loop.ys.append(y)
+        return loop
+
+    def __len__(self):
+        return len(self.xs)
+
+    def points(self):
+        return list(zip(self.xs, self.ys))
+
+
+_LOOP_CACHE = {}
+_LOOP_CACHE_MAX = 256
+
+
+def loop_of(pts):
+    """Loop.of с запоминанием по содержимому списка вершин.
+
+    Ключ — кортеж вершин (XYZ неизменяемы), поэтому правка списка на месте
+    даёт новый контур; нехешируемые вершины переводятся без кэша.
+    """
+    if isinstance(pts, Loop):
+        return pts
+    try:
+        key = tuple(pts or ())
+        hit = _LOOP_CACHE.get(key)
+    except TypeError:
+        return Loop.of(pts)
+    if hit is not None:
+        return hit
+    loop = Loop.of(key)
+    if len(_LOOP_CACHE) >= _LOOP_CACHE_MAX:
+        _LOOP_CACHE.clear()
+    _LOOP_CACHE[key] = loop
+    return loop
+
+
+def poly_area(loop):
+    """Знаковая площадь контура (>0 против часовой стрелки)."""
+    xs, ys = loop.xs, loop.ys
+    n = len(xs)
+    if n < 3:
+        return 0.0
+    a2 = 0.0
+    for i in range(n):
+        j = i + 1 if i + 1 < n else 0
+        a2 += xs[i] * ys[j] - xs[j] * ys[i]
+    return a2 * 0.5
+
+
+def point_in_poly(x, y, loop):
+    """Точка в контуре (чётность пересечений луча)."""
+    xs, ys = loop.xs, loop.ys
+    n = len(xs)
+    if n < 3:
+        return False
+    inside = False
+    j = n - 1
+    for i in range(n):
+        xi, yi = xs[i], ys[i]
+        xj, yj = xs[j], ys[j]
+        if (yi > y) != (yj > y):
+            dy = (yj - yi) if abs(yj - yi) > 1e-12 else 1e-12
+            if x < (xj - xi) * (y - yi) / dy + xi:
+                inside = not inside
+        j = i
+    return inside
+
+
+def closest_point_on_segment(px, py, ax, ay, bx, by):
+    """(qx, qy, t) — ближайшая к точке точка отрезка ab и её параметр."""
+    vx = bx - ax
+    vy = by - ay
+    den = vx * vx + vy * vy
+    if den <= 1e-12:
+        return ax, ay, 0.0
+    t = ((px - ax) * vx + (py - ay) * vy) / den
+    if t < 0.0:
+        t = 0.0
+    elif t > 1.0:
+        t = 1.0
+    return ax + t * vx, ay + t * vy, t
+
+
+def point_segment_distance(p, a, b):
+    """Расстояние от точки p до отрезка ab; кортежи (x, y, z) — для 3D-индексов отрезков."""
+    ax, ay, az = a
+    dx, dy, dz = b[0] - ax, b[1] - ay, b[2] - az
+    px, py, pz = p[0] - ax, p[1] - ay, p[2] - az
+    ll = dx * dx + dy * dy + dz * dz
+    t = 0.0
+    if ll > 1e-18:
+        t = (px * dx + py * dy + pz * dz) / ll
+        t = 0.0 if t < 0.0 else (1.0 if t > 1.0 else t)
+    ex, ey, ez = px - t * dx, py - t * dy, pz - t * dz
+    return (ex * ex + ey * ey + ez * ez) ** 0.5
+
+
+def _min_d2_to_loop(x, y, loop):
+    xs, ys = loop.xs, loop.ys
+    n = len(xs)
+    best_d2, qx, qy = None, None, None
+    for i in range(n):
+        j = i + 1 if i + 1 < n else 0
+        cx, cy, _ = closest_point_on_segment(x, y, xs[i], ys[i], xs[j], ys[j])
+        dx = x - cx
+        dy = y - cy
+        d2 = dx * dx + dy * dy
+        if best_d2 is None or d2 < best_d2:
+            best_d2, qx, qy = d2, cx, cy
+    return best_d2, qx, qy
+
+
+def min_dist_to_loop(x, y, loop):
+    """(расстояние, (qx, qy)) до рёбер контура или (None, None)."""
+    if len(loop) < 2:
+        return None, None
+    d2, qx, qy = _min_d2_to_loop(x, y, loop)
+    if d2 is None:
+        return None, None
+    return d2 ** 0.5, (qx, qy)
+
+
+def _odd_and_min_d2(x, y, loop):
+    """За один проход: (чётность пересечений луча, min квадрат расстояния до рёбер).
+
+    Те же формулы, что point_in_poly и closest_point_on_segment, без вызовов
+    на каждое ребро — это внутренний цикл polylabel.
+    """
+    xs, ys = loop.xs, loop.ys
+    n = len(xs)
+    odd = False
+    min_d2 = None
+    for k in range(n):
+        a_x = xs[k]
+        a_y = ys[k]
+        m = k + 1 if k + 1 < n else 0
+        b_x = xs[m]
+        b_y = ys[m]
+        if (b_y > y) != (a_y > y):
+            dy = (a_y - b_y) if abs(a_y - b_y) > 1e-12 else 1e-12
+            if x < (a_x - b_x) * (y - b_y) / dy + b_x:
+                odd = not odd
+        v_x = b_x - a_x
+        v_y = b_y - a_y
+        den = v_x * v_x + v_y * v_y
+        if den <= 1e-12:
+            cx = a_x
+            cy = a_y
+        else:
+            t = ((x - a_x) * v_x + (y - a_y) * v_y) / den
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            cx = a_x + t * v_x
+            cy = a_y + t * v_y
+        dx = x - cx
+        dy2 = y - cy
+        d2 = dx * dx + dy2 * dy2
+        if min_d2 is None or d2 < min_d2:
+            min_d2 = d2
+    return odd, min_d2
+
+
+def signed_dist_to_boundary(x, y, outer, holes=None):
+    """Расстояние до границы помещения: >0 внутри (в контуре, вне отверстий), <0 снаружи."""
+    if len(outer) < 3:
+        return -1e9
+    inside, min_d2 = _odd_and_min_d2(x, y, outer)
+    for h in holes or []:
+        if len(h) < 3:
+            continue
+        odd, d2 = _odd_and_min_d2(x, y, h)
+        if odd:
+            inside = False
+        if d2 is not None and (min_d2 is None or d2 < min_d2):
+            min_d2 = d2
+    dist = 0.0 if min_d2 is None else min_d2 ** 0.5
+    return dist if inside else -dist
+
+
+def segments_intersect(p1x, p1y, p2x, p2y, p3x, p3y, p4x, p4y, tol=1e-9):
+    """Пересечение отрезков p1p2 и p3p4: (ok, t, u, (ix, iy)) или (False, None, None, None)."""
+    rx, ry = p2x - p1x, p2y - p1y
+    sx, sy = p4x - p3x, p4y - p3y
+    denom = rx * sy - ry * sx
+    if abs(denom) < tol:
+        return False, None, None, None
+    qx, qy = p3x - p1x, p3y - p1y
+    t = (qx * sy - qy * sx) / denom
+    u = (qx * ry - qy * rx) / denom
+    if -tol <= t <= 1.0 + tol and -tol <= u <= 1.0 + tol:
+        return True, t, u, (p1x + rx * t, p1y + ry * t)
+    return False, None, None, None
+
+
+def _collinear(ax, ay, bx, by, cx, cy, tol):
+    return abs((bx - ax) * (cy - by) - (by - ay) * (cx - bx)) < tol
+
+
+def simplify_polygon(loop, min_dist=0.01, collinear_tol=0.01, passes=3):
+    """Индексы вершин контура без дублей (ближе min_dist) и коллинеарных вершин."""
+    xs, ys = loop.xs, loop.ys
+    n = len(xs)
+    if n < 3:
+        return list(range(n))
+    keep = [0]
+    for i in range(1, n):
+        k = keep[-1]
+        if ((xs[i] - xs[k]) ** 2 + (ys[i] - ys[k]) ** 2) ** 0.5 > min_dist:
+            keep.append(i)
+    if len(keep) > 1:
+        f, l = keep[0], keep[-1]
+        if ((xs[f] - xs[l]) ** 2 + (ys[f] - ys[l]) ** 2) ** 0.5 < min_dist:
+            keep.pop()
+    if len(keep) < 3:
+        return keep
+    for _ in range(passes):
+        m = len(keep)
+        if m < 3:
+            break
+        kept = []
+        for i in range(m):
+            a, b, c = keep[i - 1], keep[i], keep[(i + 1) % m]
+            if not _collinear(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], collinear_tol):
+                kept.append(b)
+        if len(kept) == m:
+            break
+        keep = kept
+    return keep
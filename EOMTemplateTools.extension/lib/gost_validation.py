@@ -0,0 +1,762 @@
+# -*- coding: utf-8 -*-
+"""Движок проверки размещения электрооборудования по ГОСТ/СП (ВалидацияГОСТ).
+
+Все категории собираются один раз в общий контекст (`ValidationContext`):
+точки элементов, принадлежность помещениям (через RoomSpatialIndex адаптера)
+и индексы расстояний (газопроводы — `SegmentIndex`, раковины — `BoxIndex`)
+строятся лениво при первом обращении и переиспользуются всеми правилами.
+Правила — плагины (`@rule`), каждое получает контекст и возвращает список
+нарушений; `run_rules` замеряет время каждого правила и общих этапов.
+
+Доступ к Revit инкапсулирован в адаптере (см. script.py ВалидацииГОСТ):
+    collect_electrical(), collect_rooms(), collect_plumbing(), collect_gas_pipes(),
+    element_id(e), point(e) -> (x, y, z) | None, room_id(e, point) -> int | None,
+    height_mm(e), room_perimeter_mm(room), room_area_m2(room),
+    curve_segments(e) -> [((x, y, z), (x, y, z)), ...], bbox(e) -> (min, max) | None,
+    is_socket(e), is_switch(e), is_kitchen(room), is_bathroom(room),
+    is_bath_fixture(e), is_sink_fixture(e).
+
+Инкрементальный режим (`validate_incremental`) хранит в `ValidationState`
+слепки элементов, принадлежность помещениям и нарушения по объектам и
+пересчитывает только изменённое. Дополнительно адаптер предоставляет
+snapshot(e) -> сравнимое значение (меняется при изменении элемента) и,
+необязательно, rooms_changed() — сброс своих кэшей помещений.
+
+При отслеживании (state.tracking) категории заново не собираются: состав
+берётся из состояния, а id из DocumentChanged (`note_changes`) разбираются
+по одному через необязательные element(id) -> элемент | None и
+kind(e) -> 'electrical' | 'room' | 'plumbing' | 'gas_pipe' | None. Точки
+неизменённых элементов и индексы расстояний (если их категории не менялись)
+переходят из прошлого прогона.
+"""
+
+import math
+import time
+
+from segment_index import BoxIndex, SegmentIndex
+from utils_units import ft_to_mm, mm_to_ft
+
+
+# ----------------------------- Нормативы -----------------------------
+NORM_SOCKET_HEIGHT = u'СП 256.1325800.2016, п. 15.30'
+NORM_SWITCH_HEIGHT = u'СП 256.1325800.2016, п. 15.28'
+NORM_SOCKET_COUNT_ROOM = u'СП 256.1325800.2016, п. 15.29'
+NORM_SOCKET_COUNT_KITCHEN = u'СП 256.1325800.2016, п. 15.29'
+NORM_GAS_DISTANCE = u'ПУЭ п. 7.1.50'
+NORM_BATHROOM_ZONE = u'ГОСТ Р 50571.7.701-2013'
+NORM_SINK_DISTANCE = u'СП 256.1325800.2016, п. 15.29'
+
+GAS_MIN_DISTANCE_MM = 500.0
+SINK_MIN_DISTANCE_MM = 600.0
+BATH_ZONE_MM = 600.0
+
+
+def make_violation(check_name, element, problem, norm):
+    return {
+        'check': check_name,
+        'element': element,
+        'problem': problem,
+        'norm': norm
+    }
+
+
+class ValidationContext(object):
+    """Общие данные прогона проверок; всё вычисляется не более одного раза.
+
+    Args:
+        adapter: доступ к документу (см. описание модуля).
+        clock: источник времени для замеров (по умолчанию time.time).
+    """
+
+    def __init__(self, adapter, clock=None):
+        self.adapter = adapter
+        self.clock = clock or time.time
+        self.stage_timings = []
+        self._stage_total = 0.0
+        self._cache = {}
+        self._points = {}
+        self._room_ids = {}
+
+    def preset(self, name, value):
+        """Подставить готовое значение общих данных (без замера времени)."""
+        self._cache[name] = value
+
+    def _get(self, name, factory):
+        if name in self._cache:
+            return self._cache[name]
+        t0 = self.clock()
+        value = factory()
+        dt = self.clock() - t0
+        self.stage_timings.append((name, dt))
+        self._stage_total += dt
+        self._cache[name] = value
+        return value
+
+    # --- Категории (один сбор на прогон) ---
+    @property
+    def electrical(self):
+        return self._get('electrical', lambda: list(self.adapter.collect_electrical() or []))
+
+    @property
+    def sockets(self):
+        return self._get('sockets', lambda: [e for e in self.electrical if self.adapter.is_socket(e)])
+
+    @property
+    def switches(self):
+        return self._get('switches', lambda: [e for e in self.electrical if self.adapter.is_switch(e)])
+
+    @property
+    def rooms(self):
+        return self._get('rooms', lambda: list(self.adapter.collect_rooms() or []))
+
+    @property
+    def plumbing(self):
+        return self._get('plumbing', lambda: list(self.adapter.collect_plumbing() or []))
+
+    @property
+    def bath_fixtures(self):
+        return self._get('bath_fixtures', lambda: [f for f in self.plumbing if self.adapter.is_bath_fixture(f)])
+
+    @property
+    def sinks(self):
+        return self._get('sinks', lambda: [f for f in self.plumbing if self.adapter.is_sink_fixture(f)])
+
+    @property
+    def gas_pipes(self):
+        return self._get('gas_pipes', lambda: list(self.adapter.collect_gas_pipes() or []))
+
+    # --- Точки и помещения (по одному разу на элемент) ---
+    def point(self, elem):
+        key = self.adapter.element_id(elem)
+        if key is None:
+            return self.adapter.point(elem)
+        if key not in self._points:
+            self._points[key] = self.adapter.point(elem)
+        return self._points[key]
+
+    def room_id(self, elem):
+        key = self.adapter.element_id(elem)
+        if key is not None and key in self._room_ids:
+            return self._room_ids[key]
+        try:
+            rid = self.adapter.room_id(elem, self.point(elem))
+        except Exception:
+            rid = None
+        if key is not None:
+            self._room_ids[key] = rid
+        return rid
+
+    def group_by_room(self, elems):
+        """{room_id: [elements]} (порядок элементов сохраняется)."""
+        result = {}
+        for e in elems:
+            rid = self.room_id(e)
+            if rid is None:
+                continue
+            result.setdefault(rid, []).append(e)
+        return result
+
+    def preset_room_id(self, key, room_id):
+        """Принадлежность помещению из прошлого прогона (инкрементальный режим)."""
+        self._room_ids[key] = room_id
+
+    def preset_point(self, key, point):
+        """Точка элемента из прошлого прогона (инкрементальный режим)."""
+        self._points[key] = point
+
+    @property
+    def sockets_by_room(self):
+        return self._get('sockets_by_room', lambda: self.group_by_room(self.sockets))
+
+    @property
+    def bath_fixtures_by_room(self):
+        return self._get('bath_fixtures_by_room', lambda: self.group_by_room(self.bath_fixtures))
+
+    # --- Индексы расстояний ---
+    @property
+    def gas_index(self):
+        def _build():
+            index = SegmentIndex(mm_to_ft(GAS_MIN_DISTANCE_MM) * 2.0)
+            for p in self.gas_pipes:
+                try:
+                    segments = self.adapter.curve_segments(p) or []
+                except Exception:
+                    segments = []
+                for a, b in segments:
+                    index.add(a, b, p)
+            return index
+        return self._get('gas_index', _build)
+
+    @property
+    def sink_index(self):
+        def _build():
+            index = BoxIndex(mm_to_ft(SINK_MIN_DISTANCE_MM) * 2.0)
+            for s in self.sinks:
+                try:
+                    box = self.adapter.bbox(s)
+                except Exception:
+                    box = None
+                if box:
+                    index.add(box[0], box[1], s)
+            return index
+        return self._get('sink_index', _build)
+
+
+# Категории элементов контекста (для инкрементального режима).
+CATEGORY_SOCKET = 'socket'
+CATEGORY_SWITCH = 'switch'
+CATEGORY_ROOM = 'room'
+CATEGORY_GAS_PIPE = 'gas_pipe'
+CATEGORY_SINK = 'sink'
+CATEGORY_BATH = 'bath'
+
+# Элементы, принадлежность которых помещениям влияет на правила помещений.
+MEMBER_CATEGORIES = (CATEGORY_SOCKET, CATEGORY_SWITCH, CATEGORY_SINK, CATEGORY_BATH)
+
+# Свойства контекста по категориям (порядок = приоритет, как в _context_categories).
+_CATEGORY_PROPERTIES = (
+    (CATEGORY_SOCKET, 'sockets'),
+    (CATEGORY_SWITCH, 'switches'),
+    (CATEGORY_ROOM, 'rooms'),
+    (CATEGORY_GAS_PIPE, 'gas_pipes'),
+    (CATEGORY_SINK, 'sinks'),
+    (CATEGORY_BATH, 'bath_fixtures'),
+)
+
+# Индексы расстояний, переживающие прогон, пока не менялась их категория.
+_REUSABLE_INDEXES = (('gas_index', CATEGORY_GAS_PIPE), ('sink_index', CATEGORY_SINK))
+
+
+def _context_categories(ctx):
+    """[(категория, элементы)] в порядке приоритета (первая категория элемента побеждает)."""
+    return [
+        (CATEGORY_SOCKET, ctx.sockets),
+        (CATEGORY_SWITCH, ctx.switches),
+        (CATEGORY_ROOM, ctx.rooms),
+        (CATEGORY_GAS_PIPE, ctx.gas_pipes),
+        (CATEGORY_SINK, ctx.sinks),
+        (CATEGORY_BATH, ctx.bath_fixtures),
+    ]
+
+
+_SCOPE_SUBJECTS = {
+    CATEGORY_SOCKET: lambda ctx: ctx.sockets,
+    CATEGORY_SWITCH: lambda ctx: ctx.switches,
+    CATEGORY_ROOM: lambda ctx: ctx.rooms,
+}
+
+
+class Rule(object):
+    """Правило-плагин.
+
+    scope=None — правило целиком: fn(ctx) -> нарушения (в инкрементальном
+    режиме выполняется всегда). scope='socket'/'switch'/'room' — правило по
+    объектам: fn(ctx, subject) -> нарушения одного объекта; inputs —
+    категории, изменение которых требует полного перезапуска правила.
+    """
+    __slots__ = ('rule_id', 'name', 'norm', 'fn', 'scope', 'inputs')
+
+    def __init__(self, rule_id, name, norm, fn, scope=None, inputs=()):
+        self.rule_id = rule_id
+        self.name = name
+        self.norm = norm
+        self.fn = fn
+        self.scope = scope
+        self.inputs = tuple(inputs or ())
+
+    def subjects(self, ctx):
+        return list(_SCOPE_SUBJECTS[self.scope](ctx)) if self.scope else []
+
+    def check(self, ctx, subject):
+        return list(self.fn(ctx, subject) or [])
+
+    def __call__(self, ctx):
+        if not self.scope:
+            return list(self.fn(ctx) or [])
+        out = []
+        for subject in self.subjects(ctx):
+            out.extend(self.check(ctx, subject))
+        return out
+
+
+RULES = []
+
+
+def rule(rule_id, name, norm, scope=None, inputs=()):
+    """Декоратор: зарегистрировать правило в RULES (порядок объявления = порядок отчёта)."""
+    def _wrap(fn):
+        r = Rule(rule_id, name, norm, fn, scope=scope, inputs=inputs)
+        for i, old in enumerate(RULES):
+            if old.rule_id == rule_id:
+                RULES[i] = r
+                return fn
+        RULES.append(r)
+        return fn
+    return _wrap
+
+
+class ValidationReport(object):
+    """Результат прогона: нарушения, время правил и общих этапов (секунды).
+
+    incremental — прогон по изменениям; changed — число изменённых элементов.
+    """
+
+    def __init__(self, violations, rule_timings, stage_timings, total_seconds, incremental=False, changed=None):
+        self.violations = violations
+        self.rule_timings = rule_timings
+        self.stage_timings = stage_timings
+        self.total_seconds = total_seconds
+        self.incremental = incremental
+        self.changed = changed
+
+    def timing_lines(self):
+        lines = []
+        for t in self.rule_timings:
+            lines.append(u'{0}: {1:.2f} с ({2} наруш.)'.format(t['name'], t['seconds'], t['violations']))
+        shared = sum(dt for _, dt in self.stage_timings)
+        lines.append(u'Общие данные: {0:.2f} с'.format(shared))
+        if self.incremental:
+            lines.append(u'Изменено элементов: {0}'.format(self.changed or 0))
+        lines.append(u'Всего: {0:.2f} с'.format(self.total_seconds))
+        return lines
+
+
+def _timed(ctx, fn):
+    """(результат, ошибка, время без общих данных, построенных внутри fn)."""
+    stage_before = ctx._stage_total
+    t0 = ctx.clock()
+    try:
+        result, error = fn(), None
+    except Exception as ex:
+        result, error = None, u'{0}'.format(ex)
+    elapsed = ctx.clock() - t0 - (ctx._stage_total - stage_before)
+    return result, error, max(0.0, elapsed)
+
+
+def run_rules(ctx, rules=None):
+    """Выполнить правила над общим контекстом; ошибка правила не прерывает прогон.
+
+    Время правила — без общих данных, построенных во время его выполнения
+    (они учитываются в stage_timings).
+    """
+    violations = []
+    rule_timings = []
+    t_start = ctx.clock()
+    for r in (RULES if rules is None else rules):
+        found, error, elapsed = _timed(ctx, lambda: r(ctx))
+        found = found or []
+        violations.extend(found)
+        rule_timings.append({
+            'rule': r.rule_id,
+            'name': r.name,
+            'seconds': elapsed,
+            'violations': len(found),
+            'error': error,
+        })
+    return ValidationReport(violations, rule_timings, list(ctx.stage_timings), ctx.clock() - t_start)
+
+
+# ----------------------------- Правила -----------------------------
+@rule('socket_height', u'Высота розеток', NORM_SOCKET_HEIGHT, scope=CATEGORY_SOCKET)
+def check_socket_height(ctx, s):
+    h = ctx.adapter.height_mm(s)
+    if h is None:
+        return []
+    if h < 300 or h > 1000:
+        problem = u'Высота розетки {0:.0f} мм (норма 300-1000 мм)'.format(h)
+        return [make_violation(u'Высота розеток', s, problem, NORM_SOCKET_HEIGHT)]
+    return []
+
+
+@rule('switch_height', u'Высота выключателей', NORM_SWITCH_HEIGHT, scope=CATEGORY_SWITCH)
+def check_switch_height(ctx, s):
+    h = ctx.adapter.height_mm(s)
+    if h is None:
+        return []
+    if h < 800 or h > 1700:
+        problem = u'Высота выключателя {0:.0f} мм (норма 800-1700 мм)'.format(h)
+        return [make_violation(u'Высота выключателей', s, problem, NORM_SWITCH_HEIGHT)]
+    return []
+
+
+@rule('socket_count_perimeter', u'Количество розеток по периметру', NORM_SOCKET_COUNT_ROOM, scope=CATEGORY_ROOM)
+def check_socket_count_per_perimeter(ctx, room):
+    try:
+        perim_mm = ctx.adapter.room_perimeter_mm(room)
+        if perim_mm is None:
+            return []
+        required = int(math.ceil(perim_mm / 3000.0))
+        if required <= 0:
+            return []
+        count = len(ctx.sockets_by_room.get(ctx.adapter.element_id(room), []))
+        if count < required:
+            problem = u'Розеток: {0}, требуется: {1} (периметр {2:.0f} мм)'.format(count, required, perim_mm)
+            return [make_violation(u'Количество розеток по периметру', room, problem, NORM_SOCKET_COUNT_ROOM)]
+    except Exception:
+        pass
+    return []
+
+
+@rule('kitchen_sockets', u'Розетки на кухне', NORM_SOCKET_COUNT_KITCHEN, scope=CATEGORY_ROOM)
+def check_kitchen_sockets(ctx, room):
+    if not ctx.adapter.is_kitchen(room):
+        return []
+    try:
+        area_m2 = ctx.adapter.room_area_m2(room)
+        if area_m2 is None:
+            return []
+        required = 3 if area_m2 <= 8.0 else 4
+        count = len(ctx.sockets_by_room.get(ctx.adapter.element_id(room), []))
+        if count < required:
+            problem = u'Розеток: {0}, требуется: {1} (площадь {2:.2f} м²)'.format(count, required, area_m2)
+            return [make_violation(u'Розетки на кухне', room, problem, NORM_SOCKET_COUNT_KITCHEN)]
+    except Exception:
+        pass
+    return []
+
+
+@rule('gas_distance', u'Расстояние до газопровода', NORM_GAS_DISTANCE,
+      scope=CATEGORY_SOCKET, inputs=(CATEGORY_GAS_PIPE,))
+def check_distance_from_gas(ctx, s):
+    if not ctx.gas_pipes:
+        return []
+    pt = ctx.point(s)
+    if not pt:
+        return []
+    min_dist = mm_to_ft(GAS_MIN_DISTANCE_MM)
+    _, d = ctx.gas_index.nearest(pt, min_dist)
+    if d is not None and d < min_dist:
+        problem = u'Расстояние до газопровода {0:.0f} мм (норма ≥ 500 мм)'.format(ft_to_mm(d))
+        return [make_violation(u'Расстояние до газопровода', s, problem, NORM_GAS_DISTANCE)]
+    return []
+
+
+@rule('bathroom_zones', u'Запретная зона ванной', NORM_BATHROOM_ZONE, scope=CATEGORY_ROOM)
+def check_bathroom_zones(ctx, room):
+    if not ctx.bath_fixtures or not ctx.adapter.is_bathroom(room):
+        return []
+    rid = ctx.adapter.element_id(room)
+    room_sockets = ctx.sockets_by_room.get(rid, [])
+    if not room_sockets:
+        return []
+    violations = []
+    pad = mm_to_ft(BATH_ZONE_MM)
+    for fx in ctx.bath_fixtures_by_room.get(rid, []):
+        try:
+            box = ctx.adapter.bbox(fx)
+        except Exception:
+            box = None
+        if not box:
+            continue
+        lo, hi = box
+        for s in room_sockets:
+            pt = ctx.point(s)
+            if not pt:
+                continue
+            if (lo[0] - pad <= pt[0] <= hi[0] + pad) and (lo[1] - pad <= pt[1] <= hi[1] + pad):
+                problem = u'Розетка в зоне 600 мм от ванны/душа'
+                violations.append(make_violation(u'Запретная зона ванной', s, problem, NORM_BATHROOM_ZONE))
+    return violations
+
+
+@rule('sink_distance', u'Расстояние до раковин', NORM_SINK_DISTANCE,
+      scope=CATEGORY_SOCKET, inputs=(CATEGORY_SINK,))
+def check_distance_from_sinks(ctx, s):
+    if not ctx.sinks:
+        return []
+    pt = ctx.point(s)
+    if not pt:
+        return []
+    min_dist = mm_to_ft(SINK_MIN_DISTANCE_MM)
+    _, d = ctx.sink_index.nearest(pt, min_dist)
+    if d is not None and d < min_dist:
+        problem = u'Расстояние до раковины {0:.0f} мм (норма ≥ 600 мм)'.format(ft_to_mm(d))
+        return [make_violation(u'Расстояние до раковин', s, problem, NORM_SINK_DISTANCE)]
+    return []
+
+
+def validate(adapter, rules=None, clock=None):
+    """Полный прогон: новый контекст + все (или указанные) правила."""
+    return run_rules(ValidationContext(adapter, clock=clock), rules)
+
+
+# ----------------------------- Инкрементальный режим -----------------------------
+class ValidationState(object):
+    """Состояние последнего прогона документа.
+
+    snapshot — {id: слепок элемента} (adapter.snapshot), categories — {id: категория},
+    elements — {id: элемент}, order — id в порядке документа, room_of — {id элемента:
+    id помещения}, points — {id: точка}, indexes — {имя: индекс расстояний},
+    results — {rule_id: {id объекта: нарушения}} (для правил без scope — {None: нарушения}).
+    pending — id из DocumentChanged; tracking=True — изменения приходят только через
+    note_changes (без сбора категорий и сравнения слепков).
+    """
+
+    def __init__(self):
+        self.rule_ids = None
+        self.snapshot = {}
+        self.categories = {}
+        self.elements = {}
+        self.order = []
+        self.room_of = {}
+        self.points = {}
+        self.indexes = {}
+        self.results = {}
+        self.pending = set()
+        self.tracking = False
+
+    @property
+    def ready(self):
+        return self.rule_ids is not None
+
+
+def note_changes(state, added=(), modified=(), deleted=()):
+    """Учесть id из события DocumentChanged (int или ElementId)."""
+    for ids in (added, modified, deleted):
+        for eid in ids or ():
+            try:
+                state.pending.add(int(eid))
+            except Exception:
+                try:
+                    state.pending.add(int(eid.IntegerValue))
+                except Exception:
+                    continue
+
+
+_STATES = {}
+
+
+def state_for(key):
+    """ValidationState документа (живёт, пока модуль в sys.modules)."""
+    state = _STATES.get(key)
+    if state is None:
+        state = ValidationState()
+        _STATES[key] = state
+    return state
+
+
+def reset_state(key=None):
+    if key is None:
+        _STATES.clear()
+    else:
+        _STATES.pop(key, None)
+
+
+def _current_categories(ctx):
+    cats = {}
+    elems = {}
+    order = []
+    for cat, items in _context_categories(ctx):
+        for e in items:
+            eid = ctx.adapter.element_id(e)
+            if eid is None or eid in cats:
+                continue
+            cats[eid] = cat
+            elems[eid] = e
+            order.append(eid)
+    return cats, elems, order
+
+
+def _can_track(adapter):
+    return hasattr(adapter, 'element') and hasattr(adapter, 'kind')
+
+
+def _classify(adapter, elem):
+    """Категория контекста элемента (как её дал бы сбор категорий) или None."""
+    try:
+        kind = adapter.kind(elem)
+        if kind == 'electrical':
+            if adapter.is_socket(elem):
+                return CATEGORY_SOCKET
+            if adapter.is_switch(elem):
+                return CATEGORY_SWITCH
+        elif kind == 'room':
+            return CATEGORY_ROOM
+        elif kind == 'gas_pipe':
+            return CATEGORY_GAS_PIPE
+        elif kind == 'plumbing':
+            if adapter.is_sink_fixture(elem):
+                return CATEGORY_SINK
+            if adapter.is_bath_fixture(elem):
+                return CATEGORY_BATH
+    except Exception:
+        pass
+    return None
+
+
+def _tracked_categories(adapter, state):
+    """Состав из состояния, обновлённый по id из DocumentChanged (без сбора категорий)."""
+    cats = dict(state.categories)
+    elems = dict(state.elements)
+    for eid in state.pending:
+        try:
+            e = adapter.element(eid)
+        except Exception:
+            e = None
+        cat = _classify(adapter, e) if e is not None else None
+        if cat is None:
+            cats.pop(eid, None)
+            elems.pop(eid, None)
+        else:
+            cats[eid] = cat
+            elems[eid] = e
+    order = [eid for eid in state.order if eid in cats]
+    known = set(order)
+    order.extend(sorted(eid for eid in cats if eid not in known))
+    return cats, elems, order
+
+
+def _preset_categories(ctx, cats, elems, order):
+    for cat, name in _CATEGORY_PROPERTIES:
+        ctx.preset(name, [elems[eid] for eid in order if cats[eid] == cat])
+
+
+def _snapshot_of(ctx, elem):
+    try:
+        return ctx.adapter.snapshot(elem)
+    except Exception:
+        return None
+
+
+def _changed_ids(ctx, state, cats, elems):
+    """Изменённые id и обновлённые слепки."""
+    snapshot = dict(state.snapshot)
+    appeared = set(cats) ^ set(state.categories)
+    moved = set(eid for eid in cats if eid in state.categories and state.categories[eid] != cats[eid])
+    if state.tracking:
+        changed = set(state.pending) | appeared | moved
+        for eid in changed:
+            if eid in elems:
+                snapshot[eid] = _snapshot_of(ctx, elems[eid])
+            else:
+                snapshot.pop(eid, None)
+    else:
+        changed = appeared | moved
+        snapshot = {}
+        for eid, e in elems.items():
+            sig = _snapshot_of(ctx, e)
+            snapshot[eid] = sig
+            if eid not in changed and state.snapshot.get(eid) != sig:
+                changed.add(eid)
+    changed = set(eid for eid in changed if eid in cats or eid in state.categories)
+    return changed, snapshot
+
+
+def _member_room_ids(ctx, cats, elems):
+    return dict((eid, ctx.room_id(elems[eid])) for eid, cat in cats.items() if cat in MEMBER_CATEGORIES)
+
+
+def _results_for(ctx, r, subjects, store):
+    """Пересчитать нарушения правила r для объектов subjects в store."""
+    for subject in subjects:
+        sid = ctx.adapter.element_id(subject)
+        store[sid] = r.check(ctx, subject)
+
+
+def validate_incremental(adapter, state, rules=None, clock=None):
+    """Прогон по изменениям с прошлого прогона state (первый прогон — полный).
+
+    Правило по объектам пересчитывается только для изменённых объектов своей
+    категории и помещений, состав которых (розетки, выключатели, сантехника)
+    или свойства изменились; при изменении категорий из inputs — целиком.
+    """
+    ctx = ValidationContext(adapter, clock=clock)
+    rules = list(RULES if rules is None else rules)
+    rule_ids = tuple(r.rule_id for r in rules)
+    t_start = ctx.clock()
+
+    full = (not state.ready) or state.rule_ids != rule_ids
+    if not full and state.tracking and _can_track(adapter):
+        cats, elems, order = _tracked_categories(adapter, state)
+        _preset_categories(ctx, cats, elems, order)
+    else:
+        cats, elems, order = _current_categories(ctx)
+    if full:
+        changed = set(cats)
+        snapshot = dict((eid, _snapshot_of(ctx, e)) for eid, e in elems.items())
+        state.results = {}
+    else:
+        changed, snapshot = _changed_ids(ctx, state, cats, elems)
+
+    changed_cats = set(cats.get(eid) or state.categories.get(eid) for eid in changed)
+    rooms_changed = CATEGORY_ROOM in changed_cats
+
+    if not full:
+        for eid, pt in state.points.items():
+            if eid not in changed and eid in cats:
+                ctx.preset_point(eid, pt)
+        for name, cat in _REUSABLE_INDEXES:
+            if name in state.indexes and cat not in changed_cats:
+                ctx.preset(name, state.indexes[name])
+
+    # Принадлежность помещениям: неизменённые элементы берут её из состояния.
+    if not full and not rooms_changed:
+        for eid, rid in state.room_of.items():
+            if eid not in changed and eid in cats:
+                ctx.preset_room_id(eid, rid)
+    elif not full:
+        hook = getattr(adapter, 'rooms_changed', None)
+        if hook is not None:
+            hook()
+    room_of = _member_room_ids(ctx, cats, elems)
+
+    dirty_rooms = set(eid for eid in changed if cats.get(eid) == CATEGORY_ROOM)
+    for eid in set(room_of) | set(state.room_of):
+        old, new = state.room_of.get(eid), room_of.get(eid)
+        if eid in changed or old != new:
+            dirty_rooms.update(r for r in (old, new) if r is not None)
+
+    violations = []
+    rule_timings = []
+    for r in rules:
+        store = state.results.setdefault(r.rule_id, {})
+
+        def _run(r=r, store=store):
+            if not r.scope:
+                store.clear()
+                store[None] = list(r(ctx) or [])
+                return 1
+            subjects = r.subjects(ctx)
+            if full or any(c in changed_cats for c in r.inputs):
+                store.clear()
+                todo = subjects
+            else:
+                present = set(ctx.adapter.element_id(x) for x in subjects)
+                for sid in list(store):
+                    if sid not in present:
+                        store.pop(sid, None)
+                if r.scope == CATEGORY_ROOM:
+                    todo = [x for x in subjects if ctx.adapter.element_id(x) in dirty_rooms]
+                else:
+                    todo = [x for x in subjects if ctx.adapter.element_id(x) in changed]
+            _results_for(ctx, r, todo, store)
+            return len(todo)
+
+        evaluated, error, elapsed = _timed(ctx, _run)
+        if r.scope:
+            found = []
+            for subject in r.subjects(ctx):
+                found.extend(store.get(ctx.adapter.element_id(subject)) or [])
+        else:
+            found = list(store.get(None) or [])
+        violations.extend(found)
+        rule_timings.append({
+            'rule': r.rule_id,
+            'name': r.name,
+            'seconds': elapsed,
+            'violations': len(found),
+            'evaluated': evaluated or 0,
+            'error': error,
+        })
+
+    state.rule_ids = rule_ids
+    state.snapshot = snapshot
+    state.categories = cats
+    state.elements = elems
+    state.order = order
+    state.room_of = room_of
+    state.points = dict((eid, pt) for eid, pt in ctx._points.items() if eid in cats)
+    state.indexes = dict((name, ctx._cache[name]) for name, _ in _REUSABLE_INDEXES if name in ctx._cache)
+    state.pending = set()
+    return ValidationReport(violations, rule_timings, list(ctx.stage_timings), ctx.clock() - t_start,
+                            incremental=not full, changed=len(changed))
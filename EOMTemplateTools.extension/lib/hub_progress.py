@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""События прогресса задач Hub (чистый Python).
+
+Инструмент сообщает этап, processed/total; события копятся и передаются
+приёмнику (sink) не чаще раза в PROGRESS_FLUSH_INTERVAL_SEC. Приёмник
+регистрирует Hub monitor (через AppDomain, т.к. команды pyRevit могут
+выполняться в разных движках) и отдаёт события EOMHub по командному каналу.
+
+Вне запуска из Hub (нет EOM_HUB_JOB_ID) репортёр ничего не делает.
+"""
+
+import os
+import time
+
+PROGRESS_FLUSH_INTERVAL_SEC = 0.2
+_PROGRESS_SINK_KEY = 'eom_hub_progress_sink'
+_PROGRESS_SINK = [None]
+
+
+def set_progress_sink(sink):
+    """Зарегистрировать sink(job_id, events) для пакетов событий (None — снять)."""
+    _PROGRESS_SINK[0] = sink
+    try:
+        import System
+        System.AppDomain.CurrentDomain.SetData(_PROGRESS_SINK_KEY, sink)
+    except Exception:
+        pass
+
+
+def get_progress_sink():
+    try:
+        import System
+        sink = System.AppDomain.CurrentDomain.GetData(_PROGRESS_SINK_KEY)
+        if sink is not None:
+            return sink
+    except Exception:
+        pass
+    return _PROGRESS_SINK[0]
+
+
+class ProgressReporter(object):
+    """Прогресс одной задачи: этап, processed/total, скорость и ETA.
+
+    Args:
+        job_id: идентификатор задачи Hub (без него — no-op).
+        tool_id: идентификатор инструмента.
+        sink: приёмник sink(job_id, events).
+        interval: минимальный интервал между отправками, сек.
+        clock: функция времени (для тестов).
+    """
+
+    def __init__(self, job_id=None, tool_id=None, sink=None, interval=PROGRESS_FLUSH_INTERVAL_SEC, clock=None):
+        self.job_id = job_id
+        self.tool_id = tool_id
+        self.sink = sink
+        self.interval = float(interval)
+        self._clock = clock or time.time
+        self._seq = 0
+        self._queue = []
+        self._last_flush = None
+        self.stage_name = None
+        self.processed = 0
+        self.total = None
+        self._stage_started = self._clock()
+
+    @property
+    def enabled(self):
+        return bool(self.job_id) and self.sink is not None
+
+    def stage(self, name, total=None):
+        """Начать новый этап; состояние предыдущего попадает в очередь."""
+        if self.stage_name is not None:
+            self._enqueue()
+        self.stage_name = name
+        self.processed = 0
+        self.total = total
+        self._stage_started = self._clock()
+        self._enqueue()
+        self.flush()
+
+    def update(self, processed=None, total=None, step=1):
+        """Задать processed (или прибавить step); отправить, если прошёл интервал."""
+        if processed is None:
+            self.processed += step
+        else:
+            self.processed = processed
+        if total is not None:
+            self.total = total
+        self.flush()
+
+    def snapshot(self):
+        now = self._clock()
+        elapsed = max(now - self._stage_started, 0.0)
+        rate = (self.processed / elapsed) if elapsed > 0 else 0.0
+        eta = None
+        if self.total and rate > 0:
+            eta = max(self.total - self.processed, 0) / rate
+        self._seq += 1
+        return {
+            'seq': self._seq,
+            'job_id': self.job_id,
+            'tool_id': self.tool_id,
+            'stage': self.stage_name,
+            'processed': self.processed,
+            'total': self.total,
+            'rate': rate,
+            'eta_sec': eta,
+            'elapsed_sec': elapsed,
+            'timestamp': now,
+        }
+
+    def _enqueue(self):
+        if self.enabled:
+            self._queue.append(self.snapshot())
+
+    def flush(self, force=False):
+        if not self.enabled:
+            return False
+        now = self._clock()
+        if not force and self._last_flush is not None and (now - self._last_flush) < self.interval:
+            return False
+        last = self._queue[-1] if self._queue else None
+        if last is None or last.get('processed') != self.processed or last.get('stage') != self.stage_name:
+            self._enqueue()
+        events, self._queue = self._queue, []
+        self._last_flush = now
+        try:
+            self.sink(self.job_id, events)
+        except Exception:
+            pass
+        return True
+
+    def close(self):
+        """Финальная отправка независимо от интервала."""
+        if self.enabled:
+            self._enqueue()
+            self.flush(force=True)
+
+
+def progress_reporter(tool_id=None):
+    """ProgressReporter текущей задачи Hub (EOM_HUB_JOB_ID); no-op вне Hub."""
+    job_id = os.environ.get('EOM_HUB_JOB_ID')
+    return ProgressReporter(
+        job_id=job_id,
+        tool_id=tool_id or os.environ.get('EOM_HUB_TOOL_ID'),
+        sink=get_progress_sink() if job_id else None,
+    )
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Реестр сессий Hub: session id -> расположение статус-файла monitor.
+
+Один известный файл `eom_hub_sessions.json` в корневом TEMP. Monitor
+(write_status) регистрирует свою сессию, EOMHub находит статус-файл по
+session id одним чтением вместо обхода UUID-подпапок TEMP.
+
+Формат:
+    {"version": 1, "sessions": {"<session id>": {"statusFile": ..., "tempDir": ...,
+     "commandPort": ..., "pid": ..., "updated": <unix time>}}}
+
+Совместим с IronPython 2.7 и CPython 3 (формат читает EOMHub/src/api/tools.py).
+"""
+
+import io
+import json
+import os
+import time
+
+REGISTRY_FILE_NAME = 'eom_hub_sessions.json'
+REGISTRY_VERSION = 1
+MAX_SESSIONS = 20
+SESSION_TTL_SEC = 7 * 24 * 3600
+
+
+def registry_path(directory):
+    return os.path.join(directory, REGISTRY_FILE_NAME)
+
+
+def read_sessions(directory):
+    """Словарь сессий реестра ({} если файла нет или он повреждён)."""
+    try:
+        with io.open(registry_path(directory), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get('version') != REGISTRY_VERSION:
+        return {}
+    sessions = data.get('sessions')
+    return sessions if isinstance(sessions, dict) else {}
+
+
+def _write_sessions(directory, sessions):
+    path = registry_path(directory)
+    tmp_path = u'{0}.{1}.tmp'.format(path, os.getpid())
+    text = json.dumps({'version': REGISTRY_VERSION, 'sessions': sessions}, ensure_ascii=False, indent=2)
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    with io.open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except Exception:
+        pass
+    os.rename(tmp_path, path)
+
+
+def _prune(sessions, now):
+    alive = {}
+    for sid, record in sessions.items():
+        if not isinstance(record, dict):
+            continue
+        if now - float(record.get('updated') or 0) > SESSION_TTL_SEC:
+            continue
+        status_file = record.get('statusFile')
+        if status_file and not os.path.exists(status_file):
+            continue
+        alive[sid] = record
+    if len(alive) > MAX_SESSIONS:
+        newest = sorted(alive.items(), key=lambda kv: float(kv[1].get('updated') or 0), reverse=True)
+        alive = dict(newest[:MAX_SESSIONS])
+    return alive
+
+
+def register_session(directory, session_id, record, attempts=2):
+    """Записать/обновить сессию в реестре; True, если запись видна после записи.
+
+    Несколько Revit могут писать реестр одновременно: после записи она
+    перечитывается и при потере повторяется.
+    """
+    if not directory or not session_id:
+        return False
+    entry = dict(record or {})
+    entry['updated'] = time.time()
+    for _ in range(max(1, int(attempts))):
+        sessions = _prune(read_sessions(directory), entry['updated'])
+        sessions[session_id] = entry
+        try:
+            _write_sessions(directory, sessions)
+        except Exception:
+            continue
+        current = read_sessions(directory).get(session_id)
+        if isinstance(current, dict) and current.get('statusFile') == entry.get('statusFile'):
+            return True
+    return False
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""Командный канал Hub <-> Revit monitor поверх loopback TCP (чистый Python).
+
+Протокол: одно соединение — один запрос. Запрос и ответ — JSON-объект в
+UTF-8, завершённый переводом строки. Запрос содержит `op` (run, cancel,
+status, progress, events) и `token`; порт и токен monitor публикует в статус-файле
+(`commandPort`, `commandToken`). Файловый протокол остаётся запасным.
+
+Совместим с IronPython 2.7 (сторона Revit) и CPython 3 (EOMHub, тесты).
+"""
+
+import json
+import socket
+import threading
+import uuid
+
+HOST = '127.0.0.1'
+MAX_MESSAGE_BYTES = 1024 * 1024
+CONNECT_TIMEOUT_SEC = 0.5
+IO_TIMEOUT_SEC = 2.0
+
+
+def _text(value):
+    try:
+        return u'{0}'.format(value)
+    except Exception:
+        try:
+            return repr(value)
+        except Exception:
+            return u''
+
+
+def new_token():
+    return uuid.uuid4().hex
+
+
+def encode_message(payload):
+    text = json.dumps(payload, ensure_ascii=False)
+    if not isinstance(text, bytes):
+        text = text.encode('utf-8')
+    return text + b'\n'
+
+
+def read_message(conn, limit=MAX_MESSAGE_BYTES):
+    """Прочитать один JSON-объект до перевода строки (None при обрыве/ошибке)."""
+    chunks = []
+    size = 0
+    while True:
+        data = conn.recv(65536)
+        if not data:
+            break
+        pos = data.find(b'\n')
+        if pos >= 0:
+            chunks.append(data[:pos])
+            break
+        chunks.append(data)
+        size += len(data)
+        if size > limit:
+            return None
+    raw = b''.join(chunks)
+    if not raw:
+        return None
+    try:
+        payload = json.loads(raw.decode('utf-8'))
+    except Exception:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def request(port, token, payload, timeout=IO_TIMEOUT_SEC):
+    """Отправить запрос monitor и вернуть ответ (dict) или None, если канал недоступен."""
+    try:
+        port = int(port)
+    except Exception:
+        return None
+    if port <= 0:
+        return None
+    message = dict(payload or {})
+    message['token'] = token
+    conn = None
+    try:
+        conn = socket.create_connection((HOST, port), CONNECT_TIMEOUT_SEC)
+        conn.settimeout(timeout)
+        conn.sendall(encode_message(message))
+        return read_message(conn)
+    except Exception:
+        return None
+    finally:
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class CommandServer(object):
+    """Однопоточный сервер запросов monitor.
+
+    Поток блокируется в accept() и не делает работы, пока нет запросов.
+    handler(request_dict) -> dict ответа; исключения превращаются в ok=False.
+
+    Args:
+        handler: обработчик запроса.
+        token: общий секрет из статус-файла (по умолчанию — случайный).
+        log: необязательная функция логирования.
+    """
+
+    def __init__(self, handler, token=None, log=None):
+        self.handler = handler
+        self.token = token or new_token()
+        self.port = None
+        self._log = log
+        self._sock = None
+        self._thread = None
+        self._stopped = False
+
+    def _debug(self, msg):
+        if self._log is not None:
+            try:
+                self._log(msg)
+            except Exception:
+                pass
+
+    def start(self, port=0):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind((HOST, int(port or 0)))
+            sock.listen(8)
+        except Exception:
+            sock.close()
+            raise
+        self._sock = sock
+        self.port = int(sock.getsockname()[1])
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+        self._debug(u'Command server listening on {0}:{1}'.format(HOST, self.port))
+        return self.port
+
+    @property
+    def running(self):
+        return bool(self._thread is not None and self._thread.is_alive() and not self._stopped)
+
+    def stop(self):
+        self._stopped = True
+        sock, self._sock = self._sock, None
+        if sock is None:
+            return
+        # accept() может не прерываться закрытием сокета: разбудить соединением.
+        try:
+            socket.create_connection((HOST, self.port), CONNECT_TIMEOUT_SEC).close()
+        except Exception:
+            pass
+        try:
+            sock.close()
+        except Exception:
+            pass
+
+    def _serve(self):
+        while not self._stopped:
+            sock = self._sock
+            if sock is None:
+                break
+            try:
+                conn, _addr = sock.accept()
+            except Exception:
+                if self._stopped:
+                    break
+                continue
+            if self._stopped:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                break
+            try:
+                self._handle(conn)
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def _handle(self, conn):
+        try:
+            conn.settimeout(IO_TIMEOUT_SEC)
+            message = read_message(conn)
+        except Exception:
+            return
+        if message is None:
+            return
+        if message.get('token') != self.token:
+            response = {'ok': False, 'error': 'unauthorized'}
+        else:
+            message.pop('token', None)
+            try:
+                response = self.handler(message)
+            except Exception as e:
+                self._debug(u'Command server handler error: ' + _text(e))
+                response = {'ok': False, 'error': _text(e)}
+            if not isinstance(response, dict):
+                response = {'ok': bool(response)}
+        try:
+            conn.sendall(encode_message(response))
+        except Exception:
+            pass
+
+
+def start_file_watcher(directory, pattern, callback):
+    """FileSystemWatcher (.NET) на командные файлы; None вне IronPython/.NET.
+
+    Позволяет monitor ждать событий файловой системы вместо частого опроса.
+    """
+    try:
+        from System.IO import FileSystemWatcher, NotifyFilters  # noqa: F401
+    except Exception:
+        return None
+    try:
+        watcher = FileSystemWatcher(directory, pattern)
+        watcher.IncludeSubdirectories = False
+        watcher.NotifyFilter = NotifyFilters.FileName | NotifyFilters.LastWrite | NotifyFilters.Size
+
+        def _on_event(sender, args):
+            try:
+                callback()
+            except Exception:
+                pass
+
+        watcher.Created += _on_event
+        watcher.Changed += _on_event
+        watcher.Renamed += _on_event
+        watcher.EnableRaisingEvents = True
+        return watcher
+    except Exception:
+        return None
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""Дисковый кэш извлечённой геометрии связей АР между сеансами Revit.
+
+Записи помещений, дверей и стен (id, уровень, точка двери, ось и толщина
+стены), контуры помещений и точки сантехприборов, однажды извлечённые из
+связи, сохраняются в компактный JSON в %TEMP%. Ключ — путь файла связи
+(`link_reader.try_get_link_path`), подпись — mtime и размер файла. При
+следующем открытии проекта с неизменённой связью всё это читается из кэша,
+без FilteredElementCollector, GetBoundarySegments и чтения параметров.
+
+Модуль не зависит от Revit API: всё хранится в виде кортежей (x, y, z).
+
+Отключить: EOM_LINK_CACHE=0. Другая папка: EOM_LINK_CACHE_DIR.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+CACHE_VERSION = 2
+FLUSH_INTERVAL_SEC = 5.0
+
+
+def cache_enabled():
+    try:
+        v = os.environ.get('EOM_LINK_CACHE', '')
+        return str(v).strip().lower() not in ('0', 'false', 'no', 'off', 'n')
+    except Exception:
+        return True
+
+
+def get_cache_dir():
+    custom = os.environ.get('EOM_LINK_CACHE_DIR')
+    if custom:
+        return custom
+    temp_root = os.environ.get('TEMP') or os.environ.get('TMP') or tempfile.gettempdir()
+    return os.path.join(temp_root, 'eom_link_geometry_cache')
+
+
+def _norm_path(path):
+    try:
+        return os.path.normcase(os.path.abspath(path))
+    except Exception:
+        return None
+
+
+def file_signature(path):
+    """[путь, mtime, размер] файла связи или None, если файл недоступен (облако и т.п.)."""
+    if not path:
+        return None
+    norm = _norm_path(path)
+    if not norm:
+        return None
+    try:
+        st = os.stat(norm)
+    except Exception:
+        return None
+    return [norm, int(st.st_mtime), int(st.st_size)]
+
+
+def cache_file_for(path, cache_dir=None):
+    norm = _norm_path(path) or u''
+    try:
+        raw = norm.encode('utf-8')
+    except Exception:
+        raw = str(norm)
+    name = hashlib.sha1(raw).hexdigest()[:20] + '.json'
+    return os.path.join(cache_dir or get_cache_dir(), name)
+
+
+def _pt(p):
+    try:
+        return (float(p[0]), float(p[1]), float(p[2]))
+    except Exception:
+        return None
+
+
+def _pts(seq):
+    out = []
+    for p in seq or []:
+        t = _pt(p)
+        if t is not None:
+            out.append(t)
+    return out
+
+
+def _round_pt(p):
+    # 1e-9 фута — ниже точности Revit, но заметно сокращает файл.
+    return [round(p[0], 9), round(p[1], 9), round(p[2], 9)]
+
+
+class LinkGeometryCache(object):
+    """Геометрия одной связи, загруженная с диска и дополняемая по ходу работы.
+
+    Подпись файла фиксируется при создании: если файл связи изменится до
+    сохранения (связь ещё не перезагружена), данные на диск не пишутся.
+    """
+
+    def __init__(self, link_path, signature, cache_path):
+        self.link_path = link_path
+        self.signature = signature
+        self.path = cache_path
+        self.rooms = {}
+        self.records = {}
+        self.points = {}
+        self.dirty = False
+        self.loaded = False
+        self._last_flush = time.time()
+
+    @classmethod
+    def open(cls, link_path, cache_dir=None):
+        """Кэш для файла связи или None (кэш отключён / файл недоступен)."""
+        if not cache_enabled():
+            return None
+        sig = file_signature(link_path)
+        if sig is None:
+            return None
+        cache = cls(link_path, sig, cache_file_for(link_path, cache_dir))
+        cache.load()
+        return cache
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.loads(f.read().decode('utf-8'))
+        except Exception:
+            return False
+        if not isinstance(data, dict):
+            return False
+        if data.get('version') != CACHE_VERSION or data.get('signature') != self.signature:
+            return False
+        try:
+            self.rooms = dict(data.get('rooms') or {})
+            self.records = dict(data.get('records') or {})
+            self.points = dict(data.get('points') or {})
+        except Exception:
+            self.rooms, self.records, self.points = {}, {}, {}
+            return False
+        self.loaded = True
+        return True
+
+    # --- помещения -------------------------------------------------------
+
+    def room_loops(self, room_id):
+        """(outer, holes) кортежами или None, если помещения нет в кэше."""
+        item = self.rooms.get(str(room_id))
+        if not item:
+            return None
+        try:
+            return _pts(item[0]), [_pts(h) for h in (item[1] or [])]
+        except Exception:
+            return None
+
+    def put_room_loops(self, room_id, outer, holes):
+        self.rooms[str(room_id)] = [
+            [_round_pt(p) for p in _pts(outer)],
+            [[_round_pt(p) for p in _pts(h)] for h in (holes or [])],
+        ]
+        self.dirty = True
+
+    # --- записи элементов (помещения, двери, стены) ----------------------
+
+    def get_records(self, kind):
+        """Строки записей раздела kind ('rooms', 'doors', 'walls') или None, если раздела нет."""
+        rows = self.records.get(kind)
+        return list(rows) if rows is not None else None
+
+    def put_records(self, kind, rows):
+        """Сохранить полный список строк раздела (списки из чисел, точек и None)."""
+        self.records[kind] = [list(r) for r in rows or []]
+        self.dirty = True
+
+    # --- произвольные наборы точек (сантехника и т.п.) --------------------
+
+    def get_points(self, key):
+        item = self.points.get(key)
+        if item is None:
+            return None
+        return _pts(item)
+
+    def put_points(self, key, pts):
+        self.points[key] = [_round_pt(p) for p in _pts(pts)]
+        self.dirty = True
+
+    # --- запись ----------------------------------------------------------
+
+    def is_current(self):
+        return file_signature(self.link_path) == self.signature
+
+    def save(self):
+        """Записывает кэш атомарно (tmp + rename). Возвращает True при записи."""
+        if not self.dirty:
+            return False
+        self._last_flush = time.time()
+        if not self.is_current():
+            return False
+        data = {
+            'version': CACHE_VERSION,
+            'signature': self.signature,
+            'rooms': self.rooms,
+            'records': self.records,
+            'points': self.points,
+        }
+        tmp = self.path + '.tmp'
+        try:
+            folder = os.path.dirname(self.path)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+            payload = json.dumps(data, separators=(',', ':'), ensure_ascii=True)
+            with open(tmp, 'wb') as f:
+                f.write(payload.encode('utf-8'))
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(tmp, self.path)
+        except Exception:
+            try:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            except Exception:
+                pass
+            return False
+        self.dirty = False
+        return True
+
+    def maybe_save(self, interval_sec=FLUSH_INTERVAL_SEC):
+        if self.dirty and (time.time() - self._last_flush) >= float(interval_sec):
+            return self.save()
+        return False
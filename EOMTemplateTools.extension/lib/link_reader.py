@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
-import heapq
+import functools
 import math
 
 from pyrevit import DB
 from pyrevit import forms
+import geom2d
+import link_geometry_cache
 import magic_context
+import polylabel_batch
+import room_boundary
 
 
 def _magic_active():
@@ -30,9 +34,12 @@ def is_link_loaded(link_instance):
 
 def get_link_doc(link_instance):
     try:
-        return link_instance.GetLinkDocument()
+        link_doc = link_instance.GetLinkDocument()
     except Exception:
         return None
+    if link_doc is not None:
+        _remember_link_path(link_doc, link_instance)
+    return link_doc
 
 
 def get_total_transform(link_instance):
@@ -264,6 +271,9 @@ def try_get_link_path(host_doc, link_instance):
 def get_rooms(link_doc):
     if link_doc is None:
         return []
+    snap = get_link_snapshot(link_doc)
+    if snap is not None:
+        return [rec.element for rec in snap.rooms]
     try:
         return list(DB.FilteredElementCollector(link_doc)
                     .OfCategory(DB.BuiltInCategory.OST_Rooms)
@@ -559,6 +569,11 @@ def iter_elements_by_category(doc, bic, limit=None, level_id=None):
 
 
 def iter_rooms(link_doc, limit=None, level_id=None):
+    snap = get_link_snapshot(link_doc)
+    if snap is not None:
+        for rec in snap.rooms_on_level(level_id, limit=limit):
+            yield rec.element
+        return
     for e in iter_elements_by_category(link_doc, DB.BuiltInCategory.OST_Rooms, limit=limit, level_id=level_id):
         yield e
 
@@ -566,6 +581,9 @@ def iter_rooms(link_doc, limit=None, level_id=None):
 def get_doors(link_doc):
     if link_doc is None:
         return []
+    snap = get_link_snapshot(link_doc)
+    if snap is not None:
+        return [rec.element for rec in snap.doors]
     try:
         return list(DB.FilteredElementCollector(link_doc)
                     .OfCategory(DB.BuiltInCategory.OST_Doors)
@@ -576,10 +594,477 @@ def get_doors(link_doc):
 
 
 def iter_doors(link_doc, limit=None, level_id=None):
+    snap = get_link_snapshot(link_doc)
+    if snap is not None:
+        for rec in snap.doors_on_level(level_id, limit=limit):
+            yield rec.element
+        return
     for e in iter_elements_by_category(link_doc, DB.BuiltInCategory.OST_Doors, limit=limit, level_id=level_id):
         yield e
 
 
+# --- Снимок геометрии связи ---------------------------------------------------
+#
+# Документ связи только для чтения, поэтому помещения, контуры, двери, стены и уровни
+# извлекаются один раз и переиспользуются всеми инструментами (в т.ч. в цепочке
+# "Волшебной кнопки"). Снимок привязан к экземпляру Document связи: после
+# перезагрузки связи Revit выдаёт новый Document, а старый становится невалидным.
+
+_LINK_SNAPSHOTS = {}
+
+
+def _elem_id_int(elem):
+    try:
+        return int(elem.Id.IntegerValue)
+    except Exception:
+        return None
+
+
+def _elem_level_id_int(elem):
+    """LevelId элемента как int; None если уровня нет, -1 если прочитать не удалось."""
+    try:
+        lid = elem.LevelId
+    except Exception:
+        return -1
+    if not lid:
+        return None
+    try:
+        return int(lid.IntegerValue)
+    except Exception:
+        return -1
+
+
+def _xyz_tuple(pt):
+    try:
+        return (float(pt.X), float(pt.Y), float(pt.Z))
+    except Exception:
+        return None
+
+
+def _xyz_list(tuples):
+    return [DB.XYZ(p[0], p[1], p[2]) for p in tuples or []]
+
+
+def _loop_tuples(pts):
+    out = []
+    for p in pts or []:
+        t = _xyz_tuple(p)
+        if t is not None:
+            out.append(t)
+    return out
+
+
+def _row_pt(p):
+    return (float(p[0]), float(p[1]), float(p[2])) if p else None
+
+
+class _ElementRecord(object):
+    """Запись элемента связи. Запись из дискового кэша (`from_row`) получает
+    элемент по id (`doc.GetElement`) только при первом обращении к `element`."""
+    __slots__ = ('id', 'level_id', '_element', '_doc')
+
+    def _init_element(self, elem):
+        self.id = _elem_id_int(elem)
+        self.level_id = _elem_level_id_int(elem)
+        self._element = elem
+        self._doc = None
+
+    @classmethod
+    def from_row(cls, doc, row):
+        rec = cls.__new__(cls)
+        rec.id = int(row[0])
+        rec.level_id = int(row[1]) if row[1] is not None else None
+        rec._element = None
+        rec._doc = doc
+        rec._load_row(row)
+        return rec
+
+    def _load_row(self, row):
+        pass
+
+    def row(self):
+        return [self.id, self.level_id]
+
+    @property
+    def element(self):
+        if self._element is None and self._doc is not None:
+            try:
+                self._element = self._doc.GetElement(DB.ElementId(self.id))
+            except Exception:
+                self._element = None
+            self._doc = None
+        return self._element
+
+
+class RoomRecord(_ElementRecord):
+    """Помещение связи: id, уровень и (лениво) контуры в виде кортежей (x, y, z)."""
+    __slots__ = ('outer', 'holes')
+
+    def __init__(self, elem):
+        self._init_element(elem)
+        self.outer = None
+        self.holes = None
+
+    def _load_row(self, row):
+        self.outer = None
+        self.holes = None
+
+
+class DoorRecord(_ElementRecord):
+    __slots__ = ('point', 'host_id')
+
+    def __init__(self, elem):
+        self._init_element(elem)
+        self.point = _xyz_tuple(get_instance_fallback_point(elem))
+        try:
+            self.host_id = _elem_id_int(elem.Host)
+        except Exception:
+            self.host_id = None
+
+    def _load_row(self, row):
+        self.point = _row_pt(row[2])
+        self.host_id = int(row[3]) if row[3] is not None else None
+
+    def row(self):
+        return [self.id, self.level_id, self.point, self.host_id]
+
+
+class WallRecord(_ElementRecord):
+    __slots__ = ('p0', 'p1', 'width')
+
+    def __init__(self, elem):
+        self._init_element(elem)
+        self.p0 = None
+        self.p1 = None
+        try:
+            curve = elem.Location.Curve
+            self.p0 = _xyz_tuple(curve.GetEndPoint(0))
+            self.p1 = _xyz_tuple(curve.GetEndPoint(1))
+        except Exception:
+            pass
+        try:
+            self.width = float(elem.Width)
+        except Exception:
+            self.width = 0.0
+
+    def _load_row(self, row):
+        self.p0 = _row_pt(row[2])
+        self.p1 = _row_pt(row[3])
+        self.width = float(row[4] or 0.0)
+
+    def row(self):
+        return [self.id, self.level_id, self.p0, self.p1, self.width]
+
+
+class LevelRecord(object):
+    __slots__ = ('id', 'name', 'elevation', 'element')
+
+    def __init__(self, elem):
+        self.id = _elem_id_int(elem)
+        try:
+            self.name = elem.Name
+        except Exception:
+            self.name = u''
+        try:
+            self.elevation = float(elem.Elevation)
+        except Exception:
+            self.elevation = 0.0
+        self.element = elem
+
+
+def _filter_records_by_level(records, level_id, limit=None):
+    lid = None
+    if level_id is not None:
+        try:
+            lid = int(level_id.IntegerValue)
+        except Exception:
+            try:
+                lid = int(level_id)
+            except Exception:
+                lid = None
+    try:
+        lim = int(limit) if limit is not None else None
+    except Exception:
+        lim = None
+
+    out = []
+    for rec in records:
+        if lid is not None and rec.level_id is not None and rec.level_id != lid:
+            continue
+        out.append(rec)
+        if lim is not None and len(out) >= lim:
+            break
+    return out
+
+
+class LinkSnapshot(object):
+    """Извлечённые один раз данные документа связи.
+
+    Разделы (rooms/doors/walls/levels) собираются лениво при первом обращении,
+    контуры помещений — по требованию для каждого помещения. Если у связи есть
+    дисковый кэш (`disk`) неизменённой версии файла, записи помещений, дверей
+    и стен и контуры берутся из него без обхода элементов связи.
+    """
+
+    def __init__(self, link_doc):
+        self.doc = link_doc
+        self.key = _link_doc_key(link_doc)
+        self._rooms = None
+        self._doors = None
+        self._walls = None
+        self._levels = None
+        self._room_by_id = {}
+        self._loops = {}
+        self._points = {}
+        self.polylabels = {}
+        self.disk = None
+        self._caches = {}
+
+    def is_valid(self):
+        return _is_doc_valid(self.doc)
+
+    def _collect(self, bic, factory):
+        out = []
+        for e in iter_elements_by_category(self.doc, bic):
+            try:
+                out.append(factory(e))
+            except Exception:
+                continue
+        return out
+
+    def _records(self, kind, bic, cls):
+        """Записи раздела: с диска (та же версия связи) или обходом элементов с записью на диск."""
+        rows = self.disk.get_records(kind) if self.disk is not None else None
+        if rows is not None:
+            out = []
+            for row in rows:
+                try:
+                    out.append(cls.from_row(self.doc, row))
+                except Exception:
+                    continue
+            return out
+        out = self._collect(bic, cls)
+        if self.disk is not None and all(r.id is not None for r in out):
+            self.disk.put_records(kind, [r.row() for r in out])
+        return out
+
+    @property
+    def rooms(self):
+        if self._rooms is None:
+            self._rooms = self._records('rooms', DB.BuiltInCategory.OST_Rooms, RoomRecord)
+            self._room_by_id = dict((r.id, r) for r in self._rooms if r.id is not None)
+        return self._rooms
+
+    @property
+    def doors(self):
+        if self._doors is None:
+            self._doors = self._records('doors', DB.BuiltInCategory.OST_Doors, DoorRecord)
+        return self._doors
+
+    @property
+    def walls(self):
+        if self._walls is None:
+            self._walls = self._records('walls', DB.BuiltInCategory.OST_Walls, WallRecord)
+        return self._walls
+
+    @property
+    def levels(self):
+        if self._levels is None:
+            out = []
+            for lvl in list_levels(self.doc):
+                try:
+                    out.append(LevelRecord(lvl))
+                except Exception:
+                    continue
+            self._levels = out
+        return self._levels
+
+    def rooms_on_level(self, level_id=None, limit=None):
+        return _filter_records_by_level(self.rooms, level_id, limit=limit)
+
+    def doors_on_level(self, level_id=None, limit=None):
+        return _filter_records_by_level(self.doors, level_id, limit=limit)
+
+    def walls_on_level(self, level_id=None, limit=None):
+        return _filter_records_by_level(self.walls, level_id, limit=limit)
+
+    def room_loops(self, room):
+        """(outer, holes) в виде вершин XYZ; GetBoundarySegments вызывается один раз на помещение."""
+        rid = _elem_id_int(room)
+        if rid is None:
+            return _extract_room_boundary_loops(room)
+        return self._room_loops_by_id(rid, lambda: room)
+
+    def _room_loops_by_id(self, rid, get_room):
+        cached = self._loops.get(rid)
+        if cached is None:
+            cached = self._disk_room_loops(rid)
+        if cached is None:
+            cached = _extract_room_boundary_loops(get_room())
+            if self.disk is not None and cached[0]:
+                self.disk.put_room_loops(rid, _loop_tuples(cached[0]), [_loop_tuples(h) for h in (cached[1] or [])])
+        self._loops[rid] = cached
+        return cached
+
+    def _disk_room_loops(self, rid):
+        if self.disk is None:
+            return None
+        loops = self.disk.room_loops(rid)
+        if loops is None:
+            return None
+        outer, holes = loops
+        return _xyz_list(outer), [_xyz_list(h) for h in holes]
+
+    def cached_points(self, key, compute):
+        """Список XYZ по ключу: из памяти, с диска или через compute() (результат сохраняется).
+
+        Ключ должен однозначно описывать выборку (категория, ключевые слова и т.п.).
+        """
+        pts = self._points.get(key)
+        if pts is not None:
+            return list(pts)
+        tuples = self.disk.get_points(key) if self.disk is not None else None
+        if tuples is not None:
+            pts = _xyz_list(tuples)
+        else:
+            pts = list(compute() or [])
+            if self.disk is not None:
+                self.disk.put_points(key, _loop_tuples(pts))
+        self._points[key] = pts
+        return list(pts)
+
+    def cache(self, name, factory):
+        """Именованный кэш инструмента, живущий вместе со снимком связи."""
+        c = self._caches.get(name)
+        if c is None:
+            c = factory()
+            self._caches[name] = c
+        return c
+
+    def room_record(self, room_id):
+        """RoomRecord с заполненными контурами (кортежи) или None."""
+        rooms = self.rooms
+        rec = self._room_by_id.get(room_id) if rooms else None
+        if rec is None:
+            return None
+        if rec.outer is None:
+            outer, holes = self._room_loops_by_id(rec.id, lambda: rec.element)
+            rec.outer = _loop_tuples(outer)
+            rec.holes = [_loop_tuples(h) for h in (holes or [])]
+        return rec
+
+
+def _is_doc_valid(doc):
+    if doc is None:
+        return False
+    try:
+        return bool(getattr(doc, 'IsValidObject', True))
+    except Exception:
+        return False
+
+
+def _is_linked_doc(doc):
+    try:
+        return bool(doc.IsLinked)
+    except Exception:
+        return False
+
+
+def _link_doc_key(doc):
+    try:
+        return int(doc.GetHashCode())
+    except Exception:
+        return id(doc)
+
+
+_LINK_PATHS = {}
+
+
+def _remember_link_path(link_doc, link_instance):
+    key = _link_doc_key(link_doc)
+    if key in _LINK_PATHS:
+        return
+    path = None
+    try:
+        path = try_get_link_path(link_instance.Document, link_instance)
+    except Exception:
+        path = None
+    _LINK_PATHS[key] = path
+
+
+def _link_file_path(link_doc):
+    path = _LINK_PATHS.get(_link_doc_key(link_doc))
+    if path:
+        return path
+    try:
+        return link_doc.PathName or None
+    except Exception:
+        return None
+
+
+def _open_disk_cache(link_doc):
+    try:
+        return link_geometry_cache.LinkGeometryCache.open(_link_file_path(link_doc))
+    except Exception:
+        return None
+
+
+def _save_disk_cache(snap, force=True):
+    if snap is None or snap.disk is None:
+        return False
+    try:
+        if force:
+            return snap.disk.save()
+        return snap.disk.maybe_save()
+    except Exception:
+        return False
+
+
+def get_link_snapshot(link_doc):
+    """Возвращает LinkSnapshot для документа связи или None (хост-документ/нет документа).
+
+    Хост-документ не кэшируется: инструменты в нём создают и удаляют элементы.
+    Снимок связи подключает дисковый кэш геометрии (см. link_geometry_cache).
+    """
+    if link_doc is None or not _is_linked_doc(link_doc):
+        return None
+
+    for k in list(_LINK_SNAPSHOTS.keys()):
+        old = _LINK_SNAPSHOTS[k]
+        if not old.is_valid():
+            _save_disk_cache(old)
+            del _LINK_SNAPSHOTS[k]
+        else:
+            _save_disk_cache(old, force=False)
+
+    key = _link_doc_key(link_doc)
+    snap = _LINK_SNAPSHOTS.get(key)
+    if snap is None or snap.doc is not link_doc:
+        _save_disk_cache(snap)
+        snap = LinkSnapshot(link_doc)
+        snap.disk = _open_disk_cache(link_doc)
+        _LINK_SNAPSHOTS[key] = snap
+    return snap
+
+
+def flush_link_geometry_caches():
+    """Записывает на диск несохранённую геометрию всех связей."""
+    saved = 0
+    for snap in list(_LINK_SNAPSHOTS.values()):
+        if _save_disk_cache(snap):
+            saved += 1
+    return saved
+
+
+def invalidate_link_snapshots(link_doc=None):
+    """Сбрасывает снимок указанной связи (или все снимки); геометрия сохраняется на диск."""
+    if link_doc is None:
+        flush_link_geometry_caches()
+        _LINK_SNAPSHOTS.clear()
+        return
+    _save_disk_cache(_LINK_SNAPSHOTS.pop(_link_doc_key(link_doc), None))
+
+
 def get_room_center(room):
     return get_room_center_ex(room, return_method=False)
 
@@ -637,39 +1122,17 @@ def _poly_area_xy(pts):
     if not pts or len(pts) < 3:
         return 0.0
     try:
-        a2 = 0.0
-        n = len(pts)
-        for i in range(n):
-            p0 = pts[i]
-            p1 = pts[(i + 1) % n]
-            x0 = float(p0.X)
-            y0 = float(p0.Y)
-            x1 = float(p1.X)
-            y1 = float(p1.Y)
-            a2 += (x0 * y1 - x1 * y0)
-        return a2 * 0.5
+        return geom2d.poly_area(geom2d.loop_of(pts))
     except Exception:
         return 0.0
 
 
 def _point_in_poly_xy(x, y, pts):
-    """Трассировка лучей "точка в полигоне" в XY. pts - это вершины XYZ."""
+    """Трассировка лучей "точка в полигоне" в XY. pts - вершины XYZ, кортежи или geom2d.Loop."""
     if not pts or len(pts) < 3:
         return False
     try:
-        inside = False
-        n = len(pts)
-        j = n - 1
-        for i in range(n):
-            xi = float(pts[i].X)
-            yi = float(pts[i].Y)
-            xj = float(pts[j].X)
-            yj = float(pts[j].Y)
-            inter = ((yi > y) != (yj > y)) and (x < (xj - xi) * (y - yi) / ((yj - yi) if abs(yj - yi) > 1e-12 else 1e-12) + xi)
-            if inter:
-                inside = not inside
-            j = i
-        return inside
+        return geom2d.point_in_poly(float(x), float(y), geom2d.loop_of(pts))
     except Exception:
         return False
 
@@ -682,78 +1145,12 @@ def _point_to_room_boundary_dist_xy(x, y, outer_pts, hole_pts_list=None):
     """
     if not outer_pts or len(outer_pts) < 3:
         return -1e9
-
-    holes = hole_pts_list or []
-    inside = _point_in_poly_xy(x, y, outer_pts)
-    if inside and holes:
-        for hp in holes:
-            try:
-                if hp and _point_in_poly_xy(x, y, hp):
-                    inside = False
-                    break
-            except Exception:
-                continue
-
-    # Min distance to any boundary
-    min_d2 = None
-    n = len(outer_pts)
-    for i in range(n):
-        a = outer_pts[i]
-        b = outer_pts[(i + 1) % n]
-        try:
-            ax = float(a.X)
-            ay = float(a.Y)
-            bx = float(b.X)
-            by = float(b.Y)
-        except Exception:
-            continue
-
-        cx, cy = _closest_point_on_segment_xy(x, y, ax, ay, bx, by)
-        dx = x - cx
-        dy = y - cy
-        d2 = dx * dx + dy * dy
-        if min_d2 is None or d2 < min_d2:
-            min_d2 = d2
-
-    for hp in holes:
-        if not hp or len(hp) < 3:
-            continue
-        m = len(hp)
-        for i in range(m):
-            a = hp[i]
-            b = hp[(i + 1) % m]
-            try:
-                ax = float(a.X)
-                ay = float(a.Y)
-                bx = float(b.X)
-                by = float(b.Y)
-            except Exception:
-                continue
-
-            cx, cy = _closest_point_on_segment_xy(x, y, ax, ay, bx, by)
-            dx = x - cx
-            dy = y - cy
-            d2 = dx * dx + dy * dy
-            if min_d2 is None or d2 < min_d2:
-                min_d2 = d2
-
-    if min_d2 is None:
-        dist = 0.0
-    else:
-        dist = min_d2 ** 0.5
-
-    return dist if inside else -dist
+    holes = [geom2d.loop_of(hp) for hp in (hole_pts_list or []) if hp]
+    return geom2d.signed_dist_to_boundary(float(x), float(y), geom2d.loop_of(outer_pts), holes)
 
 
-class _Cell(object):
-    __slots__ = ('x', 'y', 'h', 'd', 'max')
-
-    def __init__(self, x, y, h, outer_pts, holes):
-        self.x = float(x)
-        self.y = float(y)
-        self.h = float(h)
-        self.d = _point_to_room_boundary_dist_xy(self.x, self.y, outer_pts, holes)
-        self.max = self.d + self.h * 1.41421356237
+def _xy_loop(pts):
+    return geom2d.loop_of(pts or []).points()
 
 
 def _polylabel_xy(outer_pts, hole_pts_list=None, precision=0.2):
@@ -761,90 +1158,88 @@ def _polylabel_xy(outer_pts, hole_pts_list=None, precision=0.2):
 
     outer_pts / holes — это вершины XYZ в плоскости XY помещения.
     precision — в футах.
+    Расчёт выполняет polylabel_batch (результат идентичен прежней реализации).
     """
     if not outer_pts or len(outer_pts) < 3:
         return None, None
+    outer = _xy_loop(outer_pts)
+    holes = [_xy_loop(hp) for hp in (hole_pts_list or []) if hp]
+    return polylabel_batch.polylabel(outer, holes, precision=precision)
 
-    holes = hole_pts_list or []
-    try:
-        prec = max(float(precision or 0.2), 1e-3)
-    except Exception:
-        prec = 0.2
 
-    # Bounding box
-    min_x = min(float(p.X) for p in outer_pts)
-    min_y = min(float(p.Y) for p in outer_pts)
-    max_x = max(float(p.X) for p in outer_pts)
-    max_y = max(float(p.Y) for p in outer_pts)
+def _polylabel_precision(min_clear):
+    """Точность polylabel (футы): выше, если запрошен зазор до стен."""
+    prec = 0.2
+    if min_clear > 0.0:
+        prec = max(0.1, min(0.5, min_clear / 3.0))
+    return prec
 
-    width = max_x - min_x
-    height = max_y - min_y
-    if width <= 1e-9 or height <= 1e-9:
-        return None, None
 
-    cell_size = min(width, height)
-    h = cell_size / 2.0
-    if cell_size <= 1e-9:
-        return None, None
+def _polylabel_level(group, precision=0.2):
+    """[(room_id, ((x, y), dist))] для помещений одного уровня (задача исполнителя)."""
+    results = polylabel_batch.polylabel_many([loops for _, _, loops in group], precision=precision)
+    return [(rid, res) for (_, rid, _), res in zip(group, results)]
 
-    # Приоритетная очередь (max-heap через отрицательное значение)
-    q = []
-    uid = 0
-    x = min_x
-    while x < max_x:
-        y = min_y
-        while y < max_y:
-            c = _Cell(x + h, y + h, h, outer_pts, holes)
-            heapq.heappush(q, (-c.max, uid, c))
-            uid += 1
-            y += cell_size
-        x += cell_size
-
-    # Начальное лучшее значение: центроид, если доступен, иначе центр ограничивающего параллелепипеда
-    best_p = None
-    best_d = None
+
+def polylabel_rooms_xy(rooms, min_wall_clearance_ft=0.0, executor=None):
+    """Полюса недоступности для всех помещений (например, одного уровня) за один вызов.
+
+    Возвращает словарь {room_id: ((x, y), dist)}; контуры берутся из снимка связи.
+    Результаты запоминаются в снимке и переиспользуются get_room_center_ex_safe.
+    С executor (room_executor.RoomTaskExecutor) контуры извлекаются здесь же,
+    а расчёт идёт параллельно по уровням.
+    """
     try:
-        cc = _poly_centroid_xy(outer_pts)
-        if cc:
-            cx, cy = cc
-            d = _point_to_room_boundary_dist_xy(cx, cy, outer_pts, holes)
-            best_p = (cx, cy)
-            best_d = d
+        precision = _polylabel_precision(float(min_wall_clearance_ft or 0.0))
     except Exception:
-        best_p = None
-        best_d = None
-
-    if best_p is None:
-        cx = (min_x + max_x) * 0.5
-        cy = (min_y + max_y) * 0.5
-        best_p = (cx, cy)
-        best_d = _point_to_room_boundary_dist_xy(cx, cy, outer_pts, holes)
-
-    # Уточнить
-    it = 0
-    it_cap = 20000
-    while q and it < it_cap:
-        it += 1
-        _, _, cell = heapq.heappop(q)
-
-        if cell.d > best_d:
-            best_p = (cell.x, cell.y)
-            best_d = cell.d
-
-        if (cell.max - best_d) <= prec:
+        precision = 0.2
+    items = []
+    for room in rooms or []:
+        try:
+            outer, holes = _room_boundary_loops_points(room)
+        except Exception:
             continue
-
-        h2 = cell.h / 2.0
-        if h2 <= 1e-9:
+        if not outer or len(outer) < 3:
             continue
+        try:
+            level_key = room.LevelId.IntegerValue
+        except Exception:
+            level_key = None
+        loops = (_xy_loop(outer), [_xy_loop(hp) for hp in (holes or []) if hp])
+        items.append((level_key, _elem_id_int(room), loops))
+    fn = functools.partial(_polylabel_level, precision=precision)
+    if executor is None:
+        pairs = fn(items)
+    else:
+        pairs = []
+        for level_pairs in executor.map_partitions(fn, items, key=lambda it: it[0]).values():
+            pairs.extend(level_pairs)
+    out = dict(pairs)
+    for room in rooms or []:
+        snap = _snapshot_of_room(room)
+        rid = _elem_id_int(room)
+        if snap is not None and rid in out:
+            snap.polylabels[(rid, float(precision))] = out[rid]
+    return out
+
+
+def _snapshot_of_room(room):
+    try:
+        return get_link_snapshot(room.Document)
+    except Exception:
+        return None
 
-        for dx in (-h2, h2):
-            for dy in (-h2, h2):
-                c = _Cell(cell.x + dx, cell.y + dy, h2, outer_pts, holes)
-                heapq.heappush(q, (-c.max, uid, c))
-                uid += 1
 
-    return best_p, best_d
+def _room_polylabel_xy(room, loop_pts, hole_loops, precision):
+    """_polylabel_xy для контура помещения с учётом результатов polylabel_rooms_xy."""
+    snap = _snapshot_of_room(room)
+    key = (_elem_id_int(room), float(precision))
+    if snap is not None and key in snap.polylabels:
+        return snap.polylabels[key]
+    res = _polylabel_xy(loop_pts, hole_pts_list=hole_loops, precision=precision)
+    if snap is not None:
+        snap.polylabels[key] = res
+    return res
 
 
 def _room_boundary_loop_points(room):
@@ -855,31 +1250,27 @@ def _room_boundary_loop_points(room):
 
 def _room_boundary_loops_points(room):
     """Возвращает (outer_loop_pts, hole_loops_pts_list) как вершины XYZ."""
+    if room is None:
+        return None, []
+    snap = _snapshot_of_room(room)
+    if snap is not None:
+        return snap.room_loops(room)
+    return _extract_room_boundary_loops(room)
+
+
+def _extract_room_boundary_loops(room):
     if room is None:
         return None, []
     try:
-        opts = DB.SpatialElementBoundaryOptions()
-        seglists = room.GetBoundarySegments(opts)
-        if not seglists:
+        rb = room_boundary.get_room_boundary(room)
+        if not rb:
             return None, []
 
         loops = []
-        for segs in seglists:
-            try:
-                pts = []
-                for s in segs:
-                    try:
-                        c = s.GetCurve()
-                        if c is None:
-                            continue
-                        pts.append(c.GetEndPoint(0))
-                    except Exception:
-                        continue
-
-                if len(pts) >= 3:
-                    loops.append(pts)
-            except Exception:
-                continue
+        for i in range(len(rb)):
+            pts = rb.loop_points(i)
+            if len(pts) >= 3:
+                loops.append(pts)
 
         if not loops:
             return None, []
@@ -919,19 +1310,8 @@ def _room_boundary_loops_points(room):
 
 
 def _closest_point_on_segment_xy(px, py, ax, ay, bx, by):
-    vx = bx - ax
-    vy = by - ay
-    den = vx * vx + vy * vy
-    if den <= 1e-12:
-        return ax, ay
-
-    t = ((px - ax) * vx + (py - ay) * vy) / den
-    if t < 0.0:
-        t = 0.0
-    elif t > 1.0:
-        t = 1.0
-
-    return ax + t * vx, ay + t * vy
+    qx, qy, _ = geom2d.closest_point_on_segment(px, py, ax, ay, bx, by)
+    return qx, qy
 
 
 def _min_dist_to_loop_xy(pt, loop_pts):
@@ -945,32 +1325,8 @@ def _min_dist_to_loop_xy(pt, loop_pts):
     except Exception:
         return None, None
 
-    min_d2 = None
-    qx = None
-    qy = None
-
-    n = len(loop_pts)
-    for i in range(n):
-        a = loop_pts[i]
-        b = loop_pts[(i + 1) % n]
-        try:
-            ax = float(a.X)
-            ay = float(a.Y)
-            bx = float(b.X)
-            by = float(b.Y)
-        except Exception:
-            continue
-
-        cx, cy = _closest_point_on_segment_xy(px, py, ax, ay, bx, by)
-        dx = px - cx
-        dy = py - cy
-        d2 = dx * dx + dy * dy
-        if min_d2 is None or d2 < min_d2:
-            min_d2 = d2
-            qx = cx
-            qy = cy
-
-    if min_d2 is None:
+    d, q = geom2d.min_dist_to_loop(px, py, geom2d.loop_of(loop_pts))
+    if d is None:
         return None, None
 
     try:
@@ -979,9 +1335,9 @@ def _min_dist_to_loop_xy(pt, loop_pts):
         z = 0.0
 
     try:
-        return (min_d2 ** 0.5), DB.XYZ(float(qx), float(qy), z)
+        return d, DB.XYZ(float(q[0]), float(q[1]), z)
     except Exception:
-        return (min_d2 ** 0.5), None
+        return d, None
 
 
 def get_room_center_ex(room, return_method=False):
@@ -1044,11 +1400,9 @@ def get_room_center_ex_safe(room, min_wall_clearance_ft=0.0, return_method=False
     if loop_pts:
         try:
             # точность в футах (более высокая, если пользователь запрашивает зазор)
-            prec = 0.2
-            if min_clear > 0.0:
-                prec = max(0.1, min(0.5, min_clear / 3.0))
+            prec = _polylabel_precision(min_clear)
 
-            xy, d = _polylabel_xy(loop_pts, hole_pts_list=hole_loops, precision=prec)
+            xy, d = _room_polylabel_xy(room, loop_pts, hole_loops, prec)
             if xy and d is not None and d > 0.0:
                 zref = float(loop_pts[0].Z)
                 p = DB.XYZ(float(xy[0]), float(xy[1]), zref)
@@ -1310,9 +1664,7 @@ def get_room_centers_by_shape(room, min_wall_clearance_ft=0.0, return_meta=False
     c2 = None
     c3 = None
     try:
-        prec = 0.2
-        if min_clear > 0.0:
-            prec = max(0.1, min(0.5, min_clear / 3.0))
+        prec = _polylabel_precision(min_clear)
 
         if left:
             xy2, d2 = _polylabel_xy(left, hole_pts_list=hole_loops, precision=prec)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Ограниченный LRU-кэш со статистикой попаданий.
+
+Для долгоживущих кэшей в модулях lib (они сохраняются в sys.modules между
+запусками инструментов pyRevit), где обычный dict рос бы без ограничений.
+Совместим с IronPython 2.7 (OrderedDict без move_to_end).
+"""
+
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class LruCache(object):
+    """Словарь с вытеснением давно не использованных ключей.
+
+    Args:
+        maxsize: максимальное число записей (минимум 1).
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = max(1, int(maxsize or 1))
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        value = self._data.pop(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    __setitem__ = put
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (float(self.hits) / total) if total else 0.0,
+        }
@@ -10,6 +10,7 @@ import time
 from pyrevit import script, revit, DB
 from config_loader import load_rules
 from placement_engine import place_point_family_instance
+from hub_progress import progress_reporter
 
 # DEBUG LOGGING setup
 DEBUG_LOG_FILE = os.path.join(os.environ.get("TEMP"), "eom_orchestrator.log")
@@ -103,9 +104,12 @@ def run_lights_center(doc, uidoc, output, rules):
         log_debug("View/Phase error: " + str(e))
         return {'placed': 0, 'skipped': 0, 'error': str(e)}
     
+    progress = progress_reporter('lights_center')
+    progress.stage('place', total=len(rooms))
     try:
         with revit.Transaction("Свет по центру"):
             for room in rooms:
+                progress.update()
                 try:
                     # Filter by phase
                     p_room_phase = room.get_Parameter(DB.BuiltInParameter.ROOM_PHASE)
@@ -155,6 +159,8 @@ def run_lights_center(doc, uidoc, output, rules):
         log_debug("Transaction error: " + str(e))
         log_debug(traceback.format_exc())
         return {'placed': placed, 'skipped': skipped, 'error': str(e)}
+    finally:
+        progress.close()
                 
     if output:
         output.print_md("Размещено: **{}**, Пропущено: **{}**".format(placed, skipped))
@@ -209,6 +215,14 @@ def _run_tool_handler(tool_id, doc, uidoc, output, rules):
 
 register_tool_handler('lights_center', run_lights_center)
 
+def _flush_link_caches():
+    try:
+        import link_reader
+        link_reader.flush_link_geometry_caches()
+    except Exception as e:
+        log_debug("Link cache flush failed: " + str(e))
+
+
 def run_placement(doc, uidoc, output, script_obj):
     """Main entry point called by scripts."""
     log_debug("run_placement called")
@@ -243,3 +257,5 @@ def run_placement(doc, uidoc, output, script_obj):
             output.print_md("ERROR in orchestrator: {}".format(str(e)))
             output.print_md(traceback.format_exc())
         return {'placed': 0, 'skipped': 0, 'error': str(e)}
+    finally:
+        _flush_link_caches()
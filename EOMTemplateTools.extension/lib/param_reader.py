@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""Чтение параметров элементов с запоминанием (get_Parameter/LookupParameter).
+
+Классификация по тексту (`socket_utils._elem_text`, `_room_text`, тексты
+помещений щитов, поиск параметров по нормализованному имени) читает одни и
+те же локализованные параметры (ADSK_Марка, Комментарии, Наименование...)
+у одних и тех же элементов; каждый LookupParameter идёт через interop.
+
+Читатель документа хранит значения по ключу (id элемента, BIP/имя).
+Параметры типа (Symbol) кэшируются по id типа и общие для всех его
+экземпляров; `memo` хранит производные значения (текст элемента, текст
+типа). Кэшируются только документы связей: их содержимое не меняется до
+перезагрузки связи. Для хост-документа читатель передаёт запросы в API
+напрямую (инструменты меняют его элементы), но ведёт ту же статистику.
+
+    s = param_reader.get_string(elem, bip=DB.BuiltInParameter.ALL_MODEL_MARK, name=u'Марка')
+    p = param_reader.find_param(elem, u'ADSK_Марка', norm_fn)
+    param_reader.get_param_reader_stats(link_doc)   # {'lookups', 'hits', 'saved_rate', ...}
+"""
+
+from lru_cache import LruCache
+
+MAX_ENTRIES = 300000
+
+_MISSING = object()
+
+
+def _elem_key(elem):
+    try:
+        return int(elem.Id.IntegerValue)
+    except Exception:
+        try:
+            return int(elem.Id.Value)
+        except Exception:
+            return None
+
+
+def _read_param(elem, bip, name):
+    p = None
+    try:
+        if bip is not None:
+            p = elem.get_Parameter(bip)
+    except Exception:
+        p = None
+    if p is None and name:
+        try:
+            p = elem.LookupParameter(name)
+        except Exception:
+            p = None
+    return p
+
+
+def _as_string(p):
+    if p is None:
+        return u''
+    try:
+        return p.AsString() or u''
+    except Exception:
+        return u''
+
+
+def _definition_name(p):
+    try:
+        d = getattr(p, 'Definition', None)
+        return getattr(d, 'Name', None) if d is not None else None
+    except Exception:
+        return None
+
+
+class ParamReader(object):
+    """Запоминающий читатель параметров одного документа.
+
+    Args:
+        cache: False — без запоминания (хост-документ), только статистика.
+        maxsize: предел записей LRU.
+    """
+
+    def __init__(self, cache=True, maxsize=MAX_ENTRIES):
+        self.cache = LruCache(maxsize) if cache else None
+        self.lookups = 0
+
+    def _memo(self, key, compute):
+        self.lookups += 1
+        if self.cache is None or key[0] is None:
+            return compute()
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.cache.put(key, value)
+        return value
+
+    def memo(self, elem, key, compute):
+        """compute() один раз для (элемент, key); для типа — общее для всех экземпляров."""
+        if elem is None:
+            return compute()
+        return self._memo((_elem_key(elem), 'memo', key), compute)
+
+    def get_string(self, elem, bip=None, name=None):
+        """AsString() параметра по BIP, затем по имени; u'' если параметра нет."""
+        if elem is None:
+            return u''
+        return self._memo((_elem_key(elem), bip, name), lambda: _as_string(_read_param(elem, bip, name)))
+
+    def find_param(self, elem, pname, norm_fn=None):
+        """Parameter по точному имени, затем по нормализованному (norm_fn) среди elem.Parameters.
+
+        Запоминается найденное имя определения; сам Parameter каждый раз
+        берётся заново (он может использоваться для записи).
+        """
+        if elem is None or not pname:
+            return None
+        found = self._memo((_elem_key(elem), 'find', pname), lambda: self._resolve_name(elem, pname, norm_fn))
+        if not found:
+            return None
+        try:
+            return elem.LookupParameter(found)
+        except Exception:
+            return None
+
+    def _resolve_name(self, elem, pname, norm_fn):
+        try:
+            if elem.LookupParameter(pname) is not None:
+                return pname
+        except Exception:
+            pass
+        key = norm_fn(pname) if norm_fn is not None else pname
+        if not key:
+            return None
+        try:
+            params = getattr(elem, 'Parameters', None)
+            for p in (params or []):
+                n = _definition_name(p)
+                if n and (norm_fn(n) if norm_fn is not None else n) == key:
+                    return n
+        except Exception:
+            return None
+        return None
+
+    def stats(self):
+        """lookups — запросы, hits — сэкономленные обращения к API."""
+        hits = self.cache.hits if self.cache is not None else 0
+        return {
+            'cached': self.cache is not None,
+            'lookups': self.lookups,
+            'hits': hits,
+            'saved_rate': (float(hits) / self.lookups) if self.lookups else 0.0,
+            'size': len(self.cache) if self.cache is not None else 0,
+        }
+
+
+_READERS = {}
+
+
+def _doc_key(doc):
+    try:
+        return int(doc.GetHashCode())
+    except Exception:
+        return id(doc)
+
+
+def _is_cacheable(doc):
+    # Только настоящий документ связи (IsLinked — bool), не заглушки.
+    try:
+        return doc.IsLinked is True
+    except Exception:
+        return False
+
+
+def _is_valid(doc):
+    try:
+        return bool(getattr(doc, 'IsValidObject', True))
+    except Exception:
+        return False
+
+
+def reader_for(doc):
+    """ParamReader документа (для связи — с запоминанием на сеанс)."""
+    if doc is None:
+        return _PASSTHROUGH
+    key = _doc_key(doc)
+    hit = _READERS.get(key)
+    if hit is not None and hit[0] is doc:
+        return hit[1]
+    for k in list(_READERS.keys()):
+        if not _is_valid(_READERS[k][0]):
+            del _READERS[k]
+    reader = ParamReader(cache=_is_cacheable(doc))
+    _READERS[key] = (doc, reader)
+    return reader
+
+
+def reader_of(elem):
+    try:
+        doc = elem.Document
+    except Exception:
+        doc = None
+    return reader_for(doc)
+
+
+def get_string(elem, bip=None, name=None):
+    if elem is None:
+        return u''
+    return reader_of(elem).get_string(elem, bip=bip, name=name)
+
+
+def find_param(elem, pname, norm_fn=None):
+    if elem is None:
+        return None
+    return reader_of(elem).find_param(elem, pname, norm_fn)
+
+
+def get_param_reader_stats(doc):
+    return reader_for(doc).stats()
+
+
+def reset(doc=None):
+    """Сбрасывает читатель документа (или все), например после перезагрузки связи."""
+    if doc is None:
+        _READERS.clear()
+        return
+    _READERS.pop(_doc_key(doc), None)
+
+
+_PASSTHROUGH = ParamReader(cache=False)
@@ -98,13 +98,6 @@ def _dbg_codepoints(label, text, max_len=120):
         return ''
 
 
-def _dbg_similarity(a, b):
-    try:
-        import difflib
-        return float(difflib.SequenceMatcher(None, a or '', b or '').ratio())
-    except Exception:
-        return 0.0
-
 from utils_revit import ensure_symbol_active, find_nearest_level, set_comments
 
 
@@ -408,6 +401,252 @@ def _contains_panel_token(text, token):
         return False
 
 
+def _bic_key(bic):
+    """Ключ категории для сравнения с записями индекса (int значения BuiltInCategory)."""
+    if bic is None:
+        return None
+    try:
+        return int(bic)
+    except Exception:
+        return str(bic)
+
+
+def _symbol_category_key(symbol):
+    try:
+        return int(symbol.Category.Id.IntegerValue)
+    except Exception:
+        return None
+
+
+def _trigrams(text):
+    t = u'  {0} '.format(text or u'')
+    return set(t[i:i + 3] for i in range(len(t) - 2))
+
+
+class _SymbolRecord(object):
+    """Запись индекса типов: ElementId символа и заранее нормализованные имена."""
+    __slots__ = ('seq', 'id', 'cat', 'fam', 'type', 'fam_raw', 'type_raw', 'label', 'label_low', 'panel_num')
+
+
+class FamilySymbolIndex(object):
+    """Индекс загруженных FamilySymbol документа.
+
+    Строится одним проходом коллектора: нормализованное семейство -> тип ->
+    записи (в порядке документа), тип -> записи, и лениво — триграммы типов
+    для нечёткого поиска. Имена нормализуются один раз при построении.
+    """
+
+    def __init__(self, doc, symbols=None):
+        self.doc = doc
+        self.records = []
+        self.families = {}
+        self.types = {}
+        self._trigram_index = None
+        self._groups = {}
+        try:
+            import floor_panel_niches as fpn
+            panel_num_from = fpn.extract_panel_number_from_type_name
+        except Exception:
+            panel_num_from = None
+        if symbols is None:
+            symbols = iter_family_symbols(doc, category_bic=None, limit=None)
+        for s in symbols:
+            try:
+                rec = self._make_record(s, panel_num_from)
+            except Exception:
+                continue
+            rec.seq = len(self.records)
+            self.records.append(rec)
+            self.types.setdefault(rec.type, []).append(rec)
+            self.families.setdefault(rec.fam, {}).setdefault(rec.type, []).append(rec)
+
+    @staticmethod
+    def _make_record(s, panel_num_from):
+        rec = _SymbolRecord()
+        rec.id = s.Id
+        rec.cat = _symbol_category_key(s)
+        type_raw = get_symbol_type_name(s)
+        parsed_fam, parsed_type = _parse_family_type(type_raw)
+        rec.type = _norm_ft(parsed_type or type_raw)
+        fam_raw = u''
+        try:
+            fam_raw = getattr(s, 'FamilyName', None) or u''
+        except Exception:
+            fam_raw = u''
+        if not fam_raw:
+            try:
+                fam = getattr(s, 'Family', None)
+                fam_raw = fam.Name if fam else u''
+            except Exception:
+                fam_raw = u''
+        rec.fam = _norm_ft(fam_raw) or (_norm_ft(parsed_fam) if parsed_fam else u'')
+        rec.fam_raw = fam_raw
+        rec.type_raw = type_raw
+        rec.label = u'{0} : {1}'.format(fam_raw, type_raw).strip()
+        rec.label_low = rec.label.lower()
+        rec.panel_num = None
+        if panel_num_from is not None:
+            try:
+                rec.panel_num = panel_num_from(rec.type)
+                if rec.panel_num is None:
+                    rec.panel_num = panel_num_from(rec.label)
+            except Exception:
+                rec.panel_num = None
+        return rec
+
+    def __len__(self):
+        return len(self.records)
+
+    def symbol(self, rec):
+        """FamilySymbol записи или None, если элемент удалён после построения индекса."""
+        if rec is None:
+            return None
+        try:
+            s = self.doc.GetElement(rec.id)
+        except Exception:
+            return None
+        try:
+            if s is not None and not s.IsValidObject:
+                return None
+        except Exception:
+            pass
+        return s
+
+    def first_symbol(self, records, category_bic=None):
+        """Первый существующий FamilySymbol из записей (с фильтром по категории)."""
+        cat = _bic_key(category_bic)
+        for rec in records or ():
+            if cat is not None and rec.cat != cat:
+                continue
+            sym = self.symbol(rec)
+            if sym is not None:
+                return sym
+        return None
+
+    def count(self, category=None):
+        if category is None:
+            return len(self.records)
+        return len([r for r in self.records if r.cat == category])
+
+    def find(self, n_type, n_fam=None, category=None, require_family=False, panel_num=None, panel_token=None):
+        """Первая (в порядке документа) запись с типом n_type.
+
+        Совпадение по номеру щита (panel_num) или токену (panel_token) принимается
+        как в прежнем линейном поиске: побеждает запись, стоящая раньше.
+        """
+        if require_family and n_fam:
+            pool = self.families.get(n_fam, {}).get(n_type, ())
+        else:
+            pool = self.types.get(n_type, ())
+        best = None
+        for rec in pool:
+            if category is None or rec.cat == category:
+                best = rec
+                break
+        if panel_num is None:
+            return best
+
+        token = (panel_token or u'').lower()
+        stop = best.seq if best is not None else len(self.records)
+        for rec in self.records[:stop]:
+            if category is not None and rec.cat != category:
+                continue
+            if require_family and n_fam and rec.fam != n_fam:
+                continue
+            try:
+                if rec.panel_num is not None and int(rec.panel_num) == int(panel_num):
+                    return rec
+            except Exception:
+                pass
+            if token and (token in rec.type or token in rec.label_low):
+                return rec
+        return best
+
+    def group_by(self, name, key_fn):
+        """Дополнительная группировка записей по key_fn(record); строится один раз на индекс."""
+        groups = self._groups.get(name)
+        if groups is None:
+            groups = {}
+            for rec in self.records:
+                try:
+                    key = key_fn(rec)
+                except Exception:
+                    continue
+                groups.setdefault(key, []).append(rec)
+            self._groups[name] = groups
+        return groups
+
+    def fuzzy(self, text, top_n=10, category=None, min_score=0.3):
+        """Ближайшие по имени типа записи: [(оценка Дайса по триграммам, запись)]."""
+        grams = _trigrams(_norm_ft(text))
+        if not grams:
+            return []
+        if self._trigram_index is None:
+            tri = {}
+            for rec in self.records:
+                for g in _trigrams(rec.type):
+                    tri.setdefault(g, []).append(rec.seq)
+            self._trigram_index = tri
+        shared = {}
+        for g in grams:
+            for seq in self._trigram_index.get(g, ()):
+                shared[seq] = shared.get(seq, 0) + 1
+        scored = []
+        for seq, n in shared.items():
+            rec = self.records[seq]
+            if category is not None and rec.cat != category:
+                continue
+            score = 2.0 * n / float(len(grams) + len(_trigrams(rec.type)))
+            if score >= min_score:
+                scored.append((score, rec))
+        scored.sort(key=lambda x: (-x[0], x[1].seq))
+        return scored[:max(int(top_n or 0), 0)]
+
+
+# Индексы по документам живут, пока модуль в sys.modules (между запусками
+# инструментов). Загрузка семейства меняет число Family/FamilySymbol — индекс
+# перестраивается; удалённый символ обнаруживается при разрешении записи.
+_SYMBOL_INDEXES = {}
+
+
+def _doc_key(doc):
+    try:
+        return int(doc.GetHashCode())
+    except Exception:
+        return id(doc)
+
+
+def _symbol_index_signature(doc):
+    try:
+        n_fam = DB.FilteredElementCollector(doc).OfClass(DB.Family).GetElementCount()
+        n_sym = DB.FilteredElementCollector(doc).OfClass(DB.FamilySymbol).GetElementCount()
+        return int(n_fam), int(n_sym)
+    except Exception:
+        return None
+
+
+def get_symbol_index(doc):
+    """FamilySymbolIndex документа (перестраивается после загрузки семейств)."""
+    if doc is None:
+        return None
+    key = _doc_key(doc)
+    sig = _symbol_index_signature(doc)
+    cached = _SYMBOL_INDEXES.get(key)
+    if cached is not None and cached[0] is doc and sig is not None and cached[1] == sig:
+        return cached[2]
+    index = FamilySymbolIndex(doc)
+    _SYMBOL_INDEXES[key] = (doc, sig, index)
+    return index
+
+
+def invalidate_symbol_index(doc=None):
+    """Сбросить индекс типов документа (или всех документов)."""
+    if doc is None:
+        _SYMBOL_INDEXES.clear()
+        return
+    _SYMBOL_INDEXES.pop(_doc_key(doc), None)
+
+
 def debug_dump_family_symbols(doc,
                              title='EOM Template Tools',
                              category_bics=None,
@@ -480,6 +719,8 @@ def find_family_symbol(doc, fullname, category_bic=None, limit=5000):
     """Найти FamilySymbol по строке 'Семейство : Тип'.
 
     Если установлен category_bic, сначала искать в этой категории.
+    Поиск идёт по FamilySymbolIndex документа; limit оставлен для совместимости
+    (индекс покрывает все загруженные типы).
     """
     fam_name, type_name = _parse_family_type(fullname)
     n_fam = _norm_ft(fam_name)
@@ -519,206 +760,86 @@ def find_family_symbol(doc, fullname, category_bic=None, limit=5000):
         except Exception:
             panel_token = None
 
-    def _iter_symbols(collector, require_family):
-        for s in collector:
-            try:
-                sym_name_raw = get_symbol_type_name(s)
-                sym_name_fam, sym_name_type = _parse_family_type(sym_name_raw)
-                sym_type = _norm_ft(sym_name_type or sym_name_raw)
-
-                sym_fam = ''
-                try:
-                    sym_fam = _norm_ft(getattr(s, 'FamilyName', None))
-                except Exception:
-                    sym_fam = ''
-                if not sym_fam:
-                    try:
-                        fam = getattr(s, 'Family', None)
-                        sym_fam = _norm_ft(fam.Name) if fam else ''
-                    except Exception:
-                        sym_fam = ''
-                if not sym_fam and sym_name_fam:
-                    sym_fam = _norm_ft(sym_name_fam)
-
-                if sym_type != n_type:
-                    # Запасной вариант: сопоставление по номеру панели при точном несовпадении типа.
-                    matched_by_num = False
-                    label = None
-                    if panel_num is not None:
-                        sym_num = None
-                        try:
-                            if panel_num_from is not None:
-                                sym_num = panel_num_from(sym_type)
-                        except Exception:
-                            sym_num = None
-                        if sym_num is None:
-                            try:
-                                label = format_family_type(s)
-                            except Exception:
-                                label = sym_name_raw
-                            try:
-                                if panel_num_from is not None:
-                                    sym_num = panel_num_from(label)
-                            except Exception:
-                                sym_num = None
-                        try:
-                            matched_by_num = (sym_num is not None and int(sym_num) == int(panel_num))
-                        except Exception:
-                            matched_by_num = False
-
-                    if not matched_by_num:
-                        # Устаревший запасной вариант: проверка токена на наличие.
-                        if panel_token:
-                            if label is None:
-                                try:
-                                    label = format_family_type(s)
-                                except Exception:
-                                    label = sym_name_raw
-                            if not (_contains_panel_token(sym_type, panel_token) or _contains_panel_token(label, panel_token)):
-                                continue
-                        else:
-                            continue
-                if require_family and n_fam and sym_fam != n_fam:
-                    continue
-                return s
-            except Exception:
-                continue
+    holder = [get_symbol_index(doc)]
+    if holder[0] is None:
+        return None
+    cat_key = _bic_key(category_bic)
+
+    def _lookup(bic_key, require_family):
+        for _ in (0, 1):
+            index = holder[0]
+            rec = index.find(n_type, n_fam=n_fam, category=bic_key, require_family=require_family,
+                             panel_num=panel_num, panel_token=panel_token)
+            if rec is None:
+                return None
+            sym = index.symbol(rec)
+            if sym is not None:
+                return sym
+            # Символ удалён после построения индекса: перестроить один раз.
+            invalidate_symbol_index(doc)
+            holder[0] = get_symbol_index(doc)
         return None
 
-    def _dbg_collect_top_matches(bic, max_scan=2000, top_n=15):
-        """Собрать N наиболее близких совпадений по нормализованной строке типа."""
+    def _dbg_collect_top_matches(bic_key, top_n=15):
+        """Записать N наиболее близких (по триграммам) типов к запрошенному."""
         if not _dbg_enabled():
             return
-        scored = []
-        scanned = 0
         try:
-            for s in iter_family_symbols(doc, category_bic=bic, limit=None):
-                scanned += 1
+            scored = holder[0].fuzzy(type_name or fullname, top_n=top_n, category=bic_key, min_score=0.0)
+            _dbg_write(u'closest_matches: bic={0} indexed={1} showing_top={2}'.format(
+                bic_key, holder[0].count(bic_key), top_n))
+            for i, (ratio, rec) in enumerate(scored):
                 try:
-                    label = format_family_type(s)
-                except Exception:
-                    label = ''
-
-                try:
-                    sym_name_raw = get_symbol_type_name(s)
-                except Exception:
-                    sym_name_raw = None
-
-                sym_name_fam, sym_name_type = _parse_family_type(sym_name_raw)
-                cand_type_raw = sym_name_type or sym_name_raw or ''
-                cand_type_norm = _norm_ft(cand_type_raw)
-                ratio = _dbg_similarity(n_type, cand_type_norm)
-
-                scored.append((ratio, label, sym_name_raw, cand_type_raw, cand_type_norm))
-                if scanned >= max_scan:
-                    break
-                # keep list bounded
-                if len(scored) > top_n * 8:
-                    scored = sorted(scored, key=lambda x: x[0], reverse=True)[:top_n * 4]
-        except Exception:
-            pass
-
-        try:
-            scored = sorted(scored, key=lambda x: x[0], reverse=True)
-            _dbg_write(u'closest_matches: bic={0} scanned={1} showing_top={2}'.format(bic, scanned, top_n))
-            for i, (ratio, label, sym_name_raw, cand_type_raw, cand_type_norm) in enumerate(scored[:top_n]):
-                try:
-                    _dbg_write(u'  #{0:02d} ratio={1:.3f} label={2}'.format(i + 1, ratio, label))
-                    _dbg_write(u'      sym.Name.raw={0}'.format(sym_name_raw))
-                    _dbg_write(u'      cand.type.raw={0}'.format(cand_type_raw))
-                    _dbg_write(u'      cand.type.norm={0}'.format(cand_type_norm))
+                    _dbg_write(u'  #{0:02d} ratio={1:.3f} label={2}'.format(i + 1, ratio, rec.label))
+                    _dbg_write(u'      sym.Name.raw={0}'.format(rec.type_raw))
+                    _dbg_write(u'      cand.type.norm={0}'.format(rec.type))
                 except Exception:
                     continue
             if scored:
                 try:
-                    best = scored[0]
-                    _dbg_write(_dbg_codepoints(u'best.cand.type.codepoints', best[3]))
+                    _dbg_write(_dbg_codepoints(u'best.cand.type.codepoints', scored[0][1].type_raw))
                 except Exception:
                     pass
         except Exception:
             return
 
-    try:
-        # Счетчики сканирования (по возможности)
-        scanned_cat = None
-        scanned_all = None
-        if _dbg_enabled():
+    def _found(sym, stage):
+        if sym and _dbg_enabled():
             try:
-                # Приблизительные подсчеты с ранним ограничением для предотвращения зависания UI.
-                c = 0
-                for _ in iter_family_symbols(doc, category_bic=category_bic, limit=None):
-                    c += 1
-                    if c >= 8000:
-                        break
-                scanned_cat = c
+                _dbg_write(u'FOUND {0}: {1}'.format(stage, format_family_type(sym)))
             except Exception:
-                scanned_cat = None
-            try:
-                c = 0
-                for _ in iter_family_symbols(doc, category_bic=None, limit=None):
-                    c += 1
-                    if c >= 8000:
-                        break
-                scanned_all = c
-            except Exception:
-                scanned_all = None
+                pass
+        return sym
+
+    try:
+        if _dbg_enabled():
             try:
-                _dbg_write(u'scan_counts (capped@8000): in_category={0} global={1}'.format(scanned_cat, scanned_all))
+                _dbg_write(u'index: symbols={0} in_category={1}'.format(
+                    holder[0].count(None), holder[0].count(cat_key)))
             except Exception:
                 pass
 
         if n_fam:
-            found = _iter_symbols(iter_family_symbols(doc, category_bic=category_bic, limit=limit), True)
+            found = _lookup(cat_key, True)
             if found:
-                if _dbg_enabled():
-                    try:
-                        _dbg_write(u'FOUND in category require_family=True: {0}'.format(format_family_type(found)))
-                    except Exception:
-                        pass
-                return found
-            found = _iter_symbols(iter_family_symbols(doc, category_bic=category_bic, limit=limit), False)
-            if found:
-                if _dbg_enabled():
-                    try:
-                        _dbg_write(u'FOUND in category require_family=False: {0}'.format(format_family_type(found)))
-                    except Exception:
-                        pass
-                return found
-        else:
-            found = _iter_symbols(iter_family_symbols(doc, category_bic=category_bic, limit=limit), False)
-            if found:
-                if _dbg_enabled():
-                    try:
-                        _dbg_write(u'FOUND in category (no family): {0}'.format(format_family_type(found)))
-                    except Exception:
-                        pass
-                return found
+                return _found(found, u'in category require_family=True')
+        found = _lookup(cat_key, False)
+        if found:
+            return _found(found, u'in category require_family=False')
 
-        if category_bic is not None:
+        if cat_key is not None:
             if n_fam:
-                found = _iter_symbols(iter_family_symbols(doc, category_bic=None, limit=limit), True)
+                found = _lookup(None, True)
                 if found:
-                    if _dbg_enabled():
-                        try:
-                            _dbg_write(u'FOUND global require_family=True: {0}'.format(format_family_type(found)))
-                        except Exception:
-                            pass
-                    return found
-                found2 = _iter_symbols(iter_family_symbols(doc, category_bic=None, limit=limit), False)
-                if found2 and _dbg_enabled():
-                    try:
-                        _dbg_write(u'FOUND global require_family=False: {0}'.format(format_family_type(found2)))
-                    except Exception:
-                        pass
-                if not found2 and _dbg_enabled():
-                    _dbg_collect_top_matches(category_bic, max_scan=min(int(limit or 5000), 3000), top_n=15)
-                    _dbg_collect_top_matches(None, max_scan=2000, top_n=15)
-                return found2
-            found3 = _iter_symbols(iter_family_symbols(doc, category_bic=None, limit=limit), False)
-            if not found3 and _dbg_enabled():
-                _dbg_collect_top_matches(category_bic, max_scan=min(int(limit or 5000), 3000), top_n=15)
-                _dbg_collect_top_matches(None, max_scan=2000, top_n=15)
-            return found3
+                    return _found(found, u'global require_family=True')
+            found = _lookup(None, False)
+            if found:
+                return _found(found, u'global require_family=False')
+
+        if _dbg_enabled():
+            _dbg_collect_top_matches(cat_key, top_n=15)
+            if cat_key is not None:
+                _dbg_collect_top_matches(None, top_n=15)
         return None
     except Exception:
         return None
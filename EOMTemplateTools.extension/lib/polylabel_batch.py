@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Пакетный расчёт полюса недоступности (polylabel) для помещений.
+
+Повторяет алгоритм `link_reader._polylabel_xy` шаг в шаг (та же сетка, та же
+очередь с приоритетом, тот же порядок операций с плавающей точкой), поэтому
+результаты совпадают бит в бит. Отличие — в вычислении расстояния до границы:
+контуры один раз переводятся в geom2d.Loop (массивы `array('d')`), и
+знаковое расстояние считает `geom2d.signed_dist_to_boundary` — без XYZ и
+`float(p.X)` во внутреннем цикле.
+
+Ускорение — только внутри одного помещения: `polylabel_many` решает
+помещения уровня по очереди (или параллельно через room_executor), кандидаты
+разных помещений одним пакетом не считаются — без векторных операций
+в IronPython общий пакет не даёт выигрыша над тем же циклом.
+
+Контуры передаются как последовательности кортежей (x, y[, z]).
+"""
+
+import functools
+import heapq
+
+import geom2d
+
+
+_SQRT2 = 1.41421356237
+_IT_CAP = 20000
+
+
+class SegmentSet(object):
+    """Внешний контур и отверстия помещения как geom2d.Loop (одно извлечение координат)."""
+
+    __slots__ = ('outer', 'holes', 'n')
+
+    def __init__(self, outer, holes=None):
+        self.outer = geom2d.Loop.of(outer)
+        self.holes = [geom2d.Loop.of(h) for h in (holes or []) if h and len(h) >= 3]
+        self.n = len(self.outer)
+
+
+def signed_distances(xs, ys, seg):
+    """Знаковые расстояния до границы для набора точек (+ внутри, - снаружи)."""
+    if seg.n == 0:
+        return [-1e9] * len(xs)
+    outer, holes = seg.outer, seg.holes
+    return [geom2d.signed_dist_to_boundary(xs[i], ys[i], outer, holes) for i in range(len(xs))]
+
+
+def _centroid_xy(pts):
+    if not pts or len(pts) < 3:
+        return None
+    a2 = 0.0
+    cx6 = 0.0
+    cy6 = 0.0
+    n = len(pts)
+    for i in range(n):
+        x0 = float(pts[i][0])
+        y0 = float(pts[i][1])
+        x1 = float(pts[(i + 1) % n][0])
+        y1 = float(pts[(i + 1) % n][1])
+        cross = x0 * y1 - x1 * y0
+        a2 += cross
+        cx6 += (x0 + x1) * cross
+        cy6 += (y0 + y1) * cross
+    if abs(a2) < 1e-9:
+        return None
+    return cx6 / (3.0 * a2), cy6 / (3.0 * a2)
+
+
+def polylabel(outer, holes=None, precision=0.2):
+    """Полюс недоступности одного помещения: ((x, y), dist) или (None, None)."""
+    if not outer or len(outer) < 3:
+        return None, None
+    try:
+        prec = max(float(precision or 0.2), 1e-3)
+    except Exception:
+        prec = 0.2
+
+    xs_all = [float(p[0]) for p in outer]
+    ys_all = [float(p[1]) for p in outer]
+    min_x, max_x = min(xs_all), max(xs_all)
+    min_y, max_y = min(ys_all), max(ys_all)
+    width = max_x - min_x
+    height = max_y - min_y
+    if width <= 1e-9 or height <= 1e-9:
+        return None, None
+    cell_size = min(width, height)
+    h = cell_size / 2.0
+    if cell_size <= 1e-9:
+        return None, None
+
+    seg = SegmentSet(outer, holes)
+
+    cx_list = []
+    cy_list = []
+    x = min_x
+    while x < max_x:
+        y = min_y
+        while y < max_y:
+            cx_list.append(float(x + h))
+            cy_list.append(float(y + h))
+            y += cell_size
+        x += cell_size
+
+    q = []
+    uid = 0
+    for i, d in enumerate(signed_distances(cx_list, cy_list, seg)):
+        heapq.heappush(q, (-(d + h * _SQRT2), uid, cx_list[i], cy_list[i], h, d))
+        uid += 1
+
+    best_p = None
+    best_d = None
+    cc = _centroid_xy(outer)
+    if cc:
+        best_p = cc
+        best_d = signed_distances([cc[0]], [cc[1]], seg)[0]
+    if best_p is None:
+        cx = (min_x + max_x) * 0.5
+        cy = (min_y + max_y) * 0.5
+        best_p = (cx, cy)
+        best_d = signed_distances([cx], [cy], seg)[0]
+
+    it = 0
+    while q and it < _IT_CAP:
+        it += 1
+        neg_max, _, cx, cy, ch, cd = heapq.heappop(q)
+        if cd > best_d:
+            best_p = (cx, cy)
+            best_d = cd
+        if (-neg_max - best_d) <= prec:
+            continue
+        h2 = ch / 2.0
+        if h2 <= 1e-9:
+            continue
+        kx = [float(cx - h2), float(cx - h2), float(cx + h2), float(cx + h2)]
+        ky = [float(cy - h2), float(cy + h2), float(cy - h2), float(cy + h2)]
+        for i, d in enumerate(signed_distances(kx, ky, seg)):
+            heapq.heappush(q, (-(d + h2 * _SQRT2), uid, kx[i], ky[i], h2, d))
+            uid += 1
+
+    return best_p, best_d
+
+
+def _polylabel_item(item, precision=0.2):
+    try:
+        outer, holes = item
+        return polylabel(outer, holes, precision=precision)
+    except Exception:
+        return (None, None)
+
+
+def polylabel_many(rooms, precision=0.2, executor=None):
+    """Центры для всех помещений уровня (каждое помещение — отдельный polylabel).
+
+    Args:
+        rooms: последовательность (outer, holes) с вершинами-кортежами.
+        precision: точность в футах.
+        executor: room_executor.RoomTaskExecutor для параллельного расчёта
+            (None — последовательно).
+
+    Returns:
+        Список ((x, y), dist) в том же порядке; (None, None) для вырожденных.
+    """
+    fn = functools.partial(_polylabel_item, precision=precision)
+    if executor is None:
+        return [fn(item) for item in rooms or []]
+    return executor.map(fn, rooms or [], on_error=lambda item, exc: (None, None))
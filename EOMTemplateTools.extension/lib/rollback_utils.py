@@ -15,7 +15,6 @@ Example:
 """
 from __future__ import print_function
 
-import re
 from datetime import datetime
 from typing import Dict, List, Optional, Set, Tuple
 
@@ -26,56 +25,11 @@ except ImportError:
     revit = None
 
 
-# Default tag prefix used by all EOM tools
-DEFAULT_TAG_PREFIX = "AUTO_EOM"
-
-# Regex pattern to parse tag format: AUTO_EOM:TOOL:TIMESTAMP
-TAG_PATTERN = re.compile(
-    r"^(AUTO_EOM)(?::([A-Z_]+))?(?::(\d{8}_\d{6}))?",
-    re.IGNORECASE
-)
-
-
-def parse_tag(comment: Optional[str]) -> Optional[Dict[str, str]]:
-    """Parse AUTO_EOM tag from element comment.
-    
-    Args:
-        comment: The Comments parameter value from an element.
-        
-    Returns:
-        Dictionary with 'prefix', 'tool', 'timestamp' keys if valid tag,
-        None if not a valid AUTO_EOM tag.
-        
-    Examples:
-        >>> parse_tag("AUTO_EOM:SOCKET:20260117_143022")
-        {'prefix': 'AUTO_EOM', 'tool': 'SOCKET', 'timestamp': '20260117_143022'}
-        >>> parse_tag("AUTO_EOM:LIGHT")
-        {'prefix': 'AUTO_EOM', 'tool': 'LIGHT', 'timestamp': None}
-        >>> parse_tag("Some other comment")
-        None
-    """
-    if not comment:
-        return None
-    
-    comment = comment.strip()
-    match = TAG_PATTERN.match(comment)
-    
-    if not match:
-        # Try simple prefix match for legacy tags
-        if comment.upper().startswith(DEFAULT_TAG_PREFIX):
-            parts = comment.split(":")
-            return {
-                "prefix": parts[0] if parts else DEFAULT_TAG_PREFIX,
-                "tool": parts[1] if len(parts) > 1 else None,
-                "timestamp": parts[2] if len(parts) > 2 else None,
-            }
-        return None
-    
-    return {
-        "prefix": match.group(1) or DEFAULT_TAG_PREFIX,
-        "tool": match.group(2),
-        "timestamp": match.group(3),
-    }
+# Tag grammar lives with the tagged-element registry (IronPython-safe module);
+# re-exported here for existing callers.
+import tagged_registry  # noqa: E402
+from tagged_registry import DEFAULT_TAG_PREFIX  # noqa: E402
+from tagged_registry import TAG_PATTERN, parse_tag  # noqa: E402,F401
 
 
 def generate_tag(tool_name: str, include_timestamp: bool = True) -> str:
@@ -124,63 +78,15 @@ def find_tagged_elements(
     """
     if doc is None or DB is None:
         return []
-    
-    elements = []
-    
-    try:
-        # Use parameter filter for efficiency
-        provider = DB.ParameterValueProvider(
-            DB.ElementId(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS)
-        )
-        
-        # Filter for elements containing AUTO_EOM
-        rule = DB.FilterStringRule(
-            provider,
-            DB.FilterStringContains(),
-            DEFAULT_TAG_PREFIX
-        )
-        param_filter = DB.ElementParameterFilter(rule)
-        
-        collector = (
-            DB.FilteredElementCollector(doc)
-            .WhereElementIsNotElementType()
-            .WherePasses(param_filter)
-        )
-        
-        for elem in collector:
-            try:
-                comment_param = elem.get_Parameter(
-                    DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS
-                )
-                if not comment_param:
-                    continue
-                    
-                comment = comment_param.AsString()
-                if not comment:
-                    continue
-                
-                parsed = parse_tag(comment)
-                if not parsed:
-                    continue
-                
-                # Apply filters
-                if tag_filter:
-                    if not comment.upper().startswith(tag_filter.upper()):
-                        continue
-                
-                if tool_filter:
-                    if parsed.get("tool", "").upper() != tool_filter.upper():
-                        continue
-                
-                elements.append(elem)
-                
-            except Exception:
-                continue
-                
-    except Exception:
-        pass
-    
-    return elements
+
+    # Registry of AUTO_EOM elements: one collector pass per document,
+    # then dictionary lookups (see tagged_registry).
+    registry = tagged_registry.get_registry(doc)
+    if registry is None:
+        return []
+
+    records = registry.records(prefix=tag_filter or None, tool=tool_filter or None)
+    return [rec.elem for rec in records if rec.parsed]
 
 
 def get_unique_tags(doc) -> List[Tuple[str, int]]:
@@ -202,29 +108,13 @@ def get_unique_tags(doc) -> List[Tuple[str, int]]:
     if doc is None:
         return []
     
-    tag_counts: Dict[str, int] = {}
-    elements = find_tagged_elements(doc)
-    
-    for elem in elements:
-        try:
-            comment_param = elem.get_Parameter(
-                DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS
-            )
-            if not comment_param:
-                continue
-                
-            comment = comment_param.AsString()
-            parsed = parse_tag(comment)
-            
-            if parsed:
-                # Create tag key (prefix + tool, without timestamp)
-                tool = parsed.get("tool") or "UNKNOWN"
-                tag_key = "{}:{}".format(parsed["prefix"], tool)
-                tag_counts[tag_key] = tag_counts.get(tag_key, 0) + 1
-                
-        except Exception:
-            continue
-    
+    registry = tagged_registry.get_registry(doc) if DB is not None else None
+    if registry is None:
+        return []
+
+    # Tag key is prefix + tool, without timestamp
+    tag_counts: Dict[str, int] = registry.tag_counts()
+
     # Sort by count descending
     sorted_tags = sorted(tag_counts.items(), key=lambda x: -x[1])
     return sorted_tags
@@ -305,7 +195,9 @@ def delete_elements(doc, elements: List, transaction_name: str = "Undo AUTO_EOM"
                 
     except Exception:
         return 0
-    
+
+    if deleted:
+        tagged_registry.note_deleted(doc, element_ids)
     return deleted
 
 
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Смежность помещений уровня связи и внешние сегменты их границ.
+
+`socket_utils._is_room_outer_boundary_segment` для каждого сегмента каждого
+помещения проверял `IsPointInRoom` по обе стороны середины сегмента и искал
+помещение за стеной через `GetRoomAtPoint` (с перебором стадий при ошибке).
+Здесь это делается один раз на уровень связи: границы помещений берутся из
+кэша room_boundary, стороны проверяются по индексу помещений (room_index,
+«точка в полигоне» по контурам), а помещения, разделённые одной стеной,
+связываются рёбрами графа. Граф строится отдельно для каждого варианта
+опций границы (SpatialElementBoundaryOptions вызывающего), чтобы сегменты
+вызывающего совпадали с сегментами графа.
+
+    adj = room_adjacency.get_room_adjacency(link_doc, level_id, probe_ft)
+    adj.is_exterior(room, curve)       # True/False; None — сегмент не из кэша границ
+    adj.exterior_segments(room)        # [BoundarySegmentRecord]
+    adj.neighbours(room)               # {room_id: set(wall_id)}
+    adj.rooms_of_wall(wall_id)         # [room_id]
+
+Сегмент внешний, если ровно одна проба (probe_ft по нормали от середины)
+попадает в само помещение, а противоположная — ни в какое помещение уровня.
+Это не прежние API-пробы: принадлежность точки решает «точка в полигоне» по
+контурам помещений того же уровня (с Z-диапазоном их bbox), а не
+IsPointInRoom/GetRoomAtPoint. Поэтому помещения других уровней (например,
+двусветные с нижнего уровня) и стадии связи не учитываются, а проба в
+помещении без контура проверяется его IsPointInRoom.
+Граф хранится в снимке связи; для хост-документа не строится (None).
+"""
+
+from pyrevit import DB
+
+import room_boundary
+from room_index import RoomSpatialIndex
+
+# Шаг квантования середины сегмента для поиска (5 мм).
+KEY_FT = 5.0 / 304.8
+
+
+def _room_id(room):
+    try:
+        return int(room.Id.IntegerValue)
+    except Exception:
+        return None
+
+
+def _level_id(room):
+    try:
+        lid = room.LevelId
+        return int(lid.IntegerValue) if lid else None
+    except Exception:
+        return None
+
+
+def _mid_key(room_id, pt):
+    return (room_id, int(round(float(pt.X) / KEY_FT)), int(round(float(pt.Y) / KEY_FT)))
+
+
+def segment_probes(curve, probe_ft):
+    """(mid, p1, p2): середина кривой и точки по обе стороны от неё по нормали в XY; None при ошибке."""
+    try:
+        mid = curve.Evaluate(0.5, True)
+        d = curve.ComputeDerivatives(0.5, True)
+        v = d.BasisX if d else None
+        if mid is None or v is None:
+            return None
+        n = DB.XYZ(-float(v.Y), float(v.X), 0.0)
+        if n.GetLength() <= 1e-9:
+            return None
+        n = n.Normalize()
+    except Exception:
+        return None
+
+    try:
+        p1 = DB.XYZ(float(mid.X + n.X * probe_ft), float(mid.Y + n.Y * probe_ft), float(mid.Z))
+        p2 = DB.XYZ(float(mid.X - n.X * probe_ft), float(mid.Y - n.Y * probe_ft), float(mid.Z))
+    except Exception:
+        return None
+    return mid, p1, p2
+
+
+class RoomAdjacency(object):
+    """Граф смежности помещений одного уровня с классификацией сегментов границ.
+
+    Args:
+        rooms: помещения уровня.
+        probe_ft: расстояние пробных точек от середины сегмента.
+        opts: SpatialElementBoundaryOptions (None — общие room_boundary).
+        index: RoomSpatialIndex помещений (по умолчанию строится по rooms).
+    """
+
+    def __init__(self, rooms, probe_ft, opts=None, index=None):
+        self.probe_ft = float(probe_ft)
+        self.index = index if index is not None else RoomSpatialIndex(rooms)
+        self._wall_rooms = {}
+        self._neighbours = {}
+        self._exterior = {}
+        self._by_mid = {}
+        bounded = []
+        for room in rooms or []:
+            rid = _room_id(room)
+            if rid is None:
+                continue
+            rb = room_boundary.get_room_boundary(room, opts)
+            if rb is None:
+                continue
+            bounded.append((rid, rb))
+            for wid in rb.wall_ids():
+                self._wall_rooms.setdefault(wid, []).append(rid)
+        for rid, rb in bounded:
+            self._neighbours.setdefault(rid, {})
+            out = self._exterior.setdefault(rid, [])
+            for loop in rb.loops:
+                for rec in loop:
+                    if self._classify(rid, rec):
+                        out.append(rec)
+
+    def _rooms_at(self, pt):
+        try:
+            return self.index.find_all(pt)
+        except Exception:
+            return []
+
+    def _classify(self, rid, rec):
+        probes = segment_probes(rec.curve, self.probe_ft) if rec.curve is not None else None
+        if probes is None:
+            return False
+        mid, p1, p2 = probes
+        at1 = [_room_id(r) for r in self._rooms_at(p1)]
+        at2 = [_room_id(r) for r in self._rooms_at(p2)]
+        in1 = rid in at1
+        in2 = rid in at2
+        exterior = False
+        if in1 != in2:
+            opposite = [oid for oid in (at2 if in1 else at1) if oid != rid]
+            for oid in opposite:
+                if oid is not None:
+                    self._neighbours[rid].setdefault(oid, set()).add(rec.element_id)
+            exterior = not opposite
+        self._by_mid[_mid_key(rid, mid)] = exterior
+        return exterior
+
+    def is_exterior(self, room, curve):
+        """Внешний ли сегмент curve границы room; None, если сегмента нет в графе."""
+        rid = _room_id(room)
+        if rid is None or curve is None:
+            return None
+        try:
+            mid = curve.Evaluate(0.5, True)
+            return self._by_mid.get(_mid_key(rid, mid))
+        except Exception:
+            return None
+
+    def exterior_segments(self, room):
+        return list(self._exterior.get(_room_id(room), ()))
+
+    def neighbours(self, room):
+        """{id помещения за стеной: set(id разделяющих элементов)}."""
+        return dict(self._neighbours.get(_room_id(room), {}))
+
+    def rooms_of_wall(self, wall_id):
+        """Помещения уровня, в границу которых входит элемент wall_id."""
+        return list(self._wall_rooms.get(wall_id, ()))
+
+
+def get_room_adjacency(link_doc, level_id, probe_ft, opts=None):
+    """RoomAdjacency уровня связи из снимка link_reader; None для хост-документа."""
+    if link_doc is None:
+        return None
+    try:
+        import link_reader
+        snap = link_reader.get_link_snapshot(link_doc)
+    except Exception:
+        snap = None
+    if snap is None:
+        return None
+    if opts is None:
+        opts = room_boundary.boundary_options()
+    graphs = snap.cache('room_adjacency', dict)
+    key = (level_id, round(float(probe_ft), 6), room_boundary.options_key(opts))
+    adj = graphs.get(key)
+    if adj is None:
+        rooms = [r.element for r in snap.rooms_on_level(level_id)]
+        adj = RoomAdjacency(rooms, probe_ft, opts=opts)
+        graphs[key] = adj
+    return adj
+
+
+def get_room_adjacency_of(link_doc, room, probe_ft, opts=None):
+    """RoomAdjacency уровня помещения room (см. get_room_adjacency)."""
+    if room is None:
+        return None
+    return get_room_adjacency(link_doc, _level_id(room), probe_ft, opts=opts)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Кэш границ помещений (GetBoundarySegments) на сеанс.
+
+Инструменты читали границы одного и того же помещения заново, каждый раз
+с новым SpatialElementBoundaryOptions. Здесь границы читаются один раз на
+ключ (документ связи, id помещения, вариант границы) и хранятся в снимке
+связи (link_reader) вместе с кривыми, id ограничивающих элементов и
+упрощёнными контурами.
+
+    rb = room_boundary.get_room_boundary(room)            # Finish, общие опции
+    rb = room_boundary.get_room_boundary(room, opts)      # опции инструмента
+    segs = rb.longest_loop()                              # [BoundarySegmentRecord]
+    pts = rb.simplified_points(0)
+
+Записи сегментов повторяют интерфейс BoundarySegment (GetCurve(), ElementId),
+кривая читается из API один раз. Кривые общие для всех инструментов — не
+изменять их на месте. Хост-документ не кэшируется (инструменты в нём меняют
+помещения): границы читаются заново, опции переиспользуются.
+"""
+
+from pyrevit import DB
+
+import geom2d
+from lru_cache import LruCache
+
+MAX_ROOMS = 10000
+
+_OPTIONS = {}
+
+
+def boundary_options(location=None):
+    """Общий SpatialElementBoundaryOptions для варианта границы (None — по умолчанию, Finish).
+
+    Объект переиспользуется всеми вызовами и не должен изменяться.
+    """
+    key = _location_key(location)
+    opts = _OPTIONS.get(key)
+    if opts is None:
+        opts = DB.SpatialElementBoundaryOptions()
+        if location is not None:
+            try:
+                opts.SpatialElementBoundaryLocation = location
+            except Exception:
+                pass
+        _OPTIONS[key] = opts
+    return opts
+
+
+def _location_key(location):
+    if location is None:
+        return None
+    try:
+        return int(location)
+    except Exception:
+        return str(location)
+
+
+def options_key(opts):
+    """Ключ варианта границы: (SpatialElementBoundaryLocation, StoreFreeBoundaryFaces)."""
+    if opts is None:
+        return (None, False)
+    try:
+        loc = _location_key(opts.SpatialElementBoundaryLocation)
+    except Exception:
+        loc = None
+    try:
+        free = bool(opts.StoreFreeBoundaryFaces)
+    except Exception:
+        free = False
+    return (loc, free)
+
+
+def _elem_id_int(eid):
+    if eid is None:
+        return None
+    try:
+        value = int(eid.IntegerValue)
+    except Exception:
+        try:
+            value = int(eid.Value)
+        except Exception:
+            return None
+    return value if value >= 0 else None
+
+
+def _room_id(room):
+    try:
+        return _elem_id_int(room.Id)
+    except Exception:
+        return None
+
+
+class BoundarySegmentRecord(object):
+    """Сегмент границы с прочитанной кривой; GetCurve() не обращается к API."""
+
+    __slots__ = ('segment', 'curve', 'ElementId', 'element_id', 'length')
+
+    def __init__(self, segment):
+        self.segment = segment
+        try:
+            self.curve = segment.GetCurve()
+        except Exception:
+            self.curve = None
+        try:
+            self.ElementId = segment.ElementId
+        except Exception:
+            self.ElementId = None
+        self.element_id = _elem_id_int(self.ElementId)
+        self.length = 0.0
+        if self.curve is not None:
+            try:
+                self.length = float(self.curve.Length)
+            except Exception:
+                self.length = 0.0
+
+    def GetCurve(self):
+        return self.curve
+
+
+class RoomBoundary(object):
+    """Петли границы одного помещения в порядке GetBoundarySegments.
+
+    loops[i] — записи сегментов петли i, lengths[i] — её длина по кривым,
+    longest_index — петля наибольшей длины (внешний контур в понимании
+    socket_utils) или None для помещения без границ.
+    """
+
+    def __init__(self, seglists=None):
+        self.loops = []
+        for segs in seglists or []:
+            try:
+                self.loops.append([BoundarySegmentRecord(s) for s in segs or []])
+            except Exception:
+                continue
+        self.lengths = [sum(r.length for r in loop) for loop in self.loops]
+        self.longest_index = None
+        for i, total in enumerate(self.lengths):
+            if self.longest_index is None or total > self.lengths[self.longest_index]:
+                self.longest_index = i
+        self._points = {}
+        self._simplified = {}
+
+    def __len__(self):
+        return len(self.loops)
+
+    def _loop_indexes(self, index):
+        return range(len(self.loops)) if index is None else [index]
+
+    def longest_loop(self):
+        """Сегменты самой длинной петли или None."""
+        if self.longest_index is None:
+            return None
+        return self.loops[self.longest_index]
+
+    def curves(self, index=None):
+        """Кривые петли index (None — всех петель) без пустых."""
+        return [r.curve for i in self._loop_indexes(index) for r in self.loops[i] if r.curve is not None]
+
+    def wall_ids(self, index=None):
+        """Уникальные id ограничивающих элементов (int) в порядке обхода."""
+        seen = set()
+        out = []
+        for i in self._loop_indexes(index):
+            for r in self.loops[i]:
+                eid = r.element_id
+                if eid is not None and eid not in seen:
+                    seen.add(eid)
+                    out.append(eid)
+        return out
+
+    def loop_points(self, index):
+        """Начальные точки кривых петли (XYZ)."""
+        pts = self._points.get(index)
+        if pts is None:
+            pts = []
+            for r in self.loops[index]:
+                try:
+                    pts.append(r.curve.GetEndPoint(0))
+                except Exception:
+                    continue
+            self._points[index] = pts
+        return list(pts)
+
+    def simplified_points(self, index):
+        """loop_points без дублей и коллинеарных вершин (geom2d.simplify_polygon)."""
+        pts = self._simplified.get(index)
+        if pts is None:
+            pts = self.loop_points(index)
+            if len(pts) >= 3:
+                keep = geom2d.simplify_polygon(geom2d.Loop.of(pts))
+                pts = [pts[i] for i in keep]
+            self._simplified[index] = pts
+        return list(pts)
+
+
+def _read(room, opts):
+    try:
+        seglists = room.GetBoundarySegments(opts)
+    except Exception:
+        seglists = None
+    return RoomBoundary(seglists)
+
+
+def _boundary_cache(doc):
+    try:
+        import link_reader
+        snap = link_reader.get_link_snapshot(doc)
+    except Exception:
+        snap = None
+    if snap is None:
+        return None
+    return snap.cache('room_boundaries', lambda: LruCache(MAX_ROOMS))
+
+
+def get_room_boundary(room, opts=None):
+    """RoomBoundary помещения (None — нет помещения); для связи — из кэша снимка."""
+    if room is None:
+        return None
+    if opts is None:
+        opts = boundary_options()
+    rid = _room_id(room)
+    cache = _boundary_cache(getattr(room, 'Document', None)) if rid is not None else None
+    if cache is None:
+        return _read(room, opts)
+    key = (rid, options_key(opts))
+    rb = cache.get(key)
+    if rb is None:
+        rb = _read(room, opts)
+        cache.put(key, rb)
+    return rb
+
+
+def get_room_boundary_stats(link_doc):
+    """Статистика кэша границ связи (LruCache.stats) или None."""
+    cache = _boundary_cache(link_doc)
+    return cache.stats() if cache is not None else None
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Параллельный расчёт по помещениям/уровням на извлечённых данных.
+
+Чистая геометрия (контуры-кортежи, интервалы, центры) считается в пуле
+потоков; под IronPython нет GIL, и потоки дают реальный параллелизм.
+Пул процессов (mode='process') доступен только в CPython (тесты, CI) и
+требует функций уровня модуля. Revit API из задач НЕ вызывается:
+извлечение данных и транзакции остаются в потоке API.
+
+    executor = room_executor.get_executor(rules)
+    centers = executor.map(polylabel_for_room, room_data)
+    by_level = executor.map_partitions(process_level, room_data, key=level_of)
+
+Сейчас через исполнитель идут только центры помещений (polylabel) —
+`link_reader.polylabel_rooms_xy` в СветПоПомещениям. Генерация кандидатов
+розеток (01_Общие calculate_allowed_path/generate_candidates_general,
+МокрыеТочки generate_candidates, КухняБлок get_perimeter_candidates) и
+центры СветПоЦентру по ходу расчёта обращаются к Revit API (GetElement,
+проёмы, тексты семейств, IsPointInRoom, кривые Revit), поэтому остаются
+последовательными до перевода на извлечённые кортежи (geom2d, room_boundary).
+"""
+
+import threading
+
+try:
+    from collections import OrderedDict
+except ImportError:  # pragma: no cover
+    OrderedDict = dict
+
+MODE_SERIAL = 'serial'
+MODE_THREAD = 'thread'
+MODE_PROCESS = 'process'
+
+MAX_AUTO_WORKERS = 8
+
+
+def cpu_count():
+    """Число логических процессоров (IronPython: System.Environment)."""
+    try:
+        import multiprocessing
+        return max(1, int(multiprocessing.cpu_count()))
+    except Exception:
+        pass
+    try:
+        import System
+        return max(1, int(System.Environment.ProcessorCount))
+    except Exception:
+        return 1
+
+
+def _process_pool_class():
+    try:
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor
+    except Exception:
+        return None
+
+
+def partition(items, key):
+    """OrderedDict {ключ: [элементы]} в порядке первого появления ключа."""
+    groups = OrderedDict()
+    for item in items or []:
+        groups.setdefault(key(item), []).append(item)
+    return groups
+
+
+class TaskError(Exception):
+    """Ошибка задачи: индекс элемента и исходное исключение."""
+
+    def __init__(self, index, error):
+        Exception.__init__(self, u'task {0}: {1}'.format(index, error))
+        self.index = index
+        self.error = error
+
+
+class RoomTaskExecutor(object):
+    """Исполнитель задач по помещениям/уровням.
+
+    Args:
+        workers: число потоков/процессов; 0/None — по числу процессоров
+            (не больше MAX_AUTO_WORKERS), 1 — последовательно.
+        mode: 'thread' (по умолчанию), 'process' (только CPython; иначе
+            потоки) или 'serial'.
+    """
+
+    def __init__(self, workers=None, mode=MODE_THREAD):
+        try:
+            workers = int(workers or 0)
+        except Exception:
+            workers = 0
+        if workers <= 0:
+            workers = min(MAX_AUTO_WORKERS, cpu_count())
+        mode = (mode or MODE_THREAD).lower()
+        if mode == MODE_PROCESS and _process_pool_class() is None:
+            mode = MODE_THREAD
+        if workers <= 1 or mode not in (MODE_THREAD, MODE_PROCESS):
+            mode, workers = MODE_SERIAL, 1
+        self.workers = workers
+        self.mode = mode
+
+    def map(self, fn, items, on_error=None):
+        """[fn(item)] в порядке items.
+
+        Без on_error первая (по порядку items) ошибка поднимается как TaskError
+        после завершения всех задач; с on_error(item, exc) результат — её
+        возвращаемое значение.
+        """
+        items = list(items or [])
+        if not items:
+            return []
+        if self.mode == MODE_SERIAL or len(items) == 1:
+            outcomes = [_call(fn, item) for item in items]
+        elif self.mode == MODE_PROCESS:
+            outcomes = self._map_process(fn, items)
+        else:
+            outcomes = self._map_threads(fn, items)
+        results = []
+        for i, (ok, value) in enumerate(outcomes):
+            if ok:
+                results.append(value)
+            elif on_error is not None:
+                results.append(on_error(items[i], value))
+            else:
+                raise TaskError(i, value)
+        return results
+
+    def map_partitions(self, fn, items, key, on_error=None):
+        """{ключ: fn(элементы группы)}: одна задача на группу (например, уровень)."""
+        groups = partition(items, key)
+        keys = list(groups.keys())
+        results = self.map(fn, [groups[k] for k in keys], on_error=on_error)
+        return OrderedDict(zip(keys, results))
+
+    def _map_threads(self, fn, items):
+        outcomes = [None] * len(items)
+        lock = threading.Lock()
+        cursor = [0]
+
+        def _worker():
+            while True:
+                with lock:
+                    i = cursor[0]
+                    cursor[0] = i + 1
+                if i >= len(items):
+                    return
+                outcomes[i] = _call(fn, items[i])
+
+        threads = [threading.Thread(target=_worker) for _ in range(min(self.workers, len(items)))]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+        return outcomes
+
+    def _map_process(self, fn, items):
+        pool_cls = _process_pool_class()
+        chunk = max(1, len(items) // (self.workers * 4))
+        with pool_cls(max_workers=self.workers) as pool:
+            return list(pool.map(_call_packed, [(fn, item) for item in items], chunksize=chunk))
+
+
+def _call(fn, item):
+    try:
+        return True, fn(item)
+    except Exception as ex:
+        return False, ex
+
+
+def _call_packed(args):
+    return _call(args[0], args[1])
+
+
+_SERIAL = RoomTaskExecutor(workers=1)
+
+
+def get_executor(rules=None):
+    """Исполнитель по правилам: parallel_mode ('thread'/'process'/'serial'), parallel_workers."""
+    rules = rules or {}
+    mode = rules.get('parallel_mode', MODE_THREAD)
+    workers = rules.get('parallel_workers', 0)
+    if mode == MODE_SERIAL:
+        return _SERIAL
+    return RoomTaskExecutor(workers=workers, mode=mode)
+
+
+def serial_executor():
+    return _SERIAL
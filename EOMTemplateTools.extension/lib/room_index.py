@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Пространственный индекс помещений для поиска помещения по точке.
+
+Вместо перебора всех помещений с `IsPointInRoom` для каждого элемента строится
+равномерная сетка по ограничивающим прямоугольникам помещений. Запрос проверяет
+только помещения своей ячейки: сначала Z-диапазон, затем "точка в полигоне"
+geom2d по заранее извлечённым контурам (geom2d.Loop).
+Если контур извлечь не удалось, используется `room.IsPointInRoom`.
+"""
+
+import math
+
+import geom2d
+
+
+def _default_boundary_loader(room):
+    import link_reader
+    outer, holes = link_reader._room_boundary_loops_points(room)
+    return outer, holes
+
+
+def _xyz(pt):
+    try:
+        return float(pt.X), float(pt.Y), float(pt.Z)
+    except Exception:
+        pass
+    try:
+        return float(pt[0]), float(pt[1]), (float(pt[2]) if len(pt) > 2 else None)
+    except Exception:
+        return None
+
+
+class _RoomEntry(object):
+    __slots__ = ('room', 'outer', 'holes', 'min_x', 'min_y', 'max_x', 'max_y', 'min_z', 'max_z')
+
+
+class RoomSpatialIndex(object):
+    """Равномерная сетка по bbox помещений.
+
+    Args:
+        rooms: помещения (Revit Room или совместимые объекты).
+        cell_size_ft: размер ячейки; по умолчанию — средний размер помещения.
+        boundary_loader: room -> (outer, holes); по умолчанию link_reader (с кэшем связи).
+        z_tolerance_ft: допуск по Z при сравнении с bbox помещения.
+    """
+
+    def __init__(self, rooms, cell_size_ft=None, boundary_loader=None, z_tolerance_ft=1.0):
+        self._loader = boundary_loader or _default_boundary_loader
+        self._ztol = float(z_tolerance_ft or 0.0)
+        self._entries = []
+        self._grid = {}
+        for room in rooms or []:
+            entry = self._make_entry(room)
+            if entry is not None:
+                self._entries.append(entry)
+        self.cell = self._pick_cell_size(cell_size_ft)
+        for entry in self._entries:
+            for key in self._cells_for_box(entry.min_x, entry.min_y, entry.max_x, entry.max_y):
+                self._grid.setdefault(key, []).append(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _make_entry(self, room):
+        if room is None:
+            return None
+        outer = geom2d.Loop()
+        holes = []
+        try:
+            o, hs = self._loader(room)
+            outer = geom2d.Loop.of(o)
+            holes = [h for h in (geom2d.Loop.of(x) for x in (hs or [])) if len(h) >= 3]
+        except Exception:
+            outer = geom2d.Loop()
+            holes = []
+
+        bb = None
+        try:
+            bb = room.get_BoundingBox(None)
+        except Exception:
+            bb = None
+
+        e = _RoomEntry()
+        e.room = room
+        e.outer = outer if len(outer) >= 3 else None
+        e.holes = holes
+        e.min_z = None
+        e.max_z = None
+        if e.outer:
+            xs, ys = e.outer.xs, e.outer.ys
+            e.min_x, e.max_x, e.min_y, e.max_y = min(xs), max(xs), min(ys), max(ys)
+        elif bb is not None:
+            try:
+                e.min_x, e.min_y = float(bb.Min.X), float(bb.Min.Y)
+                e.max_x, e.max_y = float(bb.Max.X), float(bb.Max.Y)
+            except Exception:
+                return None
+        else:
+            return None
+        if bb is not None:
+            try:
+                e.min_z = float(bb.Min.Z)
+                e.max_z = float(bb.Max.Z)
+            except Exception:
+                e.min_z = None
+                e.max_z = None
+        return e
+
+    def _pick_cell_size(self, cell_size_ft):
+        try:
+            if cell_size_ft and float(cell_size_ft) > 0:
+                return float(cell_size_ft)
+        except Exception:
+            pass
+        if not self._entries:
+            return 10.0
+        total = 0.0
+        for e in self._entries:
+            total += max(e.max_x - e.min_x, e.max_y - e.min_y)
+        return max(total / float(len(self._entries)), 1.0)
+
+    def _cells_for_box(self, min_x, min_y, max_x, max_y):
+        c = self.cell
+        i0, i1 = int(math.floor(min_x / c)), int(math.floor(max_x / c))
+        j0, j1 = int(math.floor(min_y / c)), int(math.floor(max_y / c))
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                yield (i, j)
+
+    def candidates(self, x, y):
+        """Помещения, bbox которых накрывает ячейку точки (без проверки контура)."""
+        key = (int(math.floor(x / self.cell)), int(math.floor(y / self.cell)))
+        return [e.room for e in self._grid.get(key, ())]
+
+    def _entry_contains(self, e, x, y, z, pt):
+        if x < e.min_x or x > e.max_x or y < e.min_y or y > e.max_y:
+            return False
+        if z is not None and e.min_z is not None:
+            if z < e.min_z - self._ztol or z > e.max_z + self._ztol:
+                return False
+        if e.outer:
+            if not geom2d.point_in_poly(x, y, e.outer):
+                return False
+            for h in e.holes:
+                if geom2d.point_in_poly(x, y, h):
+                    return False
+            return True
+        try:
+            return bool(e.room.IsPointInRoom(pt))
+        except Exception:
+            return False
+
+    def find(self, pt):
+        """Возвращает помещение, содержащее точку (XYZ или кортеж), или None."""
+        xyz = _xyz(pt)
+        if xyz is None:
+            return None
+        x, y, z = xyz
+        key = (int(math.floor(x / self.cell)), int(math.floor(y / self.cell)))
+        for e in self._grid.get(key, ()):
+            if self._entry_contains(e, x, y, z, pt):
+                return e.room
+        return None
+
+    def find_all(self, pt):
+        """Все помещения, содержащие точку (например, при наложении помещений)."""
+        xyz = _xyz(pt)
+        if xyz is None:
+            return []
+        x, y, z = xyz
+        key = (int(math.floor(x / self.cell)), int(math.floor(y / self.cell)))
+        return [e.room for e in self._grid.get(key, ()) if self._entry_contains(e, x, y, z, pt)]
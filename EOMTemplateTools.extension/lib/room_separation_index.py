@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Индекс линий разделения помещений (OST_RoomSeparationLines) связи.
+
+Раньше для каждого помещения собирались все линии разделения связи и у
+каждой заново читалась геометрия (get_Geometry) — O(помещения × линии)
+извлечений геометрии. Здесь геометрия читается один раз на связь, отрезки
+раскладываются по ячейкам сетки по центру линии, и запрос помещения —
+выборка ячеек его габарита:
+
+    index = room_separation_index.get_room_separation_index(link_doc)
+    for line in index.in_box(min_x, min_y, max_x, max_y):
+        line.p0, line.p1, line.center, line.element
+
+Координаты — документа связи. Индекс связи хранится в её снимке
+(link_reader), для хост-документа строится заново.
+"""
+
+import math
+
+from pyrevit import DB
+
+# Ячейка сетки (~2 м) — порядка размера помещения.
+CELL_FT = 2000.0 / 304.8
+
+
+class SeparationLine(object):
+    """Отрезок линии разделения (DB.XYZ концов и центра в координатах связи)."""
+    __slots__ = ('element', 'p0', 'p1', 'center')
+
+    def __init__(self, element, p0, p1):
+        self.element = element
+        self.p0 = p0
+        self.p1 = p1
+        self.center = DB.XYZ(
+            (p0.X + p1.X) / 2,
+            (p0.Y + p1.Y) / 2,
+            (p0.Z + p1.Z) / 2
+        )
+
+
+def _element_lines(elem):
+    """Отрезки DB.Line геометрии элемента (в том числе внутри GeometryInstance)."""
+    out = []
+    geom = elem.get_Geometry(DB.Options())
+    if not geom:
+        return out
+    for geom_obj in geom:
+        if isinstance(geom_obj, DB.Line):
+            out.append(geom_obj)
+        elif isinstance(geom_obj, DB.GeometryInstance):
+            # Иногда геометрия обёрнута в GeometryInstance
+            for sub_obj in geom_obj.GetInstanceGeometry():
+                if isinstance(sub_obj, DB.Line):
+                    out.append(sub_obj)
+    return out
+
+
+class RoomSeparationIndex(object):
+    """Сетка линий разделения по XY-центру; порядок ответов — порядок документа."""
+
+    def __init__(self, elements, cell_ft=CELL_FT):
+        self.cell = float(cell_ft)
+        self.lines = []
+        self._grid = {}
+        for elem in elements or []:
+            try:
+                segs = _element_lines(elem)
+            except Exception:
+                continue
+            for line in segs:
+                try:
+                    rec = SeparationLine(elem, line.GetEndPoint(0), line.GetEndPoint(1))
+                except Exception:
+                    continue
+                self._grid.setdefault(self._key(rec.center.X, rec.center.Y), []).append(len(self.lines))
+                self.lines.append(rec)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def _key(self, x, y):
+        c = self.cell
+        return int(math.floor(x / c)), int(math.floor(y / c))
+
+    def in_box(self, min_x, min_y, max_x, max_y):
+        """Линии, центр которых лежит в XY-прямоугольнике (границы включительно)."""
+        i0, j0 = self._key(min_x, min_y)
+        i1, j1 = self._key(max_x, max_y)
+        found = []
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._grid):
+            cells = self._grid.values()
+        else:
+            cells = [self._grid.get((i, j), ()) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+        for idxs in cells:
+            for idx in idxs:
+                c = self.lines[idx].center
+                if min_x <= c.X <= max_x and min_y <= c.Y <= max_y:
+                    found.append(idx)
+        found.sort()
+        return [self.lines[idx] for idx in found]
+
+
+def _collect_separation_elements(doc):
+    try:
+        return list(DB.FilteredElementCollector(doc)
+                    .OfCategory(DB.BuiltInCategory.OST_RoomSeparationLines)
+                    .WhereElementIsNotElementType())
+    except Exception:
+        return []
+
+
+def get_room_separation_index(doc):
+    """RoomSeparationIndex документа; для связи — из снимка link_reader."""
+    if doc is None:
+        return None
+    try:
+        import link_reader
+        snap = link_reader.get_link_snapshot(doc)
+    except Exception:
+        snap = None
+    if snap is not None:
+        return snap.cache('room_separation_index',
+                          lambda: RoomSeparationIndex(_collect_separation_elements(doc)))
+    return RoomSeparationIndex(_collect_separation_elements(doc))
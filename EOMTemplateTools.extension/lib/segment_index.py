@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""Сеточные индексы отрезков и габаритов (чистый Python) для запросов расстояния.
+
+Объекты раскладываются по ячейкам равномерной XY-сетки по своему габариту;
+запрос с радиусом проверяет только объекты ближайших ячеек, точное
+расстояние считается в 3D. Очень длинные объекты (габарит больше
+MAX_CELLS_PER_ITEM ячеек) хранятся отдельно и проверяются всегда.
+
+Координаты — кортежи (x, y, z) во внутренних единицах (футы).
+
+`RoomSegmentIndex` — плоский (XY) индекс отрезков границы одного помещения
+[(p0, p1, payload)] для поиска ближайшего сегмента и трассировки лучей;
+`room_segment_index(segs)` переиспользует индекс для тех же отрезков.
+Стены документа целиком индексирует `wall_index.WallSegmentIndex`.
+
+Геометрия отрезков (расстояния, пересечения) — из geom2d.
+"""
+
+import math
+from array import array
+
+import geom2d
+
+MAX_CELLS_PER_ITEM = 4096
+
+
+def point_box_distance(p, lo, hi):
+    """Расстояние от точки до осепараллельного параллелепипеда (0 внутри)."""
+    d2 = 0.0
+    for i in (0, 1, 2):
+        v = p[i]
+        if v < lo[i]:
+            d2 += (lo[i] - v) ** 2
+        elif v > hi[i]:
+            d2 += (v - hi[i]) ** 2
+    return math.sqrt(d2)
+
+
+class _GridIndex(object):
+    """Общая часть: сетка XY-габаритов, кандидаты для точки с радиусом."""
+
+    def __init__(self, cell_ft):
+        self.cell = max(1e-3, float(cell_ft or 1.0))
+        self.items = []
+        self._grid = {}
+        self._oversize = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def _key(self, x, y):
+        c = self.cell
+        return int(math.floor(x / c)), int(math.floor(y / c))
+
+    def _register(self, idx, min_x, min_y, max_x, max_y):
+        i0, j0 = self._key(min_x, min_y)
+        i1, j1 = self._key(max_x, max_y)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > MAX_CELLS_PER_ITEM:
+            self._oversize.append(idx)
+            return
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self._grid.setdefault((i, j), []).append(idx)
+
+    def candidates(self, x, y, radius):
+        """Индексы объектов, чей XY-габарит может быть ближе radius (по возрастанию)."""
+        r = max(0.0, float(radius))
+        i0, j0 = self._key(x - r, y - r)
+        i1, j1 = self._key(x + r, y + r)
+        seen = set(self._oversize)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._grid):
+            seen.update(range(len(self.items)))
+        else:
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    seen.update(self._grid.get((i, j), ()))
+        return sorted(seen)
+
+
+class SegmentIndex(_GridIndex):
+    """Индекс 3D-отрезков с полезной нагрузкой.
+
+    Args:
+        cell_ft: размер ячейки; разумно брать порядка радиуса запросов.
+    """
+
+    def add(self, a, b, item=None):
+        a = (float(a[0]), float(a[1]), float(a[2]))
+        b = (float(b[0]), float(b[1]), float(b[2]))
+        idx = len(self.items)
+        self.items.append((a, b, item))
+        self._register(idx, min(a[0], b[0]), min(a[1], b[1]), max(a[0], b[0]), max(a[1], b[1]))
+        return idx
+
+    def nearest(self, p, max_dist):
+        """(item, расстояние) ближайшего отрезка не дальше max_dist или (None, None)."""
+        best_item, best_d = None, None
+        lim = float(max_dist)
+        for idx in self.candidates(p[0], p[1], lim):
+            a, b, item = self.items[idx]
+            d = geom2d.point_segment_distance(p, a, b)
+            if d <= lim and (best_d is None or d < best_d):
+                best_item, best_d = item, d
+        return best_item, best_d
+
+
+class BoxIndex(_GridIndex):
+    """Индекс осепараллельных габаритов (min, max) с полезной нагрузкой."""
+
+    def add(self, lo, hi, item=None):
+        lo = (float(lo[0]), float(lo[1]), float(lo[2]))
+        hi = (float(hi[0]), float(hi[1]), float(hi[2]))
+        idx = len(self.items)
+        self.items.append((lo, hi, item))
+        self._register(idx, lo[0], lo[1], hi[0], hi[1])
+        return idx
+
+    def nearest(self, p, max_dist):
+        """(item, расстояние) ближайшего габарита не дальше max_dist или (None, None)."""
+        best_item, best_d = None, None
+        lim = float(max_dist)
+        for idx in self.candidates(p[0], p[1], lim):
+            lo, hi, item = self.items[idx]
+            d = point_box_distance(p, lo, hi)
+            if d <= lim and (best_d is None or d < best_d):
+                best_item, best_d = item, d
+        return best_item, best_d
+
+    def containing_xy(self, x, y, pad=0.0):
+        """Items габаритов, чей XY (расширенный на pad) содержит точку."""
+        out = []
+        for idx in self.candidates(x, y, pad):
+            lo, hi, item = self.items[idx]
+            if lo[0] - pad <= x <= hi[0] + pad and lo[1] - pad <= y <= hi[1] + pad:
+                out.append(item)
+        return out
+
+
+class RoomSegmentIndex(_GridIndex):
+    """XY-индекс отрезков [(p0, p1, payload)] (точки XYZ или кортежи).
+
+    Результаты — позиции отрезков во входном списке; при равных расстояниях
+    выигрывает меньшая позиция, как при линейном переборе.
+
+    Args:
+        segments: отрезки; payload не используется индексом.
+        cell_ft: размер ячейки (по умолчанию — габарит / sqrt(число отрезков)).
+    """
+
+    EPS = 1e-6
+
+    def __init__(self, segments, cell_ft=None):
+        self.segments = list(segments or [])
+        self.ax, self.ay = array('d'), array('d')
+        self.bx, self.by = array('d'), array('d')
+        for seg in self.segments:
+            x0, y0 = geom2d._xy(seg[0])
+            x1, y1 = geom2d._xy(seg[1])
+            self.ax.append(x0)
+            self.ay.append(y0)
+            self.bx.append(x1)
+            self.by.append(y1)
+        n = len(self.segments)
+        if n:
+            min_x, max_x = min(min(self.ax), min(self.bx)), max(max(self.ax), max(self.bx))
+            min_y, max_y = min(min(self.ay), min(self.by)), max(max(self.ay), max(self.by))
+        else:
+            min_x = max_x = min_y = max_y = 0.0
+        if cell_ft is None:
+            span = max(max_x - min_x, max_y - min_y, 1e-3)
+            cell_ft = span / max(1.0, math.sqrt(n))
+        _GridIndex.__init__(self, cell_ft)
+        e = self.EPS
+        for idx in range(n):
+            self.items.append(idx)
+            x0, y0, x1, y1 = self.ax[idx], self.ay[idx], self.bx[idx], self.by[idx]
+            self._register(idx, min(x0, x1) - e, min(y0, y1) - e, max(x0, x1) + e, max(y0, y1) + e)
+        i0, j0 = self._key(min_x - e, min_y - e)
+        i1, j1 = self._key(max_x + e, max_y + e)
+        self._bounds = (i0, j0, i1, j1)
+
+    def distance(self, idx, x, y):
+        """(расстояние, (px, py)) от точки до отрезка idx в плане."""
+        px, py, _ = geom2d.closest_point_on_segment(x, y, self.ax[idx], self.ay[idx], self.bx[idx], self.by[idx])
+        return math.sqrt((x - px) ** 2 + (y - py) ** 2), (px, py)
+
+    def direction(self, idx):
+        """Единичное направление отрезка (ux, uy) или None для вырожденного."""
+        vx, vy = self.bx[idx] - self.ax[idx], self.by[idx] - self.ay[idx]
+        ln = math.sqrt(vx * vx + vy * vy)
+        if ln <= 1e-6:
+            return None
+        return vx / ln, vy / ln
+
+    def _ring(self, ci, cj, k):
+        i0, j0, i1, j1 = self._bounds
+        if k == 0:
+            if i0 <= ci <= i1 and j0 <= cj <= j1:
+                yield ci, cj
+            return
+        for i in range(max(ci - k, i0), min(ci + k, i1) + 1):
+            for j in (cj - k, cj + k):
+                if j0 <= j <= j1:
+                    yield i, j
+        for j in range(max(cj - k + 1, j0), min(cj + k - 1, j1) + 1):
+            for i in (ci - k, ci + k):
+                if i0 <= i <= i1:
+                    yield i, j
+
+    def nearest(self, x, y, accept=None, max_dist=None):
+        """(позиция, расстояние, (px, py)) ближайшего отрезка или (None, None, None).
+
+        accept(idx) -> bool отбирает допустимые отрезки; поиск идёт кольцами
+        ячеек от точки и останавливается, как только дальние кольца не могут
+        дать отрезок ближе найденного.
+        """
+        best = [None, None, None]
+        if not self.items:
+            return tuple(best)
+        seen = set()
+
+        def _test(idx):
+            if idx in seen:
+                return
+            seen.add(idx)
+            if accept is not None and not accept(idx):
+                return
+            d, proj = self.distance(idx, x, y)
+            if best[1] is None or d < best[1] or (d == best[1] and idx < best[0]):
+                best[0], best[1], best[2] = idx, d, proj
+
+        for idx in self._oversize:
+            _test(idx)
+        ci, cj = self._key(x, y)
+        i0, j0, i1, j1 = self._bounds
+        k = max(0, i0 - ci, ci - i1, j0 - cj, cj - j1)
+        k_max = max(abs(ci - i0), abs(ci - i1), abs(cj - j0), abs(cj - j1))
+        while k <= k_max:
+            for cell in self._ring(ci, cj, k):
+                for idx in self._grid.get(cell, ()):
+                    _test(idx)
+            # Непросмотренные отрезки лежат в кольцах >= k + 1, т.е. не ближе k ячеек.
+            reach = k * self.cell
+            if best[1] is not None and best[1] < reach:
+                break
+            if max_dist is not None and reach > max_dist:
+                break
+            k += 1
+        if best[1] is None or (max_dist is not None and best[1] > max_dist):
+            return None, None, None
+        return tuple(best)
+
+    def _ray_hit(self, idx, ox, oy, rx, ry, max_dist, tol=1e-9):
+        ax, ay, bx, by = self.ax[idx], self.ay[idx], self.bx[idx], self.by[idx]
+        sx, sy = bx - ax, by - ay
+        if math.sqrt(sx * sx + sy * sy) <= 1e-6:
+            return None
+        ok, t, _, hit = geom2d.segments_intersect(ox, oy, ox + rx, oy + ry, ax, ay, bx, by, tol)
+        if not ok:
+            return None
+        dist = t * max_dist
+        if dist <= 1e-6 or dist > max_dist + 1e-6:
+            return None
+        return dist, hit
+
+    def raycast(self, ox, oy, ux, uy, max_dist):
+        """(позиция, расстояние, (hx, hy)) первого пересечения луча или (None, None, None).
+
+        Луч из (ox, oy) по единичному направлению (ux, uy) длиной max_dist;
+        обходятся только ячейки вдоль луча (DDA), пока найденное попадание
+        ближе выхода из текущей ячейки.
+        """
+        none = (None, None, None)
+        if not self.items or max_dist is None:
+            return none
+        max_dist = float(max_dist)
+        rx = (ox + ux * max_dist) - ox
+        ry = (oy + uy * max_dist) - oy
+        best = [None, None, None]
+        seen = set()
+
+        def _test(idx):
+            if idx in seen:
+                return
+            seen.add(idx)
+            hit = self._ray_hit(idx, ox, oy, rx, ry, max_dist)
+            if hit is None:
+                return
+            d = hit[0]
+            if best[1] is None or d < best[1] or (d == best[1] and idx < best[0]):
+                best[0], best[1], best[2] = idx, d, hit[1]
+
+        for idx in self._oversize:
+            _test(idx)
+
+        c = self.cell
+        i0, j0, i1, j1 = self._bounds
+        t_enter, t_leave = 0.0, max_dist + 1e-6
+        for o, u, lo, hi in ((ox, ux, i0 * c, (i1 + 1) * c), (oy, uy, j0 * c, (j1 + 1) * c)):
+            if abs(u) < 1e-15:
+                if not (lo <= o <= hi):
+                    return tuple(best) if best[0] is not None else none
+                continue
+            ta, tb = (lo - o) / u, (hi - o) / u
+            if ta > tb:
+                ta, tb = tb, ta
+            t_enter, t_leave = max(t_enter, ta), min(t_leave, tb)
+        if t_enter > t_leave:
+            return tuple(best) if best[0] is not None else none
+
+        i, j = self._key(ox + ux * t_enter, oy + uy * t_enter)
+        i = min(max(i, i0), i1)
+        j = min(max(j, j0), j1)
+        inf = float('inf')
+        if ux > 0:
+            step_i, t_max_x, t_dx = 1, ((i + 1) * c - ox) / ux, c / ux
+        elif ux < 0:
+            step_i, t_max_x, t_dx = -1, (i * c - ox) / ux, -c / ux
+        else:
+            step_i, t_max_x, t_dx = 0, inf, inf
+        if uy > 0:
+            step_j, t_max_y, t_dy = 1, ((j + 1) * c - oy) / uy, c / uy
+        elif uy < 0:
+            step_j, t_max_y, t_dy = -1, (j * c - oy) / uy, -c / uy
+        else:
+            step_j, t_max_y, t_dy = 0, inf, inf
+
+        while i0 <= i <= i1 and j0 <= j <= j1:
+            for idx in self._grid.get((i, j), ()):
+                _test(idx)
+            t_exit = min(t_max_x, t_max_y)
+            if best[1] is not None and best[1] < t_exit:
+                break
+            if t_exit > t_leave:
+                break
+            if t_max_x < t_max_y:
+                i += step_i
+                t_max_x += t_dx
+            else:
+                j += step_j
+                t_max_y += t_dy
+        return tuple(best) if best[0] is not None else none
+
+
+_ROOM_INDEX_CACHE = {}
+_ROOM_INDEX_CACHE_MAX = 64
+
+
+def room_segment_index(segments):
+    """RoomSegmentIndex для отрезков; повторно — для того же содержимого списка.
+
+    Ключ — кортеж отрезков, поэтому правка списка на месте даёт новый индекс.
+    Отрезки с нехешируемой нагрузкой индексируются без кэша.
+    """
+    try:
+        key = tuple(segments or ())
+        hit = _ROOM_INDEX_CACHE.get(key)
+    except TypeError:
+        return RoomSegmentIndex(segments)
+    if hit is not None:
+        return hit
+    index = RoomSegmentIndex(key)
+    if len(_ROOM_INDEX_CACHE) >= _ROOM_INDEX_CACHE_MAX:
+        _ROOM_INDEX_CACHE.clear()
+    _ROOM_INDEX_CACHE[key] = index
+    return index
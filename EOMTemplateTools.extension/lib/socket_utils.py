@@ -3,9 +3,16 @@ import math
 import re
 from pyrevit import DB, forms, revit, script
 import link_reader
+import param_reader
 import placement_engine
+import room_adjacency
+import room_boundary
 from utils_revit import alert, tx, ensure_symbol_active, set_comments
 from utils_units import mm_to_ft
+from lru_cache import LruCache
+import spatial_hash
+import tagged_registry
+import wall_index
 
 def _is_socket_instance(inst):
     if inst is None or not isinstance(inst, DB.FamilyInstance): return False
@@ -103,18 +110,8 @@ def _match_any(rx_list, text):
     return False
 
 def _get_param_as_string(elem, bip=None, name=None):
-    if elem is None: return u''
-    p = None
-    try:
-        if bip: p = elem.get_Parameter(bip)
-    except: p = None
-    if p is None and name:
-        try: p = elem.LookupParameter(name)
-        except: p = None
-    if p:
-        try: return p.AsString() or u''
-        except: return u''
-    return u''
+    # Значения параметров связей запоминаются на сеанс (param_reader)
+    return param_reader.get_string(elem, bip=bip, name=name)
 
 def _room_text(room):
     if room is None: return u''
@@ -247,22 +244,11 @@ def _room_level_elevation_ft(room, link_doc):
     return 0.0
 
 def _get_room_outer_boundary_segments(room, opts=None):
+    """Самая длинная петля границы (записи room_boundary, кэш на сеанс)."""
     if room is None: return None
     try:
-        if opts is None: opts = DB.SpatialElementBoundaryOptions()
-        seglists = room.GetBoundarySegments(opts)
-        if not seglists: return None
-        best = None
-        best_len = -1.0
-        for segs in seglists:
-            total = 0.0
-            for s in segs:
-                c = s.GetCurve()
-                if c: total += float(c.Length)
-            if total > best_len:
-                best = segs
-                best_len = total
-        return best
+        rb = room_boundary.get_room_boundary(room, opts)
+        return rb.longest_loop() if rb else None
     except: return None
 
 def _inst_center_point(inst):
@@ -625,9 +611,7 @@ def _get_room_at_point_safe(doc, pt):
     except Exception:
         pass
     try:
-        phase = None
-        for ph in DB.FilteredElementCollector(doc).OfClass(DB.Phase):
-            phase = ph
+        phase = _last_phase(doc)
         if phase is not None:
             return doc.GetRoomAtPoint(pt, phase)
     except Exception:
@@ -635,7 +619,29 @@ def _get_room_at_point_safe(doc, pt):
     return None
 
 
-def _is_room_outer_boundary_segment(link_doc, room, curve, probe_mm=200.0):
+def _find_last_phase(doc):
+    phase = None
+    for ph in DB.FilteredElementCollector(doc).OfClass(DB.Phase):
+        phase = ph
+    return phase
+
+
+def _last_phase(doc):
+    # Последняя стадия связи читается один раз (снимок link_reader)
+    snap = link_reader.get_link_snapshot(doc)
+    if snap is None:
+        return _find_last_phase(doc)
+    return snap.cache('last_phase', lambda: [_find_last_phase(doc)])[0]
+
+
+def _is_room_outer_boundary_segment(link_doc, room, curve, probe_mm=200.0, opts=None):
+    """Внешний ли сегмент curve границы room (за ним нет помещения).
+
+    opts — SpatialElementBoundaryOptions, с которыми получена curve (None — общие
+    room_boundary). Для связи ответ берётся из графа смежности уровня с теми же
+    опциями (room_adjacency: стороны по контурам помещений того же уровня);
+    сегмент не из графа проверяется пробами IsPointInRoom / GetRoomAtPoint.
+    """
     if link_doc is None or room is None or curve is None:
         return False
     try:
@@ -645,24 +651,19 @@ def _is_room_outer_boundary_segment(link_doc, room, curve, probe_mm=200.0):
     if probe_ft <= 1e-6:
         probe_ft = float(mm_to_ft(200.0) or 0.0)
 
+    # Сегменты границ помещений связи классифицированы заранее (граф смежности уровня)
     try:
-        mid = curve.Evaluate(0.5, True)
-        d = curve.ComputeDerivatives(0.5, True)
-        v = d.BasisX if d else None
-        if mid is None or v is None:
-            return False
-        n = DB.XYZ(-float(v.Y), float(v.X), 0.0)
-        if n.GetLength() <= 1e-9:
-            return False
-        n = n.Normalize()
+        adj = room_adjacency.get_room_adjacency_of(link_doc, room, probe_ft, opts=opts)
+        known = adj.is_exterior(room, curve) if adj is not None else None
     except Exception:
-        return False
+        known = None
+    if known is not None:
+        return known
 
-    try:
-        p1 = DB.XYZ(float(mid.X + n.X * probe_ft), float(mid.Y + n.Y * probe_ft), float(mid.Z))
-        p2 = DB.XYZ(float(mid.X - n.X * probe_ft), float(mid.Y - n.Y * probe_ft), float(mid.Z))
-    except Exception:
+    probes = room_adjacency.segment_probes(curve, probe_ft)
+    if probes is None:
         return False
+    _, p1, p2 = probes
 
     in1 = False
     in2 = False
@@ -718,6 +719,15 @@ def _invert_intervals(blocked, lo, hi):
 
 def _elem_text(e):
     if e is None: return u''
+    return param_reader.reader_of(e).memo(e, 'elem_text', lambda: _build_elem_text(e))
+
+
+def _symbol_text(sym):
+    # Текст типа общий для всех его экземпляров
+    return param_reader.reader_of(sym).memo(sym, 'type_text', lambda: _build_symbol_text(sym))
+
+
+def _build_elem_text(e):
     parts = []
     try: parts.append(getattr(e, 'Name', u'') or u'')
     except: pass
@@ -742,56 +752,316 @@ def _elem_text(e):
     try:
         sym = getattr(e, 'Symbol', None)
         if sym:
-            try:
-                parts.append(_get_param_as_string(sym, bip=DB.BuiltInParameter.ALL_MODEL_TYPE_MARK, name=u'Марка типоразмера'))
-            except: pass
-            for nm in (u'ADSK_Марка типоразмера', u'ADSK_TypeMark', u'Type Mark', u'Комментарии типоразмера', u'Type Comments'):
-                try:
-                    v = _get_param_as_string(sym, name=nm)
-                    if v: parts.append(v)
-                except Exception:
-                    pass
-            parts.append(getattr(sym, 'Name', u'') or u'')
-            fam = getattr(sym, 'Family', None)
-            if fam: parts.append(getattr(fam, 'Name', u'') or u'')
+            parts.append(_symbol_text(sym))
     except: pass
     return _norm(u' '.join([p for p in parts if p]))
 
-def _collect_textnote_points(link_doc, keys):
-    pts = []
-    if link_doc is None or not keys:
-        return pts
+
+def _build_symbol_text(sym):
+    parts = []
+    try:
+        parts.append(_get_param_as_string(sym, bip=DB.BuiltInParameter.ALL_MODEL_TYPE_MARK, name=u'Марка типоразмера'))
+    except: pass
+    for nm in (u'ADSK_Марка типоразмера', u'ADSK_TypeMark', u'Type Mark', u'Комментарии типоразмера', u'Type Comments'):
+        try:
+            v = _get_param_as_string(sym, name=nm)
+            if v: parts.append(v)
+        except Exception:
+            pass
     try:
-        col = DB.FilteredElementCollector(link_doc).OfClass(DB.TextNote)
-        for tn in col:
+        parts.append(getattr(sym, 'Name', u'') or u'')
+        fam = getattr(sym, 'Family', None)
+        if fam: parts.append(getattr(fam, 'Name', u'') or u'')
+    except: pass
+    return u' '.join([p for p in parts if p])
+
+_TOKEN_RX = re.compile(u'[a-zа-я0-9]+')
+
+
+class _KeywordMatcher(object):
+    """_text_has_any_keyword для одного набора ключей, скомпилированный один раз.
+
+    Длинные ключи ищутся одним регулярным выражением (подстроки), короткие
+    (до 2 символов) — как токен или марка вида «бк1».
+    """
+
+    def __init__(self, keys):
+        long_keys = []
+        short = set()
+        for k in (keys or []):
+            nk = _norm(k)
+            if not nk:
+                continue
+            if len(nk) <= 2:
+                short.add(nk)
+            elif nk not in long_keys:
+                long_keys.append(nk)
+        self._rx = re.compile(u'|'.join([re.escape(k) for k in long_keys])) if long_keys else None
+        self._short = short
+        self._short_lens = sorted(set(len(k) for k in short))
+
+    def __bool__(self):
+        return self._rx is not None or bool(self._short)
+
+    __nonzero__ = __bool__
+
+    def match(self, text, tokens=None):
+        """text — нормализованный (_norm) текст, tokens — его токены (_TOKEN_RX)."""
+        if not text:
+            return False
+        if self._rx is not None and self._rx.search(text):
+            return True
+        if not self._short:
+            return False
+        if tokens is None:
+            tokens = _TOKEN_RX.findall(text)
+        short = self._short
+        for tok in tokens:
+            if tok in short:
+                return True
+            for n in self._short_lens:
+                if len(tok) > n and tok[:n] in short and tok[n:].isdigit():
+                    return True
+        return False
+
+
+_KEYWORD_MATCHERS = {}
+
+
+def _keyword_matcher(keys):
+    key = tuple(keys or ())
+    m = _KEYWORD_MATCHERS.get(key)
+    if m is None:
+        if len(_KEYWORD_MATCHERS) >= 256:
+            _KEYWORD_MATCHERS.clear()
+        m = _KeywordMatcher(key)
+        _KEYWORD_MATCHERS[key] = m
+    return m
+
+
+_NO_POINT = object()
+_ANY_CATEGORY = object()
+
+
+class _FixtureItem(object):
+    """Элемент каталога: нормализованный текст, его токены и точка (читается при первом запросе)."""
+
+    __slots__ = ('element', 'text', 'tokens', 'category_id', '_locate', '_point')
+
+    def __init__(self, element, text, locate, category_id=None):
+        self.element = element
+        self.text = text or u''
+        self.tokens = _TOKEN_RX.findall(self.text) if self.text else []
+        self.category_id = category_id
+        self._locate = locate
+        self._point = _NO_POINT
+
+    def point(self):
+        if self._point is _NO_POINT:
             try:
-                txt = tn.Text
+                self._point = self._locate(self.element)
             except Exception:
-                txt = u''
-            if not txt:
-                continue
-            if not _text_has_any_keyword(txt, keys):
+                self._point = None
+        return self._point
+
+
+def _textnote_point(tn):
+    return tn.Coord
+
+
+class FixtureCatalog(object):
+    """Тексты элементов документа для поиска оборудования по ключевым словам.
+
+    Каждая категория, TextNote и IndependentTag обходятся один раз; текст
+    элемента (_elem_text, ~25 параметров) строится один раз и проверяется
+    всеми наборами ключей. Каталог связи живёт в снимке link_reader, для
+    хост-документа — на один вызов collect_fixture_points.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.scans = 0
+        self._items = {}
+        self._textnotes = None
+        self._tags = None
+
+    def items(self, bic):
+        """Элементы категории (без типов)."""
+        items = self._items.get(bic)
+        if items is None:
+            items = []
+            self.scans += 1
+            try:
+                col = DB.FilteredElementCollector(self.doc).OfCategory(bic).WhereElementIsNotElementType()
+                for e in col:
+                    try:
+                        t = _elem_text(e)
+                    except Exception:
+                        t = u''
+                    items.append(_FixtureItem(e, t, _inst_center_point))
+            except Exception:
+                pass
+            self._items[bic] = items
+        return items
+
+    def textnotes(self):
+        """TextNote с непустым текстом; точка — Coord."""
+        if self._textnotes is None:
+            items = []
+            self.scans += 1
+            try:
+                for tn in DB.FilteredElementCollector(self.doc).OfClass(DB.TextNote):
+                    try:
+                        txt = tn.Text
+                    except Exception:
+                        txt = u''
+                    if txt:
+                        items.append(_FixtureItem(tn, _norm(txt), _textnote_point))
+            except Exception:
+                pass
+            self._textnotes = items
+        return self._textnotes
+
+    def tags(self):
+        """IndependentTag с непустым текстом; category_id — int, None (нет категории)
+        или _ANY_CATEGORY (категорию не прочитать — не фильтруется)."""
+        if self._tags is None:
+            items = []
+            self.scans += 1
+            try:
+                col = DB.FilteredElementCollector(self.doc).OfClass(DB.IndependentTag)
+            except Exception:
+                col = []
+            for tag in col:
+                try:
+                    if tag is None:
+                        continue
+                    try:
+                        if hasattr(tag, 'IsValidObject') and (not tag.IsValidObject):
+                            continue
+                    except Exception:
+                        pass
+                    try:
+                        cat = getattr(tag, 'Category', None)
+                        cat_id = int(cat.Id.IntegerValue) if cat else None
+                    except Exception:
+                        cat_id = _ANY_CATEGORY
+                    txt = u''
+                    try:
+                        txt = getattr(tag, 'TagText', u'') or u''
+                    except Exception:
+                        txt = u''
+                    if not txt:
+                        # Some tag families store the visible string in a parameter
+                        try:
+                            txt = _get_param_as_string(tag, name=u'Text')
+                        except Exception:
+                            txt = u''
+                    if not txt:
+                        continue
+                    items.append(_FixtureItem(tag, _norm(txt), self._tag_point, category_id=cat_id))
+                except Exception:
+                    continue
+            self._tags = items
+        return self._tags
+
+    def _tag_point(self, tag):
+        # Предпочитать центр элемента, к которому прикреплен тег, если доступен
+        # (голова тега может быть перемещена произвольно).
+        host_ids = []
+        try:
+            host_ids = list(tag.GetTaggedLocalElementIds() or [])
+        except Exception:
+            host_ids = []
+        if not host_ids:
+            try:
+                hid = getattr(tag, 'TaggedLocalElementId', None)
+                if hid and hid != DB.ElementId.InvalidElementId:
+                    host_ids = [hid]
+            except Exception:
+                host_ids = []
+
+        for hid in host_ids:
+            try:
+                host = self.doc.GetElement(hid)
+            except Exception:
+                host = None
+            if host is None:
                 continue
+            pt = _inst_center_point(host)
+            if pt is not None:
+                return pt
+
+        pt = None
+        try:
+            pt = getattr(tag, 'TagHeadPosition', None)
+        except Exception:
+            pt = None
+        if pt is None:
             try:
-                pt = tn.Coord
+                loc = getattr(tag, 'Location', None)
+                pt = loc.Point if loc and hasattr(loc, 'Point') else None
             except Exception:
                 pt = None
-            if pt:
-                pts.append(pt)
+        return pt
+
+
+def get_fixture_catalog(link_doc):
+    """FixtureCatalog документа: для связи — из снимка link_reader, иначе новый."""
+    if link_doc is None:
+        return None
+    try:
+        snap = link_reader.get_link_snapshot(link_doc)
     except Exception:
-        pass
+        snap = None
+    if snap is None:
+        return FixtureCatalog(link_doc)
+    return snap.cache('fixture_catalog', lambda: FixtureCatalog(link_doc))
+
+
+def _item_points(items):
+    pts = []
+    for it in items:
+        pt = it.point()
+        if pt:
+            pts.append(pt)
     return pts
 
 
-def _collect_independent_tag_points(link_doc, keys, allowed_bics=None):
+def _matches_strong_or_short_mark(item, strong, mark):
+    """Сильный ключ или марка в короткой (до 2 токенов) подписи."""
+    if strong.match(item.text, item.tokens):
+        return True
+    return bool(mark) and 0 < len(item.tokens) <= 2 and mark.match(item.text, item.tokens)
+
+
+def _collect_annotation_points(strong_keys, mark_keys, catalog):
+    """Аннотационные символы и TextNotes: сильные ключи или короткая марка («СМ», «СМ1»)."""
+    strong = _keyword_matcher(strong_keys)
+    mark = _keyword_matcher(mark_keys)
+    items = []
+    for bic in (DB.BuiltInCategory.OST_GenericAnnotation, DB.BuiltInCategory.OST_DetailComponents):
+        items.extend([it for it in catalog.items(bic) if _matches_strong_or_short_mark(it, strong, mark)])
+    items.extend([it for it in catalog.textnotes() if _matches_strong_or_short_mark(it, strong, mark)])
+    return _item_points(items)
+
+
+def _collect_textnote_points(link_doc, keys, catalog=None):
+    if link_doc is None or not keys:
+        return []
+    catalog = catalog or get_fixture_catalog(link_doc)
+    m = _keyword_matcher(keys)
+    return _item_points([it for it in catalog.textnotes() if m.match(it.text, it.tokens)])
+
+
+def _collect_independent_tag_points(link_doc, keys, allowed_bics=None, catalog=None):
     """Собирает точки для элементов IndependentTag, чей TagText соответствует ключам.
 
     Многие АР-модели размещают марки оборудования, такие как "BK/БК" или "ПС",
     с помощью тегов, а не TextNotes или смоделированных семейств.
     """
-    pts = []
     if link_doc is None or not keys:
-        return pts
+        return []
 
     allowed_ids = None
     try:
@@ -809,92 +1079,37 @@ def _collect_independent_tag_points(link_doc, keys, allowed_bics=None):
     except Exception:
         allowed_ids = None
 
-    try:
-        col = DB.FilteredElementCollector(link_doc).OfClass(DB.IndependentTag)
-    except Exception:
-        return pts
-
-    for tag in col:
-        try:
-            if tag is None:
-                continue
-            try:
-                if hasattr(tag, 'IsValidObject') and (not tag.IsValidObject):
-                    continue
-            except Exception:
-                pass
-
-            if allowed_ids is not None:
-                try:
-                    cat = getattr(tag, 'Category', None)
-                    if not cat:
-                        continue
-                    if int(cat.Id.IntegerValue) not in allowed_ids:
-                        continue
-                except Exception:
-                    # If we cannot read category, do not filter it out
-                    pass
-
-            txt = u''
-            try:
-                txt = getattr(tag, 'TagText', u'') or u''
-            except Exception:
-                txt = u''
-            if not txt:
-                # Some tag families store the visible string in a parameter
-                try:
-                    txt = _get_param_as_string(tag, name=u'Text')
-                except Exception:
-                    txt = u''
-            if not txt:
+    catalog = catalog or get_fixture_catalog(link_doc)
+    m = _keyword_matcher(keys)
+    items = []
+    for it in catalog.tags():
+        if allowed_ids is not None:
+            if it.category_id is None:
                 continue
-            if not _text_has_any_keyword(txt, keys):
+            # If we cannot read category, do not filter it out
+            if it.category_id is not _ANY_CATEGORY and it.category_id not in allowed_ids:
                 continue
+        if m.match(it.text, it.tokens):
+            items.append(it)
+    return [pt for pt in (it.point() for it in items) if pt is not None]
 
-            pt = None
-            # Предпочитать центр элемента, к которому прикреплен тег, если доступен
-            # (голова тега может быть перемещена произвольно).
-            host_ids = []
-            try:
-                host_ids = list(tag.GetTaggedLocalElementIds() or [])
-            except Exception:
-                host_ids = []
-            if not host_ids:
-                try:
-                    hid = getattr(tag, 'TaggedLocalElementId', None)
-                    if hid and hid != DB.ElementId.InvalidElementId:
-                        host_ids = [hid]
-                except Exception:
-                    host_ids = []
-
-            for hid in host_ids:
-                try:
-                    host = link_doc.GetElement(hid)
-                except Exception:
-                    host = None
-                if host is None:
-                    continue
-                pt = _inst_center_point(host)
-                if pt is not None:
-                    break
 
-            if pt is None:
-                try:
-                    pt = getattr(tag, 'TagHeadPosition', None)
-                except Exception:
-                    pt = None
-            if pt is None:
-                try:
-                    loc = getattr(tag, 'Location', None)
-                    pt = loc.Point if loc and hasattr(loc, 'Point') else None
-                except Exception:
-                    pt = None
+def _collect_tag_points(link_doc, keys, tag_bic_names, catalog=None):
+    """IndependentTag из категорий марок; если там ничего нет — из всех тегов.
 
-            if pt is not None:
-                pts.append(pt)
+    Некоторые проекты используют нестандартные категории марок.
+    """
+    tag_bics = []
+    for nm in tag_bic_names:
+        try:
+            bic = getattr(DB.BuiltInCategory, nm, None)
+            if bic is not None:
+                tag_bics.append(bic)
         except Exception:
             continue
-
+    pts = _collect_independent_tag_points(link_doc, keys, allowed_bics=(tag_bics if tag_bics else None), catalog=catalog)
+    if (not pts) and tag_bics:
+        pts = _collect_independent_tag_points(link_doc, keys, allowed_bics=None, catalog=catalog)
     return pts
 
 def _text_has_any_keyword(norm_text, keys):
@@ -932,31 +1147,29 @@ def _text_has_any_keyword(norm_text, keys):
                 return True
     return False
 
-def _collect_points_by_keywords(link_doc, keys, bic):
-    pts = []
-    if link_doc is None or not keys: return pts
-    try:
-        col = DB.FilteredElementCollector(link_doc).OfCategory(bic).WhereElementIsNotElementType()
-        for e in col:
-            t = _elem_text(e)
-            if not t: continue
-            if not _text_has_any_keyword(t, keys):
-                continue
-            pt = _inst_center_point(e)
-            if pt: pts.append(pt)
-    except: pass
-    return pts
+def _collect_points_by_keywords(link_doc, keys, bic, catalog=None):
+    if link_doc is None or not keys: return []
+    snap = link_reader.get_link_snapshot(link_doc)
+    if snap is None:
+        return _scan_points_by_keywords(link_doc, keys, bic, catalog)
+    key = u'kw|{0}|{1}'.format(bic, u'|'.join(sorted(_norm(k) for k in keys)))
+    return snap.cached_points(key, lambda: _scan_points_by_keywords(link_doc, keys, bic, catalog))
 
-def _collect_radiator_points(link_doc):
+def _scan_points_by_keywords(link_doc, keys, bic, catalog=None):
+    catalog = catalog or get_fixture_catalog(link_doc)
+    m = _keyword_matcher(keys)
+    return _item_points([it for it in catalog.items(bic) if m.match(it.text, it.tokens)])
+
+def _collect_radiator_points(link_doc, catalog=None):
     pts = []
     if not link_doc: return pts
     keys = [u'радиатор', u'radiator']
     bics = (DB.BuiltInCategory.OST_MechanicalEquipment, DB.BuiltInCategory.OST_PlumbingFixtures, DB.BuiltInCategory.OST_SpecialityEquipment)
     for bic in bics:
-        pts.extend(_collect_points_by_keywords(link_doc, keys, bic))
+        pts.extend(_collect_points_by_keywords(link_doc, keys, bic, catalog))
     return pts
 
-def _collect_sinks_points(link_doc, rules):
+def _collect_sinks_points(link_doc, rules, catalog=None):
     if link_doc is None:
         return []
 
@@ -970,6 +1183,7 @@ def _collect_sinks_points(link_doc, rules):
     except Exception:
         pass
 
+    catalog = catalog or get_fixture_catalog(link_doc)
     pts = []
 
     # Элементы модели
@@ -991,109 +1205,26 @@ def _collect_sinks_points(link_doc, rules):
             continue
 
     for bic in bics_model:
-        pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic))
+        pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic, catalog))
         # Марки типа "МК" иногда хранятся в Mark/Tag для семейств раковин.
-        pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic))
-
-    # Аннотационные символы (на основе FamilyInstance). Принимать короткие марки только тогда, когда метка короткая.
-    for bic in (DB.BuiltInCategory.OST_GenericAnnotation, DB.BuiltInCategory.OST_DetailComponents):
-        try:
-            col = DB.FilteredElementCollector(link_doc).OfCategory(bic).WhereElementIsNotElementType()
-        except Exception:
-            col = None
-        if not col:
-            continue
-        for e in col:
-            try:
-                t = _elem_text(e)
-            except Exception:
-                t = u''
-            if not t:
-                continue
-            ok = False
-            try:
-                ok = _text_has_any_keyword(t, strong_keys)
-            except Exception:
-                ok = False
-            if not ok:
-                try:
-                    tokens = re.findall(u'[a-zа-я0-9]+', t)
-                    if tokens and len(tokens) <= 2 and _text_has_any_keyword(t, mark_keys):
-                        ok = True
-                except Exception:
-                    ok = False
-            if not ok:
-                continue
-            try:
-                pt = _inst_center_point(e)
-            except Exception:
-                pt = None
-            if pt:
-                pts.append(pt)
-
-    # TextNotes
-    try:
-        tn_col = DB.FilteredElementCollector(link_doc).OfClass(DB.TextNote)
-        for tn in tn_col:
-            try:
-                txt = tn.Text
-            except Exception:
-                txt = u''
-            if not txt:
-                continue
-
-            ok = False
-            try:
-                ok = _text_has_any_keyword(txt, strong_keys)
-            except Exception:
-                ok = False
-            if not ok:
-                try:
-                    tnorm = _norm(txt)
-                    tokens = re.findall(u'[a-zа-я0-9]+', tnorm) if tnorm else []
-                    if tokens and len(tokens) <= 2 and _text_has_any_keyword(txt, mark_keys):
-                        ok = True
-                except Exception:
-                    ok = False
-            if not ok:
-                continue
+        pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic, catalog))
 
-            try:
-                pt = tn.Coord
-            except Exception:
-                pt = None
-            if pt:
-                pts.append(pt)
-    except Exception:
-        pass
+    # Аннотационные символы (на основе FamilyInstance) и TextNotes. Принимать короткие марки только тогда, когда метка короткая.
+    pts.extend(_collect_annotation_points(strong_keys, mark_keys, catalog))
 
     # Tags (IndependentTag)
-    try:
-        tag_bics = []
-        for nm in (
-            'OST_PlumbingFixtureTags',
-            'OST_CaseworkTags',
-            'OST_GenericModelTags',
-            'OST_FurnitureTags',
-            'OST_GenericAnnotation',
-        ):
-            try:
-                bic = getattr(DB.BuiltInCategory, nm, None)
-                if bic is not None:
-                    tag_bics.append(bic)
-            except Exception:
-                continue
-        tag_pts = _collect_independent_tag_points(link_doc, (mark_keys + strong_keys), allowed_bics=(tag_bics if tag_bics else None))
-        if (not tag_pts) and tag_bics:
-            tag_pts = _collect_independent_tag_points(link_doc, (mark_keys + strong_keys), allowed_bics=None)
-        pts.extend(tag_pts)
-    except Exception:
-        pass
+    pts.extend(_collect_tag_points(link_doc, list(mark_keys) + list(strong_keys), (
+        'OST_PlumbingFixtureTags',
+        'OST_CaseworkTags',
+        'OST_GenericModelTags',
+        'OST_FurnitureTags',
+        'OST_GenericAnnotation',
+    ), catalog))
 
     return pts
 
 
-def _collect_stoves_points(link_doc, rules):
+def _collect_stoves_points(link_doc, rules, catalog=None):
     """Собирает точки электрических плит/варочных панелей в связанном АР.
 
     Использует как элементы модели, так и аннотации (TextNotes/IndependentTags).
@@ -1111,6 +1242,7 @@ def _collect_stoves_points(link_doc, rules):
     # Короткие марки на плане, часто используемые в тегах/тексте.
     mark_keys = rules.get('stove_mark_keywords', None) or [u'эп']
 
+    catalog = catalog or get_fixture_catalog(link_doc)
     pts = []
 
     # Элементы модели
@@ -1123,110 +1255,27 @@ def _collect_stoves_points(link_doc, rules):
         DB.BuiltInCategory.OST_ElectricalFixtures,
         DB.BuiltInCategory.OST_PlumbingFixtures,
     ):
-        pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic))
-        pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic))
+        pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic, catalog))
+        pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic, catalog))
 
-    # Аннотационные символы (на основе FamilyInstance). Принимать марки только для коротких меток.
-    for bic in (DB.BuiltInCategory.OST_GenericAnnotation, DB.BuiltInCategory.OST_DetailComponents):
-        try:
-            col = DB.FilteredElementCollector(link_doc).OfCategory(bic).WhereElementIsNotElementType()
-        except Exception:
-            col = None
-        if not col:
-            continue
-        for e in col:
-            try:
-                t = _elem_text(e)
-            except Exception:
-                t = u''
-            if not t:
-                continue
-            ok = False
-            try:
-                ok = _text_has_any_keyword(t, strong_keys)
-            except Exception:
-                ok = False
-            if not ok:
-                try:
-                    tokens = re.findall(u'[a-zа-я0-9]+', _norm(t))
-                    if tokens and len(tokens) <= 2 and _text_has_any_keyword(t, mark_keys):
-                        ok = True
-                except Exception:
-                    ok = False
-            if not ok:
-                continue
-            try:
-                pt = _inst_center_point(e)
-            except Exception:
-                pt = None
-            if pt:
-                pts.append(pt)
+    # Аннотационные символы (на основе FamilyInstance) и TextNotes. Принимать марки только для коротких меток.
+    pts.extend(_collect_annotation_points(strong_keys, mark_keys, catalog))
 
-    # TextNotes
-    try:
-        tn_col = DB.FilteredElementCollector(link_doc).OfClass(DB.TextNote)
-        for tn in tn_col:
-            try:
-                txt = tn.Text
-            except Exception:
-                txt = u''
-            if not txt:
-                continue
+    # Tags (IndependentTag)
+    pts.extend(_collect_tag_points(link_doc, list(mark_keys) + list(strong_keys), (
+        'OST_MechanicalEquipmentTags',
+        'OST_SpecialityEquipmentTags',
+        'OST_ElectricalEquipmentTags',
+        'OST_ElectricalFixtureTags',
+        'OST_FurnitureTags',
+        'OST_GenericModelTags',
+        'OST_GenericAnnotation',
+    ), catalog))
 
-            ok = False
-            try:
-                ok = _text_has_any_keyword(txt, strong_keys)
-            except Exception:
-                ok = False
-            if not ok:
-                try:
-                    tnorm = _norm(txt)
-                    tokens = re.findall(u'[a-zа-я0-9]+', tnorm) if tnorm else []
-                    if tokens and len(tokens) <= 2 and _text_has_any_keyword(txt, mark_keys):
-                        ok = True
-                except Exception:
-                    ok = False
-            if not ok:
-                continue
+    return pts
 
-            try:
-                pt = tn.Coord
-            except Exception:
-                pt = None
-            if pt:
-                pts.append(pt)
-    except Exception:
-        pass
-
-    # Tags (IndependentTag)
-    try:
-        tag_bics = []
-        for nm in (
-            'OST_MechanicalEquipmentTags',
-            'OST_SpecialityEquipmentTags',
-            'OST_ElectricalEquipmentTags',
-            'OST_ElectricalFixtureTags',
-            'OST_FurnitureTags',
-            'OST_GenericModelTags',
-            'OST_GenericAnnotation',
-        ):
-            try:
-                bic = getattr(DB.BuiltInCategory, nm, None)
-                if bic is not None:
-                    tag_bics.append(bic)
-            except Exception:
-                continue
-        tag_pts = _collect_independent_tag_points(link_doc, (mark_keys + strong_keys), allowed_bics=(tag_bics if tag_bics else None))
-        if (not tag_pts) and tag_bics:
-            tag_pts = _collect_independent_tag_points(link_doc, (mark_keys + strong_keys), allowed_bics=None)
-        pts.extend(tag_pts)
-    except Exception:
-        pass
-
-    return pts
 
-
-def _collect_fridges_points(link_doc, rules):
+def _collect_fridges_points(link_doc, rules, catalog=None):
     """Собирает точки холодильников в связанном АР.
 
     Использует как элементы модели, так и аннотации (TextNotes/IndependentTags).
@@ -1243,6 +1292,7 @@ def _collect_fridges_points(link_doc, rules):
     # Избегать сопоставления коротких марок для холодильников по умолчанию (слишком много ложных срабатываний).
     mark_keys = rules.get('fridge_mark_keywords', None) or []
 
+    catalog = catalog or get_fixture_catalog(link_doc)
     pts = []
 
     bics_model = [
@@ -1261,109 +1311,28 @@ def _collect_fridges_points(link_doc, rules):
             continue
 
     for bic in bics_model:
-        pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic))
+        pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic, catalog))
         if mark_keys:
-            pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic))
+            pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic, catalog))
 
-    # Annotation symbols (FamilyInstance-based)
-    for bic in (DB.BuiltInCategory.OST_GenericAnnotation, DB.BuiltInCategory.OST_DetailComponents):
-        try:
-            col = DB.FilteredElementCollector(link_doc).OfCategory(bic).WhereElementIsNotElementType()
-        except Exception:
-            col = None
-        if not col:
-            continue
-        for e in col:
-            try:
-                t = _elem_text(e)
-            except Exception:
-                t = u''
-            if not t:
-                continue
-            ok = False
-            try:
-                ok = _text_has_any_keyword(t, strong_keys)
-            except Exception:
-                ok = False
-            if not ok and mark_keys:
-                try:
-                    tokens = re.findall(u'[a-zа-я0-9]+', _norm(t))
-                    if tokens and len(tokens) <= 2 and _text_has_any_keyword(t, mark_keys):
-                        ok = True
-                except Exception:
-                    ok = False
-            if not ok:
-                continue
-            try:
-                pt = _inst_center_point(e)
-            except Exception:
-                pt = None
-            if pt:
-                pts.append(pt)
-
-    # TextNotes
-    try:
-        tn_col = DB.FilteredElementCollector(link_doc).OfClass(DB.TextNote)
-        for tn in tn_col:
-            try:
-                txt = tn.Text
-            except Exception:
-                txt = u''
-            if not txt:
-                continue
-            ok = False
-            try:
-                ok = _text_has_any_keyword(txt, strong_keys)
-            except Exception:
-                ok = False
-            if not ok and mark_keys:
-                try:
-                    tnorm = _norm(txt)
-                    tokens = re.findall(u'[a-zа-я0-9]+', tnorm) if tnorm else []
-                    if tokens and len(tokens) <= 2 and _text_has_any_keyword(txt, mark_keys):
-                        ok = True
-                except Exception:
-                    ok = False
-            if not ok:
-                continue
-            try:
-                pt = tn.Coord
-            except Exception:
-                pt = None
-            if pt:
-                pts.append(pt)
-    except Exception:
-        pass
+    # Annotation symbols (FamilyInstance-based) and TextNotes
+    pts.extend(_collect_annotation_points(strong_keys, mark_keys, catalog))
 
     # Tags (IndependentTag)
-    try:
-        tag_bics = []
-        for nm in (
-            'OST_FurnitureTags',
-            'OST_SpecialityEquipmentTags',
-            'OST_MechanicalEquipmentTags',
-            'OST_GenericModelTags',
-            'OST_GenericAnnotation',
-        ):
-            try:
-                bic = getattr(DB.BuiltInCategory, nm, None)
-                if bic is not None:
-                    tag_bics.append(bic)
-            except Exception:
-                continue
-        tag_keys = list(strong_keys or [])
-        if mark_keys:
-            tag_keys = list(mark_keys or []) + tag_keys
-        tag_pts = _collect_independent_tag_points(link_doc, tag_keys, allowed_bics=(tag_bics if tag_bics else None))
-        if (not tag_pts) and tag_bics:
-            tag_pts = _collect_independent_tag_points(link_doc, tag_keys, allowed_bics=None)
-        pts.extend(tag_pts)
-    except Exception:
-        pass
+    tag_keys = list(strong_keys or [])
+    if mark_keys:
+        tag_keys = list(mark_keys or []) + tag_keys
+    pts.extend(_collect_tag_points(link_doc, tag_keys, (
+        'OST_FurnitureTags',
+        'OST_SpecialityEquipmentTags',
+        'OST_MechanicalEquipmentTags',
+        'OST_GenericModelTags',
+        'OST_GenericAnnotation',
+    ), catalog))
 
     return pts
 
-def _collect_washing_machines_points(link_doc, rules):
+def _collect_washing_machines_points(link_doc, rules, catalog=None):
     if link_doc is None:
         return []
 
@@ -1372,6 +1341,7 @@ def _collect_washing_machines_points(link_doc, rules):
     # Короткие марки на плане часто используются в тегах/тексте (избегать сопоставления подстрок; _text_has_any_keyword учитывает токены).
     mark_keys = rules.get('washing_machine_mark_keywords', None) or [u'см', u'wm']
 
+    catalog = catalog or get_fixture_catalog(link_doc)
     pts = []
 
     # Элементы модели
@@ -1382,109 +1352,26 @@ def _collect_washing_machines_points(link_doc, rules):
         DB.BuiltInCategory.OST_GenericModel,
         DB.BuiltInCategory.OST_Furniture,
     ):
-        pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic))
-        pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic))
-
-    # Аннотационные символы (на основе FamilyInstance). Принимать марки только для коротких меток.
-    for bic in (DB.BuiltInCategory.OST_GenericAnnotation, DB.BuiltInCategory.OST_DetailComponents):
-        try:
-            col = DB.FilteredElementCollector(link_doc).OfCategory(bic).WhereElementIsNotElementType()
-        except Exception:
-            col = None
-        if not col:
-            continue
-        for e in col:
-            try:
-                t = _elem_text(e)
-            except Exception:
-                t = u''
-            if not t:
-                continue
-            ok = False
-            try:
-                ok = _text_has_any_keyword(t, strong_keys)
-            except Exception:
-                ok = False
-            if not ok:
-                try:
-                    tokens = re.findall(u'[a-zа-я0-9]+', t)
-                    if tokens and len(tokens) <= 2 and _text_has_any_keyword(t, mark_keys):
-                        ok = True
-                except Exception:
-                    ok = False
-            if not ok:
-                continue
-            try:
-                pt = _inst_center_point(e)
-            except Exception:
-                pt = None
-            if pt:
-                pts.append(pt)
+        pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic, catalog))
+        pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic, catalog))
 
-    # TextNotes: принимать сильные ключевые слова; принимать марки только тогда, когда текст представляет собой простую короткую марку (например, "СМ", "СМ1").
-    try:
-        tn_col = DB.FilteredElementCollector(link_doc).OfClass(DB.TextNote)
-        for tn in tn_col:
-            try:
-                txt = tn.Text
-            except Exception:
-                txt = u''
-            if not txt:
-                continue
-
-            ok = False
-            try:
-                ok = _text_has_any_keyword(txt, strong_keys)
-            except Exception:
-                ok = False
-            if not ok:
-                try:
-                    # Марки типа "см" неоднозначны в общих примечаниях; принимать только если примечание короткое.
-                    tnorm = _norm(txt)
-                    tokens = re.findall(u'[a-zа-я0-9]+', tnorm) if tnorm else []
-                    if tokens and len(tokens) <= 2 and _text_has_any_keyword(txt, mark_keys):
-                        ok = True
-                except Exception:
-                    ok = False
-            if not ok:
-                continue
-
-            try:
-                pt = tn.Coord
-            except Exception:
-                pt = None
-            if pt:
-                pts.append(pt)
-    except Exception:
-        pass
+    # Аннотационные символы и TextNotes: принимать сильные ключевые слова; марки типа "см" неоднозначны
+    # в общих примечаниях, поэтому принимать их только для простой короткой марки (например, "СМ", "СМ1").
+    pts.extend(_collect_annotation_points(strong_keys, mark_keys, catalog))
 
     # Tags (IndependentTag)
-    try:
-        tag_bics = []
-        for nm in (
-            'OST_MechanicalEquipmentTags',
-            'OST_PlumbingFixtureTags',
-            'OST_SpecialityEquipmentTags',
-            'OST_GenericModelTags',
-            'OST_FurnitureTags',
-            'OST_GenericAnnotation',
-        ):
-            try:
-                bic = getattr(DB.BuiltInCategory, nm, None)
-                if bic is not None:
-                    tag_bics.append(bic)
-            except Exception:
-                continue
-        tag_pts = _collect_independent_tag_points(link_doc, (mark_keys + strong_keys), allowed_bics=(tag_bics if tag_bics else None))
-        if (not tag_pts) and tag_bics:
-            tag_pts = _collect_independent_tag_points(link_doc, (mark_keys + strong_keys), allowed_bics=None)
-        pts.extend(tag_pts)
-    except Exception:
-        pass
+    pts.extend(_collect_tag_points(link_doc, list(mark_keys) + list(strong_keys), (
+        'OST_MechanicalEquipmentTags',
+        'OST_PlumbingFixtureTags',
+        'OST_SpecialityEquipmentTags',
+        'OST_GenericModelTags',
+        'OST_FurnitureTags',
+        'OST_GenericAnnotation',
+    ), catalog))
 
     return pts
 
-def _collect_boilers_points(link_doc):
+def _collect_boilers_points(link_doc, catalog=None):
     # Сильные, однозначные ключевые слова бойлера.
     strong_keys = [
         u'boiler', u'boyler',
@@ -1496,6 +1383,9 @@ def _collect_boilers_points(link_doc):
     # поэтому мы принимаем их только в аннотациях/тексте или в механическом/специальном оборудовании.
     mark_keys = [u'bk', u'бк']
 
+    if link_doc is None:
+        return []
+    catalog = catalog or get_fixture_catalog(link_doc)
     strong_pts = []
     mark_pts = []
     ann_pts = []
@@ -1509,7 +1399,7 @@ def _collect_boilers_points(link_doc):
         DB.BuiltInCategory.OST_GenericModel,
         DB.BuiltInCategory.OST_Furniture,
     ):
-        strong_pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic))
+        strong_pts.extend(_collect_points_by_keywords(link_doc, strong_keys, bic, catalog))
 
     # Элементы модели by mark only.
     # Default: exclude PlumbingFixtures to avoid WC false-positives.
@@ -1519,43 +1409,28 @@ def _collect_boilers_points(link_doc):
         DB.BuiltInCategory.OST_GenericModel,
         DB.BuiltInCategory.OST_PipeAccessory,
     ):
-        mark_pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic))
+        mark_pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic, catalog))
 
     # If we found nothing by strong keywords, allow BK/БК marks in PlumbingFixtures as a fallback.
     if not strong_pts:
-        mark_pts.extend(_collect_points_by_keywords(link_doc, mark_keys, DB.BuiltInCategory.OST_PlumbingFixtures))
+        mark_pts.extend(_collect_points_by_keywords(link_doc, mark_keys, DB.BuiltInCategory.OST_PlumbingFixtures, catalog))
 
     # Annotations/text marks (FamilyInstance-based)
     for bic in (DB.BuiltInCategory.OST_GenericAnnotation, DB.BuiltInCategory.OST_DetailComponents):
-        ann_pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic))
-    ann_pts.extend(_collect_textnote_points(link_doc, mark_keys))
+        ann_pts.extend(_collect_points_by_keywords(link_doc, mark_keys, bic, catalog))
+    ann_pts.extend(_collect_textnote_points(link_doc, mark_keys, catalog))
 
     # Tags (IndependentTag)
-    try:
-        tag_bics = []
-        for nm in (
-            'OST_MechanicalEquipmentTags',
-            'OST_PlumbingFixtureTags',
-            'OST_PipeAccessoryTags',
-            'OST_GenericAnnotation',
-        ):
-            try:
-                bic = getattr(DB.BuiltInCategory, nm, None)
-                if bic is not None:
-                    tag_bics.append(bic)
-            except Exception:
-                continue
-        tag_pts = _collect_independent_tag_points(link_doc, mark_keys + strong_keys, allowed_bics=(tag_bics if tag_bics else None))
-        # Fallback: some projects use non-standard tag categories; scan all IndependentTags if filtered scan found nothing.
-        if (not tag_pts) and tag_bics:
-            tag_pts = _collect_independent_tag_points(link_doc, mark_keys + strong_keys, allowed_bics=None)
-        ann_pts.extend(tag_pts)
-    except Exception:
-        pass
+    ann_pts.extend(_collect_tag_points(link_doc, mark_keys + strong_keys, (
+        'OST_MechanicalEquipmentTags',
+        'OST_PlumbingFixtureTags',
+        'OST_PipeAccessoryTags',
+        'OST_GenericAnnotation',
+    ), catalog))
 
     return strong_pts + mark_pts + ann_pts
 
-def _collect_towel_rails_points(link_doc):
+def _collect_towel_rails_points(link_doc, catalog=None):
     # Включает общие аббревиатуры, используемые в планах/тегах: "ПС" (полотенцесушитель).
     keys = [
         u'polotence', u'sushitel', u'towel', u'dryer',
@@ -1563,6 +1438,9 @@ def _collect_towel_rails_points(link_doc):
         u'пс', u'п/с', u'ps'
     ]
 
+    if link_doc is None:
+        return []
+    catalog = catalog or get_fixture_catalog(link_doc)
     pts = []
     for bic in (
         DB.BuiltInCategory.OST_PlumbingFixtures,
@@ -1574,35 +1452,49 @@ def _collect_towel_rails_points(link_doc):
         DB.BuiltInCategory.OST_GenericAnnotation,
         DB.BuiltInCategory.OST_DetailComponents,
     ):
-        pts.extend(_collect_points_by_keywords(link_doc, keys, bic))
+        pts.extend(_collect_points_by_keywords(link_doc, keys, bic, catalog))
 
     # Некоторые проекты аннотируют рейки как текст; также поддерживают TextNotes.
-    pts.extend(_collect_textnote_points(link_doc, keys))
+    pts.extend(_collect_textnote_points(link_doc, keys, catalog))
 
     # Tags (IndependentTag)
-    try:
-        tag_bics = []
-        for nm in (
-            'OST_MechanicalEquipmentTags',
-            'OST_PlumbingFixtureTags',
-            'OST_PipeAccessoryTags',
-            'OST_GenericAnnotation',
-        ):
-            try:
-                bic = getattr(DB.BuiltInCategory, nm, None)
-                if bic is not None:
-                    tag_bics.append(bic)
-            except Exception:
-                continue
-        tag_pts = _collect_independent_tag_points(link_doc, keys, allowed_bics=(tag_bics if tag_bics else None))
-        if (not tag_pts) and tag_bics:
-            tag_pts = _collect_independent_tag_points(link_doc, keys, allowed_bics=None)
-        pts.extend(tag_pts)
-    except Exception:
-        pass
+    pts.extend(_collect_tag_points(link_doc, keys, (
+        'OST_MechanicalEquipmentTags',
+        'OST_PlumbingFixtureTags',
+        'OST_PipeAccessoryTags',
+        'OST_GenericAnnotation',
+    ), catalog))
 
     return pts
 
+
+FIXTURE_KINDS = ('sink', 'stove', 'fridge', 'washing_machine', 'boiler', 'towel_rail', 'radiator')
+
+_FIXTURE_COLLECTORS = {
+    'sink': lambda doc, rules, catalog: _collect_sinks_points(doc, rules, catalog),
+    'stove': lambda doc, rules, catalog: _collect_stoves_points(doc, rules, catalog),
+    'fridge': lambda doc, rules, catalog: _collect_fridges_points(doc, rules, catalog),
+    'washing_machine': lambda doc, rules, catalog: _collect_washing_machines_points(doc, rules, catalog),
+    'boiler': lambda doc, rules, catalog: _collect_boilers_points(doc, catalog),
+    'towel_rail': lambda doc, rules, catalog: _collect_towel_rails_points(doc, catalog),
+    'radiator': lambda doc, rules, catalog: _collect_radiator_points(doc, catalog),
+}
+
+
+def collect_fixture_points(link_doc, rules=None, kinds=None):
+    """{вид оборудования: [XYZ]} по одному каталогу текстов документа (FixtureCatalog).
+
+    kinds — подмножество FIXTURE_KINDS (по умолчанию все). Ключевые слова и
+    категории те же, что у отдельных _collect_*_points; категории связи
+    обходятся один раз для всех видов.
+    """
+    rules = rules or {}
+    kinds = list(kinds or FIXTURE_KINDS)
+    if link_doc is None:
+        return dict((k, []) for k in kinds)
+    catalog = get_fixture_catalog(link_doc)
+    return dict((k, _FIXTURE_COLLECTORS[k](link_doc, rules, catalog)) for k in kinds)
+
 def _collect_toilets_data(link_doc):
     data = []
     if not link_doc: return data
@@ -1762,26 +1654,11 @@ def _points_in_room(points, room, padding_ft=0.0):
             continue
     return out
 
-class _XYZIndex(object):
+class _XYZIndex(spatial_hash.SpatialHash):
+    """Dedupe index of placed/existing points (lib/spatial_hash.py)."""
+
     def __init__(self, cell_ft):
-        self._c = max(1.0, float(cell_ft or 1.0))
-        self._grid = {}
-    def _key(self, x, y):
-        return (int(math.floor(float(x)/self._c)), int(math.floor(float(y)/self._c)))
-    def add(self, x, y, z):
-        k = self._key(x, y)
-        self._grid.setdefault(k, []).append((float(x), float(y), float(z)))
-    def has_near(self, x, y, z, r_ft):
-        r = float(r_ft or 0.0)
-        if r <= 1e-9: return False
-        x0, y0, z0 = float(x), float(y), float(z)
-        r2 = r*r
-        k = self._key(x0, y0)
-        for ix in (k[0]-1, k[0], k[0]+1):
-            for iy in (k[1]-1, k[1], k[1]+1):
-                for (xx, yy, zz) in self._grid.get((ix, iy), []):
-                    if ((xx-x0)**2 + (yy-y0)**2 + (zz-z0)**2) <= r2: return True
-        return False
+        super(_XYZIndex, self).__init__(max(1.0, float(cell_ft or 1.0)))
 
 def _get_sketchplane_cached(doc_, origin_xyz, normal_xyz, cache):
     if not doc_ or not origin_xyz or not normal_xyz or cache is None: return None
@@ -1811,6 +1688,12 @@ def _rotate_instance_to_xy_dir(inst, origin_xyz, target_dir_xy):
 def _collect_existing_tagged_points(host_doc, tag_value):
     pts = []
     if not host_doc or not tag_value: return pts
+    elems = tagged_registry.find_tagged(host_doc, tag_value)
+    if elems is not None:
+        for e in elems:
+            pt = _inst_center_point(e)
+            if pt: pts.append(pt)
+        return pts
     try:
         provider = DB.ParameterValueProvider(DB.ElementId(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS))
         rule = DB.FilterStringRule(provider, DB.FilterStringContains(), tag_value) # 2022+ signature might vary
@@ -1825,25 +1708,23 @@ def _collect_existing_tagged_points(host_doc, tag_value):
 def _get_linked_wall_face_ref_and_point(link_wall, link_inst, point_link, faces_cache=None, prefer_n_link=None):
     if not link_wall or not link_inst or not point_link: return None, None, None
     try:
-        # Prioritize SideFaces (ShellLayerType) - most robust for hosting
-        side_refs = []
-        try: side_refs += list(DB.HostObjectUtils.GetSideFaces(link_wall, DB.ShellLayerType.Interior))
-        except: pass
-        try: side_refs += list(DB.HostObjectUtils.GetSideFaces(link_wall, DB.ShellLayerType.Exterior))
-        except: pass
-        
         valid_faces = []
         wid = None
         if faces_cache is not None:
             try: wid = int(link_wall.Id.IntegerValue)
             except: wid = None
             if wid is not None:
-                try:
-                    if wid in faces_cache:
-                        valid_faces = faces_cache.get(wid) or []
+                try: valid_faces = faces_cache.get(wid) or []
                 except: valid_faces = []
         
         if not valid_faces:
+            # Prioritize SideFaces (ShellLayerType) - most robust for hosting
+            side_refs = []
+            try: side_refs += list(DB.HostObjectUtils.GetSideFaces(link_wall, DB.ShellLayerType.Interior))
+            except: pass
+            try: side_refs += list(DB.HostObjectUtils.GetSideFaces(link_wall, DB.ShellLayerType.Exterior))
+            except: pass
+
             # 1. Process SideRefs first
             for r in side_refs:
                 face = link_wall.GetGeometryObjectFromReference(r)
@@ -1973,93 +1854,12 @@ def _get_linked_wall_face_ref_and_point(link_wall, link_inst, point_link, faces_
     except: return None, None, None
 
 
-def _collect_host_walls(host_doc, scan_cap=8000):
-    walls = []
-    if host_doc is None:
-        return walls
-    try:
-        col = DB.FilteredElementCollector(host_doc).OfClass(DB.Wall)
-        i = 0
-        for w in col:
-            i += 1
-            if scan_cap and i > int(scan_cap):
-                break
-            try:
-                bb = w.get_BoundingBox(None)
-            except Exception:
-                bb = None
-            walls.append((w, bb))
-    except Exception:
-        return walls
-    return walls
-
-
-def _nearest_host_wall_to_point(walls_with_bb, pt, max_dist_ft=1.0):
-    if not walls_with_bb or not pt:
-        return None
-
-    best_w = None
-    best_d = None
-
-    for w, bb in walls_with_bb:
-        if not w:
-            continue
-
-        if bb:
-            try:
-                if (
-                    pt.X < bb.Min.X - max_dist_ft or pt.X > bb.Max.X + max_dist_ft or
-                    pt.Y < bb.Min.Y - max_dist_ft or pt.Y > bb.Max.Y + max_dist_ft or
-                    pt.Z < bb.Min.Z - max_dist_ft or pt.Z > bb.Max.Z + max_dist_ft
-                ):
-                    continue
-            except Exception:
-                pass
-
-        c = None
-        try:
-            loc = getattr(w, 'Location', None)
-            if isinstance(loc, DB.LocationCurve):
-                c = loc.Curve
-        except Exception:
-            c = None
-        if not c:
-            continue
-
-        try:
-            p = DB.XYZ(float(pt.X), float(pt.Y), float(c.GetEndPoint(0).Z))
-            ir = c.Project(p)
-        except Exception:
-            ir = None
-        if not ir:
-            continue
-
-        try:
-            proj = ir.XYZPoint
-        except Exception:
-            proj = None
-        if not proj:
-            continue
-
-        try:
-            d = _dist_xy(proj, pt)
-        except Exception:
-            continue
-
-        if best_d is None or d < best_d:
-            best_d = d
-            best_w = w
-
-    if best_w is None or best_d is None:
+def _nearest_host_wall_to_point(host_wall_index, pt, max_dist_ft=1.0):
+    """Ближайшая стена хоста в плане (с допуском max_dist_ft и по Z) через WallSegmentIndex."""
+    if host_wall_index is None or not pt:
         return None
-
-    try:
-        if float(best_d) > float(max_dist_ft):
-            return None
-    except Exception:
-        pass
-
-    return best_w
+    wall, _proj, _d = host_wall_index.nearest(pt, max_dist_ft, z_pad_ft=max_dist_ft)
+    return wall
 
 
 def _get_host_wall_face_ref_and_point(host_wall, point_host, prefer_n_host=None):
@@ -2153,373 +1953,560 @@ def _get_host_wall_face_ref_and_point(host_wall, point_host, prefer_n_host=None)
     except Exception:
         return None, None, None
 
-def _place_socket_batch(host_doc, link_inst, t, batch, sym_flags, sp_cache, comment_value, strict_hosting=False, wall_search_ft=None):
-    created = created_face = created_workplane = created_point_on_face = 0
-    created_verified = 0 # New counter for "Verified Geometry" placements
-    skipped_no_face = skipped_no_place = 0
+# Счётчики проб граней стен при размещении розеток (накопительные за сеанс).
+# probes — запросы грани (вкл. повторные), geometry_probes — реальные вызовы
+# геометрии Revit (промахи кэша), sockets — созданные экземпляры.
+SOCKET_PROBE_STATS = {'probes': 0, 'geometry_probes': 0, 'sockets': 0}
+
+# Шаг квантования точки пробы: 5 мм — меньше любого допуска размещения.
+_PROBE_QUANT_FT = mm_to_ft(5)
+
+
+def reset_socket_probe_stats():
+    for k in SOCKET_PROBE_STATS:
+        SOCKET_PROBE_STATS[k] = 0
+
+
+def get_socket_probe_stats():
+    """Копия счётчиков + среднее число проб на размещённую розетку."""
+    stats = dict(SOCKET_PROBE_STATS)
+    sockets = stats.get('sockets') or 0
+    stats['probes_per_socket'] = (float(stats['probes']) / sockets) if sockets else 0.0
+    stats['geometry_probes_per_socket'] = (float(stats['geometry_probes']) / sockets) if sockets else 0.0
+    return stats
+
 
-    faces_cache = {}
+class LinkFaceCache(object):
+    """Кэш граней стен одной связи, общий для пакетов и инструментов сеанса.
+
+    faces  — боковые грани стены (id стены -> [(face, ref)]);
+    probes — результат проекции по (экземпляр связи, id стены, точка с шагом
+    5 мм, предпочтительная нормаль XY). Оба — ограниченные LRU.
+    Живёт в снимке связи (link_reader.LinkSnapshot) и сбрасывается вместе с ним
+    при перезагрузке связи.
+    """
+
+    def __init__(self, max_walls=4000, max_probes=100000):
+        self.faces = LruCache(max_walls)
+        self.probes = LruCache(max_probes)
+
+    def stats(self):
+        return {'faces': self.faces.stats(), 'probes': self.probes.stats()}
+
+
+def _get_link_face_cache(link_inst):
+    """LinkFaceCache из снимка связи; для недоступной связи — новый (на один пакет)."""
+    snap = None
     try:
-        ws = float(wall_search_ft) if wall_search_ft is not None else float(mm_to_ft(300))
+        snap = link_reader.get_link_snapshot(link_inst.GetLinkDocument())
     except Exception:
-        ws = float(mm_to_ft(300))
-    host_walls = _collect_host_walls(host_doc, scan_cap=8000) if host_doc and strict_hosting else []
-    
-    if not host_doc or not link_inst or not t or not batch:
-        return 0,0,0,0,0,0,0
+        snap = None
+    if snap is None:
+        return LinkFaceCache()
+    return snap.cache('wall_faces', LinkFaceCache)
 
-    with tx('ЭОМ: Разместить розетки (batch)', doc=host_doc, swallow_warnings=True):
-        uniq = {}
-        for item in (batch or []):
-            try:
-                s = item[3]
-            except Exception:
-                s = None
-            if s:
-                try:
-                    uniq[s.Id.IntegerValue] = s
-                except Exception:
-                    continue
-        for s in uniq.values(): ensure_symbol_active(host_doc, s)
 
-        for item in (batch or []):
+def get_link_face_cache_stats(link_inst):
+    """Статистика попаданий кэша граней связи: {'faces': {...}, 'probes': {...}}."""
+    return _get_link_face_cache(link_inst).stats()
+
+
+class _LinkFaceProbe(object):
+    """Мемоизированный `_get_linked_wall_face_ref_and_point` для одного экземпляра связи.
+
+    z-пробы, опоры ±200 мм и шаговый поиск вдоль стены у соседних розеток
+    постоянно попадают в одни и те же точки; результаты хранятся в
+    LinkFaceCache связи. calls/misses — счётчики текущего пакета.
+    """
+
+    def __init__(self, link_inst, face_cache=None):
+        self.link_inst = link_inst
+        self.cache = face_cache if face_cache is not None else _get_link_face_cache(link_inst)
+        try:
+            self._inst_id = int(link_inst.Id.IntegerValue)
+        except Exception:
+            self._inst_id = id(link_inst)
+        self.calls = 0
+        self.misses = 0
+
+    def _key(self, wall, pt, prefer_n):
+        try:
+            q = float(_PROBE_QUANT_FT)
+            k = (
+                self._inst_id,
+                int(wall.Id.IntegerValue),
+                int(round(float(pt.X) / q)),
+                int(round(float(pt.Y) / q)),
+                int(round(float(pt.Z) / q)),
+            )
+        except Exception:
+            return None
+        if prefer_n is None:
+            return k + (None, None)
+        try:
+            return k + (round(float(prefer_n.X), 4), round(float(prefer_n.Y), 4))
+        except Exception:
+            return None
+
+    def probe(self, wall, pt, prefer_n=None):
+        self.calls += 1
+        key = self._key(wall, pt, prefer_n) if (wall is not None and pt is not None) else None
+        if key is not None:
+            res = self.cache.probes.get(key)
+            if res is not None:
+                return res
+        self.misses += 1
+        res = _get_linked_wall_face_ref_and_point(wall, self.link_inst, pt, faces_cache=self.cache.faces, prefer_n_link=prefer_n)
+        if key is not None:
+            self.cache.probes.put(key, res)
+        return res
+
+
+def probe_linked_wall_face(link_wall, link_inst, point_link, prefer_n_link=None):
+    """`_get_linked_wall_face_ref_and_point` через общий кэш граней связи (для других инструментов)."""
+    return _LinkFaceProbe(link_inst).probe(link_wall, point_link, prefer_n_link)
+
+
+class _SocketPlan(object):
+    """Результат этапа "разрешение хоста" для одной розетки."""
+    __slots__ = (
+        'sym', 'comment', 'link_ref', 'host_ref', 'pt_host_on_face', 'dir_host', 'n_host',
+        'is_verified', 'original_target_z',
+    )
+
+
+def _resolve_socket_hosting(item, link_inst, t, probe, host_wall_index, ws, strict_hosting, comment_value):
+    """Чистый этап: грани, точки и нормали для одной позиции пакета (без изменения модели).
+
+    Возвращает (_SocketPlan или None, причина пропуска: None | 'no_place' | 'no_face').
+    """
+    item_comment = comment_value
+    prefer_n_link = None
+    try:
+        wall_link, pt_link, wall_dir_link, sym_inst, _seg_len = item[:5]
+        try:
+            if len(item) > 5 and item[5]:
+                item_comment = item[5]
+        except Exception:
             item_comment = comment_value
+        try:
+            if len(item) > 6:
+                prefer_n_link = item[6]
+        except Exception:
             prefer_n_link = None
-            try:
-                wall_link, pt_link, wall_dir_link, sym_inst, _seg_len = item[:5]
-                try:
-                    if len(item) > 5 and item[5]:
-                        item_comment = item[5]
-                except Exception:
-                    item_comment = comment_value
-                try:
-                    if len(item) > 6:
-                        prefer_n_link = item[6]
-                except Exception:
-                    prefer_n_link = None
-            except Exception:
-                skipped_no_place += 1
-                continue
-            if not wall_link or not pt_link or not sym_inst:
-                skipped_no_place += 1
-                continue
-            
-            sid = sym_inst.Id.IntegerValue
-            is_wp = sym_flags.get(sid, (False, False))[0]
-            is_ol = sym_flags.get(sid, (False, False))[1]
-            
-            inst = None
-            # Save the original target Z from pt_link BEFORE any transformations
-            # This is critical for low-height placements (e.g., ШДУП at 300mm)
-            original_pt_link_z = float(pt_link.Z) if pt_link else None
-
-            link_ref, proj_pt_link, face_n_link = _get_linked_wall_face_ref_and_point(wall_link, link_inst, pt_link, faces_cache=faces_cache, prefer_n_link=prefer_n_link)
+    except Exception:
+        return None, 'no_place'
+    if not wall_link or not pt_link or not sym_inst:
+        return None, 'no_place'
+
+    # Save the original target Z from pt_link BEFORE any transformations
+    # This is critical for low-height placements (e.g., ШДУП at 300mm)
+    original_pt_link_z = float(pt_link.Z) if pt_link else None
+
+    def _face_at(p):
+        return probe.probe(wall_link, p, prefer_n_link)
+
+    link_ref, proj_pt_link, face_n_link = _face_at(pt_link)
 
     # Если не найдена грань на целевой высоте, попробовать найти на других высотах (для низких размещений, таких как ШДУП на 300 мм)
-            # Strategy: find face at higher elevation to confirm wall geometry exists, then use host wall for actual placement
-            found_geometry_at_higher_z = False
-            if (proj_pt_link is None) and strict_hosting:
+    # Strategy: find face at higher elevation to confirm wall geometry exists, then use host wall for actual placement
+    found_geometry_at_higher_z = False
+    if (proj_pt_link is None) and strict_hosting:
+        try:
+            for z_probe_mm in (500, 800, 1200, 1500):
+                z_probe_ft = mm_to_ft(z_probe_mm)
+                pt_probe = DB.XYZ(float(pt_link.X), float(pt_link.Y), float(pt_link.Z) + z_probe_ft)
+                lr_probe, pp_probe, nn_probe = _face_at(pt_probe)
+                if pp_probe is not None:
+                    # Found face at higher elevation - geometry exists
+                    # Save the normal, mark as found, but don't use the reference (wrong Z)
+                    found_geometry_at_higher_z = True
+                    face_n_link = nn_probe
+                    # Create a projected point at original Z for verification
+                    proj_pt_link = DB.XYZ(float(pp_probe.X), float(pp_probe.Y), float(pt_link.Z))
+                    break
+        except: pass
+
+    try:
+        wd = None
+        if wall_dir_link:
+            try: wd = DB.XYZ(float(wall_dir_link.X), float(wall_dir_link.Y), 0.0)
+            except: wd = None
+        if wd and wd.GetLength() > 1e-9:
+            wd = wd.Normalize()
+            step_ft = float(mm_to_ft(50) or 0.0)
+            max_ft = float(mm_to_ft(1200) or 0.0)
+            support_half_ft = float(mm_to_ft(200) or 0.0)
+            try:
+                if _seg_len and support_half_ft > 1e-9:
+                    support_half_ft = min(support_half_ft, float(_seg_len) * 0.45)
+            except: pass
+
+            def _solid_at(p):
+                lr0, pp0, nn0 = _face_at(p)
+                # If no face at this point, try higher elevations
+                if pp0 is None:
+                    try:
+                        for z_probe_mm in (500, 800, 1200):
+                            z_probe_ft = mm_to_ft(z_probe_mm)
+                            p_probe = DB.XYZ(float(p.X), float(p.Y), float(p.Z) + z_probe_ft)
+                            lr_pr, pp_pr, nn_pr = _face_at(p_probe)
+                            if pp_pr is not None:
+                                lr0 = lr_pr
+                                pp0 = DB.XYZ(float(pp_pr.X), float(pp_pr.Y), float(p.Z))
+                                nn0 = nn_pr
+                                break
+                    except: pass
+                if pp0 is None: return None, None, None
+                if support_half_ft > 1e-9:
+                    p_a = DB.XYZ(p.X + wd.X * support_half_ft, p.Y + wd.Y * support_half_ft, p.Z)
+                    p_b = DB.XYZ(p.X - wd.X * support_half_ft, p.Y - wd.Y * support_half_ft, p.Z)
+                    _, pp_a, _ = _face_at(p_a)
+                    if pp_a is None: return None, None, None
+                    _, pp_b, _ = _face_at(p_b)
+                    if pp_b is None: return None, None, None
+                return lr0, pp0, nn0
+
+            need = (proj_pt_link is None)
+            if (not need) and support_half_ft > 1e-9:
+                p_a = DB.XYZ(pt_link.X + wd.X * support_half_ft, pt_link.Y + wd.Y * support_half_ft, pt_link.Z)
+                p_b = DB.XYZ(pt_link.X - wd.X * support_half_ft, pt_link.Y - wd.Y * support_half_ft, pt_link.Z)
+                _, pp_a, _ = _face_at(p_a)
+                _, pp_b, _ = _face_at(p_b)
+                if pp_a is None or pp_b is None: need = True
+
+            if need and step_ft > 1e-9 and max_ft > 1e-9:
+                lr0, pp0, nn0 = _solid_at(pt_link)
+                if pp0 is not None:
+                    link_ref, proj_pt_link, face_n_link = lr0, pp0, nn0
+                else:
+                    steps = int(max(1, math.ceil(max_ft / step_ft)))
+                    found = False
+                    for i in range(1, steps + 1):
+                        off = step_ft * i
+                        for sgn in (-1.0, 1.0):
+                            p_try = DB.XYZ(pt_link.X + wd.X * off * sgn, pt_link.Y + wd.Y * off * sgn, pt_link.Z)
+                            lr0, pp0, nn0 = _solid_at(p_try)
+                            if pp0 is not None:
+                                pt_link = p_try
+                                link_ref, proj_pt_link, face_n_link = lr0, pp0, nn0
+                                found = True
+                                break
+                        if found: break
+    except: pass
+
+    # If link_ref failed but we are in strict_hosting, check if proj_pt_link was found (geometry exists)
+    # If so, we treat it as "verified" for OneLevel placement purposes.
+    pt_host = t.OfPoint(pt_link)
+    pt_host_on_face = t.OfPoint(proj_pt_link) if proj_pt_link else pt_host
+
+    # Calculate original target Z in host coordinates
+    # Transform the original pt_link Z to host coordinates to get the true target height
+    try:
+        if original_pt_link_z is not None:
+            # Create a point at original Z in link coords and transform it
+            pt_link_at_original_z = DB.XYZ(float(pt_link.X), float(pt_link.Y), original_pt_link_z)
+            pt_host_at_original_z = t.OfPoint(pt_link_at_original_z)
+            original_target_z = float(pt_host_at_original_z.Z)
+        else:
+            original_target_z = float(pt_host_on_face.Z) if pt_host_on_face else None
+    except:
+        original_target_z = float(pt_host_on_face.Z) if pt_host_on_face else None
+
+    n_link = face_n_link or getattr(wall_link, 'Orientation', None)
+    n_host = t.OfVector(n_link) if n_link else None
+
+    host_ref = None
+    host_face_pt = None
+    host_n = None
+    if (not link_ref) and strict_hosting:
+        # Try to find host wall face - critical when link face not available
+        # This is especially important for low-height placements (e.g., ШДУП at 300mm)
+        host_wall = _nearest_host_wall_to_point(host_wall_index, pt_host_on_face, max_dist_ft=ws)
+        if host_wall is not None:
+            hr0, hp0, hn0 = _get_host_wall_face_ref_and_point(host_wall, pt_host_on_face, prefer_n_host=n_host)
+            if hr0 and hp0:
+                host_ref, host_face_pt, host_n = hr0, hp0, hn0
+                pt_host_on_face = host_face_pt
+                if host_n:
+                    n_host = host_n
+            # If still not found, try at higher elevations
+            # This is critical for low placements where wall may not have geometry at target height
+            if not hr0:
                 try:
                     for z_probe_mm in (500, 800, 1200, 1500):
                         z_probe_ft = mm_to_ft(z_probe_mm)
-                        pt_probe = DB.XYZ(float(pt_link.X), float(pt_link.Y), float(pt_link.Z) + z_probe_ft)
-                        lr_probe, pp_probe, nn_probe = _get_linked_wall_face_ref_and_point(wall_link, link_inst, pt_probe, faces_cache=faces_cache, prefer_n_link=prefer_n_link)
-                        if pp_probe is not None:
-                            # Found face at higher elevation - geometry exists
-                            # Save the normal, mark as found, but don't use the reference (wrong Z)
-                            found_geometry_at_higher_z = True
-                            face_n_link = nn_probe
-                            # Create a projected point at original Z for verification
-                            proj_pt_link = DB.XYZ(float(pp_probe.X), float(pp_probe.Y), float(pt_link.Z))
+                        # Use original_target_z to ensure we always probe from the same base height
+                        pt_probe_host = DB.XYZ(float(pt_host_on_face.X), float(pt_host_on_face.Y), float(original_target_z) + z_probe_ft)
+                        hr_probe, hp_probe, hn_probe = _get_host_wall_face_ref_and_point(host_wall, pt_probe_host, prefer_n_host=n_host)
+                        if hr_probe and hp_probe:
+                            # Found face at higher elevation
+                            # For Face-based families: use the reference directly (Revit will project to face)
+                            # For WorkPlane/OneLevel: project point back to original Z
+                            host_ref = hr_probe
+                            host_n = hn_probe
+                            # Keep original Z but use found X,Y projection
+                            host_face_pt = DB.XYZ(float(hp_probe.X), float(hp_probe.Y), float(original_target_z))
+                            pt_host_on_face = host_face_pt
+                            if host_n:
+                                n_host = host_n
                             break
                 except: pass
 
-            try:
-                wd = None
-                if wall_dir_link:
-                    try: wd = DB.XYZ(float(wall_dir_link.X), float(wall_dir_link.Y), 0.0)
-                    except: wd = None
-                if wd and wd.GetLength() > 1e-9:
-                    wd = wd.Normalize()
-                    step_ft = float(mm_to_ft(50) or 0.0)
-                    max_ft = float(mm_to_ft(1200) or 0.0)
-                    support_half_ft = float(mm_to_ft(200) or 0.0)
-                    try:
-                        if _seg_len and support_half_ft > 1e-9:
-                            support_half_ft = min(support_half_ft, float(_seg_len) * 0.45)
-                    except: pass
+    is_verified = (link_ref is not None) or (host_ref is not None) or (proj_pt_link is not None) or found_geometry_at_higher_z
+    if strict_hosting and (not is_verified):
+        return None, 'no_face'
+
+    dir_host = t.OfVector(wall_dir_link) if wall_dir_link else DB.XYZ.BasisX
+    if n_host and n_host.GetLength() > 1e-9:
+        n = n_host.Normalize()
+        comp = n.Multiply(dir_host.DotProduct(n))
+        dir_host = dir_host - comp
+    dir_host = dir_host.Normalize() if dir_host.GetLength() > 1e-9 else DB.XYZ.BasisX
+
+    plan = _SocketPlan()
+    plan.sym = sym_inst
+    plan.comment = item_comment
+    plan.link_ref = link_ref
+    plan.host_ref = host_ref
+    plan.pt_host_on_face = pt_host_on_face
+    plan.dir_host = dir_host
+    plan.n_host = n_host
+    plan.is_verified = is_verified
+    plan.original_target_z = original_target_z
+    return plan, None
+
+
+def _create_socket_from_plan(host_doc, plan, sym_flags, sp_cache, strict_hosting):
+    """Этап создания: экземпляр по готовому плану. Возвращает (inst, способ: 'face'|'wp'|'ol'|None)."""
+    sym_inst = plan.sym
+    pt_host_on_face = plan.pt_host_on_face
+    dir_host = plan.dir_host
+    n_host = plan.n_host
+    sid = sym_inst.Id.IntegerValue
+    is_wp = sym_flags.get(sid, (False, False))[0]
+    is_ol = sym_flags.get(sid, (False, False))[1]
+
+    inst = None
+    how = None
+    # 1. Face Hosted (Priority)
+    if plan.link_ref:
+        try: inst = host_doc.Create.NewFamilyInstance(plan.link_ref, pt_host_on_face, dir_host, sym_inst)
+        except Exception:
+            # Try fallback signature
+            try: inst = host_doc.Create.NewFamilyInstance(plan.link_ref, pt_host_on_face, sym_inst)
+            except: pass
+        if inst: how = 'face'
 
-                    def _solid_at(p):
-                        lr0, pp0, nn0 = _get_linked_wall_face_ref_and_point(wall_link, link_inst, p, faces_cache=faces_cache, prefer_n_link=prefer_n_link)
-                        # If no face at this point, try higher elevations
-                        if pp0 is None:
-                            try:
-                                for z_probe_mm in (500, 800, 1200):
-                                    z_probe_ft = mm_to_ft(z_probe_mm)
-                                    p_probe = DB.XYZ(float(p.X), float(p.Y), float(p.Z) + z_probe_ft)
-                                    lr_pr, pp_pr, nn_pr = _get_linked_wall_face_ref_and_point(wall_link, link_inst, p_probe, faces_cache=faces_cache, prefer_n_link=prefer_n_link)
-                                    if pp_pr is not None:
-                                        lr0 = lr_pr
-                                        pp0 = DB.XYZ(float(pp_pr.X), float(pp_pr.Y), float(p.Z))
-                                        nn0 = nn_pr
-                                        break
-                            except: pass
-                        if pp0 is None: return None, None, None
-                        if support_half_ft > 1e-9:
-                            p_a = DB.XYZ(p.X + wd.X * support_half_ft, p.Y + wd.Y * support_half_ft, p.Z)
-                            p_b = DB.XYZ(p.X - wd.X * support_half_ft, p.Y - wd.Y * support_half_ft, p.Z)
-                            _, pp_a, _ = _get_linked_wall_face_ref_and_point(wall_link, link_inst, p_a, faces_cache=faces_cache, prefer_n_link=prefer_n_link)
-                            if pp_a is None: return None, None, None
-                            _, pp_b, _ = _get_linked_wall_face_ref_and_point(wall_link, link_inst, p_b, faces_cache=faces_cache, prefer_n_link=prefer_n_link)
-                            if pp_b is None: return None, None, None
-                        return lr0, pp0, nn0
-
-                    need = (proj_pt_link is None)
-                    if (not need) and support_half_ft > 1e-9:
-                        p_a = DB.XYZ(pt_link.X + wd.X * support_half_ft, pt_link.Y + wd.Y * support_half_ft, pt_link.Z)
-                        p_b = DB.XYZ(pt_link.X - wd.X * support_half_ft, pt_link.Y - wd.Y * support_half_ft, pt_link.Z)
-                        _, pp_a, _ = _get_linked_wall_face_ref_and_point(wall_link, link_inst, p_a, faces_cache=faces_cache, prefer_n_link=prefer_n_link)
-                        _, pp_b, _ = _get_linked_wall_face_ref_and_point(wall_link, link_inst, p_b, faces_cache=faces_cache, prefer_n_link=prefer_n_link)
-                        if pp_a is None or pp_b is None: need = True
-
-                    if need and step_ft > 1e-9 and max_ft > 1e-9:
-                        lr0, pp0, nn0 = _solid_at(pt_link)
-                        if pp0 is not None:
-                            link_ref, proj_pt_link, face_n_link = lr0, pp0, nn0
-                        else:
-                            steps = int(max(1, math.ceil(max_ft / step_ft)))
-                            found = False
-                            for i in range(1, steps + 1):
-                                off = step_ft * i
-                                for sgn in (-1.0, 1.0):
-                                    p_try = DB.XYZ(pt_link.X + wd.X * off * sgn, pt_link.Y + wd.Y * off * sgn, pt_link.Z)
-                                    lr0, pp0, nn0 = _solid_at(p_try)
-                                    if pp0 is not None:
-                                        pt_link = p_try
-                                        link_ref, proj_pt_link, face_n_link = lr0, pp0, nn0
-                                        found = True
-                                        break
-                                if found: break
+    # 1b. Host wall face when link face ref is missing
+    if not inst and plan.host_ref:
+        try: inst = host_doc.Create.NewFamilyInstance(plan.host_ref, pt_host_on_face, dir_host, sym_inst)
+        except Exception:
+            try: inst = host_doc.Create.NewFamilyInstance(plan.host_ref, pt_host_on_face, sym_inst)
             except: pass
-            
-            # If link_ref failed but we are in strict_hosting, check if proj_pt_link was found (geometry exists)
-            # If so, we treat it as "verified" for OneLevel placement purposes.
-            pt_host = t.OfPoint(pt_link)
-            pt_host_on_face = t.OfPoint(proj_pt_link) if proj_pt_link else pt_host
-
-            # Calculate original target Z in host coordinates
-            # Transform the original pt_link Z to host coordinates to get the true target height
-            try:
-                if original_pt_link_z is not None:
-                    # Create a point at original Z in link coords and transform it
-                    pt_link_at_original_z = DB.XYZ(float(pt_link.X), float(pt_link.Y), original_pt_link_z)
-                    pt_host_at_original_z = t.OfPoint(pt_link_at_original_z)
-                    original_target_z = float(pt_host_at_original_z.Z)
-                else:
-                    original_target_z = float(pt_host_on_face.Z) if pt_host_on_face else None
+        if inst: how = 'face'
+
+    # 2. Work Plane (Fallback only if Face Failed AND allowed)
+    # Relaxed strict_hosting check: verify geometry (proj_pt_link or link_ref), not just link_ref
+    if not inst and (not strict_hosting or plan.is_verified) and is_wp and n_host:
+        sp = _get_sketchplane_cached(host_doc, pt_host_on_face, n_host, sp_cache)
+        if sp:
+            try: inst = host_doc.Create.NewFamilyInstance(pt_host_on_face, sym_inst, sp, DB.Structure.StructuralType.NonStructural)
             except:
-                original_target_z = float(pt_host_on_face.Z) if pt_host_on_face else None
-
-            n_link = face_n_link or getattr(wall_link, 'Orientation', None)
-            n_host = t.OfVector(n_link) if n_link else None
-
-            host_ref = None
-            host_face_pt = None
-            host_n = None
-            if (not link_ref) and strict_hosting:
-                # Try to find host wall face - critical when link face not available
-                # This is especially important for low-height placements (e.g., ШДУП at 300mm)
-                host_wall = _nearest_host_wall_to_point(host_walls, pt_host_on_face, max_dist_ft=ws)
-                if host_wall is not None:
-                    hr0, hp0, hn0 = _get_host_wall_face_ref_and_point(host_wall, pt_host_on_face, prefer_n_host=n_host)
-                    if hr0 and hp0:
-                        host_ref, host_face_pt, host_n = hr0, hp0, hn0
-                        pt_host_on_face = host_face_pt
-                        if host_n:
-                            n_host = host_n
-                    # If still not found, try at higher elevations
-                    # This is critical for low placements where wall may not have geometry at target height
-                    if not hr0:
+                try: inst = host_doc.Create.NewFamilyInstance(pt_host_on_face, sym_inst, sp)
+                except: pass
+            if inst: how = 'wp'
+
+    # 2b. OneLevel placement when WorkPlane failed or not supported
+    # In strict_hosting mode with verified geometry, try OneLevel as a fallback
+    if not inst and (not strict_hosting or plan.is_verified) and is_ol:
+        try: inst = placement_engine.place_point_family_instance(host_doc, sym_inst, pt_host_on_face)
+        except: inst = None
+        if inst:
+            how = 'ol'
+            if n_host: _rotate_instance_to_xy_dir(inst, pt_host_on_face, n_host)
+
+    if not inst:
+        return None, None
+
+    # Ensure facing points to the room side: face normal should oppose the wall normal (in host coords)
+    # because sockets must be oriented "into" the room, not outwards.
+    try:
+        if n_host is not None:
+            fo = getattr(inst, 'FacingOrientation', None)
+            if fo is not None:
+                f2 = DB.XYZ(float(fo.X), float(fo.Y), 0.0)
+                n2 = DB.XYZ(float(n_host.X), float(n_host.Y), 0.0)
+                if f2.GetLength() > 1e-9 and n2.GetLength() > 1e-9:
+                    f2 = f2.Normalize()
+                    n2 = n2.Normalize()
+                    # If facing is aligned with wall normal (points out of room), flip.
+                    if float(f2.DotProduct(n2)) > 0.2:
                         try:
-                            for z_probe_mm in (500, 800, 1200, 1500):
-                                z_probe_ft = mm_to_ft(z_probe_mm)
-                                # Use original_target_z to ensure we always probe from the same base height
-                                pt_probe_host = DB.XYZ(float(pt_host_on_face.X), float(pt_host_on_face.Y), float(original_target_z) + z_probe_ft)
-                                hr_probe, hp_probe, hn_probe = _get_host_wall_face_ref_and_point(host_wall, pt_probe_host, prefer_n_host=n_host)
-                                if hr_probe and hp_probe:
-                                    # Found face at higher elevation
-                                    # For Face-based families: use the reference directly (Revit will project to face)
-                                    # For WorkPlane/OneLevel: project point back to original Z
-                                    host_ref = hr_probe
-                                    host_n = hn_probe
-                                    # Keep original Z but use found X,Y projection
-                                    host_face_pt = DB.XYZ(float(hp_probe.X), float(hp_probe.Y), float(original_target_z))
-                                    pt_host_on_face = host_face_pt
-                                    if host_n:
-                                        n_host = host_n
-                                    break
-                        except: pass
-
-            is_verified = (link_ref is not None) or (host_ref is not None) or (proj_pt_link is not None) or found_geometry_at_higher_z
-            
-            dir_host = t.OfVector(wall_dir_link) if wall_dir_link else DB.XYZ.BasisX
-            if n_host and n_host.GetLength() > 1e-9:
-                n = n_host.Normalize()
-                comp = n.Multiply(dir_host.DotProduct(n))
-                dir_host = dir_host - comp
-            dir_host = dir_host.Normalize() if dir_host.GetLength() > 1e-9 else DB.XYZ.BasisX
-            
-            # 1. Face Hosted (Priority)
-            if link_ref:
-                try: inst = host_doc.Create.NewFamilyInstance(link_ref, pt_host_on_face, dir_host, sym_inst)
-                except Exception as e: 
-                    # Try fallback signature
-                    try: inst = host_doc.Create.NewFamilyInstance(link_ref, pt_host_on_face, sym_inst)
-                    except: pass
-                
-                if inst: 
-                    created_face += 1
-                    created_verified += 1
-                else:
-                    pass
+                            inst.flipFacing()
+                        except Exception:
+                            try:
+                                inst.FacingFlipped = (not bool(getattr(inst, 'FacingFlipped', False)))
+                            except Exception:
+                                pass
+    except Exception:
+        pass
 
-            # 1b. Host wall face when link face ref is missing
-            if not inst and host_ref:
-                try: inst = host_doc.Create.NewFamilyInstance(host_ref, pt_host_on_face, dir_host, sym_inst)
-                except Exception:
-                    try: inst = host_doc.Create.NewFamilyInstance(host_ref, pt_host_on_face, sym_inst)
-                    except: pass
-                if inst:
-                    created_face += 1
-                    created_verified += 1
+    # For OneLevelBased families the API overload can ignore the Z of pt_host_on_face.
+    # Force the instance to the target height via "Elevation from Level" / offset params.
+    try:
+        if is_ol:
+            # Use the original target Z that we saved before any host wall searches
+            target_z = plan.original_target_z if plan.original_target_z is not None else float(getattr(pt_host_on_face, 'Z', None) if pt_host_on_face else None)
+        else:
+            target_z = None
+    except Exception:
+        target_z = None
 
-            if strict_hosting and (not is_verified):
-                skipped_no_face += 1
-                skipped_no_place += 1
-                continue
-            
-            # 2. Work Plane (Fallback only if Face Failed AND allowed)
-            # Relaxed strict_hosting check: verify geometry (proj_pt_link or link_ref), not just link_ref
-            if not inst and (not strict_hosting or is_verified) and is_wp and n_host:
-                sp = _get_sketchplane_cached(host_doc, pt_host_on_face, n_host, sp_cache)
-                if sp:
-                    try: inst = host_doc.Create.NewFamilyInstance(pt_host_on_face, sym_inst, sp, DB.Structure.StructuralType.NonStructural)
-                    except:
-                        try: inst = host_doc.Create.NewFamilyInstance(pt_host_on_face, sym_inst, sp)
-                        except: pass
-                    if inst:
-                        created_workplane += 1
-                        if is_verified: created_verified += 1
-
-            # 2b. OneLevel placement when WorkPlane failed or not supported
-            # In strict_hosting mode with verified geometry, try OneLevel as a fallback
-            if not inst and (not strict_hosting or is_verified) and is_ol:
-                try: inst = placement_engine.place_point_family_instance(host_doc, sym_inst, pt_host_on_face)
-                except: inst = None
-                if inst:
-                    created_point_on_face += 1
-                    if is_verified: created_verified += 1
-                    if n_host: _rotate_instance_to_xy_dir(inst, pt_host_on_face, n_host)
-
-            # Ensure facing points to the room side: face normal should oppose the wall normal (in host coords)
-            # because sockets must be oriented "into" the room, not outwards.
+    if target_z is not None:
+        try:
+            lvl = None
             try:
-                if inst is not None and n_host is not None:
-                    fo = getattr(inst, 'FacingOrientation', None)
-                    if fo is not None:
-                        f2 = DB.XYZ(float(fo.X), float(fo.Y), 0.0)
-                        n2 = DB.XYZ(float(n_host.X), float(n_host.Y), 0.0)
-                        if f2.GetLength() > 1e-9 and n2.GetLength() > 1e-9:
-                            f2 = f2.Normalize()
-                            n2 = n2.Normalize()
-                            # If facing is aligned with wall normal (points out of room), flip.
-                            if float(f2.DotProduct(n2)) > 0.2:
-                                try:
-                                    inst.flipFacing()
-                                except Exception:
-                                    try:
-                                        inst.FacingFlipped = (not bool(getattr(inst, 'FacingFlipped', False)))
-                                    except Exception:
-                                        pass
+                lid = getattr(inst, 'LevelId', None)
+                if lid and lid != DB.ElementId.InvalidElementId:
+                    lvl = host_doc.GetElement(lid)
             except Exception:
-                pass
-
-            if not inst:
-                if not is_verified: skipped_no_face += 1
-                skipped_no_place += 1
-            else:
-                # For OneLevelBased families the API overload can ignore the Z of pt_host_on_face.
-                # Force the instance to the target height via "Elevation from Level" / offset params.
-                try:
-                    if is_ol:
-                        # Use the original target Z that we saved before any host wall searches
-                        target_z = original_target_z if original_target_z is not None else float(getattr(pt_host_on_face, 'Z', None) if pt_host_on_face else None)
-                    else:
-                        target_z = None
-                except Exception:
-                    target_z = None
+                lvl = None
+            lvl_z = float(getattr(lvl, 'Elevation', None) if lvl else None) if lvl else None
+        except Exception:
+            lvl_z = None
 
-                if target_z is not None:
+        if lvl_z is not None:
+            off = float(target_z) - float(lvl_z)
+            set_ok = False
+            # Built-in param
+            try:
+                p = inst.get_Parameter(DB.BuiltInParameter.INSTANCE_ELEVATION_PARAM)
+                if p and (not p.IsReadOnly) and p.StorageType == DB.StorageType.Double:
+                    p.Set(off)
+                    set_ok = True
+            except Exception:
+                set_ok = False
+            # Common localized names
+            if not set_ok:
+                for nm in (
+                    u'Отметка от уровня',
+                    u'Смещение от уровня',
+                    u'Elevation from Level',
+                    u'Offset from Level',
+                ):
                     try:
-                        lvl = None
-                        try:
-                            lid = getattr(inst, 'LevelId', None)
-                            if lid and lid != DB.ElementId.InvalidElementId:
-                                lvl = host_doc.GetElement(lid)
-                        except Exception:
-                            lvl = None
-                        lvl_z = float(getattr(lvl, 'Elevation', None) if lvl else None) if lvl else None
+                        p = inst.LookupParameter(nm)
+                        if p and (not p.IsReadOnly) and p.StorageType == DB.StorageType.Double:
+                            p.Set(off)
+                            set_ok = True
+                            break
                     except Exception:
-                        lvl_z = None
-
-                    if lvl_z is not None:
-                        off = float(target_z) - float(lvl_z)
-                        set_ok = False
-                        # Built-in param
-                        try:
-                            p = inst.get_Parameter(DB.BuiltInParameter.INSTANCE_ELEVATION_PARAM)
-                            if p and (not p.IsReadOnly) and p.StorageType == DB.StorageType.Double:
-                                p.Set(off)
-                                set_ok = True
-                        except Exception:
-                            set_ok = False
-                        # Common localized names
-                        if not set_ok:
-                            for nm in (
-                                u'Отметка от уровня',
-                                u'Смещение от уровня',
-                                u'Elevation from Level',
-                                u'Offset from Level',
-                            ):
-                                try:
-                                    p = inst.LookupParameter(nm)
-                                    if p and (not p.IsReadOnly) and p.StorageType == DB.StorageType.Double:
-                                        p.Set(off)
-                                        set_ok = True
-                                        break
-                                except Exception:
-                                    continue
-
-                        # Last resort: move by Z
-                        if not set_ok:
-                            try:
-                                pt0 = _inst_center_point(inst)
-                                if pt0 is not None:
-                                    dz = float(target_z) - float(pt0.Z)
-                                    if abs(dz) > 1e-6:
-                                        DB.ElementTransformUtils.MoveElement(host_doc, inst.Id, DB.XYZ(0.0, 0.0, dz))
-                            except Exception:
-                                pass
+                        continue
 
-                # Allow callers to pass empty comment_value and only tag via item_comment when provided.
+            # Last resort: move by Z
+            if not set_ok:
                 try:
-                    if item_comment is not None and item_comment != u'':
-                        set_comments(inst, item_comment)
+                    pt0 = _inst_center_point(inst)
+                    if pt0 is not None:
+                        dz = float(target_z) - float(pt0.Z)
+                        if abs(dz) > 1e-6:
+                            DB.ElementTransformUtils.MoveElement(host_doc, inst.Id, DB.XYZ(0.0, 0.0, dz))
                 except Exception:
                     pass
-                created += 1
-                
-    # Return 7 values now
+
+    # Allow callers to pass empty comment_value and only tag via item_comment when provided.
+    try:
+        if plan.comment is not None and plan.comment != u'':
+            set_comments(inst, plan.comment)
+    except Exception:
+        pass
+    return inst, how
+
+
+def _place_socket_batch(host_doc, link_inst, t, batch, sym_flags, sp_cache, comment_value, strict_hosting=False, wall_search_ft=None, host_wall_index=None):
+    """Размещает пакет розеток в два этапа.
+
+    1. Разрешение хоста (без транзакции): грани стен связи/хоста, точки и нормали
+       для всех позиций; пробы граней берутся из LinkFaceCache связи.
+    2. Создание: одна транзакция, только NewFamilyInstance и параметры.
+
+    host_wall_index — WallSegmentIndex хоста для strict_hosting; если не передан,
+    берётся общий индекс документа (wall_index.get_wall_index, перестраивается
+    только при изменении числа стен).
+
+    Возвращает 7 счётчиков: created, created_face, created_workplane,
+    created_point_on_face, skipped_no_face, skipped_no_place, created_verified.
+    """
+    created = created_face = created_workplane = created_point_on_face = 0
+    created_verified = 0 # New counter for "Verified Geometry" placements
+    skipped_no_face = skipped_no_place = 0
+
+    if not host_doc or not link_inst or not t or not batch:
+        return 0,0,0,0,0,0,0
+
+    try:
+        ws = float(wall_search_ft) if wall_search_ft is not None else float(mm_to_ft(300))
+    except Exception:
+        ws = float(mm_to_ft(300))
+    if strict_hosting and host_wall_index is None:
+        host_wall_index = wall_index.get_wall_index(host_doc)
+
+    # --- Этап 1: разрешение хоста ---
+    probe = _LinkFaceProbe(link_inst)
+    plans = []
+    for item in batch:
+        try:
+            plan, skip = _resolve_socket_hosting(item, link_inst, t, probe, host_wall_index, ws, strict_hosting, comment_value)
+        except Exception:
+            plan, skip = None, 'no_place'
+        if plan is None:
+            if skip == 'no_face':
+                skipped_no_face += 1
+            skipped_no_place += 1
+            continue
+        plans.append(plan)
+
+    SOCKET_PROBE_STATS['probes'] += probe.calls
+    SOCKET_PROBE_STATS['geometry_probes'] += probe.misses
+
+    if not plans:
+        return 0, 0, 0, 0, skipped_no_face, skipped_no_place, 0
+
+    # --- Этап 2: создание ---
+    created_insts = []
+    with tx('ЭОМ: Разместить розетки (batch)', doc=host_doc, swallow_warnings=True):
+        uniq = {}
+        for plan in plans:
+            try:
+                uniq[plan.sym.Id.IntegerValue] = plan.sym
+            except Exception:
+                continue
+        for s in uniq.values(): ensure_symbol_active(host_doc, s)
+
+        for plan in plans:
+            try:
+                inst, how = _create_socket_from_plan(host_doc, plan, sym_flags, sp_cache, strict_hosting)
+            except Exception:
+                inst, how = None, None
+            if not inst:
+                if not plan.is_verified: skipped_no_face += 1
+                skipped_no_place += 1
+                continue
+            if how == 'face':
+                created_face += 1
+                created_verified += 1
+            elif how == 'wp':
+                created_workplane += 1
+                if plan.is_verified: created_verified += 1
+            elif how == 'ol':
+                created_point_on_face += 1
+                if plan.is_verified: created_verified += 1
+            created += 1
+            created_insts.append(inst)
+
+    tagged_registry.note_created(host_doc, created_insts)
+    SOCKET_PROBE_STATS['sockets'] += created
     return created, created_face, created_workplane, created_point_on_face, skipped_no_face, skipped_no_place, created_verified
 
 SOCKET_STRONG_KEYWORDS = [u'розетка', u'рзт', u'tsl_ef', u'socket', u'outlet']
@@ -2560,19 +2547,14 @@ def _score_socket_symbol(symbol):
 def _find_symbol_by_fullname(doc_, fullname):
     if not fullname: return None
     
-    def _find_by_family_name(fam_only, category_bic=None, scan_cap=20000):
+    index = placement_engine.get_symbol_index(doc_)
+    if index is None: return None
+
+    def _find_by_family_name(fam_only, category_bic=None):
         key_fam = _norm_type_key(fam_only)
         if not key_fam: return None
-        scanned = 0
-        for s in placement_engine.iter_family_symbols(doc_, category_bic=category_bic, limit=None):
-            scanned += 1
-            if scan_cap and scanned > int(scan_cap): break
-            try: fam = getattr(getattr(s, 'Family', None), 'Name', u'') or u''
-            except: fam = u''
-            try:
-                if _norm_type_key(fam) == key_fam: return s
-            except: continue
-        return None
+        by_fam = index.group_by('su_family', lambda r: _norm_type_key(r.fam_raw))
+        return index.first_symbol(by_fam.get(key_fam), category_bic)
 
     try:
         if ':' in (fullname or ''):
@@ -2581,11 +2563,11 @@ def _find_symbol_by_fullname(doc_, fullname):
             type_only = u':'.join(parts[1:]).strip() if len(parts) > 1 else ''
             if fam_only and (not type_only):
                 for bic in (DB.BuiltInCategory.OST_ElectricalFixtures, DB.BuiltInCategory.OST_ElectricalEquipment, None):
-                    sym = _find_by_family_name(fam_only, category_bic=bic, scan_cap=20000)
+                    sym = _find_by_family_name(fam_only, category_bic=bic)
                     if sym is not None: return sym
     except: pass
 
-    def _find_fuzzy(category_bic=None, scan_cap=20000):
+    def _find_fuzzy(category_bic=None):
         try: parts = [p.strip() for p in (fullname or u'').split(':')]
         except: parts = [fullname]
         if len(parts) <= 1:
@@ -2597,22 +2579,11 @@ def _find_symbol_by_fullname(doc_, fullname):
         key_fam = _norm_type_key(fam_name) if fam_name else None
         if not key_type: return None
         
-        scanned = 0
-        for s in placement_engine.iter_family_symbols(doc_, category_bic=category_bic, limit=None):
-            scanned += 1
-            if scan_cap and scanned > int(scan_cap): break
-            try:
-                if _norm_type_key(getattr(s, 'Name', u'')) != key_type: continue
-            except: continue
-            
-            if key_fam:
-                try:
-                    fam = getattr(s, 'Family', None)
-                    famn = getattr(fam, 'Name', u'') if fam else u''
-                    if _norm_type_key(famn) != key_fam: continue
-                except: continue
-            return s
-        return None
+        by_type = index.group_by('su_type', lambda r: _norm_type_key(r.type_raw))
+        recs = by_type.get(key_type) or []
+        if key_fam:
+            recs = [r for r in recs if _norm_type_key(r.fam_raw) == key_fam]
+        return index.first_symbol(recs, category_bic)
 
     for bic in (DB.BuiltInCategory.OST_ElectricalFixtures, DB.BuiltInCategory.OST_ElectricalEquipment, None):
         try: sym = placement_engine.find_family_symbol(doc_, fullname, category_bic=bic, limit=5000)
@@ -2620,12 +2591,12 @@ def _find_symbol_by_fullname(doc_, fullname):
         if sym: return sym
 
     for bic in (DB.BuiltInCategory.OST_ElectricalFixtures, DB.BuiltInCategory.OST_ElectricalEquipment, None):
-        try: sym = _find_fuzzy(category_bic=bic, scan_cap=20000)
+        try: sym = _find_fuzzy(category_bic=bic)
         except: sym = None
         if sym: return sym
 
     for bic in (DB.BuiltInCategory.OST_ElectricalFixtures, DB.BuiltInCategory.OST_ElectricalEquipment, None):
-        try: sym = _find_by_family_name(fullname, category_bic=bic, scan_cap=20000)
+        try: sym = _find_by_family_name(fullname, category_bic=bic)
         except: sym = None
         if sym: return sym
     return None
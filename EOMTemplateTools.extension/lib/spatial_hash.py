@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""Пространственный хэш точек для дедупликации и кластеризации (чистый Python).
+
+Общий индекс для инструментов расстановки: радиусные запросы к уже
+размещённым/существующим экземплярам, добавление и удаление по ходу
+размещения, загрузка из экземпляров хоста. Повторный запуск на заполненных
+этажах стоит O(n) вместо O(n × существующие).
+
+Ячейки — по XY; Z учитывается в расстоянии (шар радиуса r) или отдельным
+допуском z_tol (цилиндр: XY ≤ r, |dz| ≤ z_tol).
+"""
+
+import math
+
+
+def point_xyz(pt):
+    """(x, y, z) из XYZ-подобного объекта или кортежа; None при ошибке."""
+    if pt is None:
+        return None
+    try:
+        return float(pt.X), float(pt.Y), float(pt.Z)
+    except Exception:
+        pass
+    try:
+        if len(pt) >= 3:
+            return float(pt[0]), float(pt[1]), float(pt[2])
+        return float(pt[0]), float(pt[1]), 0.0
+    except Exception:
+        return None
+
+
+def instance_point(elem):
+    """Точка вставки экземпляра (Location.Point) или None."""
+    try:
+        loc = getattr(elem, 'Location', None)
+        return loc.Point if loc is not None and hasattr(loc, 'Point') else None
+    except Exception:
+        return None
+
+
+class SpatialHash(object):
+    """Сеточный индекс точек с необязательной полезной нагрузкой (item).
+
+    Результаты запросов возвращаются в порядке добавления, поэтому замена
+    линейного поиска «первый подходящий» даёт тот же ответ.
+
+    Args:
+        cell_ft: размер ячейки (футы); разумно брать порядка радиуса запросов.
+    """
+
+    def __init__(self, cell_ft=1.0):
+        self.cell = max(1e-3, float(cell_ft or 1.0))
+        self._grid = {}
+        self._pts = {}
+        self._by_item = {}
+        self._next = 0
+
+    def __len__(self):
+        return len(self._pts)
+
+    def _key(self, x, y):
+        c = self.cell
+        return int(math.floor(x / c)), int(math.floor(y / c))
+
+    def add(self, x, y, z=0.0, item=None):
+        """Добавить точку; возвращает handle для remove()."""
+        x, y, z = float(x), float(y), float(z or 0.0)
+        handle = self._next
+        self._next += 1
+        self._pts[handle] = (x, y, z, item)
+        self._grid.setdefault(self._key(x, y), []).append(handle)
+        if item is not None:
+            self._by_item.setdefault(id(item), []).append(handle)
+        return handle
+
+    def add_point(self, pt, item=None):
+        xyz = point_xyz(pt)
+        if xyz is None:
+            return None
+        return self.add(xyz[0], xyz[1], xyz[2], item)
+
+    def remove(self, handle):
+        rec = self._pts.pop(handle, None)
+        if rec is None:
+            return False
+        key = self._key(rec[0], rec[1])
+        bucket = self._grid.get(key)
+        if bucket is not None:
+            try:
+                bucket.remove(handle)
+            except ValueError:
+                pass
+            if not bucket:
+                self._grid.pop(key, None)
+        if rec[3] is not None:
+            handles = self._by_item.get(id(rec[3]))
+            if handles is not None:
+                try:
+                    handles.remove(handle)
+                except ValueError:
+                    pass
+                if not handles:
+                    self._by_item.pop(id(rec[3]), None)
+        return True
+
+    def discard(self, item):
+        """Удалить все точки с данным item (по идентичности объекта)."""
+        handles = list(self._by_item.get(id(item)) or [])
+        for handle in handles:
+            self.remove(handle)
+        return bool(handles)
+
+    def _handles_near(self, x, y, z, r, z_tol=None):
+        r = float(r or 0.0)
+        if r <= 1e-9 or not self._pts:
+            return []
+        x, y, z = float(x), float(y), float(z or 0.0)
+        r2 = r * r
+        span = int(math.ceil(r / self.cell))
+        kx, ky = self._key(x, y)
+        out = []
+        for ix in range(kx - span, kx + span + 1):
+            for iy in range(ky - span, ky + span + 1):
+                for handle in self._grid.get((ix, iy), ()):
+                    px, py, pz, _ = self._pts[handle]
+                    dz = pz - z
+                    if z_tol is None:
+                        d2 = (px - x) ** 2 + (py - y) ** 2 + dz * dz
+                    else:
+                        if abs(dz) > z_tol:
+                            continue
+                        d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 <= r2:
+                        out.append(handle)
+        out.sort()
+        return out
+
+    def has_near(self, x, y, z, r, z_tol=None):
+        return bool(self._handles_near(x, y, z, r, z_tol))
+
+    def has_near_point(self, pt, r, z_tol=None):
+        xyz = point_xyz(pt)
+        return xyz is not None and self.has_near(xyz[0], xyz[1], xyz[2], r, z_tol)
+
+    def near(self, x, y, z, r, z_tol=None):
+        """Items точек в радиусе (в порядке добавления)."""
+        return [self._pts[h][3] for h in self._handles_near(x, y, z, r, z_tol)]
+
+    def near_point(self, pt, r, z_tol=None):
+        xyz = point_xyz(pt)
+        if xyz is None:
+            return []
+        return self.near(xyz[0], xyz[1], xyz[2], r, z_tol)
+
+    def first_near_point(self, pt, r, z_tol=None):
+        """Item первой добавленной точки в радиусе или None."""
+        xyz = point_xyz(pt)
+        if xyz is None:
+            return None
+        handles = self._handles_near(xyz[0], xyz[1], xyz[2], r, z_tol)
+        return self._pts[handles[0]][3] if handles else None
+
+    def pop_near_point(self, pt, r, z_tol=None):
+        """Удалить первую добавленную точку в радиусе; True, если удалена."""
+        xyz = point_xyz(pt)
+        if xyz is None:
+            return False
+        handles = self._handles_near(xyz[0], xyz[1], xyz[2], r, z_tol)
+        return self.remove(handles[0]) if handles else False
+
+    def items(self):
+        return [self._pts[h][3] for h in sorted(self._pts)]
+
+    @classmethod
+    def from_points(cls, points, cell_ft=1.0, items=None):
+        index = cls(cell_ft)
+        items = list(items) if items is not None else None
+        for i, pt in enumerate(points or []):
+            index.add_point(pt, items[i] if items is not None else pt)
+        return index
+
+    @classmethod
+    def from_instances(cls, instances, cell_ft=1.0):
+        """Загрузить экземпляры (item = экземпляр) по их Location.Point."""
+        index = cls(cell_ft)
+        for elem in instances or []:
+            index.add_point(instance_point(elem), elem)
+        return index
+
+
+def cluster_xy_count(points, tol_ft):
+    """Число жадных кластеров XY-точек с допуском tol_ft.
+
+    Точка присоединяется к первому (по порядку создания) кластеру, центр
+    которого ближе tol_ft; центр пересчитывается как среднее. Результат
+    совпадает с линейным вариантом, но кандидаты берутся из хэша.
+    """
+    if not points:
+        return 0
+    try:
+        tol = float(tol_ft or 0.0)
+    except Exception:
+        tol = 0.0
+    if tol <= 0:
+        return len(points)
+    index = SpatialHash(tol)
+    clusters = []
+    for x, y in points:
+        x, y = float(x), float(y)
+        handles = index._handles_near(x, y, 0.0, tol)
+        if not handles:
+            ci = len(clusters)
+            clusters.append([x, y, 1.0, index.add(x, y, 0.0, ci)])
+            continue
+        # Кластер, созданный раньше всех (как в линейном проходе).
+        ci = min(index._pts[h][3] for h in handles)
+        c = clusters[ci]
+        c[0] = (c[0] * c[2] + x) / (c[2] + 1.0)
+        c[1] = (c[1] * c[2] + y) / (c[2] + 1.0)
+        c[2] += 1.0
+        index.remove(c[3])
+        c[3] = index.add(c[0], c[1], 0.0, ci)
+    return len(clusters)
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""Реестр элементов документа с тегом AUTO_EOM в Comments.
+
+Строится одним проходом коллектора с фильтром по параметру Comments;
+каждый комментарий разбирается `parse_tag` один раз. Грамматика тега
+живёт здесь (модуль совместим с IronPython), rollback_utils её реэкспортирует.
+Индексы: id -> запись, инструмент, тег (PREFIX:TOOL), категория, текст
+комментария. Запросы откатов и дедупликации — словарные выборки вместо
+обхода модели.
+
+Реестр живёт, пока модуль в sys.modules (между запусками инструментов),
+и поддерживается в актуальном состоянии без обхода модели при запросе:
+инструменты сообщают созданные/удалённые id (`note_created`/`note_deleted`),
+а изменения в обход инструментов (ручное копирование, удаление, правка
+Comments, отмена) приходят через DocumentChanged приложения. Удалённые id
+убираются сразу, добавленные/изменённые перечитываются при следующем
+запросе — только они. Если подписаться на событие нельзя, реестр не
+кэшируется и собирается на каждый запрос.
+"""
+
+import re
+
+try:
+    from pyrevit import DB
+except ImportError:
+    DB = None
+
+
+# Default tag prefix used by all EOM tools
+DEFAULT_TAG_PREFIX = "AUTO_EOM"
+
+# Regex pattern to parse tag format: AUTO_EOM:TOOL:TIMESTAMP
+TAG_PATTERN = re.compile(
+    r"^(AUTO_EOM)(?::([A-Z_]+))?(?::(\d{8}_\d{6}))?",
+    re.IGNORECASE
+)
+
+
+def parse_tag(comment):
+    """Parse AUTO_EOM tag from element comment.
+
+    Args:
+        comment: The Comments parameter value from an element.
+
+    Returns:
+        Dictionary with 'prefix', 'tool', 'timestamp' keys if valid tag,
+        None if not a valid AUTO_EOM tag.
+
+    Examples:
+        >>> parse_tag("AUTO_EOM:SOCKET:20260117_143022")
+        {'prefix': 'AUTO_EOM', 'tool': 'SOCKET', 'timestamp': '20260117_143022'}
+        >>> parse_tag("AUTO_EOM:LIGHT")
+        {'prefix': 'AUTO_EOM', 'tool': 'LIGHT', 'timestamp': None}
+        >>> parse_tag("Some other comment")
+        None
+    """
+    if not comment:
+        return None
+
+    comment = comment.strip()
+    match = TAG_PATTERN.match(comment)
+
+    if not match:
+        # Try simple prefix match for legacy tags
+        if comment.upper().startswith(DEFAULT_TAG_PREFIX):
+            parts = comment.split(":")
+            return {
+                "prefix": parts[0] if parts else DEFAULT_TAG_PREFIX,
+                "tool": parts[1] if len(parts) > 1 else None,
+                "timestamp": parts[2] if len(parts) > 2 else None,
+            }
+        return None
+
+    return {
+        "prefix": match.group(1) or DEFAULT_TAG_PREFIX,
+        "tool": match.group(2),
+        "timestamp": match.group(3),
+    }
+
+
+class _TaggedRecord(object):
+    __slots__ = ('id', 'elem', 'comment', 'comment_low', 'parsed', 'tool', 'tag', 'category', 'is_instance')
+
+
+def _elem_id(elem):
+    try:
+        return int(elem.Id.IntegerValue)
+    except Exception:
+        return None
+
+
+def _comment_of(elem):
+    try:
+        p = elem.get_Parameter(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS)
+        return (p.AsString() if p else None) or u''
+    except Exception:
+        return u''
+
+
+def _category_of(elem):
+    try:
+        cat = elem.Category
+        return int(cat.Id.IntegerValue) if cat is not None else None
+    except Exception:
+        return None
+
+
+def _is_valid(elem):
+    try:
+        return elem is not None and bool(elem.IsValidObject)
+    except Exception:
+        return False
+
+
+def _to_int(value):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except Exception:
+        pass
+    try:
+        return int(value.IntegerValue)
+    except Exception:
+        return None
+
+
+def covers(tag_value):
+    """True, если выборку по подстроке tag_value можно взять из реестра.
+
+    В реестре только элементы, чей комментарий содержит AUTO_EOM; теги без
+    этого префикса (настроенные пользователем) остаются за коллектором.
+    """
+    try:
+        return DEFAULT_TAG_PREFIX.lower() in (tag_value or u'').lower()
+    except Exception:
+        return False
+
+
+class TaggedElementRegistry(object):
+    """Индекс элементов с тегом AUTO_EOM одного документа.
+
+    Args:
+        doc: документ Revit.
+        elements: готовый набор элементов (по умолчанию — коллектор по
+            Comments, содержащим AUTO_EOM).
+    """
+
+    def __init__(self, doc, elements=None):
+        self.doc = doc
+        self.by_id = {}
+        self.by_comment = {}
+        self.by_tool = {}
+        self.by_tag = {}
+        self.by_category = {}
+        self.pending = set()
+        if elements is None:
+            elements = _iter_prefix_elements(doc)
+        for e in elements:
+            self._add(e)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def _add(self, elem):
+        eid = _elem_id(elem)
+        if eid is None:
+            return None
+        self._remove(eid)
+        comment = _comment_of(elem)
+        parsed = parse_tag(comment) if comment else None
+        if not parsed and DEFAULT_TAG_PREFIX.lower() not in comment.lower():
+            return None
+        rec = _TaggedRecord()
+        rec.id = eid
+        rec.elem = elem
+        rec.comment = comment
+        rec.comment_low = comment.lower()
+        rec.parsed = parsed is not None
+        rec.tool = ((parsed or {}).get('tool') or u'').upper() or None
+        rec.tag = u'{0}:{1}'.format((parsed or {}).get('prefix') or DEFAULT_TAG_PREFIX, rec.tool or u'UNKNOWN').upper()
+        rec.category = _category_of(elem)
+        try:
+            rec.is_instance = DB is not None and isinstance(elem, DB.FamilyInstance)
+        except Exception:
+            rec.is_instance = False
+        self.by_id[eid] = rec
+        self.by_comment.setdefault(comment, set()).add(eid)
+        if rec.tool:
+            self.by_tool.setdefault(rec.tool, set()).add(eid)
+        self.by_tag.setdefault(rec.tag, set()).add(eid)
+        self.by_category.setdefault(rec.category, set()).add(eid)
+        return rec
+
+    def _remove(self, eid):
+        rec = self.by_id.pop(eid, None)
+        if rec is None:
+            return False
+        for index, key in ((self.by_comment, rec.comment), (self.by_tool, rec.tool),
+                           (self.by_tag, rec.tag), (self.by_category, rec.category)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(eid)
+                if not ids:
+                    index.pop(key, None)
+        return True
+
+    def add_elements(self, elements):
+        """Проиндексировать (или переиндексировать) элементы; число принятых."""
+        n = 0
+        for e in elements or []:
+            if e is not None and self._add(e) is not None:
+                n += 1
+        return n
+
+    def add_ids(self, ids):
+        elems = []
+        for eid in ids or []:
+            try:
+                e = self.doc.GetElement(eid if not isinstance(eid, int) else DB.ElementId(eid))
+            except Exception:
+                e = None
+            if e is not None:
+                elems.append(e)
+        return self.add_elements(elems)
+
+    def remove_ids(self, ids):
+        n = 0
+        for eid in ids or []:
+            if self._remove(_to_int(eid)):
+                n += 1
+        return n
+
+    def note_changes(self, added=(), modified=(), deleted=()):
+        """Учесть id из DocumentChanged: удалённые убрать, остальные перечитать позже."""
+        self.remove_ids(deleted)
+        for ids in (added, modified):
+            for eid in ids or ():
+                eid = _to_int(eid)
+                if eid is not None:
+                    self.pending.add(eid)
+
+    def apply_pending(self):
+        """Перечитать Comments отложенных id (тег мог появиться, смениться или исчезнуть)."""
+        if not self.pending:
+            return 0
+        ids = sorted(self.pending)
+        self.pending = set()
+        for eid in ids:
+            self._remove(eid)
+        return self.add_ids(ids)
+
+    def records(self, contains=None, prefix=None, tool=None, categories=None,
+                instances_only=False, case_sensitive=False):
+        """Записи по фильтрам (в порядке id), только живые элементы.
+
+        contains — подстрока комментария (как FilterStringContains),
+        prefix — начало комментария, tool — инструмент из тега,
+        categories — BuiltInCategory/int или их список.
+        """
+        if tool:
+            ids = set(self.by_tool.get(tool.upper(), ()))
+        else:
+            ids = None
+        if contains:
+            needle = contains if case_sensitive else contains.lower()
+            matched = set()
+            for comment, cids in self.by_comment.items():
+                hay = comment if case_sensitive else comment.lower()
+                if needle in hay:
+                    matched.update(cids)
+            ids = matched if ids is None else ids & matched
+        if categories is not None:
+            if not isinstance(categories, (list, tuple, set)):
+                categories = [categories]
+            matched = set()
+            for c in categories:
+                matched.update(self.by_category.get(_to_int(c), ()))
+            ids = matched if ids is None else ids & matched
+        if ids is None:
+            ids = self.by_id.keys()
+        out = []
+        stale = []
+        pref = prefix.lower() if prefix else None
+        for eid in sorted(ids):
+            rec = self.by_id.get(eid)
+            if rec is None:
+                continue
+            if instances_only and not rec.is_instance:
+                continue
+            if pref and not rec.comment_low.strip().startswith(pref):
+                continue
+            if not _is_valid(rec.elem):
+                stale.append(eid)
+                continue
+            out.append(rec)
+        if stale:
+            self.remove_ids(stale)
+        return out
+
+    def elements(self, **filters):
+        return [rec.elem for rec in self.records(**filters)]
+
+    def ids(self, **filters):
+        return set(rec.id for rec in self.records(**filters))
+
+    def tag_counts(self):
+        """{PREFIX:TOOL: число живых элементов с разбираемым тегом}."""
+        counts = {}
+        for rec in self.records():
+            if not rec.parsed:
+                continue
+            counts[rec.tag] = counts.get(rec.tag, 0) + 1
+        return counts
+
+
+def _iter_prefix_elements(doc):
+    if doc is None or DB is None:
+        return []
+    try:
+        provider = DB.ParameterValueProvider(DB.ElementId(DB.BuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS))
+        try:
+            rule = DB.FilterStringRule(provider, DB.FilterStringContains(), DEFAULT_TAG_PREFIX, False)
+        except Exception:
+            rule = DB.FilterStringRule(provider, DB.FilterStringContains(), DEFAULT_TAG_PREFIX)
+        return list(DB.FilteredElementCollector(doc)
+                    .WhereElementIsNotElementType()
+                    .WherePasses(DB.ElementParameterFilter(rule)))
+    except Exception:
+        return []
+
+
+# doc key -> (doc, registry)
+_REGISTRIES = {}
+
+# Приложения, на DocumentChanged которых подписан модуль: hash -> Application.
+_HOOKED_APPS = {}
+
+
+def _doc_key(doc):
+    try:
+        return int(doc.GetHashCode())
+    except Exception:
+        return id(doc)
+
+
+def _on_document_changed(sender, args):
+    try:
+        cached = _cached(args.GetDocument())
+        if cached is None:
+            return
+        cached[1].note_changes(
+            added=args.GetAddedElementIds(),
+            modified=args.GetModifiedElementIds(),
+            deleted=args.GetDeletedElementIds(),
+        )
+    except Exception:
+        try:
+            invalidate_registry(args.GetDocument())
+        except Exception:
+            pass
+
+
+def _hook_application(doc):
+    """Подписаться на DocumentChanged приложения документа; False, если нельзя."""
+    try:
+        app = doc.Application
+        key = _doc_key(app)
+    except Exception:
+        return False
+    if app is None:
+        return False
+    if key in _HOOKED_APPS:
+        return True
+    try:
+        app.DocumentChanged += _on_document_changed
+    except Exception:
+        return False
+    _HOOKED_APPS[key] = app
+    return True
+
+
+def get_registry(doc):
+    """TaggedElementRegistry документа; повторные запросы обходятся без коллектора."""
+    if doc is None or DB is None:
+        return None
+    cached = _cached(doc)
+    if cached is not None:
+        cached[1].apply_pending()
+        return cached[1]
+    registry = TaggedElementRegistry(doc)
+    if _hook_application(doc):
+        _REGISTRIES[_doc_key(doc)] = (doc, registry)
+    return registry
+
+
+def _cached(doc):
+    cached = _REGISTRIES.get(_doc_key(doc)) if doc is not None else None
+    if cached is None or cached[0] is not doc:
+        return None
+    return cached
+
+
+def note_created(doc, ids_or_elements):
+    """Добавить созданные элементы (после установки Comments) в реестр.
+
+    Без построенного реестра — ничего не делает (он соберётся при запросе).
+    """
+    cached = _cached(doc)
+    if cached is None or not ids_or_elements:
+        return 0
+    registry = cached[1]
+    elems = [x for x in ids_or_elements if hasattr(x, 'Id')]
+    ids = [x for x in ids_or_elements if not hasattr(x, 'Id')]
+    return registry.add_elements(elems) + registry.add_ids(ids)
+
+
+def note_deleted(doc, ids):
+    """Убрать удалённые id из реестра."""
+    cached = _cached(doc)
+    if cached is None or not ids:
+        return 0
+    return cached[1].remove_ids(ids)
+
+
+def invalidate_registry(doc=None):
+    """Сбросить реестр документа (или всех документов)."""
+    if doc is None:
+        _REGISTRIES.clear()
+        return
+    _REGISTRIES.pop(_doc_key(doc), None)
+
+
+def find_tagged(doc, tag_value, categories=None, instances_only=True, case_sensitive=False):
+    """Элементы, чей комментарий содержит tag_value, или None.
+
+    None означает, что реестр не может ответить (нет DB или тег без
+    AUTO_EOM) — вызывающий использует свой коллектор.
+    """
+    if not tag_value or not covers(tag_value):
+        return None
+    registry = get_registry(doc)
+    if registry is None:
+        return None
+    return registry.elements(contains=tag_value, categories=categories,
+                             instances_only=instances_only, case_sensitive=case_sensitive)
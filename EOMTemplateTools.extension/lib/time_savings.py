@@ -15,6 +15,9 @@ import json
 import tempfile
 import time
 
+import spatial_hash
+import time_savings_journal
+
 try:
     text_type = unicode  # IronPython 2
 except NameError:
@@ -83,6 +86,7 @@ _lift_shaft_count_cache = None
 _room_count_cache = {}
 _room_count_override = {}
 _link_rooms_cache = {}
+_link_room_index_cache = {}
 
 
 def _get_counts_store_paths():
@@ -301,8 +305,36 @@ def _room_contains_point(room, pt):
     return False
 
 
-def _find_room_in_rooms(rooms, pt):
-    if not rooms or pt is None:
+def _get_link_room_index_cached(link_doc):
+    if link_doc is None:
+        return None
+    key = None
+    try:
+        key = int(link_doc.GetHashCode())
+    except Exception:
+        key = None
+    if key is not None and key in _link_room_index_cache:
+        return _link_room_index_cache.get(key)
+    rooms = _get_link_rooms_cached(link_doc)
+    try:
+        import room_index
+        index = room_index.RoomSpatialIndex(rooms)
+    except Exception:
+        index = None
+    if key is not None:
+        _link_room_index_cache[key] = index
+    return index
+
+
+def _find_room_in_rooms(rooms, pt, index=None):
+    if pt is None:
+        return None
+    if index is not None:
+        try:
+            return index.find(pt)
+        except Exception:
+            pass
+    if not rooms:
         return None
     for r in rooms:
         try:
@@ -355,6 +387,7 @@ def _add_room_keys_from_links(doc, points, room_keys):
                     t_inv = None
 
         rooms = _get_link_rooms_cached(link_doc)
+        index = _get_link_room_index_cached(link_doc)
         for pt in points:
             if pt is None:
                 continue
@@ -369,7 +402,7 @@ def _add_room_keys_from_links(doc, points, room_keys):
             except Exception:
                 room = None
             if room is None and rooms:
-                room = _find_room_in_rooms(rooms, pt_link)
+                room = _find_room_in_rooms(rooms, pt_link, index=index)
             if room is not None:
                 try:
                     link_id = link_inst.Id.IntegerValue
@@ -857,15 +890,7 @@ def _append_time_saved_log_entry(tool_key, count, minutes, minutes_min, minutes_
         return
 
     try:
-        line = json.dumps(entry, ensure_ascii=False)
-    except Exception:
-        return
-
-    try:
-        path = paths[0]
-        with io.open(path, 'a', encoding='utf-8') as f:
-            f.write(_ensure_text(line))
-            f.write(u"\n")
+        time_savings_journal.append_entry(paths[0], entry, entry["tool_key"])
     except Exception:
         pass
 
@@ -875,26 +900,7 @@ def get_last_time_saved_entry(tool_key):
     key = normalize_tool_key(tool_key)
     for path in _get_log_paths():
         try:
-            if not os.path.exists(path):
-                continue
-            last = None
-            with io.open(path, 'r', encoding='utf-8') as f:
-                for raw in f:
-                    line = raw.strip()
-                    if not line:
-                        continue
-                    try:
-                        data = json.loads(line)
-                    except Exception:
-                        continue
-                    if not isinstance(data, dict):
-                        continue
-                    try:
-                        entry_key = normalize_tool_key(data.get("tool_key"))
-                    except Exception:
-                        entry_key = data.get("tool_key")
-                    if entry_key == key:
-                        last = data
+            last = time_savings_journal.read_last_entry(path, key, key_fn=normalize_tool_key)
             if last:
                 return last
         except Exception:
@@ -903,30 +909,7 @@ def get_last_time_saved_entry(tool_key):
 
 
 def _cluster_xy_points(points, tol_ft):
-    if not points:
-        return 0
-    try:
-        tol = float(tol_ft or 0.0)
-    except Exception:
-        tol = 0.0
-    if tol <= 0:
-        return len(points)
-    tol2 = tol * tol
-    clusters = []
-    for x, y in points:
-        assigned = False
-        for c in clusters:
-            dx = x - c[0]
-            dy = y - c[1]
-            if (dx * dx + dy * dy) <= tol2:
-                c[0] = (c[0] * c[2] + x) / (c[2] + 1.0)
-                c[1] = (c[1] * c[2] + y) / (c[2] + 1.0)
-                c[2] = c[2] + 1.0
-                assigned = True
-                break
-        if not assigned:
-            clusters.append([x, y, 1.0])
-    return len(clusters)
+    return spatial_hash.cluster_xy_count(points, tol_ft)
 
 
 def _load_counts_store():
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""Журнал сэкономленного времени: JSONL-сегменты + индекс последних записей.
+
+Записи дописываются в активный сегмент (`<log>.jsonl`); рядом лежит индекс
+`<log>.jsonl.idx.json` с позицией последней записи каждого инструмента.
+Последняя запись инструмента читается одним seek вместо разбора всего файла.
+
+Активный сегмент сворачивается в `<log>.<n>.jsonl` при превышении
+SEGMENT_MAX_BYTES; хранится не более MAX_SEGMENTS свёрнутых сегментов.
+
+Индекс хранит размер активного сегмента на момент записи: всё, что дописано
+позже (старые версии, потерянное обновление индекса), дочитывается с хвоста.
+Без индекса файл читается с конца блоками до первой подходящей записи.
+
+Формат читает и EOMHub (EOMHub/src/api/savings_journal.py).
+Совместим с IronPython 2.7 и CPython 3.
+"""
+
+import io
+import json
+import os
+
+INDEX_SUFFIX = '.idx.json'
+INDEX_VERSION = 1
+SEGMENT_MAX_BYTES = 512 * 1024
+MAX_SEGMENTS = 4
+READ_BLOCK_BYTES = 64 * 1024
+
+
+def index_path(log_path):
+    return log_path + INDEX_SUFFIX
+
+
+def _segment_path(log_path, number):
+    root, ext = os.path.splitext(log_path)
+    return u'{0}.{1}{2}'.format(root, int(number), ext or u'.jsonl')
+
+
+def load_index(log_path):
+    """Индекс журнала или None, если его нет либо он не читается."""
+    path = index_path(log_path)
+    try:
+        if not os.path.exists(path):
+            return None
+        with io.open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get('version') != INDEX_VERSION:
+        return None
+    if not isinstance(data.get('tools'), dict):
+        data['tools'] = {}
+    if not isinstance(data.get('segments'), list):
+        data['segments'] = []
+    return data
+
+
+def _save_index(log_path, data):
+    path = index_path(log_path)
+    tmp_path = path + u'.tmp'
+    try:
+        text = json.dumps(data, ensure_ascii=False)
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        with io.open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
+        os.rename(tmp_path, path)
+    except Exception:
+        pass
+
+
+def _new_index():
+    return {'version': INDEX_VERSION, 'size': 0, 'next_segment': 1, 'segments': [], 'tools': {}}
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except Exception:
+        return 0
+
+
+def _roll_segment(log_path, index):
+    """Свернуть активный сегмент; указатели индекса переводятся на новое имя."""
+    number = int(index.get('next_segment') or 1)
+    rolled = _segment_path(log_path, number)
+    try:
+        os.rename(log_path, rolled)
+    except Exception:
+        return False
+    active_name = os.path.basename(log_path)
+    rolled_name = os.path.basename(rolled)
+    for ptr in index['tools'].values():
+        if ptr.get('file') == active_name:
+            ptr['file'] = rolled_name
+    index['segments'].append(rolled_name)
+    index['next_segment'] = number + 1
+    index['size'] = 0
+
+    base_dir = os.path.dirname(log_path)
+    while len(index['segments']) > MAX_SEGMENTS:
+        old = index['segments'].pop(0)
+        try:
+            os.remove(os.path.join(base_dir, old))
+        except Exception:
+            pass
+        for key in [k for k, ptr in index['tools'].items() if ptr.get('file') == old]:
+            index['tools'].pop(key, None)
+    return True
+
+
+def append_entry(log_path, entry, key):
+    """Дописать запись (dict) в журнал и обновить индекс для `key`."""
+    line = json.dumps(entry, ensure_ascii=False)
+    if not isinstance(line, bytes):
+        line = line.encode('utf-8')
+    line += b'\n'
+
+    index = load_index(log_path) or _new_index()
+    size = _file_size(log_path)
+    indexed = int(index.get('size') or 0)
+    if size > indexed:
+        # Дописано мимо индекса (старая версия, потерянное обновление).
+        _reindex_tail(log_path, index, indexed)
+    elif size < indexed:
+        # Сегмент заменён или обрезан: указатели на него недействительны.
+        _reindex_tail(log_path, index, 0)
+    if size >= SEGMENT_MAX_BYTES:
+        _roll_segment(log_path, index)
+
+    with io.open(log_path, 'ab') as f:
+        f.seek(0, 2)
+        offset = f.tell()
+        f.write(line)
+        end = f.tell()
+
+    index['size'] = end
+    index['tools'][key] = {
+        'file': os.path.basename(log_path),
+        'offset': offset,
+        'length': len(line) - 1,
+        'timestamp': entry.get('timestamp'),
+    }
+    _save_index(log_path, index)
+    return offset
+
+
+def _reindex_tail(log_path, index, start):
+    """Добавить в индекс записи активного сегмента начиная с байта `start`."""
+    active_name = os.path.basename(log_path)
+    if start == 0:
+        for key in [k for k, ptr in index['tools'].items() if ptr.get('file') == active_name]:
+            index['tools'].pop(key, None)
+    try:
+        with io.open(log_path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for raw in f:
+                data = _parse_line(raw)
+                if data is not None and data.get('tool_key'):
+                    index['tools'][data.get('tool_key')] = {
+                        'file': active_name,
+                        'offset': offset,
+                        'length': len(raw.rstrip(b'\r\n')),
+                        'timestamp': data.get('timestamp'),
+                    }
+                offset += len(raw)
+    except Exception:
+        pass
+    index['size'] = _file_size(log_path)
+
+
+def _parse_line(raw):
+    line = raw.strip()
+    if not line:
+        return None
+    try:
+        data = json.loads(line.decode('utf-8'))
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def iter_entries_reversed(path, stop_offset=0, block_size=READ_BLOCK_BYTES):
+    """Записи файла от последней к первой (не раньше байта stop_offset)."""
+    try:
+        f = io.open(path, 'rb')
+    except Exception:
+        return
+    try:
+        f.seek(0, 2)
+        pos = f.tell()
+        tail = b''
+        while pos > stop_offset:
+            step = min(block_size, pos - stop_offset)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + tail).split(b'\n')
+            tail = lines[0]
+            for i in range(len(lines) - 1, 0, -1):
+                data = _parse_line(lines[i])
+                if data is not None:
+                    yield data
+        data = _parse_line(tail)
+        if data is not None:
+            yield data
+    finally:
+        f.close()
+
+
+def _read_at(path, offset, length):
+    try:
+        with io.open(path, 'rb') as f:
+            f.seek(int(offset))
+            return _parse_line(f.read(int(length)))
+    except Exception:
+        return None
+
+
+def read_last_entry(log_path, key, key_fn=None):
+    """Последняя запись журнала для `key` или None.
+
+    key_fn нормализует `tool_key` записи перед сравнением.
+    """
+    key_fn = key_fn or (lambda value: value)
+
+    def _matches(data):
+        try:
+            return key_fn(data.get('tool_key')) == key
+        except Exception:
+            return False
+
+    index = load_index(log_path)
+    size = _file_size(log_path)
+    indexed = int(index.get('size') or 0) if index else 0
+    if index and size < indexed:
+        # Сегмент заменён или обрезан: индекс относится к другому файлу.
+        index, indexed = None, 0
+
+    if size > indexed:
+        for data in iter_entries_reversed(log_path, stop_offset=indexed):
+            if _matches(data):
+                return data
+        if index is None:
+            return None
+
+    ptr = index['tools'].get(key) if index else None
+    if not isinstance(ptr, dict):
+        return None
+    path = os.path.join(os.path.dirname(log_path), ptr.get('file') or os.path.basename(log_path))
+    data = _read_at(path, ptr.get('offset') or 0, ptr.get('length') or 0)
+    if data is not None and _matches(data):
+        return data
+    # Указатель устарел (сегмент удалён/переписан): дочитать активный сегмент.
+    for data in iter_entries_reversed(log_path):
+        if _matches(data):
+            return data
+    return None
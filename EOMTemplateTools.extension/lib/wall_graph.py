@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Граф смежности стен по осям (узлы — квантованные концы, рёбра — стены).
+
+Поиск продолжения стены и обход смежных стен (ВыключателиУДверей) раньше
+собирал все стены связи и сравнивал концы линейно на каждый запрос. Граф
+строится один раз на связь из `LinkSnapshot.walls` и хранится в снимке:
+
+    graph = wall_graph.get_wall_graph(link_doc)
+    graph.walls_at(x, y, tol)                     # [(edge, end)] — концы рядом с точкой
+    graph.collinear_at(x, y, ux, uy, tol)         # то же, только параллельные стены
+    graph.walls_near(x, y, tol)                   # [edge] — ось проходит ближе tol (T-узлы)
+
+Координаты — документа связи (футы, XY). Ответы упорядочены как стены в
+документе, поэтому выбор «первой подходящей» стены не меняется.
+"""
+
+import math
+
+from pyrevit import DB
+
+import geom2d
+from segment_index import SegmentIndex
+
+# Узлы квантуются с шагом 120 мм — наибольший допуск стыка в инструментах.
+NODE_CELL_FT = 120.0 / 304.8
+# Ячейка индекса осей для T-узлов (~1 м).
+SEGMENT_CELL_FT = 1000.0 / 304.8
+
+
+class WallEdge(object):
+    """Стена-ребро: концы (x, y, z), ширина, длина и единичное направление p0→p1 в XY."""
+    __slots__ = ('index', 'wall', 'id', 'p0', 'p1', 'width', 'length', 'ux', 'uy')
+
+    def __init__(self, index, wall, wall_id, p0, p1, width):
+        self.index = index
+        self.wall = wall
+        self.id = wall_id
+        self.p0 = p0
+        self.p1 = p1
+        self.width = width
+        dx = p1[0] - p0[0]
+        dy = p1[1] - p0[1]
+        self.length = math.sqrt(dx * dx + dy * dy)
+        if self.length > 1e-9:
+            self.ux, self.uy = dx / self.length, dy / self.length
+        else:
+            self.ux, self.uy = 0.0, 0.0
+
+    def end(self, i):
+        return self.p1 if i else self.p0
+
+
+class WallGraph(object):
+    """Граф стен.
+
+    Args:
+        records: объекты с полями element, id, p0, p1 (кортежи или None), width
+            (`link_reader.WallRecord`); стены без оси пропускаются.
+    """
+
+    def __init__(self, records, node_cell_ft=NODE_CELL_FT):
+        self.cell = float(node_cell_ft)
+        self.edges = []
+        self._nodes = {}
+        self._axes = SegmentIndex(SEGMENT_CELL_FT)
+        for rec in records or []:
+            p0 = getattr(rec, 'p0', None)
+            p1 = getattr(rec, 'p1', None)
+            if p0 is None or p1 is None:
+                continue
+            edge = WallEdge(len(self.edges), getattr(rec, 'element', None), getattr(rec, 'id', None),
+                            p0, p1, getattr(rec, 'width', None))
+            self.edges.append(edge)
+            for end in (0, 1):
+                p = edge.end(end)
+                self._nodes.setdefault(self._key(p[0], p[1]), []).append((edge.index, end))
+            self._axes.add((p0[0], p0[1], 0.0), (p1[0], p1[1], 0.0), edge.index)
+
+    def __len__(self):
+        return len(self.edges)
+
+    def _key(self, x, y):
+        c = self.cell
+        return int(math.floor(x / c)), int(math.floor(y / c))
+
+    def walls_at(self, x, y, tol):
+        """[(edge, end)] стен, у которых конец end не дальше tol от точки (XY)."""
+        r = max(0.0, float(tol))
+        i0, j0 = self._key(x - r, y - r)
+        i1, j1 = self._key(x + r, y + r)
+        found = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for idx, end in self._nodes.get((i, j), ()):
+                    p = self.edges[idx].end(end)
+                    if math.sqrt((p[0] - x) ** 2 + (p[1] - y) ** 2) <= r:
+                        found.append((idx, end))
+        found.sort()
+        return [(self.edges[idx], end) for idx, end in found]
+
+    def collinear_at(self, x, y, ux, uy, tol, min_dot=0.99):
+        """walls_at, оставляя стены, параллельные направлению (ux, uy): |cos| >= min_dot."""
+        out = []
+        for edge, end in self.walls_at(x, y, tol):
+            if edge.length > 1e-9 and abs(ux * edge.ux + uy * edge.uy) >= min_dot:
+                out.append((edge, end))
+        return out
+
+    def adjacent(self, edge, end, tol):
+        """[(edge, end)] других стен, сходящихся к концу end стены edge."""
+        p = edge.end(end)
+        return [(e, k) for e, k in self.walls_at(p[0], p[1], tol) if e.index != edge.index]
+
+    def walls_near(self, x, y, tol):
+        """Стены, ось которых (отрезок в XY) проходит не дальше tol от точки."""
+        r = max(0.0, float(tol))
+        out = []
+        for i in self._axes.candidates(x, y, r):
+            a, b, idx = self._axes.items[i]
+            qx, qy, _ = geom2d.closest_point_on_segment(x, y, a[0], a[1], b[0], b[1])
+            if ((x - qx) ** 2 + (y - qy) ** 2) ** 0.5 <= r:
+                out.append(idx)
+        out.sort()
+        return [self.edges[idx] for idx in out]
+
+
+def _collect_wall_records(doc):
+    import link_reader
+    out = []
+    try:
+        walls = DB.FilteredElementCollector(doc) \
+            .OfCategory(DB.BuiltInCategory.OST_Walls) \
+            .WhereElementIsNotElementType() \
+            .ToElements()
+    except Exception:
+        return out
+    for wall in walls:
+        try:
+            out.append(link_reader.WallRecord(wall))
+        except Exception:
+            continue
+    return out
+
+
+def get_wall_graph(doc):
+    """WallGraph документа; для связи — из снимка link_reader, хост строится заново."""
+    if doc is None:
+        return None
+    try:
+        import link_reader
+        snap = link_reader.get_link_snapshot(doc)
+    except Exception:
+        snap = None
+    if snap is not None:
+        return snap.cache('wall_graph', lambda: WallGraph(snap.walls))
+    return WallGraph(_collect_wall_records(doc))
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""Двумерный индекс стен по осям (равномерная сетка) для поиска ближайшей стены.
+
+Вместо перебора всех стен документа для каждой точки (O(точки × стены))
+стены раскладываются по ячейкам сетки по XY-габариту оси (с учётом bbox
+стены). Запрос с радиусом проверяет только стены ближайших ячеек; точное
+расстояние считается как прежде — `curve.Project` точки на высоте оси.
+
+Индекс документа связи хранится в снимке связи (link_reader), индекс
+хост-документа — до `invalidate_wall_index` или изменения числа стен.
+"""
+
+import math
+
+from pyrevit import DB
+
+
+def _curve_of(wall):
+    try:
+        loc = getattr(wall, 'Location', None)
+        return loc.Curve if loc is not None and hasattr(loc, 'Curve') else None
+    except Exception:
+        return None
+
+
+def _curve_xy_points(curve):
+    pts = []
+    try:
+        pts = list(curve.Tessellate())
+    except Exception:
+        pts = []
+    if not pts:
+        for i in (0, 1):
+            try:
+                pts.append(curve.GetEndPoint(i))
+            except Exception:
+                continue
+    out = []
+    for p in pts:
+        try:
+            out.append((float(p.X), float(p.Y)))
+        except Exception:
+            continue
+    return out
+
+
+class WallEntry(object):
+    """Стена в индексе: ось, XY-габарит и Z-диапазон bbox (None, если bbox нет)."""
+    __slots__ = ('wall', 'curve', 'min_x', 'min_y', 'max_x', 'max_y', 'min_z', 'max_z', 'bbox')
+
+    def __init__(self, wall, curve, bbox):
+        self.wall = wall
+        self.curve = curve
+        self.bbox = bbox
+        xs = []
+        ys = []
+        for x, y in _curve_xy_points(curve):
+            xs.append(x)
+            ys.append(y)
+        self.min_z = None
+        self.max_z = None
+        if bbox is not None:
+            try:
+                xs.extend([float(bbox.Min.X), float(bbox.Max.X)])
+                ys.extend([float(bbox.Min.Y), float(bbox.Max.Y)])
+                self.min_z = float(min(bbox.Min.Z, bbox.Max.Z))
+                self.max_z = float(max(bbox.Min.Z, bbox.Max.Z))
+            except Exception:
+                self.min_z = None
+                self.max_z = None
+        if not xs:
+            raise ValueError('wall without geometry')
+        self.min_x, self.max_x = min(xs), max(xs)
+        self.min_y, self.max_y = min(ys), max(ys)
+
+    def z_ok(self, z, pad):
+        if z is None or self.min_z is None:
+            return True
+        return (self.min_z - pad) <= z <= (self.max_z + pad)
+
+
+class WallSegmentIndex(object):
+    """Равномерная сетка по XY-габаритам осей стен.
+
+    Args:
+        walls: стены (Revit Wall или совместимые объекты с Location.Curve).
+        cell_size_ft: размер ячейки; по умолчанию — средний габарит стены (4..50 футов).
+    """
+
+    def __init__(self, walls, cell_size_ft=None):
+        self.entries = []
+        for w in walls or []:
+            if w is None:
+                continue
+            curve = _curve_of(w)
+            if curve is None:
+                continue
+            try:
+                bb = w.get_BoundingBox(None)
+            except Exception:
+                bb = None
+            try:
+                self.entries.append(WallEntry(w, curve, bb))
+            except Exception:
+                continue
+        self.cell = self._pick_cell_size(cell_size_ft)
+        self._grid = {}
+        for i, e in enumerate(self.entries):
+            for key in self._cells(e.min_x, e.min_y, e.max_x, e.max_y):
+                self._grid.setdefault(key, []).append(i)
+
+    @classmethod
+    def from_doc(cls, doc):
+        """Индекс по всем стенам документа (без ограничения количества)."""
+        try:
+            walls = DB.FilteredElementCollector(doc).OfClass(DB.Wall).WhereElementIsNotElementType()
+        except Exception:
+            walls = []
+        return cls(walls)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _pick_cell_size(self, cell_size_ft):
+        try:
+            if cell_size_ft and float(cell_size_ft) > 0:
+                return float(cell_size_ft)
+        except Exception:
+            pass
+        if not self.entries:
+            return 10.0
+        total = 0.0
+        for e in self.entries:
+            total += max(e.max_x - e.min_x, e.max_y - e.min_y)
+        return min(max(total / float(len(self.entries)), 4.0), 50.0)
+
+    def _cells(self, min_x, min_y, max_x, max_y):
+        c = self.cell
+        i0, i1 = int(math.floor(min_x / c)), int(math.floor(max_x / c))
+        j0, j1 = int(math.floor(min_y / c)), int(math.floor(max_y / c))
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                yield (i, j)
+
+    def in_box(self, min_x, min_y, max_x, max_y):
+        """Стены, XY-габарит которых пересекает прямоугольник (в порядке документа)."""
+        if not self.entries:
+            return []
+        # Очень большой прямоугольник: дешевле пройти все стены.
+        span = ((max_x - min_x) / self.cell + 1.0) * ((max_y - min_y) / self.cell + 1.0)
+        if span > len(self._grid):
+            idx = range(len(self.entries))
+        else:
+            seen = set()
+            for key in self._cells(min_x, min_y, max_x, max_y):
+                seen.update(self._grid.get(key, ()))
+            idx = sorted(seen)
+        out = []
+        for i in idx:
+            e = self.entries[i]
+            if e.max_x < min_x or e.min_x > max_x or e.max_y < min_y or e.min_y > max_y:
+                continue
+            out.append(e)
+        return out
+
+    def near(self, x, y, radius_ft):
+        """Кандидаты для точки: стены, чей XY-габарит ближе radius_ft."""
+        r = float(radius_ft or 0.0)
+        return self.in_box(float(x) - r, float(y) - r, float(x) + r, float(y) + r)
+
+    def nearest(self, pt, max_dist_ft, z_pad_ft=None):
+        """Ближайшая стена к точке в плане: (wall, проекция на ось, расстояние) или (None, None, None).
+
+        max_dist_ft=None — без ограничения (перебор всех стен).
+        z_pad_ft — допуск по высоте относительно bbox стены (None — без проверки Z).
+        """
+        if pt is None:
+            return None, None, None
+        try:
+            px, py, pz = float(pt.X), float(pt.Y), float(pt.Z)
+        except Exception:
+            return None, None, None
+        md = float(max_dist_ft) if max_dist_ft is not None else None
+        candidates = self.near(px, py, md) if md is not None else self.entries
+        best = (None, None, None)
+        for e in candidates:
+            if z_pad_ft is not None and not e.z_ok(pz, float(z_pad_ft)):
+                continue
+            try:
+                p2 = DB.XYZ(px, py, float(e.curve.GetEndPoint(0).Z))
+                ir = e.curve.Project(p2)
+                if not ir:
+                    continue
+                proj = ir.XYZPoint
+                d = float(ir.Distance)
+            except Exception:
+                continue
+            if md is not None and d > md:
+                continue
+            if best[0] is None or d < best[2]:
+                best = (e.wall, proj, d)
+        return best
+
+
+_HOST_INDEXES = {}
+
+
+def _doc_key(doc):
+    try:
+        return int(doc.GetHashCode())
+    except Exception:
+        return id(doc)
+
+
+def _wall_count(doc):
+    try:
+        return int(DB.FilteredElementCollector(doc).OfClass(DB.Wall).GetElementCount())
+    except Exception:
+        return None
+
+
+def get_wall_index(doc):
+    """WallSegmentIndex документа; для связи — из снимка link_reader, иначе — кэш хоста."""
+    if doc is None:
+        return None
+    try:
+        import link_reader
+        snap = link_reader.get_link_snapshot(doc)
+    except Exception:
+        snap = None
+    if snap is not None:
+        return snap.cache('wall_index', lambda: WallSegmentIndex.from_doc(doc))
+
+    key = _doc_key(doc)
+    count = _wall_count(doc)
+    cached = _HOST_INDEXES.get(key)
+    if cached is not None and cached[0] is doc and cached[1] == count:
+        return cached[2]
+    index = WallSegmentIndex.from_doc(doc)
+    _HOST_INDEXES[key] = (doc, count, index)
+    return index
+
+
+def invalidate_wall_index(doc=None):
+    """Сбрасывает индекс хост-документа (в начале запуска инструмента или после правки стен)."""
+    if doc is None:
+        _HOST_INDEXES.clear()
+        return
+    _HOST_INDEXES.pop(_doc_key(doc), None)
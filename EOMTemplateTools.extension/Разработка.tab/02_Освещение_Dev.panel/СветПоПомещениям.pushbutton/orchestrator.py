@@ -5,6 +5,7 @@ import config_loader
 import link_reader
 import magic_context
 import placement_engine
+import room_executor
 
 from utils_revit import alert, trace, tx
 from utils_units import mm_to_ft
@@ -199,6 +200,7 @@ def run_placement(doc, output, script_module):
 
     with forms.ProgressBar(title='EOM: Reading room centers', cancellable=True, step=1) as pb:
         pb.max_value = pb_max
+        eligible = []
         for r in link_reader.iter_rooms(link_doc, limit=scan_limit_rooms, level_id=None):
             processed += 1
             pb.update_progress(min(processed, pb_max), pb_max)
@@ -235,6 +237,16 @@ def run_placement(doc, output, script_module):
             except Exception:
                 pass
 
+            eligible.append(r)
+
+        # Room centers (polylabel) for all eligible rooms, computed per level in parallel;
+        # get_room_center_ex_safe below reuses them from the link snapshot.
+        try:
+            link_reader.polylabel_rooms_xy(eligible, min_wall_clear_ft, executor=room_executor.get_executor(rules))
+        except Exception:
+            pass
+
+        for r in eligible:
             c, m = link_reader.get_room_center_ex_safe(r, min_wall_clear_ft, return_method=True)
             if c is None:
                 skipped_no_center += 1
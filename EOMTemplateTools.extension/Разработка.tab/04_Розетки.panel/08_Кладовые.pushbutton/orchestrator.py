@@ -17,6 +17,7 @@ except ImportError:
         sys.path.append(lib_path)
     import socket_utils as su
 from utils_units import mm_to_ft, ft_to_mm
+import wall_index
 
 
 def alert(msg):
@@ -68,6 +69,8 @@ def room_text(room):
 
 def run(doc, output):
     output.print_md('# 08. Кладовые: Расстановка оборудования')
+    # Индекс стен хоста строится один раз на запуск (strict_hosting)
+    wall_index.invalidate_wall_index(doc)
 
     rules = adapters.get_rules()
     cfg = adapters.get_config()
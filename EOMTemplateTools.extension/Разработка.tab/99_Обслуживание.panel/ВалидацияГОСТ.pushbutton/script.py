@@ -3,10 +3,10 @@
 Проверка размещения электрооборудования по ГОСТ/СП РФ.
 '''
 
-import math
 import clr
 import System
 import sys
+import time
 
 clr.AddReference('System.Windows.Forms')
 clr.AddReference('System.Drawing')
@@ -21,20 +21,16 @@ from System.Collections.Generic import *
 
 from pyrevit import revit
 
+import gost_validation
+import room_index
+
 
 # ----------------------------- Контекст Revit -----------------------------
 doc = revit.doc
 uidoc = revit.uidoc
 
-
-# ----------------------------- Нормативы -----------------------------
-NORM_SOCKET_HEIGHT = u'СП 256.1325800.2016, п. 15.30'
-NORM_SWITCH_HEIGHT = u'СП 256.1325800.2016, п. 15.28'
-NORM_SOCKET_COUNT_ROOM = u'СП 256.1325800.2016, п. 15.29'
-NORM_SOCKET_COUNT_KITCHEN = u'СП 256.1325800.2016, п. 15.29'
-NORM_GAS_DISTANCE = u'ПУЭ п. 7.1.50'
-NORM_BATHROOM_ZONE = u'ГОСТ Р 50571.7.701-2013'
-NORM_SINK_DISTANCE = u'СП 256.1325800.2016, п. 15.29'
+# Пауза после последнего изменения модели перед перепроверкой (отслеживание).
+LIVE_DEBOUNCE_SECONDS = 0.5
 
 
 # ----------------------------- Утилиты -----------------------------
@@ -160,7 +156,32 @@ def _is_sink_fixture(elem):
 	return any(k in text for k in [u'раков', u'умыв', u'sink', u'wash'])
 
 
-def _get_room_for_element(elem):
+_ROOM_INDEX_CACHE = {}
+
+
+def _get_rooms():
+	"""Помещения документа; собираются один раз на прогон проверок."""
+	rooms = _ROOM_INDEX_CACHE.get('rooms')
+	if rooms is None:
+		rooms = list(_collect_rooms())
+		_ROOM_INDEX_CACHE['rooms'] = rooms
+	return rooms
+
+
+def _get_room_index():
+	"""Индекс помещений документа; строится один раз на прогон проверок."""
+	index = _ROOM_INDEX_CACHE.get('index')
+	if index is None:
+		index = room_index.RoomSpatialIndex(_get_rooms())
+		_ROOM_INDEX_CACHE['index'] = index
+	return index
+
+
+def _reset_room_index():
+	_ROOM_INDEX_CACHE.clear()
+
+
+def _get_room_for_element(elem, pt=None):
 	try:
 		if hasattr(elem, 'Room'):
 			if elem.Room:
@@ -168,21 +189,23 @@ def _get_room_for_element(elem):
 	except Exception:
 		pass
 	try:
-		pt = _get_element_point(elem)
+		if pt is None:
+			pt = _get_element_point(elem)
 		if not pt:
 			return None
-		rooms = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Rooms).WhereElementIsNotElementType().ToElements()
-		for room in rooms:
-			try:
-				if room.IsPointInRoom(pt):
-					return room
-			except Exception:
-				pass
+		return _get_room_index().find(pt)
 	except Exception:
 		pass
 	return None
 
 
+def _room_id_int(room):
+	try:
+		return room.Id.IntegerValue
+	except Exception:
+		return None
+
+
 def _collect_electrical_instances():
 	result = []
 	try:
@@ -200,14 +223,6 @@ def _collect_electrical_instances():
 	return result
 
 
-def _collect_sockets():
-	return [e for e in _collect_electrical_instances() if _is_socket(e)]
-
-
-def _collect_switches():
-	return [e for e in _collect_electrical_instances() if _is_switch(e)]
-
-
 def _collect_rooms():
 	try:
 		return FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Rooms).WhereElementIsNotElementType().ToElements()
@@ -215,20 +230,24 @@ def _collect_rooms():
 		return []
 
 
+def _is_gas_pipe(pipe):
+	try:
+		param = pipe.get_Parameter(BuiltInParameter.RBS_PIPING_SYSTEM_TYPE_PARAM)
+		val = ''
+		if param:
+			val = param.AsValueString() or param.AsString() or ''
+		return u'газ' in _safe_lower(val)
+	except Exception:
+		return False
+
+
 def _collect_pipes_gas():
 	result = []
 	try:
 		pipes = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_PipeCurves).WhereElementIsNotElementType().ToElements()
 		for p in pipes:
-			try:
-				param = p.get_Parameter(BuiltInParameter.RBS_PIPING_SYSTEM_TYPE_PARAM)
-				val = ''
-				if param:
-					val = param.AsValueString() or param.AsString() or ''
-				if u'газ' in _safe_lower(val):
-					result.append(p)
-			except Exception:
-				continue
+			if _is_gas_pipe(p):
+				result.append(p)
 	except Exception:
 		pass
 	return result
@@ -241,13 +260,27 @@ def _collect_plumbing_fixtures():
 		return []
 
 
-def _make_violation(check_name, element, problem, norm):
-	return {
-		'check': check_name,
-		'element': element,
-		'problem': problem,
-		'norm': norm
-	}
+_ELECTRICAL_CATEGORY_IDS = (
+	int(BuiltInCategory.OST_ElectricalFixtures),
+	int(BuiltInCategory.OST_ElectricalDevices),
+)
+
+
+def _element_kind(elem):
+	"""Вид элемента для движка (как его отобрали бы функции _collect_*)."""
+	try:
+		cat_id = elem.Category.Id.IntegerValue
+	except Exception:
+		return None
+	if cat_id in _ELECTRICAL_CATEGORY_IDS:
+		return 'electrical' if isinstance(elem, FamilyInstance) else None
+	if cat_id == int(BuiltInCategory.OST_Rooms):
+		return 'room'
+	if cat_id == int(BuiltInCategory.OST_PlumbingFixtures):
+		return 'plumbing'
+	if cat_id == int(BuiltInCategory.OST_PipeCurves):
+		return 'gas_pipe' if _is_gas_pipe(elem) else None
+	return None
 
 
 def _element_display(elem):
@@ -259,239 +292,125 @@ def _element_display(elem):
 		return u'Id: ?'
 
 
-# ----------------------------- Проверки -----------------------------
-def check_socket_height():
-	violations = []
-	try:
-		sockets = _collect_sockets()
-		for s in sockets:
-			h = _get_height_from_level_mm(s)
-			if h is None:
-				continue
-			if h < 300 or h > 1000:
-				problem = u'Высота розетки {0:.0f} мм (норма 300-1000 мм)'.format(h)
-				violations.append(_make_violation(u'Высота розеток', s, problem, NORM_SOCKET_HEIGHT))
-	except Exception:
-		pass
-	return violations
+# ----------------------------- Адаптер движка -----------------------------
+def _xyz_tuple(pt):
+	if pt is None:
+		return None
+	return (pt.X, pt.Y, pt.Z)
 
 
-def check_switch_height():
-	violations = []
-	try:
-		switches = _collect_switches()
-		for s in switches:
-			h = _get_height_from_level_mm(s)
-			if h is None:
-				continue
-			if h < 800 or h > 1700:
-				problem = u'Высота выключателя {0:.0f} мм (норма 800-1700 мм)'.format(h)
-				violations.append(_make_violation(u'Высота выключателей', s, problem, NORM_SWITCH_HEIGHT))
-	except Exception:
-		pass
-	return violations
+class RevitValidationAdapter(object):
+	"""Доступ движка gost_validation к текущему документу."""
 
+	collect_electrical = staticmethod(_collect_electrical_instances)
+	collect_rooms = staticmethod(_get_rooms)
+	collect_plumbing = staticmethod(_collect_plumbing_fixtures)
+	collect_gas_pipes = staticmethod(_collect_pipes_gas)
+	is_socket = staticmethod(_is_socket)
+	is_switch = staticmethod(_is_switch)
+	is_kitchen = staticmethod(_is_kitchen)
+	is_bathroom = staticmethod(_is_bathroom)
+	is_bath_fixture = staticmethod(_is_bath_fixture)
+	is_sink_fixture = staticmethod(_is_sink_fixture)
+	height_mm = staticmethod(_get_height_from_level_mm)
 
-def check_socket_count_per_perimeter():
-	violations = []
-	try:
-		sockets = _collect_sockets()
-		rooms = _collect_rooms()
-		for room in rooms:
-			try:
-				perim_param = room.get_Parameter(BuiltInParameter.ROOM_PERIMETER)
-				if not perim_param:
-					continue
-				perim_mm = _to_mm(perim_param.AsDouble())
-				required = int(math.ceil(perim_mm / 3000.0))
-				if required <= 0:
-					continue
-				count = 0
-				for s in sockets:
-					try:
-						if s.Room and s.Room.Id == room.Id:
-							count += 1
-						else:
-							pt = _get_element_point(s)
-							if pt and room.IsPointInRoom(pt):
-								count += 1
-					except Exception:
-						continue
-				if count < required:
-					problem = u'Розеток: {0}, требуется: {1} (периметр {2:.0f} мм)'.format(count, required, perim_mm)
-					violations.append(_make_violation(u'Количество розеток по периметру', room, problem, NORM_SOCKET_COUNT_ROOM))
-			except Exception:
-				continue
-	except Exception:
-		pass
-	return violations
+	def element_id(self, elem):
+		return _room_id_int(elem)
 
+	def element(self, eid):
+		try:
+			return doc.GetElement(ElementId(eid))
+		except Exception:
+			return None
 
-def check_kitchen_sockets():
-	violations = []
-	try:
-		sockets = _collect_sockets()
-		rooms = _collect_rooms()
-		for room in rooms:
-			if not _is_kitchen(room):
-				continue
-			try:
-				area_param = room.get_Parameter(BuiltInParameter.ROOM_AREA)
-				if not area_param:
-					continue
-				area_m2 = UnitUtils.ConvertFromInternalUnits(area_param.AsDouble(), UnitTypeId.SquareMeters)
-				required = 3 if area_m2 <= 8.0 else 4
-				count = 0
-				for s in sockets:
-					try:
-						if s.Room and s.Room.Id == room.Id:
-							count += 1
-						else:
-							pt = _get_element_point(s)
-							if pt and room.IsPointInRoom(pt):
-								count += 1
-					except Exception:
-						continue
-				if count < required:
-					problem = u'Розеток: {0}, требуется: {1} (площадь {2:.2f} м²)'.format(count, required, area_m2)
-					violations.append(_make_violation(u'Розетки на кухне', room, problem, NORM_SOCKET_COUNT_KITCHEN))
-			except Exception:
-				continue
-	except Exception:
-		pass
-	return violations
+	def kind(self, elem):
+		return _element_kind(elem)
 
+	def point(self, elem):
+		return _xyz_tuple(_get_element_point(elem))
 
-def check_distance_from_gas():
-	violations = []
-	try:
-		pipes = _collect_pipes_gas()
-		if not pipes:
-			return []
-		sockets = _collect_sockets()
-		min_dist_int = _to_internal_mm(500)
-		for s in sockets:
-			pt = _get_element_point(s)
-			if not pt:
-				continue
-			min_found = None
-			for p in pipes:
-				try:
-					loc = p.Location
-					if not isinstance(loc, LocationCurve):
-						continue
-					dist = loc.Curve.Distance(pt)
-					if min_found is None or dist < min_found:
-						min_found = dist
-				except Exception:
-					continue
-			if min_found is not None and min_found < min_dist_int:
-				problem = u'Расстояние до газопровода {0:.0f} мм (норма ≥ 500 мм)'.format(_to_mm(min_found))
-				violations.append(_make_violation(u'Расстояние до газопровода', s, problem, NORM_GAS_DISTANCE))
-	except Exception:
-		pass
-	return violations
+	def room_id(self, elem, point):
+		pt = XYZ(point[0], point[1], point[2]) if point else None
+		return _room_id_int(_get_room_for_element(elem, pt))
 
+	def room_perimeter_mm(self, room):
+		param = room.get_Parameter(BuiltInParameter.ROOM_PERIMETER)
+		if not param:
+			return None
+		return _to_mm(param.AsDouble())
 
-def check_bathroom_zones():
-	violations = []
-	try:
-		sockets = _collect_sockets()
-		rooms = [r for r in _collect_rooms() if _is_bathroom(r)]
-		fixtures = [f for f in _collect_plumbing_fixtures() if _is_bath_fixture(f)]
-		if not rooms or not fixtures:
+	def room_area_m2(self, room):
+		param = room.get_Parameter(BuiltInParameter.ROOM_AREA)
+		if not param:
+			return None
+		return UnitUtils.ConvertFromInternalUnits(param.AsDouble(), UnitTypeId.SquareMeters)
+
+	def curve_segments(self, elem):
+		loc = elem.Location
+		if not isinstance(loc, LocationCurve):
 			return []
-		buffer_int = _to_internal_mm(600)
-		for room in rooms:
-			room_sockets = []
-			for s in sockets:
-				try:
-					if s.Room and s.Room.Id == room.Id:
-						room_sockets.append(s)
-					else:
-						pt = _get_element_point(s)
-						if pt and room.IsPointInRoom(pt):
-							room_sockets.append(s)
-				except Exception:
-					continue
-			if not room_sockets:
-				continue
-			for fx in fixtures:
-				try:
-					fx_room = _get_room_for_element(fx)
-					if not fx_room or fx_room.Id != room.Id:
-						continue
-					bbox = fx.get_BoundingBox(None)
-					if not bbox:
-						continue
-					min_pt = XYZ(bbox.Min.X - buffer_int, bbox.Min.Y - buffer_int, bbox.Min.Z - buffer_int)
-					max_pt = XYZ(bbox.Max.X + buffer_int, bbox.Max.Y + buffer_int, bbox.Max.Z + buffer_int)
-					for s in room_sockets:
-						pt = _get_element_point(s)
-						if not pt:
-							continue
-						if (min_pt.X <= pt.X <= max_pt.X) and (min_pt.Y <= pt.Y <= max_pt.Y):
-							problem = u'Розетка в зоне 600 мм от ванны/душа'
-							violations.append(_make_violation(u'Запретная зона ванной', s, problem, NORM_BATHROOM_ZONE))
-				except Exception:
-					continue
+		curve = loc.Curve
+		if isinstance(curve, Line):
+			pts = [curve.GetEndPoint(0), curve.GetEndPoint(1)]
+		else:
+			pts = list(curve.Tessellate())
+		return [(_xyz_tuple(pts[i]), _xyz_tuple(pts[i + 1])) for i in range(len(pts) - 1)]
+
+	def bbox(self, elem):
+		bbox = elem.get_BoundingBox(None)
+		if not bbox:
+			return None
+		return _xyz_tuple(bbox.Min), _xyz_tuple(bbox.Max)
+
+	def snapshot(self, elem):
+		"""Слепок для инкрементальной проверки: меняется при правке элемента."""
+		if isinstance(elem, SpatialElement):
+			return (
+				_safe_str(getattr(elem, 'Name', u'')),
+				self.room_perimeter_mm(elem),
+				self.room_area_m2(elem),
+				_room_id_int(_get_level_for_element(elem)),
+			)
+		pt = _get_element_point(elem)
+		loc = None
+		if pt is not None:
+			loc = (round(pt.X, 4), round(pt.Y, 4), round(pt.Z, 4))
+		if isinstance(elem.Location, LocationCurve):
+			loc = tuple(self.curve_segments(elem))
+		return (
+			loc,
+			_room_id_int(getattr(elem, 'Symbol', None)),
+			_room_id_int(_get_level_for_element(elem)),
+			_get_height_from_level_mm(elem),
+		)
+
+	def rooms_changed(self):
+		_reset_room_index()
+
+
+def _doc_key():
+	try:
+		return doc.GetHashCode()
 	except Exception:
-		pass
-	return violations
+		return id(doc)
 
 
-def check_distance_from_sinks():
-	violations = []
-	try:
-		sockets = _collect_sockets()
-		sinks = [f for f in _collect_plumbing_fixtures() if _is_sink_fixture(f)]
-		if not sinks:
-			return []
-		min_dist_int = _to_internal_mm(600)
-		for s in sockets:
-			pt = _get_element_point(s)
-			if not pt:
-				continue
-			min_found = None
-			for sink in sinks:
-				try:
-					bbox = sink.get_BoundingBox(None)
-					if not bbox:
-						continue
-					# Минимальная дистанция по XYZ до bbox
-					dx = 0 if bbox.Min.X <= pt.X <= bbox.Max.X else min(abs(pt.X - bbox.Min.X), abs(pt.X - bbox.Max.X))
-					dy = 0 if bbox.Min.Y <= pt.Y <= bbox.Max.Y else min(abs(pt.Y - bbox.Min.Y), abs(pt.Y - bbox.Max.Y))
-					dz = 0 if bbox.Min.Z <= pt.Z <= bbox.Max.Z else min(abs(pt.Z - bbox.Min.Z), abs(pt.Z - bbox.Max.Z))
-					dist = math.sqrt(dx * dx + dy * dy + dz * dz)
-					if min_found is None or dist < min_found:
-						min_found = dist
-				except Exception:
-					continue
-			if min_found is not None and min_found < min_dist_int:
-				problem = u'Расстояние до раковины {0:.0f} мм (норма ≥ 600 мм)'.format(_to_mm(min_found))
-				violations.append(_make_violation(u'Расстояние до раковин', s, problem, NORM_SINK_DISTANCE))
-	except Exception:
-		pass
-	return violations
-
-
-def run_all_checks():
-	violations = []
-	checks = [
-		check_socket_height,
-		check_switch_height,
-		check_socket_count_per_perimeter,
-		check_kitchen_sockets,
-		check_distance_from_gas,
-		check_bathroom_zones,
-		check_distance_from_sinks
-	]
-	for ch in checks:
-		try:
-			violations.extend(ch())
-		except Exception:
-			continue
-	return violations
+def run_all_checks(incremental=True):
+	"""Прогон правил gost_validation; возвращает ValidationReport.
+
+	С incremental=True повторные прогоны пересчитывают только изменённые
+	элементы и помещения (состояние хранится на документ). При отслеживании
+	изменений индекс помещений сохраняется между прогонами: его сбрасывает
+	движок через rooms_changed(), когда событие затронуло помещение.
+	"""
+	state = gost_validation.state_for(_doc_key())
+	if not (incremental and state.tracking):
+		_reset_room_index()
+	adapter = RevitValidationAdapter()
+	if not incremental:
+		gost_validation.reset_state(_doc_key())
+		return gost_validation.validate(adapter)
+	return gost_validation.validate_incremental(adapter, state)
 
 
 # ----------------------------- UI -----------------------------
@@ -499,6 +418,10 @@ class ValidationWindow(Form):
 	def __init__(self):
 		self.TopMost = True
 		self._violations = []
+		self._report = None
+		self._state = gost_validation.state_for(_doc_key())
+		self._tracking = False
+		self._last_change = 0.0
 		self.InitializeComponent()
 
 	def InitializeComponent(self):
@@ -506,6 +429,9 @@ class ValidationWindow(Form):
 		self._btn_refresh = System.Windows.Forms.Button()
 		self._btn_export = System.Windows.Forms.Button()
 		self._btn_close = System.Windows.Forms.Button()
+		self._lbl_timings = System.Windows.Forms.Label()
+		self._chk_live = System.Windows.Forms.CheckBox()
+		self._tip_timings = System.Windows.Forms.ToolTip()
 		self._col_check = System.Windows.Forms.DataGridViewTextBoxColumn()
 		self._col_element = System.Windows.Forms.DataGridViewTextBoxColumn()
 		self._col_problem = System.Windows.Forms.DataGridViewTextBoxColumn()
@@ -581,15 +507,33 @@ class ValidationWindow(Form):
 		self._btn_close.UseVisualStyleBackColor = True
 		self._btn_close.Click += self.CloseClick
 
+		# live mode: re-check elements reported by DocumentChanged
+		self._chk_live.Anchor = System.Windows.Forms.AnchorStyles.Bottom | System.Windows.Forms.AnchorStyles.Left
+		self._chk_live.Location = System.Drawing.Point(256, 463)
+		self._chk_live.Name = "chk_live"
+		self._chk_live.Size = System.Drawing.Size(170, 22)
+		self._chk_live.Text = u"Отслеживать изменения"
+		self._chk_live.CheckedChanged += self.LiveCheckedChanged
+
+		# per-rule timings (details in the tooltip)
+		self._lbl_timings.Anchor = System.Windows.Forms.AnchorStyles.Bottom | System.Windows.Forms.AnchorStyles.Left | System.Windows.Forms.AnchorStyles.Right
+		self._lbl_timings.Location = System.Drawing.Point(436, 465)
+		self._lbl_timings.Name = "lbl_timings"
+		self._lbl_timings.Size = System.Drawing.Size(380, 20)
+		self._lbl_timings.Text = u""
+
 		# form
 		self.ClientSize = System.Drawing.Size(952, 500)
 		self.Controls.Add(self._grid)
 		self.Controls.Add(self._btn_refresh)
 		self.Controls.Add(self._btn_export)
 		self.Controls.Add(self._btn_close)
+		self.Controls.Add(self._chk_live)
+		self.Controls.Add(self._lbl_timings)
 		self.Name = "ValidationWindow"
 		self.Text = u"Проверка по ГОСТ"
 		self.Load += self.WindowLoad
+		self.FormClosed += self.WindowClosed
 		self._grid.EndInit()
 		self.ResumeLayout(False)
 
@@ -619,17 +563,81 @@ class ValidationWindow(Form):
 			except Exception:
 				pass
 
-	def WindowLoad(self, sender, e):
-		self._violations = run_all_checks()
+	def _run_checks(self, incremental=True):
+		self._report = run_all_checks(incremental)
+		self._violations = self._report.violations
 		self._fill_grid()
+		try:
+			lines = self._report.timing_lines()
+			self._lbl_timings.Text = u'Нарушений: {0} | {1}'.format(len(self._violations), lines[-1])
+			self._tip_timings.SetToolTip(self._lbl_timings, u'\n'.join(lines))
+		except Exception:
+			pass
+
+	def WindowLoad(self, sender, e):
+		self._run_checks()
 
 	def RefreshClick(self, sender, e):
-		self._violations = run_all_checks()
-		self._fill_grid()
+		# Без отслеживания изменённое находится сравнением слепков элементов.
+		self._run_checks()
 
 	def CloseClick(self, sender, e):
 		self.Close()
 
+	def _set_tracking(self, enabled):
+		if enabled == self._tracking:
+			return
+		try:
+			if enabled:
+				doc.Application.DocumentChanged += self.DocumentChanged
+				uidoc.Application.Idling += self.Idling
+			else:
+				doc.Application.DocumentChanged -= self.DocumentChanged
+				uidoc.Application.Idling -= self.Idling
+		except Exception:
+			return
+		self._tracking = enabled
+		if enabled:
+			# Синхронизировать состояние, затем принимать только id из событий.
+			self._state.tracking = False
+			self._run_checks()
+		self._state.tracking = enabled
+
+	def LiveCheckedChanged(self, sender, e):
+		self._set_tracking(bool(self._chk_live.Checked))
+
+	def DocumentChanged(self, sender, args):
+		# Только запомнить id: проверка выполняется в Idling, когда правки утихнут.
+		try:
+			if args.GetDocument().GetHashCode() != _doc_key():
+				return
+			gost_validation.note_changes(
+				self._state,
+				added=args.GetAddedElementIds(),
+				modified=args.GetModifiedElementIds(),
+				deleted=args.GetDeletedElementIds(),
+			)
+			self._last_change = time.time()
+		except Exception:
+			pass
+
+	def Idling(self, sender, args):
+		if not self._state.pending:
+			return
+		if time.time() - self._last_change < LIVE_DEBOUNCE_SECONDS:
+			try:
+				args.SetRaiseWithoutDelay()
+			except Exception:
+				pass
+			return
+		try:
+			self._run_checks()
+		except Exception:
+			pass
+
+	def WindowClosed(self, sender, e):
+		self._set_tracking(False)
+
 	def ExportClick(self, sender, e):
 		try:
 			dialog = SaveFileDialog()
@@ -650,6 +658,11 @@ class ValidationWindow(Form):
 					_safe_str(v.get('norm', ''))
 				)
 				writer.WriteLine(line)
+			if self._report is not None:
+				writer.WriteLine(u"")
+				writer.WriteLine(u"Правило;Время, с;Нарушений")
+				for t in self._report.rule_timings:
+					writer.WriteLine(u"{0};{1:.3f};{2}".format(t['name'], t['seconds'], t['violations']))
 			writer.Close()
 			TaskDialog.Show(u"Проверка по ГОСТ", u"Отчёт сохранён: {0}".format(path))
 		except Exception:
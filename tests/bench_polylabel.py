@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Benchmark: per-room polylabel cost, legacy XYZ loop vs polylabel_batch.
+
+Run directly:  python tests/bench_polylabel.py [rooms] [vertices]
+
+The legacy implementation (reference.polylabel) is the pre-batch
+`link_reader._polylabel_xy`; tests use it as the reference that
+polylabel_batch must reproduce exactly.
+"""
+import os
+import sys
+import time
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+LIB = os.path.join(os.path.dirname(TESTS), "EOMTemplateTools.extension", "lib")
+for path in (LIB, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import polylabel_batch  # noqa: E402
+from reference.polylabel import as_tuples, legacy_polylabel, make_room  # noqa: E402
+
+
+def main(argv):
+    n_rooms = int(argv[1]) if len(argv) > 1 else 100
+    vertices = int(argv[2]) if len(argv) > 2 else 40
+    rooms = [make_room(i, vertices) for i in range(n_rooms)]
+
+    t0 = time.time()
+    ref = [legacy_polylabel(o, h) for o, h in rooms]
+    t_legacy = time.time() - t0
+
+    t0 = time.time()
+    new = polylabel_batch.polylabel_many([as_tuples(o, h) for o, h in rooms])
+    t_batch = time.time() - t0
+
+    mismatches = sum(1 for a, b in zip(ref, new) if a != b)
+    print("rooms={0} vertices={1}".format(n_rooms, vertices))
+    print("legacy: {0:.2f} ms/room".format(1000.0 * t_legacy / n_rooms))
+    print("batch:  {0:.2f} ms/room".format(1000.0 * t_batch / n_rooms))
+    print("speedup: x{0:.1f}, mismatches: {1}".format(t_legacy / max(t_batch, 1e-9), mismatches))
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Benchmark: wall raycasts / nearest-wall queries, linear scan vs RoomSegmentIndex.
+
+Run directly:  python tests/bench_wall_raycast.py [rooms] [segments]
+
+The linear implementations (reference.wall_raycast) mirror the per-segment
+loops of `МокрыеТочки.domain.raycast_to_walls` and
+`КухняБлок.domain.nearest_segment`; tests use them as the reference the
+index must reproduce.
+"""
+import os
+import sys
+import time
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+LIB = os.path.join(os.path.dirname(TESTS), "EOMTemplateTools.extension", "lib")
+for path in (LIB, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import segment_index  # noqa: E402
+from reference.wall_raycast import linear_nearest, linear_raycast, make_room, queries  # noqa: E402
+
+
+def main(argv):
+    n_rooms = int(argv[1]) if len(argv) > 1 else 100
+    n_segs = int(argv[2]) if len(argv) > 2 else 120
+    rooms = [make_room(i, n_segs) for i in range(n_rooms)]
+    work = [(segs, queries(i, c)) for i, (c, segs) in enumerate(rooms)]
+    max_dist = 60.0
+
+    t0 = time.time()
+    ref = []
+    for segs, qs in work:
+        for x, y, ux, uy in qs:
+            ref.append((linear_raycast(x, y, ux, uy, max_dist, segs), linear_nearest(x, y, segs)))
+    t_linear = time.time() - t0
+
+    t0 = time.time()
+    new = []
+    for segs, qs in work:
+        index = segment_index.room_segment_index(segs)
+        for x, y, ux, uy in qs:
+            new.append((index.raycast(x, y, ux, uy, max_dist), index.nearest(x, y)))
+    t_index = time.time() - t0
+
+    mismatches = sum(1 for a, b in zip(ref, new) if a[0][0] != b[0][0] or a[1][0] != b[1][0])
+    print("rooms={0} segments={1} queries/room={2}".format(n_rooms, len(rooms[0][1]), len(work[0][1])))
+    print("linear: {0:.2f} ms/room".format(1000.0 * t_linear / n_rooms))
+    print("index:  {0:.2f} ms/room (incl. build)".format(1000.0 * t_index / n_rooms))
+    print("speedup: x{0:.1f}, mismatches: {1}".format(t_linear / max(t_index, 1e-9), mismatches))
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
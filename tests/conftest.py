@@ -29,6 +29,27 @@ if "pyrevit" not in sys.modules:
     sys.modules["pyrevit"] = pyrevit_stub
 
 
+@pytest.fixture
+def fake_link():
+    """Factory for linked mock documents: ``fake_link(elements, hash_code=None, path=None)``.
+
+    Elements are served by DB.FilteredElementCollector (``MockFilteredElementCollector``,
+    whose ``scans`` counter is reset here); link_reader snapshots are dropped
+    before and after the test.
+    """
+    from mocks.revit_api import MockDocument, MockFilteredElementCollector
+    import link_reader
+
+    link_reader.invalidate_link_snapshots()
+    MockFilteredElementCollector.scans = 0
+
+    def _make(elements=(), hash_code=None, path=None):
+        return MockDocument(list(elements), linked=True, hash_code=hash_code, path=path)
+
+    yield _make
+    link_reader.invalidate_link_snapshots()
+
+
 @pytest.fixture
 def temp_config_file():
     """Create a temporary config file and return its path. Cleans up after test."""
@@ -121,47 +121,134 @@ class MockBoundingBox:
         self.Max = max_pt or MockXYZ(1, 1, 1)
 
 
+def _as_id(value: Any) -> Optional[MockElementId]:
+    if value is None or isinstance(value, MockElementId):
+        return value
+    return MockElementId(int(value))
+
+
+class MockCategory:
+    """Mock for Autodesk.Revit.DB.Category (Id is the BuiltInCategory value)."""
+
+    def __init__(self, bic: int, name: str = ""):
+        self.Id = MockElementId(int(bic))
+        self.Name = name
+
+
+class MockParameter:
+    """Mock for Autodesk.Revit.DB.Parameter holding a string value."""
+
+    def __init__(self, name: str = "", value: Optional[str] = None):
+        self.Definition = type("Definition", (), {"Name": name})()
+        self.value = value
+
+    def AsString(self) -> Optional[str]:
+        return self.value
+
+    def AsValueString(self) -> Optional[str]:
+        return self.value
+
+
 class MockElement:
-    """Mock for Autodesk.Revit.DB.Element."""
+    """Mock for Autodesk.Revit.DB.Element.
+
+    element_id and level_id accept a MockElementId or a plain int; category
+    accepts a MockCategory or a BuiltInCategory value. Parameters are added
+    with ``set_parameter`` (by name or BuiltInParameter); ``parameter_lookups``
+    counts get_Parameter/LookupParameter calls.
+    """
+
+    Location: Any = None
+    IsValidObject = True
 
     def __init__(
         self,
-        element_id: Optional[MockElementId] = None,
+        element_id: Optional[Any] = None,
         name: str = "",
         category: Optional[Any] = None,
-        bbox: Optional[MockBoundingBox] = None
+        bbox: Optional[MockBoundingBox] = None,
+        level_id: Optional[Any] = None,
+        document: Optional[Any] = None,
     ):
-        self.Id = element_id or MockElementId(1)
+        self.Id = _as_id(element_id) or MockElementId(1)
         self.Name = name
-        self.Category = category
+        self.Category = MockCategory(category) if isinstance(category, int) else category
+        self.LevelId = _as_id(level_id)
+        self.Document = document
         self._bbox = bbox
         self._parameters: dict = {}
+        self.parameter_lookups = 0
+
+    def set_parameter(self, key: Any, value: Optional[str]) -> MockParameter:
+        param = MockParameter(str(key), value)
+        self._parameters[str(key)] = param
+        return param
+
+    @property
+    def Parameters(self) -> List[MockParameter]:
+        return list(self._parameters.values())
 
     def get_BoundingBox(self, view: Any = None) -> Optional[MockBoundingBox]:
         return self._bbox
 
     def LookupParameter(self, name: str) -> Optional[Any]:
+        self.parameter_lookups += 1
         return self._parameters.get(name)
 
     def get_Parameter(self, bip: Any) -> Optional[Any]:
+        self.parameter_lookups += 1
         return self._parameters.get(str(bip))
 
 
+class MockSpatialElementBoundaryLocation:
+    """Mock for Autodesk.Revit.DB.SpatialElementBoundaryLocation enum."""
+
+    Finish = 0
+    Center = 1
+    CoreBoundary = 2
+    CoreCenter = 3
+
+
+class MockSpatialElementBoundaryOptions:
+    """Mock for Autodesk.Revit.DB.SpatialElementBoundaryOptions."""
+
+    def __init__(self):
+        self.SpatialElementBoundaryLocation = MockSpatialElementBoundaryLocation.Finish
+        self.StoreFreeBoundaryFaces = False
+
+
 class MockRoom(MockElement):
-    """Mock for Autodesk.Revit.DB.Architecture.Room."""
+    """Mock for Autodesk.Revit.DB.Architecture.Room.
+
+    ``set_boundary`` stores in ``boundaries`` the loops GetBoundarySegments
+    returns (per SpatialElementBoundaryLocation, or for every option when
+    location is None); ``boundary_reads`` and ``point_in_room_calls`` count
+    API calls.
+    """
 
     def __init__(
         self,
         name: str = "",
         number: str = "",
-        level_id: Optional[MockElementId] = None,
+        level_id: Optional[Any] = None,
         location: Optional[MockXYZ] = None,
-        bbox: Optional[MockBoundingBox] = None
+        bbox: Optional[MockBoundingBox] = None,
+        element_id: Optional[Any] = None,
+        document: Optional[Any] = None,
     ):
-        super().__init__(name=name, bbox=bbox)
+        super().__init__(element_id=element_id, name=name, category=MockBuiltInCategory.OST_Rooms,
+                         bbox=bbox, level_id=level_id, document=document)
         self.Number = number
-        self.LevelId = level_id or MockElementId.InvalidElementId
+        if self.LevelId is None:
+            self.LevelId = MockElementId.InvalidElementId
         self._location = location
+        self.boundaries: dict = {}
+        self.boundary_reads = 0
+        self.point_in_room_calls = 0
+
+    def set_boundary(self, loops: List[List[Any]], location: Optional[int] = None) -> "MockRoom":
+        self.boundaries[location] = loops
+        return self
 
     @property
     def Location(self) -> Optional[Any]:
@@ -169,7 +256,13 @@ class MockRoom(MockElement):
             return type("LocationPoint", (), {"Point": self._location})()
         return None
 
+    def GetBoundarySegments(self, options: Any) -> List[List[Any]]:
+        self.boundary_reads += 1
+        location = getattr(options, "SpatialElementBoundaryLocation", None)
+        return self.boundaries.get(location, self.boundaries.get(None, []))
+
     def IsPointInRoom(self, point: MockXYZ) -> bool:
+        self.point_in_room_calls += 1
         if not self._bbox:
             return False
         return (
@@ -192,6 +285,22 @@ class MockBuiltInCategory:
     OST_PlumbingFixtures = -2001160
     OST_GenericModel = -2000151
     OST_Furniture = -2000080
+    OST_RoomSeparationLines = -2000066
+    OST_Casework = -2001000
+    OST_DetailComponents = -2002000
+    OST_FoodServiceEquipment = -2001395
+    OST_GenericAnnotation = -2000150
+    OST_PipeAccessory = -2008055
+    OST_SpecialityEquipment = -2001350
+    OST_CaseworkTags = -2005001
+    OST_ElectricalEquipmentTags = -2005002
+    OST_ElectricalFixtureTags = -2005003
+    OST_FurnitureTags = -2005004
+    OST_GenericModelTags = -2005005
+    OST_MechanicalEquipmentTags = -2005006
+    OST_PipeAccessoryTags = -2005007
+    OST_PlumbingFixtureTags = -2005008
+    OST_SpecialityEquipmentTags = -2005009
 
 
 class MockBuiltInParameter:
@@ -202,6 +311,7 @@ class MockBuiltInParameter:
     ROOM_DEPARTMENT = -1002507
     ALL_MODEL_INSTANCE_COMMENTS = -1010106
     ALL_MODEL_MARK = -1010103
+    ALL_MODEL_TYPE_MARK = -1010104
     DOOR_WIDTH = -1016207
     WINDOW_WIDTH = -1016207
     FAMILY_WIDTH_PARAM = -1016208
@@ -266,8 +376,82 @@ def mock_room(
 class MockCurve:
     """Mock for Autodesk.Revit.DB.Curve."""
 
-    def __init__(self, length: float = 10.0):
+    def __init__(self, length: float = 10.0, start: Optional[MockXYZ] = None, end: Optional[MockXYZ] = None):
         self.Length = length
+        self._ends = (start, end)
+        if start is not None and end is not None:
+            self.Length = (end - start).GetLength()
+
+    def GetEndPoint(self, index: int) -> Optional[MockXYZ]:
+        return self._ends[index]
+
+
+class MockLine(MockCurve):
+    """Mock for Autodesk.Revit.DB.Line between two points."""
+
+    def __init__(self, start: MockXYZ, end: MockXYZ):
+        super().__init__(start=start, end=end)
+        self.Direction = (end - start).Normalize()
+
+    @staticmethod
+    def CreateBound(start: MockXYZ, end: MockXYZ) -> "MockLine":
+        return MockLine(start, end)
+
+    def Evaluate(self, parameter: float, normalized: bool) -> MockXYZ:
+        start, end = self._ends
+        return start + (end - start) * parameter
+
+    def ComputeDerivatives(self, parameter: float, normalized: bool) -> Any:
+        return type("Transform", (), {"Origin": self.Evaluate(parameter, normalized), "BasisX": self.Direction})()
+
+    def Tessellate(self) -> List[MockXYZ]:
+        return list(self._ends)
+
+    def Project(self, point: MockXYZ) -> Any:
+        start, end = self._ends
+        d = end - start
+        length2 = d.DotProduct(d)
+        t = 0.0 if length2 == 0 else max(0.0, min(1.0, (point - start).DotProduct(d) / length2))
+        q = start + d * t
+        return type("IntersectionResult", (), {"XYZPoint": q, "Distance": (point - q).GetLength()})()
+
+
+class MockGeometryInstance:
+    """Mock for Autodesk.Revit.DB.GeometryInstance (geometry already in instance coordinates)."""
+
+    def __init__(self, items: Optional[List[Any]] = None):
+        self._items = list(items or [])
+
+    def GetInstanceGeometry(self) -> List[Any]:
+        return self._items
+
+
+class MockOptions:
+    """Mock for Autodesk.Revit.DB.Options."""
+
+    def __init__(self):
+        self.ComputeReferences = False
+        self.IncludeNonVisibleObjects = False
+
+
+class MockBoundarySegment:
+    """Mock for Autodesk.Revit.DB.BoundarySegment; ``curve_reads`` counts GetCurve calls."""
+
+    def __init__(self, curve: MockCurve, element_id: Optional[Any] = None):
+        self._curve = curve
+        self.ElementId = _as_id(element_id) or MockElementId.InvalidElementId
+        self.curve_reads = 0
+
+    def GetCurve(self) -> MockCurve:
+        self.curve_reads += 1
+        return self._curve
+
+
+def mock_boundary_loop(points: List[Tuple[float, float]], element_ids: List[int]) -> List[MockBoundarySegment]:
+    """Create a closed loop of boundary segments through 2D points (z = 0)."""
+    n = len(points)
+    xyz = [MockXYZ(p[0], p[1], 0.0) for p in points]
+    return [MockBoundarySegment(MockLine(xyz[i], xyz[(i + 1) % n]), element_ids[i]) for i in range(n)]
 
 
 class MockLocationCurve:
@@ -290,24 +474,40 @@ class MockWall(MockElement):
     """Mock for Autodesk.Revit.DB.Wall."""
 
     def __init__(
-        self, 
-        name: str = "", 
+        self,
+        name: str = "",
         curve: Optional[MockCurve] = None,
         wall_type: Optional[MockWallType] = None,
-        bbox: Optional[MockBoundingBox] = None
+        bbox: Optional[MockBoundingBox] = None,
+        element_id: Optional[Any] = None,
+        level_id: Optional[Any] = None,
+        document: Optional[Any] = None,
     ):
-        super().__init__(name=name, bbox=bbox)
+        super().__init__(element_id=element_id, name=name, category=MockBuiltInCategory.OST_Walls,
+                         bbox=bbox, level_id=level_id, document=document)
         self.Location = MockLocationCurve(curve)
         self.WallType = wall_type or MockWallType()
+        self.Width = self.WallType.Width
         self.Orientation = MockXYZ(0, 1, 0)  # Default orientation
 
 
+class MockFamily(MockElement):
+    """Mock for Autodesk.Revit.DB.Family."""
+
+
 class MockFamilySymbol(MockElement):
     """Mock for Autodesk.Revit.DB.FamilySymbol."""
 
-    def __init__(self, name: str = "", family_name: str = ""):
-        super().__init__(name=name)
+    def __init__(
+        self,
+        name: str = "",
+        family_name: str = "",
+        element_id: Optional[Any] = None,
+        category: Optional[Any] = None,
+    ):
+        super().__init__(element_id=element_id, name=name, category=category)
         self.FamilyName = family_name
+        self.Family = MockFamily(name=family_name)
         self.IsActive = True
 
     def Activate(self):
@@ -318,15 +518,22 @@ class MockFamilyInstance(MockElement):
     """Mock for Autodesk.Revit.DB.FamilyInstance."""
 
     def __init__(
-        self, 
-        name: str = "", 
+        self,
+        name: str = "",
         symbol: Optional[MockFamilySymbol] = None,
         location: Optional[MockXYZ] = None,
         facing_orientation: Optional[MockXYZ] = None,
         hand_orientation: Optional[MockXYZ] = None,
-        bbox: Optional[MockBoundingBox] = None
+        bbox: Optional[MockBoundingBox] = None,
+        element_id: Optional[Any] = None,
+        category: Optional[Any] = None,
+        level_id: Optional[Any] = None,
+        document: Optional[Any] = None,
+        host: Optional[Any] = None,
     ):
-        super().__init__(name=name, bbox=bbox)
+        super().__init__(element_id=element_id, name=name, category=category,
+                         bbox=bbox, level_id=level_id, document=document)
+        self.Host = host
         self.Symbol = symbol or MockFamilySymbol()
         self._location = location
         self.FacingOrientation = facing_orientation or MockXYZ(0, 1, 0)
@@ -339,6 +546,159 @@ class MockFamilyInstance(MockElement):
         return None
 
 
+class MockModelCurve(MockElement):
+    """Mock for Autodesk.Revit.DB.ModelCurve; ``geometry_reads`` counts get_Geometry calls."""
+
+    def __init__(
+        self,
+        name: str = "",
+        geometry: Optional[List[Any]] = None,
+        category: Optional[Any] = MockBuiltInCategory.OST_RoomSeparationLines,
+        element_id: Optional[Any] = None,
+    ):
+        super().__init__(element_id=element_id, name=name, category=category)
+        self.geometry = geometry
+        self.geometry_reads = 0
+
+    def get_Geometry(self, options: Any) -> Optional[List[Any]]:
+        self.geometry_reads += 1
+        return self.geometry
+
+
+class MockTextNote(MockElement):
+    """Mock for Autodesk.Revit.DB.TextNote."""
+
+    def __init__(self, text: str = "", coord: Optional[MockXYZ] = None, element_id: Optional[Any] = None):
+        super().__init__(element_id=element_id)
+        self.Text = text
+        self.Coord = coord or MockXYZ()
+
+
+class MockIndependentTag(MockElement):
+    """Mock for Autodesk.Revit.DB.IndependentTag (tag of a host-document element)."""
+
+    def __init__(
+        self,
+        text: str = "",
+        category: Optional[Any] = None,
+        head: Optional[MockXYZ] = None,
+        element_id: Optional[Any] = None,
+    ):
+        super().__init__(element_id=element_id, category=category)
+        self.TagText = text
+        self.TagHeadPosition = head or MockXYZ()
+
+    def GetTaggedLocalElementIds(self) -> List[Any]:
+        return []
+
+
+class MockDocument:
+    """Mock for Autodesk.Revit.DB.Document holding a flat list of elements.
+
+    Elements added with ``add`` get this document as ``Document``;
+    ``GetElement`` looks them up by id and ``remove`` deletes them.
+    """
+
+    def __init__(
+        self,
+        elements: Optional[List[Any]] = None,
+        linked: bool = False,
+        hash_code: Optional[int] = None,
+        path: Optional[str] = None,
+    ):
+        self.IsLinked = linked
+        self.IsValidObject = True
+        self.PathName = path or ""
+        self._hash = hash_code if hash_code is not None else id(self)
+        self.elements: List[Any] = []
+        self.get_element_calls = 0
+        self.room_at_point_calls = 0
+        for e in elements or []:
+            self.add(e)
+
+    def add(self, element: Any) -> Any:
+        try:
+            element.Document = self
+        except AttributeError:
+            pass
+        self.elements.append(element)
+        return element
+
+    def remove(self, element_id: Any) -> None:
+        value = getattr(element_id, "IntegerValue", element_id)
+        self.elements = [e for e in self.elements if e.Id.IntegerValue != value]
+
+    def GetHashCode(self) -> int:
+        return self._hash
+
+    def GetRoomAtPoint(self, point: Any, phase: Any = None) -> Optional[Any]:
+        self.room_at_point_calls += 1
+        return None
+
+    def GetElement(self, element_id: Any) -> Optional[Any]:
+        self.get_element_calls += 1
+        value = getattr(element_id, "IntegerValue", element_id)
+        for e in self.elements:
+            if getattr(getattr(e, "Id", None), "IntegerValue", None) == value:
+                return e
+        return None
+
+
+class MockRevitLinkInstance(MockElement):
+    """Mock for Autodesk.Revit.DB.RevitLinkInstance."""
+
+    def __init__(self, element_id: Optional[Any] = None, link_doc: Optional[Any] = None):
+        super().__init__(element_id=element_id)
+        self._link_doc = link_doc
+
+    def GetLinkDocument(self) -> Optional[Any]:
+        return self._link_doc
+
+
+def _category_value(element: Any) -> Optional[int]:
+    category = getattr(element, "Category", None)
+    try:
+        return int(category.Id.IntegerValue)
+    except Exception:
+        return None
+
+
+class MockFilteredElementCollector:
+    """Mock for Autodesk.Revit.DB.FilteredElementCollector over MockDocument.elements.
+
+    ``scans`` counts iterations over a collector (class-wide, reset in tests).
+    """
+
+    scans = 0
+
+    def __init__(self, doc: Any, *args: Any):
+        self._items = list(getattr(doc, "elements", []) or [])
+
+    def OfCategory(self, bic: Any) -> "MockFilteredElementCollector":
+        self._items = [e for e in self._items if _category_value(e) == int(bic)]
+        return self
+
+    def OfClass(self, cls: Any) -> "MockFilteredElementCollector":
+        self._items = [e for e in self._items if isinstance(e, cls)]
+        return self
+
+    def WhereElementIsNotElementType(self) -> "MockFilteredElementCollector":
+        return self
+
+    def WhereElementIsElementType(self) -> "MockFilteredElementCollector":
+        return self
+
+    def GetElementCount(self) -> int:
+        return len(self._items)
+
+    def ToElements(self) -> List[Any]:
+        return list(self)
+
+    def __iter__(self):
+        MockFilteredElementCollector.scans += 1
+        return iter(list(self._items))
+
+
 class DB:
     """Mock namespace for Autodesk.Revit.DB."""
 
@@ -346,13 +706,27 @@ class DB:
     ElementId = MockElementId
     BoundingBoxXYZ = MockBoundingBox
     Element = MockElement
+    Category = MockCategory
+    Document = MockDocument
+    FilteredElementCollector = MockFilteredElementCollector
     BuiltInCategory = MockBuiltInCategory
     BuiltInParameter = MockBuiltInParameter
+    Line = MockLine
+    BoundarySegment = MockBoundarySegment
+    GeometryInstance = MockGeometryInstance
+    Options = MockOptions
+    ModelCurve = MockModelCurve
+    SpatialElementBoundaryLocation = MockSpatialElementBoundaryLocation
+    SpatialElementBoundaryOptions = MockSpatialElementBoundaryOptions
     Wall = MockWall
     WallType = MockWallType
     Curve = MockCurve
+    Family = MockFamily
     FamilySymbol = MockFamilySymbol
     FamilyInstance = MockFamilyInstance
+    RevitLinkInstance = MockRevitLinkInstance
+    TextNote = MockTextNote
+    IndependentTag = MockIndependentTag
 
     # Add other needed enums/constants
     class StorageType:
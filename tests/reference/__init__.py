@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Reference implementations and fixtures shared by tests and benchmarks."""
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Reference polylabel and room outlines shared by tests and bench_polylabel.
+
+`legacy_polylabel` is the pre-batch `link_reader._polylabel_xy` (per-cell
+object, per-segment `float(p.X)`); polylabel_batch must reproduce it exactly.
+"""
+import heapq
+import math
+
+import polylabel_batch
+
+
+class P(object):
+    """XYZ-like point (attribute access, as Revit XYZ)."""
+
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x, y, z=0.0):
+        self.X = x
+        self.Y = y
+        self.Z = z
+
+
+def _closest(px, py, ax, ay, bx, by):
+    vx = bx - ax
+    vy = by - ay
+    den = vx * vx + vy * vy
+    if den <= 1e-12:
+        return ax, ay
+    t = ((px - ax) * vx + (py - ay) * vy) / den
+    if t < 0.0:
+        t = 0.0
+    elif t > 1.0:
+        t = 1.0
+    return ax + t * vx, ay + t * vy
+
+
+def _pip(x, y, pts):
+    if not pts or len(pts) < 3:
+        return False
+    inside = False
+    n = len(pts)
+    j = n - 1
+    for i in range(n):
+        xi = float(pts[i].X)
+        yi = float(pts[i].Y)
+        xj = float(pts[j].X)
+        yj = float(pts[j].Y)
+        inter = ((yi > y) != (yj > y)) and (
+            x < (xj - xi) * (y - yi) / ((yj - yi) if abs(yj - yi) > 1e-12 else 1e-12) + xi)
+        if inter:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _dist(x, y, outer, holes):
+    inside = _pip(x, y, outer)
+    if inside and holes:
+        for hp in holes:
+            if hp and _pip(x, y, hp):
+                inside = False
+                break
+    min_d2 = None
+    for loop in [outer] + [h for h in holes if h and len(h) >= 3]:
+        n = len(loop)
+        for i in range(n):
+            a = loop[i]
+            b = loop[(i + 1) % n]
+            cx, cy = _closest(x, y, float(a.X), float(a.Y), float(b.X), float(b.Y))
+            d2 = (x - cx) * (x - cx) + (y - cy) * (y - cy)
+            if min_d2 is None or d2 < min_d2:
+                min_d2 = d2
+    dist = 0.0 if min_d2 is None else min_d2 ** 0.5
+    return dist if inside else -dist
+
+
+class _Cell(object):
+    __slots__ = ("x", "y", "h", "d", "max")
+
+    def __init__(self, x, y, h, outer, holes):
+        self.x = float(x)
+        self.y = float(y)
+        self.h = float(h)
+        self.d = _dist(self.x, self.y, outer, holes)
+        self.max = self.d + self.h * 1.41421356237
+
+
+def legacy_polylabel(outer, holes=None, precision=0.2):
+    holes = holes or []
+    prec = max(float(precision or 0.2), 1e-3)
+    min_x = min(float(p.X) for p in outer)
+    min_y = min(float(p.Y) for p in outer)
+    max_x = max(float(p.X) for p in outer)
+    max_y = max(float(p.Y) for p in outer)
+    width = max_x - min_x
+    height = max_y - min_y
+    if width <= 1e-9 or height <= 1e-9:
+        return None, None
+    cell_size = min(width, height)
+    h = cell_size / 2.0
+    q = []
+    uid = 0
+    x = min_x
+    while x < max_x:
+        y = min_y
+        while y < max_y:
+            c = _Cell(x + h, y + h, h, outer, holes)
+            heapq.heappush(q, (-c.max, uid, c))
+            uid += 1
+            y += cell_size
+        x += cell_size
+    cc = polylabel_batch._centroid_xy([(p.X, p.Y) for p in outer])
+    if cc:
+        best_p, best_d = cc, _dist(cc[0], cc[1], outer, holes)
+    else:
+        best_p = ((min_x + max_x) * 0.5, (min_y + max_y) * 0.5)
+        best_d = _dist(best_p[0], best_p[1], outer, holes)
+    it = 0
+    while q and it < 20000:
+        it += 1
+        _, _, cell = heapq.heappop(q)
+        if cell.d > best_d:
+            best_p = (cell.x, cell.y)
+            best_d = cell.d
+        if (cell.max - best_d) <= prec:
+            continue
+        h2 = cell.h / 2.0
+        if h2 <= 1e-9:
+            continue
+        for dx in (-h2, h2):
+            for dy in (-h2, h2):
+                c = _Cell(cell.x + dx, cell.y + dy, h2, outer, holes)
+                heapq.heappush(q, (-c.max, uid, c))
+                uid += 1
+    return best_p, best_d
+
+
+def make_room(seed, vertices=40):
+    """Star-ish concave room with `vertices` corners and an optional column hole."""
+    cx = (seed % 10) * 30.0
+    cy = (seed // 10) * 30.0
+    outer = []
+    for k in range(vertices):
+        a = 2.0 * math.pi * k / vertices
+        r = 10.0 + 3.0 * math.sin(3 * a + seed) + (1.5 if k % 2 else 0.0)
+        outer.append(P(cx + r * math.cos(a) * 1.4, cy + r * math.sin(a)))
+    holes = []
+    if seed % 3 == 0:
+        holes.append([P(cx - 1, cy - 1), P(cx + 1, cy - 1), P(cx + 1, cy + 1), P(cx - 1, cy + 1)])
+    return outer, holes
+
+
+def as_tuples(outer, holes):
+    return [(p.X, p.Y) for p in outer], [[(p.X, p.Y) for p in h] for h in holes]
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Linear wall queries and room outlines shared by tests and bench_wall_raycast.
+
+The linear implementations mirror the per-segment loops of
+`МокрыеТочки.domain.raycast_to_walls` and `КухняБлок.domain.nearest_segment`
+on float tuples; WallSegmentIndex must reproduce them exactly.
+"""
+import math
+import random
+
+
+def linear_nearest(x, y, segs, accept=None):
+    best = (None, None, None)
+    for idx, (a, b, _) in enumerate(segs):
+        if accept is not None and not accept(idx):
+            continue
+        vx, vy = b[0] - a[0], b[1] - a[1]
+        den = vx * vx + vy * vy
+        if den <= 1e-12:
+            px, py = a[0], a[1]
+        else:
+            t = ((x - a[0]) * vx + (y - a[1]) * vy) / den
+            t = 0.0 if t < 0.0 else (1.0 if t > 1.0 else t)
+            px, py = a[0] + vx * t, a[1] + vy * t
+        d = math.sqrt((x - px) ** 2 + (y - py) ** 2)
+        if best[1] is None or d < best[1]:
+            best = (idx, d, (px, py))
+    return best
+
+
+def linear_raycast(ox, oy, ux, uy, max_dist, segs, tol=1e-9):
+    rx = (ox + ux * max_dist) - ox
+    ry = (oy + uy * max_dist) - oy
+    best = (None, None, None)
+    for idx, (a, b, _) in enumerate(segs):
+        sx, sy = b[0] - a[0], b[1] - a[1]
+        denom = rx * sy - ry * sx
+        if abs(denom) < tol:
+            continue
+        qx, qy = a[0] - ox, a[1] - oy
+        t = (qx * sy - qy * sx) / denom
+        u = (qx * ry - qy * rx) / denom
+        if not (-tol <= t <= 1.0 + tol and -tol <= u <= 1.0 + tol):
+            continue
+        dist = t * max_dist
+        if dist <= 1e-6 or dist > max_dist + 1e-6:
+            continue
+        if math.sqrt(sx * sx + sy * sy) <= 1e-6:
+            continue
+        if best[1] is None or dist < best[1]:
+            best = (idx, dist, (ox + rx * t, oy + ry * t))
+    return best
+
+
+def make_room(seed, segments=120):
+    """Jagged closed outline (niches, pilasters) plus a few free-standing column outlines."""
+    rnd = random.Random(seed)
+    cx, cy = rnd.uniform(-500, 500), rnd.uniform(-500, 500)
+    n_outer = max(8, segments - 16)
+    pts = []
+    for k in range(n_outer):
+        a = 2.0 * math.pi * k / n_outer
+        r = 25.0 + (2.0 if k % 3 == 0 else 0.0) + rnd.uniform(-0.5, 0.5)
+        pts.append((cx + r * math.cos(a) * 1.6, cy + r * math.sin(a)))
+    segs = []
+    for k in range(n_outer):
+        segs.append((pts[k], pts[(k + 1) % n_outer], "wall-{0}".format(k)))
+    for c in range(4):
+        x0, y0 = cx + rnd.uniform(-15, 15), cy + rnd.uniform(-8, 8)
+        box = [(x0, y0), (x0 + 1.0, y0), (x0 + 1.0, y0 + 1.0), (x0, y0 + 1.0)]
+        for k in range(4):
+            segs.append((box[k], box[(k + 1) % 4], "column-{0}".format(c)))
+    return (cx, cy), segs
+
+
+def queries(seed, center, count=40):
+    rnd = random.Random(seed + 1000)
+    out = []
+    for _ in range(count):
+        x = center[0] + rnd.uniform(-30, 30)
+        y = center[1] + rnd.uniform(-20, 20)
+        a = rnd.uniform(0.0, 2.0 * math.pi)
+        out.append((x, y, math.cos(a), math.sin(a)))
+    return out
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Tests for the per-document family symbol index in placement_engine."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import placement_engine as pe  # noqa: E402
+import socket_utils as su  # noqa: E402
+
+from mocks.revit_api import (  # noqa: E402
+    MockBuiltInCategory,
+    MockDocument,
+    MockFamily,
+    MockFamilySymbol,
+    MockFilteredElementCollector,
+)
+
+FIXTURES = MockBuiltInCategory.OST_ElectricalFixtures
+EQUIPMENT = MockBuiltInCategory.OST_ElectricalEquipment
+LIGHTS = MockBuiltInCategory.OST_LightingFixtures
+
+
+class _IndexOnlyCollector(MockFilteredElementCollector):
+    def OfCategory(self, bic):
+        raise AssertionError("lookups must go through the index")
+
+
+@pytest.fixture(autouse=True)
+def _collector(monkeypatch):
+    monkeypatch.setattr(pe.DB, "FilteredElementCollector", _IndexOnlyCollector)
+    pe.invalidate_symbol_index()
+    MockFilteredElementCollector.scans = 0
+    yield
+    pe.invalidate_symbol_index()
+
+
+def _symbol(sid, family, name, cat):
+    return MockFamilySymbol(name, family, element_id=sid, category=cat)
+
+
+def _doc(symbols=None):
+    if symbols is None:
+        symbols = [
+            _symbol(1, u"Светильник", u"Потолочный", LIGHTS),
+            _symbol(2, u"EOM_Розетка", u"Двойная", EQUIPMENT),
+            _symbol(3, u"EOM_Розетка", u"Двойная", FIXTURES),
+            _symbol(4, u"Другая", u"Двойная", FIXTURES),
+            _symbol(5, u"Щит", u"ЩЭ-3", EQUIPMENT),
+        ]
+    return MockDocument([MockFamily(element_id=100)] + list(symbols))
+
+
+def _sid(symbol):
+    return symbol.Id.IntegerValue
+
+
+def test_find_family_symbol_uses_category_then_global():
+    doc = _doc()
+    assert _sid(pe.find_family_symbol(doc, u"EOM_Розетка : Двойная", category_bic=FIXTURES)) == 3
+    assert _sid(pe.find_family_symbol(doc, u"EOM_Розетка : Двойная")) == 2
+    assert _sid(pe.find_family_symbol(doc, u"Другая : Двойная", category_bic=FIXTURES)) == 4
+    # The category match wins over the family match.
+    assert _sid(pe.find_family_symbol(doc, u"Другая : Двойная", category_bic=EQUIPMENT)) == 2
+    # Unknown family falls back to the type name.
+    assert _sid(pe.find_family_symbol(doc, u"Нет : Потолочный", category_bic=LIGHTS)) == 1
+    assert pe.find_family_symbol(doc, u"Нет : Нет") is None
+    assert MockFilteredElementCollector.scans == 1
+
+
+def test_index_rebuilds_after_family_load_and_deletion():
+    doc = _doc()
+    assert pe.find_family_symbol(doc, u"Новое : Тип") is None
+    doc.add(_symbol(6, u"Новое", u"Тип", FIXTURES))
+    doc.add(MockFamily(element_id=101))
+    assert _sid(pe.find_family_symbol(doc, u"Новое : Тип")) == 6
+    assert MockFilteredElementCollector.scans == 2
+
+    # A deleted symbol is detected on resolve and the index is rebuilt once.
+    doc.remove(6)
+    doc.add(_symbol(7, u"X", u"Y", FIXTURES))
+    assert pe.find_family_symbol(doc, u"Новое : Тип") is None
+    assert _sid(pe.find_family_symbol(doc, u"X : Y")) == 7
+
+
+def test_panel_number_fallback_keeps_document_order():
+    doc = _doc()
+    assert _sid(pe.find_family_symbol(doc, u"Щит : ЩЭ-03")) == 5
+
+
+def test_socket_lookup_by_family_and_fuzzy_key():
+    doc = _doc()
+    assert _sid(su._find_symbol_by_fullname(doc, u"EOM_Розетка :")) == 3
+    assert _sid(su._find_symbol_by_fullname(doc, u"Другая : Двойная")) == 4
+    assert su._find_symbol_by_fullname(doc, u"Нет такого") is None
+    assert MockFilteredElementCollector.scans == 1
+
+
+def test_trigram_fuzzy_ranks_closest_types():
+    doc = _doc([_symbol(i, u"F", u"Тип {0}".format(i), FIXTURES) for i in range(3000)]
+               + [_symbol(9001, u"F", u"Розетка двойная с заземлением", FIXTURES)])
+    index = pe.get_symbol_index(doc)
+    scored = index.fuzzy(u"розетка двойная заземление", top_n=3)
+    assert scored[0][1].id.IntegerValue == 9001
+    assert 0.0 < scored[0][0] <= 1.0
+    assert index.fuzzy(u"", top_n=3) == []
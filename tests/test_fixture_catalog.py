@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Tests for the single-pass fixture classifier in socket_utils."""
+import itertools
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (LIB, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import socket_utils as su  # noqa: E402
+from mocks.revit_api import (  # noqa: E402
+    MockBuiltInCategory,
+    MockFamilyInstance,
+    MockFilteredElementCollector,
+    MockIndependentTag,
+    MockTextNote,
+    MockXYZ,
+)
+
+
+BIC = MockBuiltInCategory
+
+
+class _Collector(MockFilteredElementCollector):
+    """Records every category/class query."""
+    queries = []
+
+    def OfCategory(self, bic):
+        _Collector.queries.append(bic)
+        return MockFilteredElementCollector.OfCategory(self, bic)
+
+    def OfClass(self, cls):
+        _Collector.queries.append(cls.__name__)
+        return MockFilteredElementCollector.OfClass(self, cls)
+
+
+def _fixture(label, bic, x, y):
+    return MockFamilyInstance(name=label, category=bic, location=MockXYZ(x, y, 0.0))
+
+
+@pytest.fixture
+def link_fixtures(fake_link, monkeypatch):
+    texts = {"calls": 0}
+
+    def _elem_text(e):
+        texts["calls"] += 1
+        return su._norm(e.Name)
+
+    monkeypatch.setattr(su.DB, "FilteredElementCollector", _Collector)
+    monkeypatch.setattr(su, "_elem_text", _elem_text)
+    _Collector.queries = []
+    doc = fake_link([
+        _fixture(u"Мойка кухонная", BIC.OST_PlumbingFixtures, 1, 1),
+        _fixture(u"Электроплита", BIC.OST_SpecialityEquipment, 2, 2),
+        _fixture(u"Котёл БК1", BIC.OST_MechanicalEquipment, 3, 3),
+        _fixture(u"Радиатор стальной", BIC.OST_MechanicalEquipment, 8, 8),
+        _fixture(u"ПС", BIC.OST_GenericAnnotation, 4, 4),
+        MockTextNote(u"СМ", MockXYZ(5, 5, 0.0)),
+        MockTextNote(u"См. примечание 3", MockXYZ(6, 6, 0.0)),
+        MockIndependentTag(u"ЭП", BIC.OST_SpecialityEquipmentTags, MockXYZ(7, 7, 0.0)),
+    ], hash_code=9001)
+    return doc, texts
+
+
+def _xy(pts):
+    return sorted((p.X, p.Y) for p in pts)
+
+
+def test_keyword_matcher_agrees_with_text_has_any_keyword():
+    texts = [u"мойка кухонная", u"бк1", u"котёл бк", u"абк", u"п/с 2", u"пс", u"см. примечание", u"water heater 80л", u"", u"wm-3"]
+    key_sets = [[u"мойк", u"мк"], [u"bk", u"бк"], [u"пс", u"п/с"], [u"water heater"], [u"см", u"wm"], [u"", u"эп"]]
+    for text, keys in itertools.product(texts, key_sets):
+        assert su._keyword_matcher(keys).match(su._norm(text)) == su._text_has_any_keyword(text, keys), (text, keys)
+
+
+def test_collect_fixture_points_returns_all_buckets(link_fixtures):
+    doc, _ = link_fixtures
+    buckets = su.collect_fixture_points(doc, {})
+    assert set(buckets) == set(su.FIXTURE_KINDS)
+    assert _xy(buckets["sink"]) == [(1, 1)]
+    assert _xy(buckets["stove"]) == [(2, 2), (7, 7)]
+    assert buckets["fridge"] == []
+    assert _xy(buckets["washing_machine"]) == [(5, 5)]
+    assert _xy(buckets["boiler"]) == [(3, 3)]
+    assert _xy(buckets["towel_rail"]) == [(4, 4)]
+    assert _xy(buckets["radiator"]) == [(8, 8)]
+
+
+def test_each_category_and_element_text_read_once(link_fixtures):
+    doc, texts = link_fixtures
+    su.collect_fixture_points(doc, {})
+    queries = list(_Collector.queries)
+    assert len(queries) == len(set(queries))
+    assert texts["calls"] == 5
+    again = su.collect_fixture_points(doc, {"sink_family_keywords": [u"мойк"]}, kinds=("sink", "stove"))
+    assert _xy(again["sink"]) == [(1, 1)] and set(again) == {"sink", "stove"}
+    assert _Collector.queries == queries and texts["calls"] == 5
+    assert su.get_fixture_catalog(doc).scans == len(queries)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Tests for the plain-data 2D geometry kernel."""
+import math
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (LIB, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import geom2d  # noqa: E402
+from reference.polylabel import P, make_room  # noqa: E402
+
+
+def _legacy_point_in_poly(x, y, pts):
+    inside = False
+    n = len(pts)
+    j = n - 1
+    for i in range(n):
+        xi, yi = float(pts[i].X), float(pts[i].Y)
+        xj, yj = float(pts[j].X), float(pts[j].Y)
+        inter = ((yi > y) != (yj > y)) and (x < (xj - xi) * (y - yi) / ((yj - yi) if abs(yj - yi) > 1e-12 else 1e-12) + xi)
+        if inter:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _legacy_min_dist(px, py, pts):
+    best = None
+    n = len(pts)
+    for i in range(n):
+        a, b = pts[i], pts[(i + 1) % n]
+        vx, vy = b.X - a.X, b.Y - a.Y
+        den = vx * vx + vy * vy
+        t = 0.0 if den <= 1e-12 else min(1.0, max(0.0, ((px - a.X) * vx + (py - a.Y) * vy) / den))
+        d = math.hypot(px - (a.X + t * vx), py - (a.Y + t * vy))
+        best = d if best is None else min(best, d)
+    return best
+
+
+def test_matches_xyz_loops():
+    rnd = random.Random(3)
+    for seed in range(8):
+        outer, _ = make_room(seed, 40)
+        loop = geom2d.Loop.of(outer)
+        assert loop.points() == [(p.X, p.Y) for p in outer]
+        for _ in range(100):
+            x = outer[0].X + rnd.uniform(-30, 10)
+            y = outer[0].Y + rnd.uniform(-15, 15)
+            assert geom2d.point_in_poly(x, y, loop) == _legacy_point_in_poly(x, y, outer)
+            d, q = geom2d.min_dist_to_loop(x, y, loop)
+            assert d == pytest.approx(_legacy_min_dist(x, y, outer), abs=1e-12)
+            assert math.hypot(x - q[0], y - q[1]) == pytest.approx(d)
+
+
+def test_area_signed_distance_and_holes():
+    square = geom2d.Loop.of([(0, 0), (10, 0), (10, 10), (0, 10)])
+    hole = geom2d.Loop.of([(4, 4), (6, 4), (6, 6), (4, 6)])
+    assert geom2d.poly_area(square) == 100.0
+    assert geom2d.poly_area(geom2d.Loop.of(square.points()[::-1])) == -100.0
+    assert geom2d.signed_dist_to_boundary(2.0, 5.0, square) == 2.0
+    assert geom2d.signed_dist_to_boundary(3.0, 5.0, square, [hole]) == 1.0
+    assert geom2d.signed_dist_to_boundary(5.0, 5.0, square, [hole]) == -1.0
+    assert geom2d.signed_dist_to_boundary(12.0, 5.0, square) == -2.0
+    assert geom2d.min_dist_to_loop(0.0, 0.0, geom2d.Loop()) == (None, None)
+
+
+def test_segments_intersect_and_closest_point():
+    ok, t, u, hit = geom2d.segments_intersect(0, 0, 10, 0, 5, -5, 5, 5)
+    assert ok and t == 0.5 and u == 0.5 and hit == (5.0, 0.0)
+    assert geom2d.segments_intersect(0, 0, 10, 0, 0, 1, 10, 1)[0] is False
+    assert geom2d.segments_intersect(0, 0, 1, 0, 5, -5, 5, 5)[0] is False
+    assert geom2d.closest_point_on_segment(5, 3, 0, 0, 10, 0) == (5.0, 0.0, 0.5)
+    assert geom2d.closest_point_on_segment(-5, 3, 0, 0, 10, 0) == (0.0, 0.0, 0.0)
+    assert geom2d.closest_point_on_segment(1, 1, 2, 2, 2, 2) == (2, 2, 0.0)
+
+
+def test_point_segment_distance_in_3d():
+    assert geom2d.point_segment_distance((5, 3, 4), (0, 0, 0), (10, 0, 0)) == 5.0
+    assert geom2d.point_segment_distance((-3, 0, 4), (0, 0, 0), (10, 0, 0)) == 5.0
+    assert geom2d.point_segment_distance((1, 1, 1), (1, 1, 0), (1, 1, 0)) == 1.0
+
+
+def test_simplify_polygon_drops_duplicates_and_collinear_vertices():
+    pts = [P(0, 0), P(5, 0), P(10, 0), P(10, 0.001), P(10, 10), P(0, 10), P(0, 0.005)]
+    keep = geom2d.simplify_polygon(geom2d.Loop.of(pts))
+    assert [(pts[i].X, pts[i].Y) for i in keep] == [(0, 0), (10, 0), (10, 10), (0, 10)]
+    assert geom2d.simplify_polygon(geom2d.Loop.of(pts[:2])) == [0, 1]
+
+
+def test_loop_of_converts_once_per_contents():
+    pts = [P(0, 0), P(1, 0), P(1, 1)]
+    loop = geom2d.loop_of(pts)
+    assert geom2d.loop_of(pts) is loop
+    assert geom2d.loop_of(list(pts)) is loop
+    assert geom2d.loop_of(loop) is loop
+    pts.append(P(0, 1))
+    assert len(geom2d.loop_of(pts)) == 4
+    pts[0] = P(-5, 0)
+    assert geom2d.loop_of(pts).xs[0] == -5
+    assert geom2d.loop_of([[0, 0], [1, 0], [1, 1]]).points() == [(0, 0), (1, 0), (1, 1)]
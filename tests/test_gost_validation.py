@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+"""Tests for the single-pass GOST validation engine and segment/box indexes."""
+import math
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import gost_validation as gv  # noqa: E402
+from geom2d import point_segment_distance  # noqa: E402
+from segment_index import BoxIndex, SegmentIndex, point_box_distance  # noqa: E402
+from utils_units import mm_to_ft  # noqa: E402
+
+
+class _Elem(object):
+    def __init__(self, eid, kind, point=None, room=None, height=None, segments=None, box=None, name=u""):
+        self.eid = eid
+        self.kind = kind
+        self.pt = point
+        self.room = room
+        self.height = height
+        self.segments = segments or []
+        self.box = box
+        self.name = name
+
+
+class _Room(object):
+    def __init__(self, eid, name, perimeter_mm, area_m2):
+        self.eid = eid
+        self.name = name
+        self.perimeter_mm = perimeter_mm
+        self.area_m2 = area_m2
+
+
+class _Adapter(object):
+    def __init__(self, electrical, rooms, plumbing, pipes):
+        self._electrical = electrical
+        self._rooms = rooms
+        self._plumbing = plumbing
+        self._pipes = pipes
+        self.calls = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def collect_electrical(self):
+        self._count("electrical")
+        return self._electrical
+
+    def collect_rooms(self):
+        self._count("rooms")
+        return self._rooms
+
+    def collect_plumbing(self):
+        self._count("plumbing")
+        return self._plumbing
+
+    def collect_gas_pipes(self):
+        self._count("pipes")
+        return self._pipes
+
+    def element_id(self, e):
+        return e.eid
+
+    def point(self, e):
+        self._count("point")
+        return e.pt
+
+    def room_id(self, e, point):
+        self._count("room_id")
+        return e.room
+
+    def height_mm(self, e):
+        return e.height
+
+    def room_perimeter_mm(self, room):
+        return room.perimeter_mm
+
+    def room_area_m2(self, room):
+        return room.area_m2
+
+    def curve_segments(self, e):
+        return e.segments
+
+    def bbox(self, e):
+        return e.box
+
+    def is_socket(self, e):
+        return e.kind == "socket"
+
+    def is_switch(self, e):
+        return e.kind == "switch"
+
+    def is_kitchen(self, room):
+        return u"кухн" in room.name.lower()
+
+    def is_bathroom(self, room):
+        return u"ванн" in room.name.lower()
+
+    def is_bath_fixture(self, e):
+        return e.kind == "bath"
+
+    def is_sink_fixture(self, e):
+        return e.kind == "sink"
+
+    def snapshot(self, e):
+        if isinstance(e, _Room):
+            return (e.name, e.perimeter_mm, e.area_m2)
+        return (e.pt, e.room, e.height, e.box, tuple(e.segments))
+
+
+def _building(seed=7, n_sockets=400):
+    rnd = random.Random(seed)
+    rooms = [_Room(1000 + i, u"Кухня" if i % 5 == 0 else (u"Ванная" if i % 5 == 1 else u"Комната"),
+                   rnd.uniform(6000, 24000), rnd.uniform(4.0, 20.0)) for i in range(40)]
+    electrical = []
+    for i in range(n_sockets):
+        room = rooms[i % len(rooms)]
+        electrical.append(_Elem(i, "socket", (rnd.uniform(0, 200), rnd.uniform(0, 200), rnd.uniform(0, 30)),
+                                room=room.eid, height=rnd.uniform(100, 1200)))
+    for i in range(50):
+        electrical.append(_Elem(5000 + i, "switch", (rnd.uniform(0, 200), rnd.uniform(0, 200), 3.0),
+                                room=rooms[i % 40].eid, height=rnd.uniform(600, 1900)))
+    pipes = []
+    for i in range(60):
+        a = (rnd.uniform(0, 200), rnd.uniform(0, 200), rnd.uniform(0, 30))
+        b = (a[0] + rnd.uniform(-20, 20), a[1] + rnd.uniform(-20, 20), a[2])
+        c = (b[0], b[1], b[2] + rnd.uniform(0, 10))
+        pipes.append(_Elem(7000 + i, "pipe", segments=[(a, b), (b, c)]))
+    plumbing = []
+    for i in range(80):
+        x, y, z = rnd.uniform(0, 200), rnd.uniform(0, 200), rnd.uniform(0, 30)
+        kind = "sink" if i % 2 else "bath"
+        plumbing.append(_Elem(8000 + i, kind, (x, y, z), room=rooms[i % 40].eid,
+                              box=((x - 1, y - 1, z), (x + 1, y + 1, z + 3))))
+    return _Adapter(electrical, rooms, plumbing, pipes)
+
+
+def _brute_gas(adapter):
+    lim = mm_to_ft(500)
+    out = []
+    for s in adapter._electrical:
+        if s.kind != "socket":
+            continue
+        d = min(point_segment_distance(s.pt, a, b) for p in adapter._pipes for a, b in p.segments)
+        if d < lim:
+            out.append(s.eid)
+    return out
+
+
+def _brute_sinks(adapter):
+    lim = mm_to_ft(600)
+    out = []
+    sinks = [f for f in adapter._plumbing if f.kind == "sink"]
+    for s in adapter._electrical:
+        if s.kind != "socket":
+            continue
+        d = min(point_box_distance(s.pt, f.box[0], f.box[1]) for f in sinks)
+        if d < lim:
+            out.append(s.eid)
+    return out
+
+
+def test_distance_rules_match_brute_force():
+    adapter = _building(n_sockets=3000)
+    report = gv.validate(adapter)
+    by_check = {}
+    for v in report.violations:
+        by_check.setdefault(v["check"], []).append(v["element"].eid)
+    assert by_check.get(u"Расстояние до газопровода", []) == _brute_gas(adapter)
+    assert by_check.get(u"Расстояние до раковин", []) == _brute_sinks(adapter)
+    assert _brute_gas(adapter) and _brute_sinks(adapter)
+
+
+def test_categories_and_rooms_are_resolved_once():
+    adapter = _building()
+    report = gv.validate(adapter)
+    assert adapter.calls["electrical"] == 1
+    assert adapter.calls["rooms"] == 1
+    assert adapter.calls["plumbing"] == 1
+    assert adapter.calls["pipes"] == 1
+    n_elems = len(adapter._electrical) + len(adapter._plumbing)
+    assert adapter.calls["room_id"] <= n_elems
+    assert adapter.calls["point"] <= n_elems
+    assert [t["rule"] for t in report.rule_timings] == [r.rule_id for r in gv.RULES]
+    stages = [name for name, _ in report.stage_timings]
+    assert stages.count("sockets") == 1 and "gas_index" in stages
+
+
+def test_counts_heights_and_bathroom_zone():
+    rooms = [_Room(1, u"Кухня", 9000, 10.0), _Room(2, u"Ванная", 6000, 4.0), _Room(3, u"Комната", 3000, 9.0)]
+    electrical = [
+        _Elem(10, "socket", (0.0, 0.0, 1.0), room=1, height=300),
+        _Elem(11, "socket", (5.0, 0.0, 1.0), room=1, height=1100),
+        _Elem(12, "socket", (50.0, 50.0, 1.0), room=2, height=500),
+        _Elem(13, "socket", (10.0, 10.0, 1.0), room=3, height=500),
+        _Elem(14, "switch", (0.0, 1.0, 1.0), room=1, height=700),
+    ]
+    bath = _Elem(20, "bath", (50.0, 51.0, 0.0), room=2, box=((49.0, 50.5, 0.0), (51.0, 52.0, 2.0)))
+    report = gv.validate(_Adapter(electrical, rooms, [bath], []))
+    found = sorted((v["check"], getattr(v["element"], "eid", None)) for v in report.violations)
+    assert found == sorted([
+        (u"Высота розеток", 11),
+        (u"Высота выключателей", 14),
+        (u"Количество розеток по периметру", 1),
+        (u"Количество розеток по периметру", 2),
+        (u"Розетки на кухне", 1),
+        (u"Запретная зона ванной", 12),
+    ])
+
+
+def test_rule_plugins_and_failures_are_reported():
+    calls = []
+
+    def _broken(ctx):
+        raise RuntimeError("boom")
+
+    def _custom(ctx):
+        calls.append(len(ctx.sockets))
+        return [gv.make_violation(u"X", ctx.sockets[0], u"p", u"n")]
+
+    rules = [gv.Rule("broken", u"Сломанное", u"-", _broken), gv.Rule("custom", u"Своё", u"-", _custom)]
+    ticks = iter(range(100))
+    report = gv.validate(_building(), rules=rules, clock=lambda: float(next(ticks)))
+    assert report.rule_timings[0]["error"] == "boom"
+    assert report.rule_timings[1]["violations"] == 1 and calls
+    assert len(report.violations) == 1
+    # Building the shared socket list is a stage, not part of the rule time.
+    assert report.rule_timings[1]["seconds"] < report.total_seconds
+    assert report.timing_lines()[-1].startswith(u"Всего")
+
+
+def _keys(report):
+    return sorted((v["check"], v["element"].eid) for v in report.violations)
+
+
+def _evaluated(report):
+    return dict((t["rule"], t["evaluated"]) for t in report.rule_timings)
+
+
+def test_incremental_reevaluates_only_changed_elements():
+    adapter = _building()
+    state = gv.ValidationState()
+    first = gv.validate_incremental(adapter, state)
+    assert not first.incremental
+    assert _keys(first) == _keys(gv.validate(adapter))
+
+    again = gv.validate_incremental(adapter, state)
+    assert again.incremental and again.changed == 0
+    assert set(_evaluated(again).values()) == {0}
+    assert _keys(again) == _keys(first)
+
+    # Move one socket next to a gas pipe and into another room.
+    sock = adapter._electrical[3]
+    a, _ = adapter._pipes[0].segments[0]
+    sock.pt = (a[0] + 0.1, a[1], a[2])
+    sock.room = adapter._rooms[1].eid
+    sock.height = 2000
+    report = gv.validate_incremental(adapter, state)
+    ev = _evaluated(report)
+    assert report.changed == 1
+    assert ev["socket_height"] == 1 and ev["gas_distance"] == 1 and ev["sink_distance"] == 1
+    assert ev["switch_height"] == 0
+    assert ev["socket_count_perimeter"] == 2  # old and new room
+    assert _keys(report) == _keys(gv.validate(adapter))
+    assert (u"Расстояние до газопровода", sock.eid) in _keys(report)
+
+
+def test_incremental_handles_rooms_inputs_and_removals():
+    adapter = _building()
+    state = gv.ValidationState()
+    gv.validate_incremental(adapter, state)
+
+    adapter._rooms[0].perimeter_mm = 60000
+    adapter._pipes.pop()
+    removed = adapter._electrical.pop(0)
+    report = gv.validate_incremental(adapter, state)
+    ev = _evaluated(report)
+    n_sockets = len([e for e in adapter._electrical if e.kind == "socket"])
+    assert ev["gas_distance"] == n_sockets  # a pipe was deleted: full rerun of the rule
+    assert ev["sink_distance"] == 0 and ev["socket_height"] == 0
+    assert removed.eid not in [v["element"].eid for v in report.violations]
+    assert _keys(report) == _keys(gv.validate(adapter))
+
+
+def test_incremental_tracking_uses_document_changed_ids():
+    adapter = _building()
+    state = gv.ValidationState()
+    gv.validate_incremental(adapter, state)
+    state.tracking = True
+
+    sock = adapter._electrical[5]
+    sock.height = 50
+    other = adapter._electrical[6]
+    other.height = 50  # not reported by DocumentChanged: left as is
+    gv.note_changes(state, modified=[sock.eid])
+    report = gv.validate_incremental(adapter, state)
+    assert _evaluated(report)["socket_height"] == 1
+    found = _keys(report)
+    assert (u"Высота розеток", sock.eid) in found
+    assert (u"Высота розеток", other.eid) not in found
+    assert not state.pending
+
+
+class _TrackingAdapter(_Adapter):
+    """Adapter that can resolve ids from DocumentChanged one by one."""
+
+    def element(self, eid):
+        self._count("element")
+        for e in self._electrical + self._rooms + self._plumbing + self._pipes:
+            if e.eid == eid:
+                return e
+        return None
+
+    def kind(self, e):
+        if isinstance(e, _Room):
+            return "room"
+        return {"socket": "electrical", "switch": "electrical", "pipe": "gas_pipe",
+                "sink": "plumbing", "bath": "plumbing"}.get(e.kind)
+
+    def curve_segments(self, e):
+        self._count("segments")
+        return e.segments
+
+
+def test_tracking_reuses_state_instead_of_collecting():
+    base = _building()
+    adapter = _TrackingAdapter(base._electrical, base._rooms, base._plumbing, base._pipes)
+    state = gv.ValidationState()
+    gv.validate_incremental(adapter, state)
+    state.tracking = True
+    adapter.calls = {}
+
+    sock = adapter._electrical[5]
+    sock.height = 50
+    a, _ = adapter._pipes[0].segments[0]
+    sock.pt = (a[0] + 0.1, a[1], a[2])
+    new = _Elem(9999, "socket", (1.0, 1.0, 1.0), room=adapter._rooms[2].eid, height=20)
+    adapter._electrical.append(new)
+    gone = adapter._electrical.pop(0)
+    gv.note_changes(state, added=[new.eid], modified=[sock.eid], deleted=[gone.eid])
+    report = gv.validate_incremental(adapter, state)
+
+    # No category collection, points only for changed elements, gas index kept.
+    assert not any(adapter.calls.get(k) for k in ("electrical", "rooms", "plumbing", "pipes", "segments"))
+    assert adapter.calls["element"] == 3
+    assert adapter.calls["point"] == 2
+    assert report.changed == 3
+    assert _keys(report) == _keys(gv.validate(adapter))
+    assert (u"Расстояние до газопровода", sock.eid) in _keys(report)
+
+    # A changed pipe rebuilds the gas index from the tracked pipe list.
+    adapter.calls = {}
+    pipe = adapter._pipes[1]
+    pipe.segments = [(sock.pt, (sock.pt[0] + 1.0, sock.pt[1], sock.pt[2]))]
+    gv.note_changes(state, modified=[pipe.eid])
+    report = gv.validate_incremental(adapter, state)
+    assert adapter.calls["segments"] == len(adapter._pipes)
+    assert not adapter.calls.get("pipes")
+    assert _keys(report) == _keys(gv.validate(adapter))
+
+
+def test_incremental_state_is_kept_per_document():
+    gv.reset_state()
+    assert gv.state_for("doc-a") is gv.state_for("doc-a")
+    assert gv.state_for("doc-a") is not gv.state_for("doc-b")
+    gv.reset_state("doc-a")
+    assert "doc-a" not in gv._STATES
+    gv.reset_state()
+
+
+def test_segment_index_long_and_vertical_segments():
+    index = SegmentIndex(1.0)
+    index.add((0.0, 0.0, 0.0), (10000.0, 10000.0, 0.0), "long")
+    index.add((5.0, 5.0, 0.0), (5.0, 5.0, 30.0), "riser")
+    item, d = index.nearest((5.5, 5.0, 10.0), 1.0)
+    assert item == "riser" and math.isclose(d, 0.5)
+    item, d = index.nearest((9000.0, 9000.5, 0.0), 1.0)
+    assert item == "long"
+    assert index.nearest((100.0, 0.0, 0.0), 1.0) == (None, None)
+
+
+def test_box_index_containing_xy():
+    index = BoxIndex(2.0)
+    index.add((0.0, 0.0, 0.0), (1.0, 1.0, 1.0), "a")
+    index.add((10.0, 10.0, 0.0), (11.0, 11.0, 1.0), "b")
+    assert index.containing_xy(1.5, 0.5, pad=0.6) == ["a"]
+    assert index.containing_xy(5.0, 5.0, pad=0.6) == []
+    assert index.nearest((12.0, 10.5, 0.5), 2.0) == ("b", 1.0)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Tests for the Hub session registry used to locate the monitor status file."""
+
+import json
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+LIB = ROOT / "EOMTemplateTools.extension" / "lib"
+HUB_SRC = ROOT / "EOMHub" / "src"
+for p in (str(LIB), str(HUB_SRC)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import hub_sessions  # noqa: E402
+
+
+def _write_status(directory, session_id, **extra):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / "eom_hub_status.json"
+    payload = {"sessionId": session_id, "tempDir": str(directory), "document": "Doc", "timestamp": time.time()}
+    payload.update(extra)
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    return path
+
+
+def test_register_session_and_prune(tmp_path):
+    status = _write_status(tmp_path / str(uuid.uuid4()), "s1")
+    assert hub_sessions.register_session(str(tmp_path), "s1", {"statusFile": str(status)})
+    gone = tmp_path / "missing" / "eom_hub_status.json"
+    assert hub_sessions.register_session(str(tmp_path), "s2", {"statusFile": str(gone)})
+
+    sessions = hub_sessions.read_sessions(str(tmp_path))
+    assert sessions["s1"]["statusFile"] == str(status)
+    assert sessions["s1"]["updated"] > 0
+
+    # The next registration drops sessions whose status file disappeared.
+    assert hub_sessions.register_session(str(tmp_path), "s3", {"statusFile": str(status)})
+    assert set(hub_sessions.read_sessions(str(tmp_path))) == {"s1", "s3"}
+
+
+def test_registry_survives_corrupt_file(tmp_path):
+    (tmp_path / hub_sessions.REGISTRY_FILE_NAME).write_text("{not json", encoding="utf-8")
+    assert hub_sessions.read_sessions(str(tmp_path)) == {}
+    status = _write_status(tmp_path / "x", "s1")
+    assert hub_sessions.register_session(str(tmp_path), "s1", {"statusFile": str(status)})
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEMP", str(tmp_path))
+    monkeypatch.setenv("TMP", str(tmp_path))
+    monkeypatch.setenv("EOM_SESSION_ID", "session_test")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    import api.tools as tools_mod
+
+    tools_mod._STATUS_SCAN_CACHE.update({"ts": 0.0, "roots": None, "paths": []})
+    for i in range(50):
+        (tmp_path / str(uuid.uuid4())).mkdir()
+    return tools_mod
+
+
+def _count_listdir(tools, monkeypatch):
+    calls = []
+    real = tools.os.listdir
+
+    def _listdir(path):
+        calls.append(path)
+        return real(path)
+
+    monkeypatch.setattr(tools.os, "listdir", _listdir)
+    return calls
+
+
+def test_registered_session_is_found_without_scanning(tools, tmp_path, monkeypatch):
+    session_dir = tmp_path / str(uuid.uuid4())
+    status = _write_status(session_dir, "session_test", commandPort=1234)
+    hub_sessions.register_session(str(tmp_path), "session_test", {"statusFile": str(status)})
+    calls = _count_listdir(tools, monkeypatch)
+
+    assert tools.get_revit_status()["connected"] is True
+    path, payload = tools._read_latest_status_payload()
+    assert path == str(status)
+    assert tools._get_runtime_temp_dir() == str(session_dir)
+    assert calls == []
+
+
+def test_unregistered_monitor_falls_back_to_rate_limited_scan(tools, tmp_path, monkeypatch):
+    session_dir = tmp_path / str(uuid.uuid4())
+    status = _write_status(session_dir, "session_test")
+    calls = _count_listdir(tools, monkeypatch)
+
+    assert tools.get_revit_status()["connected"] is True
+    assert tools._read_latest_status_payload()[0] == str(status)
+    assert len(calls) == 1
+
+
+def test_stale_status_is_not_connected(tools, tmp_path):
+    status = _write_status(tmp_path / str(uuid.uuid4()), "session_test", timestamp=time.time() - 60)
+    hub_sessions.register_session(str(tmp_path), "session_test", {"statusFile": str(status)})
+    assert tools.get_revit_status()["connected"] is False
+    assert tools._read_latest_status_payload()[0] == str(status)
+
+
+def test_monitor_registers_session():
+    script = (
+        ROOT / "EOMTemplateTools.extension" / "EOM.tab" / "01_Хаб.panel" / "Hub.pushbutton" / "script.py"
+    ).read_text(encoding="utf-8-sig")
+    assert "hub_sessions.register_session(" in script
+    assert "register_session(status)" in script
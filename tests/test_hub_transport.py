@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Tests for the Hub <-> Revit monitor loopback command channel."""
+
+import json
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+LIB = ROOT / "EOMTemplateTools.extension" / "lib"
+HUB_SRC = ROOT / "EOMHub" / "src"
+for p in (str(LIB), str(HUB_SRC)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import hub_transport  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    received = []
+
+    def _handler(message):
+        received.append(message)
+        if message.get("op") == "progress":
+            return {"ok": True, "result": {"job_id": message.get("job_id"), "status": "running"}}
+        return {"ok": True, "job_id": message.get("job_id")}
+
+    srv = hub_transport.CommandServer(_handler)
+    srv.start()
+    srv.received = received
+    yield srv
+    srv.stop()
+
+
+def _status(srv, tmp_path):
+    return {
+        "sessionId": "session_test",
+        "tempDir": str(tmp_path),
+        "commandPort": srv.port,
+        "commandToken": srv.token,
+        "timestamp": time.time(),
+    }
+
+
+def test_round_trip_and_latency(server, tmp_path):
+    from api import transport
+
+    status = _status(server, tmp_path)
+    timings = []
+    for i in range(20):
+        t0 = time.perf_counter()
+        response = transport.send_request(status, {"op": "run", "tool_id": "lights_center", "job_id": "j%d" % i})
+        timings.append(time.perf_counter() - t0)
+        assert response == {"ok": True, "job_id": "j%d" % i}
+    timings.sort()
+    assert timings[len(timings) // 2] < 0.05
+    assert server.received[0] == {"op": "run", "tool_id": "lights_center", "job_id": "j0"}
+
+    # The lib client speaks the same protocol.
+    assert hub_transport.request(server.port, server.token, {"op": "status"})["ok"] is True
+
+
+def test_wrong_token_is_rejected(server, tmp_path):
+    from api import transport
+
+    status = dict(_status(server, tmp_path), commandToken="nope")
+    assert transport.send_request(status, {"op": "run", "tool_id": "x"}) == {"ok": False, "error": "unauthorized"}
+    assert hub_transport.request(server.port, "nope", {"op": "run"}) == {"ok": False, "error": "unauthorized"}
+    assert server.received == []
+
+
+def test_no_endpoint_or_dead_port_means_fallback(tmp_path):
+    from api import transport
+
+    assert transport.send_request({"commandPort": None}, {"op": "status"}) is None
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    assert transport.send_request({"commandPort": port, "commandToken": "t"}, {"op": "status"}) is None
+
+
+def _import_tools(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEMP", str(tmp_path))
+    monkeypatch.setenv("TMP", str(tmp_path))
+    monkeypatch.setenv("EOM_SESSION_ID", "session_test")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    import api.tools as tools
+
+    tools._MONITOR_ENDPOINT.clear()
+    monkeypatch.setattr(tools, "get_revit_status", lambda: {"connected": True})
+    return tools
+
+
+def test_run_tool_prefers_channel_over_files(server, tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    (tmp_path / "eom_hub_status.json").write_text(json.dumps(_status(server, tmp_path)), encoding="utf-8")
+
+    result = tools.run_tool("lights_center", job_id="job_1")
+    assert result["success"] is True
+    assert server.received[-1] == {"op": "run", "tool_id": "lights_center", "job_id": "job_1"}
+    assert not list(tmp_path.glob("eom_hub_command*"))
+    assert not list(tmp_path.glob("eom_hub_result*"))
+
+    assert tools.get_job_result("job_1")["status"] == "running"
+    assert tools.run_tool("cancel", job_id="job_1")["success"] is True
+    assert server.received[-1] == {"op": "cancel", "job_id": "job_1"}
+
+
+def test_run_tool_falls_back_to_files_when_channel_down(server, tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    (tmp_path / "eom_hub_status.json").write_text(json.dumps(_status(server, tmp_path)), encoding="utf-8")
+    server.stop()
+
+    assert tools.run_tool("lights_center", job_id="job_2")["success"] is True
+    assert (tmp_path / "eom_hub_command.txt").read_text(encoding="utf-8") == "run:lights_center:job_2"
+    assert tools.get_job_result("job_2")["status"] == "pending"
+
+
+def _refusing_server(delay=0.0):
+    received = []
+
+    def _handler(message):
+        received.append(message)
+        time.sleep(delay)
+        return {"ok": False, "error": "tool_id required"}
+
+    srv = hub_transport.CommandServer(_handler)
+    srv.start()
+    srv.received = received
+    return srv
+
+
+def test_refused_run_is_not_resent_or_written_to_files(tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    srv = _refusing_server()
+    try:
+        (tmp_path / "eom_hub_status.json").write_text(json.dumps(_status(srv, tmp_path)), encoding="utf-8")
+        result = tools.run_tool("lights_center", job_id="job_3")
+        assert result["success"] is False
+        assert "tool_id required" in result["error"]
+        assert len(srv.received) == 1
+        assert not list(tmp_path.glob("eom_hub_command*"))
+
+        cancel = tools.run_tool("cancel", job_id="job_3")
+        assert cancel["success"] is False
+        assert len(srv.received) == 2
+        assert not list(tmp_path.glob("eom_hub_command*"))
+    finally:
+        srv.stop()
+
+
+def test_unanswered_run_is_dispatched_once(tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    send = tools.transport.send_request
+    monkeypatch.setattr(tools.transport, "send_request", lambda status, payload: send(status, payload, timeout=0.2))
+    srv = _refusing_server(delay=0.6)
+    try:
+        (tmp_path / "eom_hub_status.json").write_text(json.dumps(_status(srv, tmp_path)), encoding="utf-8")
+        result = tools.run_tool("lights_center", job_id="job_4")
+        assert result["success"] is False
+        time.sleep(0.7)
+        assert len(srv.received) == 1
+        assert not list(tmp_path.glob("eom_hub_command*"))
+    finally:
+        srv.stop()
+
+
+def test_monitor_publishes_channel_in_status():
+    script = (
+        ROOT / "EOMTemplateTools.extension" / "EOM.tab" / "01_Хаб.panel" / "Hub.pushbutton" / "script.py"
+    ).read_text(encoding="utf-8-sig")
+    assert "hub_transport.CommandServer(handle_transport_request" in script
+    assert '"commandPort": transport_state.get("port")' in script
+    assert "hub_transport.start_file_watcher(" in script
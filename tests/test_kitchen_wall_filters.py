@@ -3,6 +3,9 @@
 import importlib.util
 import os
 import sys
+import types
+
+from mocks.revit_api import MockXYZ
 
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
@@ -18,8 +21,10 @@ LOGIC_PATH = os.path.join(
 
 def _load_logic_module():
     module_dir = os.path.dirname(LOGIC_PATH)
-    if module_dir not in sys.path:
-        sys.path.insert(0, module_dir)
+    # Other tool folders with their own domain.py may be earlier on sys.path.
+    while module_dir in sys.path:
+        sys.path.remove(module_dir)
+    sys.path.insert(0, module_dir)
 
     # Ensure local kitchen modules are loaded for this test module.
     sys.modules.pop("logic", None)
@@ -129,3 +134,27 @@ def test_filter_room_wall_segments_applies_outer_openings_min_len_and_kzh(monkey
     assert 3 in filtered_ids
     assert 4 not in filtered_ids
     assert 5 in filtered_ids
+
+
+def test_nearest_segment_smart_prefers_aligned_wall_on_large_room(monkeypatch):
+    logic = _load_logic_module()
+    db = types.SimpleNamespace(XYZ=MockXYZ)
+    monkeypatch.setattr(logic, "DB", db)
+    monkeypatch.setattr(logic.domain, "DB", db)
+    XYZ = MockXYZ
+
+    # 120-segment rectangle: bottom wall split in 100 pieces, plus 20 stubs on the left wall.
+    segs = []
+    for k in range(100):
+        segs.append((XYZ(k * 0.2, 0, 0), XYZ((k + 1) * 0.2, 0, 0), _DummyWall(k)))
+    for k in range(20):
+        segs.append((XYZ(0, k * 0.5, 0), XYZ(0, (k + 1) * 0.5, 0), _DummyWall(100 + k)))
+
+    sink = XYZ(0.5, 0.6, 0)
+    stove = XYZ(12.0, 0.6, 0)
+    seg, proj, dist = logic._nearest_segment_smart(sink, segs, other_pt=stove)
+    assert int(seg[2].Id.IntegerValue) == 2  # bottom wall (aligned), though the left wall is closer
+    assert abs(dist - 0.6) < 1e-9 and abs(proj.X - 0.5) < 1e-9
+
+    seg_any, _, dist_any = logic.domain.nearest_segment(sink, segs)
+    assert int(seg_any[2].Id.IntegerValue) == 101 and abs(dist_any - 0.5) < 1e-9
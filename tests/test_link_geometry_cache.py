@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Tests for the on-disk link geometry cache."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import link_reader  # noqa: E402
+from link_geometry_cache import LinkGeometryCache  # noqa: E402
+from mocks.revit_api import (  # noqa: E402
+    MockBuiltInCategory, MockElementId, MockFamilyInstance, MockFilteredElementCollector, MockLine, MockRoom,
+    MockWall, MockWallType)
+
+
+@pytest.fixture
+def link_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("EOM_LINK_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("EOM_LINK_CACHE", raising=False)
+    path = tmp_path / "AR.rvt"
+    path.write_bytes(b"model-v1")
+    return path
+
+
+def test_roundtrip_on_unchanged_file(link_file):
+    cache = LinkGeometryCache.open(str(link_file))
+    cache.put_room_loops(7, [(0, 0, 0), (1, 0, 0), (1, 1, 0)], [[(0.2, 0.2, 0), (0.4, 0.2, 0), (0.4, 0.4, 0)]])
+    cache.put_records("doors", [[11, 10, (1.5, 2.5, 0.0), 21]])
+    cache.put_points(u"kw|sinks", [(3.0, 4.0, 0.0)])
+    assert cache.save()
+
+    again = LinkGeometryCache.open(str(link_file))
+    assert again.loaded
+    outer, holes = again.room_loops(7)
+    assert outer == [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0)]
+    assert holes == [[(0.2, 0.2, 0.0), (0.4, 0.2, 0.0), (0.4, 0.4, 0.0)]]
+    assert again.get_records("doors") == [[11, 10, [1.5, 2.5, 0.0], 21]]
+    assert again.get_records("walls") is None
+    assert again.get_points(u"kw|sinks") == [(3.0, 4.0, 0.0)]
+    assert again.room_loops(8) is None
+
+
+def test_changed_file_is_not_warm_loaded(link_file):
+    cache = LinkGeometryCache.open(str(link_file))
+    cache.put_records("rooms", [[5, 10]])
+    cache.save()
+
+    link_file.write_bytes(b"model-v2 with more bytes")
+    again = LinkGeometryCache.open(str(link_file))
+    assert not again.loaded
+    assert again.get_records("rooms") is None
+
+
+def test_no_save_if_file_changed_after_open(link_file):
+    cache = LinkGeometryCache.open(str(link_file))
+    cache.put_records("rooms", [[5, 10]])
+    link_file.write_bytes(b"model-v2 with more bytes")
+    assert not cache.save()
+    assert not os.path.exists(cache.path)
+
+
+def test_disabled_or_missing_file(link_file, monkeypatch):
+    assert LinkGeometryCache.open(str(link_file) + ".missing") is None
+    monkeypatch.setenv("EOM_LINK_CACHE", "0")
+    assert LinkGeometryCache.open(str(link_file)) is None
+
+
+def test_link_reader_warm_loads_loops_from_disk(link_file, fake_link, monkeypatch):
+    room = MockRoom(element_id=5, level_id=10)
+    calls = {"loops": 0}
+
+    def _fake_loops(r):
+        calls["loops"] += 1
+        return [link_reader.DB.XYZ(0, 0, 0), link_reader.DB.XYZ(4, 0, 0), link_reader.DB.XYZ(4, 3, 0)], []
+
+    monkeypatch.setattr(link_reader, "_extract_room_boundary_loops", _fake_loops)
+
+    doc1 = fake_link(hash_code=1, path=str(link_file))
+    first = link_reader.get_link_snapshot(doc1).room_loops(room)
+    assert calls["loops"] == 1
+    assert link_reader.flush_link_geometry_caches() == 1
+
+    # New session: in-memory snapshots are gone, the link file is unchanged.
+    link_reader.invalidate_link_snapshots()
+    doc2 = fake_link(hash_code=2, path=str(link_file))
+    outer, holes = link_reader.get_link_snapshot(doc2).room_loops(room)
+    assert calls["loops"] == 1
+    assert [(p.X, p.Y, p.Z) for p in outer] == [(p.X, p.Y, p.Z) for p in first[0]]
+    assert holes == []
+
+
+def test_cached_points_computed_once(link_file, fake_link):
+    calls = {"n": 0}
+
+    def _compute():
+        calls["n"] += 1
+        return [link_reader.DB.XYZ(1, 2, 3)]
+
+    snap = link_reader.get_link_snapshot(fake_link(hash_code=3, path=str(link_file)))
+    assert [(p.X, p.Y, p.Z) for p in snap.cached_points(u"k", _compute)] == [(1.0, 2.0, 3.0)]
+    snap.cached_points(u"k", _compute)
+    assert calls["n"] == 1
+    assert snap.disk.get_points(u"k") == [(1.0, 2.0, 3.0)]
+
+
+def _link_elements():
+    xyz = link_reader.DB.XYZ
+    rooms = [MockRoom(element_id=1, level_id=10), MockRoom(element_id=2, level_id=20)]
+    wall = MockWall(element_id=21, level_id=10, curve=MockLine(xyz(0, 0, 0), xyz(10, 0, 0)),
+                    wall_type=MockWallType(width=0.5))
+    door = MockFamilyInstance(element_id=11, category=MockBuiltInCategory.OST_Doors, level_id=10, host=wall)
+    return rooms, door, wall
+
+
+def test_warm_session_serves_records_without_collectors(link_file, fake_link, monkeypatch):
+    xyz = link_reader.DB.XYZ
+    monkeypatch.setattr(link_reader, "get_instance_fallback_point", lambda e: xyz(1.5, 2.5, 0.0))
+    rooms, door, wall = _link_elements()
+
+    cold = link_reader.get_link_snapshot(fake_link(rooms + [door, wall], hash_code=1, path=str(link_file)))
+    cold_rows = [[r.row() for r in recs] for recs in (cold.rooms, cold.doors, cold.walls)]
+    assert MockFilteredElementCollector.scans == 3
+    assert link_reader.flush_link_geometry_caches() == 1
+
+    link_reader.invalidate_link_snapshots()
+    warm_doc = fake_link(rooms + [door, wall], hash_code=2, path=str(link_file))
+    warm = link_reader.get_link_snapshot(warm_doc)
+    assert [[r.row() for r in recs] for recs in (warm.rooms, warm.doors, warm.walls)] == cold_rows
+    assert [r.id for r in warm.rooms_on_level(MockElementId(20))] == [2]
+    assert warm.walls[0].p1 == (10.0, 0.0, 0.0) and warm.walls[0].width == 0.5
+    assert warm.doors[0].point == (1.5, 2.5, 0.0) and warm.doors[0].host_id == 21
+    assert MockFilteredElementCollector.scans == 3
+    assert warm_doc.get_element_calls == 0
+    assert link_reader.get_rooms(warm_doc) == rooms
+    assert warm_doc.get_element_calls == 2
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Tests for link_reader link snapshot cache."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import link_reader  # noqa: E402
+from mocks.revit_api import (  # noqa: E402
+    MockBuiltInCategory, MockDocument, MockElementId, MockFamilyInstance, MockFilteredElementCollector, MockRoom)
+
+
+DOORS = MockBuiltInCategory.OST_Doors
+
+
+@pytest.fixture
+def link_rooms(fake_link, monkeypatch):
+    rooms = [MockRoom(element_id=1, level_id=10), MockRoom(element_id=2, level_id=10), MockRoom(element_id=3, level_id=20)]
+    doors = [MockFamilyInstance(element_id=11, category=DOORS, level_id=10),
+             MockFamilyInstance(element_id=12, category=DOORS, level_id=20)]
+    doc = fake_link(rooms + doors, hash_code=101)
+    calls = {"loops": 0}
+
+    def _fake_loops(room):
+        calls["loops"] += 1
+        return ["outer-{0}".format(room.Id.IntegerValue)], []
+
+    monkeypatch.setattr(link_reader, "_extract_room_boundary_loops", _fake_loops)
+    return doc, rooms, calls
+
+
+def test_rooms_collected_once_across_calls(link_rooms):
+    doc, rooms, calls = link_rooms
+    assert list(link_reader.iter_rooms(doc)) == rooms
+    assert link_reader.get_rooms(doc) == rooms
+    assert MockFilteredElementCollector.scans == 1
+
+
+def test_level_filter_and_limit(link_rooms):
+    doc, rooms, _ = link_rooms
+    assert list(link_reader.iter_rooms(doc, level_id=MockElementId(10))) == rooms[:2]
+    assert list(link_reader.iter_rooms(doc, level_id=MockElementId(20))) == rooms[2:]
+    assert list(link_reader.iter_rooms(doc, limit=1)) == rooms[:1]
+    assert [d.Id.IntegerValue for d in link_reader.iter_doors(doc, level_id=MockElementId(20))] == [12]
+
+
+def test_boundary_loops_memoized_per_room(link_rooms):
+    doc, rooms, calls = link_rooms
+    first = link_reader._room_boundary_loops_points(rooms[0])
+    second = link_reader._room_boundary_loops_points(rooms[0])
+    assert first == second == (["outer-1"], [])
+    assert calls["loops"] == 1
+
+
+def test_reloaded_link_gets_new_snapshot(link_rooms):
+    doc, _, calls = link_rooms
+    snap = link_reader.get_link_snapshot(doc)
+    link_reader.get_rooms(doc)
+
+    doc.IsValidObject = False
+    reloaded = MockDocument(linked=True, hash_code=202)
+    new_snap = link_reader.get_link_snapshot(reloaded)
+    assert new_snap is not snap
+    assert link_reader.get_link_snapshot(reloaded) is new_snap
+    assert snap.key not in link_reader._LINK_SNAPSHOTS
+
+
+def test_host_document_is_not_cached(link_rooms):
+    host = MockDocument(hash_code=303)
+    assert link_reader.get_link_snapshot(host) is None
+
+
+def test_polylabel_rooms_per_level_in_parallel(link_rooms, monkeypatch):
+    import room_executor
+
+    doc, rooms, _ = link_rooms
+
+    class _P(object):
+        def __init__(self, x, y):
+            self.X, self.Y, self.Z = x, y, 0.0
+
+    def _loops(room):
+        s = float(room.Id.IntegerValue)
+        return [_P(0, 0), _P(4 * s, 0), _P(4 * s, 2 * s), _P(0, 2 * s)], []
+
+    monkeypatch.setattr(link_reader, "_extract_room_boundary_loops", _loops)
+    serial = link_reader.polylabel_rooms_xy(rooms)
+    link_reader.invalidate_link_snapshots()
+    executor = room_executor.RoomTaskExecutor(workers=2)
+    parallel = link_reader.polylabel_rooms_xy(rooms, executor=executor)
+    assert parallel == serial and sorted(parallel) == [1, 2, 3]
+    assert parallel[3][0][0] == pytest.approx(6.0, abs=0.2)
+    snap = link_reader.get_link_snapshot(doc)
+    assert (3, 0.2) in snap.polylabels
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Tests for lru_cache.LruCache."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+from lru_cache import LruCache  # noqa: E402
+
+
+def test_evicts_least_recently_used():
+    cache = LruCache(2)
+    cache.put("a", 1)
+    cache["b"] = 2
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_hit_rate():
+    cache = LruCache(4)
+    cache.put(1, "x")
+    cache.get(1)
+    cache.get(2)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+    assert cache.get(2, "d") == "d"
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Tests for the memoized parameter reader."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import param_reader  # noqa: E402
+import socket_utils as su  # noqa: E402
+from mocks.revit_api import MockBuiltInParameter, MockDocument, MockFamilyInstance, MockFamilySymbol  # noqa: E402
+
+
+BIP = MockBuiltInParameter
+
+
+def _elem(eid, doc, params, name=u"", symbol=None):
+    e = MockFamilyInstance(name=name, element_id=eid, document=doc, symbol=symbol)
+    if symbol is None:
+        e.Symbol = None
+    for key, value in params.items():
+        e.set_parameter(key, value)
+    return e
+
+
+def _lookups(*elems):
+    return sum(e.parameter_lookups for e in elems)
+
+
+@pytest.fixture(autouse=True)
+def _reader():
+    param_reader.reset()
+    yield
+    param_reader.reset()
+
+
+def test_linked_document_values_are_read_once():
+    doc = MockDocument(linked=True, hash_code=601)
+    e = _elem(1, doc, {u"Марка": u"БК1"})
+    assert param_reader.get_string(e, bip=BIP.ALL_MODEL_MARK, name=u"Марка") == u"БК1"
+    first = e.parameter_lookups
+    assert param_reader.get_string(e, bip=BIP.ALL_MODEL_MARK, name=u"Марка") == u"БК1"
+    assert param_reader.get_string(e, name=u"Нет") == u""
+    param_reader.get_string(e, name=u"Нет")
+    assert e.parameter_lookups == first + 1
+    stats = param_reader.get_param_reader_stats(doc)
+    assert stats["cached"] and stats["lookups"] == 4 and stats["hits"] == 2
+    assert stats["saved_rate"] == 0.5
+
+
+def test_host_document_is_read_through():
+    doc = MockDocument(hash_code=602)
+    e = _elem(1, doc, {u"Марка": u"А"})
+    param_reader.get_string(e, name=u"Марка")
+    e.set_parameter(u"Марка", u"Б")
+    assert param_reader.get_string(e, name=u"Марка") == u"Б"
+    stats = param_reader.get_param_reader_stats(doc)
+    assert not stats["cached"] and stats["lookups"] == 2 and stats["hits"] == 0
+
+
+def test_elem_text_shares_type_text_between_instances():
+    doc = MockDocument(linked=True, hash_code=603)
+    sym = doc.add(MockFamilySymbol(u"Настенный", u"Котёл", element_id=50))
+    sym.set_parameter(BIP.ALL_MODEL_TYPE_MARK, u"БК")
+    a = _elem(1, doc, {u"Комментарии": u"кухня"}, name=u"Котёл", symbol=sym)
+    b = _elem(2, doc, {}, name=u"Котёл", symbol=sym)
+    assert su._elem_text(a) == su._norm(u"Котёл кухня БК Настенный Котёл")
+    type_lookups = _lookups(sym, a, b)
+    assert su._elem_text(b) == su._norm(u"Котёл БК Настенный Котёл")
+    assert su._elem_text(a) == su._elem_text(a)
+    # b reads only its own instance parameters, the symbol text is reused.
+    sym_calls_for_b = _lookups(sym, a, b) - type_lookups
+    assert sym_calls_for_b < type_lookups
+
+
+def test_find_param_resolves_normalized_name():
+    doc = MockDocument(linked=True, hash_code=604)
+    e = _elem(1, doc, {u"ADSK_Марка": u"x"})
+
+    def norm(s):
+        return s.lower().replace(u"_", u"").replace(u" ", u"")
+
+    p = param_reader.find_param(e, u"adsk марка", norm)
+    assert p is e.LookupParameter(u"ADSK_Марка")
+    assert param_reader.find_param(e, u"adsk марка", norm) is p
+    assert param_reader.find_param(e, u"Другой", norm) is None
+    before = e.parameter_lookups
+    assert param_reader.find_param(e, u"Другой", norm) is None
+    assert e.parameter_lookups == before
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Tests for polylabel_batch: results must match the legacy polylabel exactly."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+for path in (LIB, os.path.dirname(__file__)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import polylabel_batch  # noqa: E402
+from reference.polylabel import P, as_tuples, legacy_polylabel, make_room  # noqa: E402
+
+
+def test_matches_legacy_on_concave_rooms_with_holes():
+    rooms = [make_room(i, 24) for i in range(12)]
+    expected = [legacy_polylabel(o, h) for o, h in rooms]
+    actual = polylabel_batch.polylabel_many([as_tuples(o, h) for o, h in rooms])
+    assert actual == expected
+
+
+def test_matches_legacy_with_precision_and_l_shape():
+    pts = [P(0, 0), P(5, 0), P(5, 3), P(2, 3), P(2, 7), P(0, 7)]
+    outer, holes = as_tuples(pts, [])
+    for prec in (0.1, 0.2, 0.5):
+        assert polylabel_batch.polylabel(outer, holes, precision=prec) == legacy_polylabel(pts, [], precision=prec)
+
+
+def test_degenerate_room_returns_none():
+    assert polylabel_batch.polylabel([(0, 0), (1, 0), (2, 0)]) == (None, None)
+    assert polylabel_batch.polylabel_many([([(0, 0)], [])]) == [(None, None)]
+
+
+def test_signed_distances_sign_and_magnitude():
+    seg = polylabel_batch.SegmentSet([(0, 0), (4, 0), (4, 4), (0, 4)])
+    inside, outside = polylabel_batch.signed_distances([2.0, 6.0], [1.0, 2.0], seg)
+    assert inside == 1.0
+    assert outside == -2.0
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Tests for batched job progress events and their delivery to EOMHub."""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+LIB = ROOT / "EOMTemplateTools.extension" / "lib"
+HUB_SRC = ROOT / "EOMHub" / "src"
+for p in (str(LIB), str(HUB_SRC)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import hub_progress  # noqa: E402
+import hub_transport  # noqa: E402
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _reporter(clock, batches):
+    return hub_progress.ProgressReporter(
+        job_id="job_1",
+        tool_id="lights_elevator",
+        sink=lambda job_id, events: batches.append((job_id, events)),
+        clock=clock,
+    )
+
+
+def test_events_are_batched_at_most_every_interval():
+    clock, batches = _Clock(), []
+    progress = _reporter(clock, batches)
+    progress.stage("place", total=100)
+    assert len(batches) == 1
+
+    for _ in range(50):
+        clock.now += 0.01
+        progress.update()
+    # 0.5 s of updates -> flushes at 0.2 and 0.4 only.
+    assert len(batches) == 3
+    assert all(job_id == "job_1" for job_id, _ in batches)
+
+    progress.close()
+    assert len(batches) == 4
+    last = batches[-1][1][-1]
+    assert last["processed"] == 50
+    assert last["stage"] == "place"
+    seqs = [ev["seq"] for _, events in batches for ev in events]
+    assert seqs == sorted(seqs)
+
+
+def test_rate_and_eta():
+    clock, batches = _Clock(), []
+    progress = _reporter(clock, batches)
+    progress.stage("place", total=100)
+    clock.now += 10.0
+    progress.update(25)
+    ev = batches[-1][1][-1]
+    assert ev["rate"] == pytest.approx(2.5)
+    assert ev["eta_sec"] == pytest.approx(30.0)
+    assert ev["elapsed_sec"] == pytest.approx(10.0)
+
+
+def test_stage_switch_keeps_previous_stage_state():
+    clock, batches = _Clock(), []
+    progress = _reporter(clock, batches)
+    progress.stage("shafts", total=3)
+    clock.now += 0.05
+    progress.update(3)
+    progress.stage("place", total=10)
+    progress.close()
+    events = [ev for _, evs in batches for ev in evs]
+    assert any(ev["stage"] == "shafts" and ev["processed"] == 3 for ev in events)
+    assert events[-1]["stage"] == "place"
+
+
+def test_reporter_is_noop_outside_hub(monkeypatch):
+    monkeypatch.delenv("EOM_HUB_JOB_ID", raising=False)
+    hub_progress.set_progress_sink(lambda job_id, events: pytest.fail("no job, no events"))
+    try:
+        progress = hub_progress.progress_reporter("lights_center")
+        assert not progress.enabled
+        progress.stage("place", total=5)
+        progress.update()
+        progress.close()
+    finally:
+        hub_progress.set_progress_sink(None)
+
+
+def test_progress_reporter_uses_registered_sink(monkeypatch):
+    batches = []
+    monkeypatch.setenv("EOM_HUB_JOB_ID", "job_9")
+    monkeypatch.setenv("EOM_HUB_TOOL_ID", "lights_center")
+    hub_progress.set_progress_sink(lambda job_id, events: batches.append((job_id, events)))
+    try:
+        progress = hub_progress.progress_reporter()
+        progress.stage("place", total=1)
+        progress.close()
+    finally:
+        hub_progress.set_progress_sink(None)
+    assert batches[0][0] == "job_9"
+    assert batches[-1][1][-1]["tool_id"] == "lights_center"
+
+
+def _import_tools(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEMP", str(tmp_path))
+    monkeypatch.setenv("TMP", str(tmp_path))
+    monkeypatch.setenv("EOM_SESSION_ID", "session_test")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    import api.tools as tools
+
+    tools._MONITOR_ENDPOINT.clear()
+    return tools
+
+
+def test_get_job_events_over_channel(tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    now = time.time()
+    events = [{"seq": i, "stage": "place", "processed": i, "total": 3} for i in (1, 2, 3)]
+
+    def _handler(message):
+        assert message["op"] == "events"
+        since = message.get("since") or 0
+        return {
+            "ok": True,
+            "events": [e for e in events if e["seq"] > since],
+            "result": {"job_id": message["job_id"], "status": "running", "timestamp": now},
+        }
+
+    srv = hub_transport.CommandServer(_handler)
+    srv.start()
+    try:
+        status = {"sessionId": "session_test", "commandPort": srv.port, "commandToken": srv.token, "timestamp": now}
+        (tmp_path / "eom_hub_status.json").write_text(json.dumps(status), encoding="utf-8")
+        payload = tools.get_job_events("job_1", since=1)
+    finally:
+        srv.stop()
+    assert [e["seq"] for e in payload["events"]] == [2, 3]
+    assert payload["result"]["status"] == "running"
+
+
+def test_get_job_events_without_channel_falls_back_to_files(tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    payload = tools.get_job_events("job_2")
+    assert payload["events"] == []
+    assert payload["result"]["status"] == "pending"
+
+
+def test_timeout_counts_from_last_progress(tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    now = time.time()
+    slow = tools._validate_job_result(
+        {"status": "running", "timestamp": now - 3600, "progressTimestamp": now - 1}
+    )
+    assert slow["status"] == "running"
+    assert not slow.get("stalled")
+
+    quiet = tools._validate_job_result(
+        {"status": "running", "timestamp": now - 3600, "progressTimestamp": now - 120}
+    )
+    assert quiet["status"] == "running"
+    assert quiet["stalled"] is True
+
+    hung = tools._validate_job_result({"status": "running", "timestamp": now - 3600})
+    assert hung["status"] == "error"
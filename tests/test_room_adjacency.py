@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Tests for the per-level room adjacency graph and exterior segments."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (LIB, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import room_adjacency  # noqa: E402
+import room_boundary  # noqa: E402
+import socket_utils  # noqa: E402
+from mocks.revit_api import (  # noqa: E402
+    MockLine,
+    MockRoom,
+    MockSpatialElementBoundaryLocation,
+    MockXYZ,
+    mock_boundary_loop,
+)
+
+PROBE_FT = 200.0 / 304.8
+CENTER = MockSpatialElementBoundaryLocation.Center
+
+
+def _room(doc, rid, corners, walls):
+    room = doc.add(MockRoom(element_id=rid, level_id=30))
+    room.set_boundary([mock_boundary_loop(corners, walls)])
+    # Wall-centre variant: the 150 mm shared wall moves to its axis x = 10.25.
+    center = [(10.25 if x in (10, 10.5) else x, y) for x, y in corners]
+    return room.set_boundary([mock_boundary_loop(center, walls)], CENTER)
+
+
+def _curve(room, i, location=None):
+    return room.boundaries[location][0][i].GetCurve()
+
+
+def _api_calls(doc, *rooms):
+    return {"in_room": sum(r.point_in_room_calls for r in rooms), "room_at": doc.room_at_point_calls}
+
+
+@pytest.fixture
+def level(fake_link, monkeypatch):
+    doc = fake_link(hash_code=8080)
+    # Two rooms separated by a 150 mm wall (id 300); all other walls are facade.
+    left = _room(doc, 1, [(0, 0), (10, 0), (10, 10), (0, 10)], [101, 300, 103, 104])
+    right = _room(doc, 2, [(10.5, 0), (20, 0), (20, 10), (10.5, 10)], [201, 202, 203, 300])
+    monkeypatch.setattr(room_boundary, "_OPTIONS", {})
+    return doc, left, right
+
+
+def test_exterior_segments_and_neighbours(level):
+    doc, left, right = level
+    adj = room_adjacency.get_room_adjacency(doc, 30, PROBE_FT)
+    assert room_adjacency.get_room_adjacency_of(doc, left, PROBE_FT) is adj
+    assert [r.element_id for r in adj.exterior_segments(left)] == [101, 103, 104]
+    assert [r.element_id for r in adj.exterior_segments(right)] == [201, 202, 203]
+    assert adj.neighbours(left) == {2: {300}}
+    assert adj.neighbours(right) == {1: {300}}
+    assert adj.rooms_of_wall(300) == [1, 2]
+
+
+def test_socket_outer_boundary_uses_graph(level):
+    doc, left, right = level
+    shared = _curve(left, 1)
+    facade = _curve(left, 0)
+    assert socket_utils._is_room_outer_boundary_segment(doc, left, shared) is False
+    assert socket_utils._is_room_outer_boundary_segment(doc, left, facade) is True
+    assert _api_calls(doc, left, right) == {"in_room": 0, "room_at": 0}
+
+    # A curve that is not a cached boundary segment falls back to API probes.
+    other = MockLine(MockXYZ(0, 5, 0), MockXYZ(5, 5, 0))
+    assert socket_utils._is_room_outer_boundary_segment(doc, left, other) is False
+    assert _api_calls(doc, left, right)["in_room"] == 2
+
+
+def test_graph_is_keyed_on_caller_boundary_options(level):
+    doc, left, right = level
+    center_opts = room_boundary.boundary_options(CENTER)
+    default = room_adjacency.get_room_adjacency_of(doc, left, PROBE_FT)
+    assert room_adjacency.get_room_adjacency_of(doc, left, PROBE_FT, opts=room_boundary.boundary_options()) is default
+    centered = room_adjacency.get_room_adjacency_of(doc, left, PROBE_FT, opts=center_opts)
+    assert centered is not default
+
+    shared = _curve(left, 1, CENTER)
+    facade = _curve(left, 0, CENTER)
+    assert default.is_exterior(left, shared) is None
+    assert socket_utils._is_room_outer_boundary_segment(doc, left, shared, opts=center_opts) is False
+    assert socket_utils._is_room_outer_boundary_segment(doc, left, facade, opts=center_opts) is True
+    assert _api_calls(doc, left, right) == {"in_room": 0, "room_at": 0}
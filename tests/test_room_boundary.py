@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Tests for the session cache of room boundaries."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (LIB, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import link_reader  # noqa: E402
+import room_boundary  # noqa: E402
+import socket_utils  # noqa: E402
+from mocks.revit_api import (  # noqa: E402
+    MockDocument,
+    MockRoom,
+    MockSpatialElementBoundaryLocation,
+    MockSpatialElementBoundaryOptions,
+    mock_boundary_loop,
+)
+
+FINISH = MockSpatialElementBoundaryLocation.Finish
+CENTER = MockSpatialElementBoundaryLocation.Center
+
+
+def _room(rid, doc):
+    outer = mock_boundary_loop([(0, 0), (5, 0), (10, 0), (10, 8), (0, 8)], range(100, 105))
+    column = mock_boundary_loop([(4, 4), (5, 4), (5, 5), (4, 5)], range(200, 204))
+    return MockRoom(element_id=rid, document=doc).set_boundary([column, outer])
+
+
+def _curve_reads(room):
+    return sum(seg.curve_reads for loop in room.boundaries[None] for seg in loop)
+
+
+def _opts(location=FINISH):
+    opts = MockSpatialElementBoundaryOptions()
+    opts.SpatialElementBoundaryLocation = location
+    return opts
+
+
+@pytest.fixture
+def room(fake_link, monkeypatch):
+    monkeypatch.setattr(room_boundary, "_OPTIONS", {})
+    return _room(7, fake_link(hash_code=501))
+
+
+def test_boundary_read_once_per_room_and_option(room):
+    rb = room_boundary.get_room_boundary(room)
+    assert room_boundary.get_room_boundary(room, _opts(FINISH)) is rb
+    assert room_boundary.boundary_options() is room_boundary.boundary_options()
+    assert room.boundary_reads == 1
+    assert room_boundary.get_room_boundary(room, _opts(CENTER)) is not rb
+    assert room.boundary_reads == 2
+    stats = room_boundary.get_room_boundary_stats(room.Document)
+    assert stats["hits"] == 1 and stats["size"] == 2
+
+
+def test_boundary_record_contents(room):
+    rb = room_boundary.get_room_boundary(room)
+    assert len(rb) == 2 and rb.longest_index == 1
+    assert [s.element_id for s in rb.longest_loop()] == [100, 101, 102, 103, 104]
+    assert rb.wall_ids(1)[:2] == [100, 101] and len(rb.wall_ids()) == 9
+    assert len(rb.curves()) == 9
+    assert [(p.X, p.Y) for p in rb.simplified_points(1)] == [(0, 0), (10, 0), (10, 8), (0, 8)]
+    assert len(rb.loop_points(1)) == 5
+    for seg in rb.longest_loop():
+        seg.GetCurve()
+    assert _curve_reads(room) == 9
+
+
+def test_tools_share_one_read(room):
+    outer, holes = link_reader._extract_room_boundary_loops(room)
+    segs = socket_utils._get_room_outer_boundary_segments(room, _opts(FINISH))
+    assert len(outer) == 5 and len(holes) == 1
+    assert [s.GetCurve().GetEndPoint(0) for s in segs] == outer
+    assert room.boundary_reads == 1
+
+
+def test_host_document_is_not_cached(fake_link, monkeypatch):
+    monkeypatch.setattr(room_boundary, "_OPTIONS", {})
+    room = _room(8, MockDocument(hash_code=502))
+    room_boundary.get_room_boundary(room)
+    room_boundary.get_room_boundary(room)
+    assert room.boundary_reads == 2
+    assert room_boundary.get_room_boundary_stats(room.Document) is None
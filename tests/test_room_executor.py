@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Tests for the per-room / per-level task executor."""
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (LIB, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import polylabel_batch  # noqa: E402
+import room_executor  # noqa: E402
+from reference.polylabel import as_tuples, make_room  # noqa: E402
+
+
+def _square(n):
+    return n * n
+
+
+def test_thread_pool_keeps_order_and_uses_several_threads():
+    executor = room_executor.RoomTaskExecutor(workers=4)
+    assert executor.mode == room_executor.MODE_THREAD
+    barrier = threading.Barrier(4, timeout=5)
+    seen = set()
+
+    def _task(n):
+        if n < 4:
+            barrier.wait()  # deadlocks unless four tasks run concurrently
+        seen.add(threading.get_ident())
+        return n * 10
+
+    assert executor.map(_task, range(40)) == [n * 10 for n in range(40)]
+    assert len(seen) >= 4
+
+
+def test_errors_are_raised_in_item_order_or_handled():
+    executor = room_executor.RoomTaskExecutor(workers=3)
+
+    def _task(n):
+        if n in (5, 7):
+            raise ValueError(n)
+        return n
+
+    with pytest.raises(room_executor.TaskError) as info:
+        executor.map(_task, range(10))
+    assert info.value.index == 5 and isinstance(info.value.error, ValueError)
+    assert executor.map(_task, range(10), on_error=lambda item, exc: -item)[5:8] == [-5, 6, -7]
+
+
+def test_map_partitions_by_level():
+    rooms = [("L1", 1), ("L2", 2), ("L1", 3), ("L3", 4), ("L2", 5)]
+    executor = room_executor.RoomTaskExecutor(workers=2)
+    result = executor.map_partitions(lambda group: [r for _, r in group], rooms, key=lambda r: r[0])
+    assert list(result.items()) == [("L1", [1, 3]), ("L2", [2, 5]), ("L3", [4])]
+
+
+def test_get_executor_from_rules():
+    assert room_executor.get_executor({"parallel_mode": "serial"}).mode == room_executor.MODE_SERIAL
+    assert room_executor.get_executor({"parallel_workers": 1}).mode == room_executor.MODE_SERIAL
+    ex = room_executor.get_executor({"parallel_workers": 3})
+    assert ex.mode == room_executor.MODE_THREAD and ex.workers == 3
+    assert room_executor.get_executor({"parallel_mode": "bogus", "parallel_workers": 3}).mode == room_executor.MODE_SERIAL
+
+
+def test_process_pool_on_cpython():
+    executor = room_executor.RoomTaskExecutor(workers=2, mode=room_executor.MODE_PROCESS)
+    assert executor.mode == room_executor.MODE_PROCESS
+    assert executor.map(_square, range(20)) == [n * n for n in range(20)]
+
+
+def test_polylabel_many_parallel_matches_serial():
+    rooms = [as_tuples(*make_room(i, 30)) for i in range(12)] + [([], [])]
+    serial = polylabel_batch.polylabel_many(rooms)
+    assert serial[-1] == (None, None)
+    for mode in (room_executor.MODE_THREAD, room_executor.MODE_PROCESS):
+        executor = room_executor.RoomTaskExecutor(workers=3, mode=mode)
+        assert polylabel_batch.polylabel_many(rooms, executor=executor) == serial
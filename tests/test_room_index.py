@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Tests for room_index spatial lookup."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import geom2d  # noqa: E402
+from room_index import RoomSpatialIndex  # noqa: E402
+from mocks.revit_api import MockBoundingBox, MockRoom  # noqa: E402
+from mocks.revit_api import MockXYZ as XYZ  # noqa: E402
+
+
+def _room(name, loop, z0=0.0, z1=10.0):
+    xs = [p[0] for p in loop]
+    ys = [p[1] for p in loop]
+    room = MockRoom(name, bbox=MockBoundingBox(XYZ(min(xs), min(ys), z0), XYZ(max(xs), max(ys), z1)))
+    room.loop = [XYZ(x, y, z0) for x, y in loop]
+    return room
+
+
+def _loader(room):
+    return room.loop, []
+
+
+def _rect(x0, y0, x1, y1):
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def test_point_in_poly_l_shape():
+    poly = geom2d.Loop.of([(0, 0), (4, 0), (4, 2), (2, 2), (2, 4), (0, 4)])
+    assert geom2d.point_in_poly(1, 1, poly)
+    assert geom2d.point_in_poly(1, 3, poly)
+    assert not geom2d.point_in_poly(3, 3, poly)
+
+
+def test_find_returns_room_containing_point():
+    rooms = [_room("r{0}".format(i), _rect(i * 10, 0, i * 10 + 10, 10)) for i in range(50)]
+    index = RoomSpatialIndex(rooms, boundary_loader=_loader)
+    assert len(index) == 50
+    assert index.find(XYZ(235.0, 5.0, 1.0)).Name == "r23"
+    assert index.find((5.0, 5.0)).Name == "r0"
+    assert index.find(XYZ(-5.0, 5.0, 1.0)) is None
+
+
+def test_find_respects_level_z_range():
+    low = _room("low", _rect(0, 0, 10, 10), z0=0.0, z1=9.0)
+    high = _room("high", _rect(0, 0, 10, 10), z0=10.0, z1=19.0)
+    index = RoomSpatialIndex([low, high], boundary_loader=_loader, z_tolerance_ft=0.5)
+    assert index.find(XYZ(5, 5, 2.0)).Name == "low"
+    assert index.find(XYZ(5, 5, 12.0)).Name == "high"
+
+
+def test_grid_limits_candidates_and_skips_revit_calls():
+    rooms = [_room("r{0}".format(i), _rect(i * 10, 0, i * 10 + 10, 10)) for i in range(100)]
+    index = RoomSpatialIndex(rooms, boundary_loader=_loader)
+    assert len(index.candidates(505.0, 5.0)) <= 4
+    index.find(XYZ(505.0, 5.0, 1.0))
+    assert all(r.point_in_room_calls == 0 for r in rooms)
+
+
+def test_fallback_to_is_point_in_room_without_boundary():
+    room = _room("box", _rect(0, 0, 5, 5))
+    room.IsPointInRoom = lambda pt: True
+    index = RoomSpatialIndex([room], boundary_loader=lambda r: (None, []))
+    assert index.find(XYZ(2, 2, 1)) is room
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Tests for the per-link room separation line index."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (LIB, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import room_separation_index as rsi  # noqa: E402
+from mocks.revit_api import DB, MockDocument, MockGeometryInstance, MockLine, MockModelCurve, MockXYZ  # noqa: E402
+
+
+def _line(p0, p1):
+    return MockLine(MockXYZ(p0[0], p0[1], 0.0), MockXYZ(p1[0], p1[1], 0.0))
+
+
+@pytest.fixture
+def lines(monkeypatch):
+    # test_rollback_utils replaces the pyrevit stub before this module is imported.
+    monkeypatch.setattr(rsi, "DB", DB)
+    return [
+        MockModelCurve("a", [_line((0, 0), (4, 0))]),
+        MockModelCurve("b", [MockGeometryInstance([_line((20, 20), (20, 24)), "not a line"])]),
+        MockModelCurve("c", [_line((2, 3), (2, 5)), _line((50, 0), (52, 0))]),
+        MockModelCurve("broken", None),
+    ]
+
+
+def test_in_box_returns_lines_by_center_in_document_order(lines):
+    index = rsi.RoomSeparationIndex(lines)
+    assert len(index) == 4
+    found = index.in_box(-1.0, -1.0, 5.0, 5.0)
+    assert [(r.element.Name, r.center.X, r.center.Y) for r in found] == [("a", 2, 0), ("c", 2, 4)]
+    assert [r.element.Name for r in index.in_box(19.0, 21.0, 21.0, 23.0)] == ["b"]
+    assert [r.element.Name for r in index.in_box(-100.0, -100.0, 100.0, 100.0)] == ["a", "b", "c", "c"]
+
+
+def test_link_index_reads_geometry_once(lines, fake_link):
+    doc = fake_link(lines, hash_code=7070)
+    index = rsi.get_room_separation_index(doc)
+    assert rsi.get_room_separation_index(doc) is index
+    index.in_box(0.0, 0.0, 10.0, 10.0)
+    assert sum(line.geometry_reads for line in lines) == 4
+    host = MockDocument(hash_code=7071)
+    assert rsi.get_room_separation_index(host) is not rsi.get_room_separation_index(host)
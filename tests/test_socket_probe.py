@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""Tests for the socket hosting resolve stage and its probe memo."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import socket_utils as su  # noqa: E402
+from mocks.revit_api import MockRevitLinkInstance, MockWall  # noqa: E402
+from mocks.revit_api import MockXYZ as XYZ  # noqa: E402
+
+
+def _wall(wid):
+    """Wall without an orientation: the face probe is the only normal source."""
+    wall = MockWall(element_id=wid)
+    wall.Orientation = None
+    return wall
+
+
+class _Identity(object):
+    def OfPoint(self, p):
+        return p
+
+    def OfVector(self, v):
+        return v
+
+
+@pytest.fixture
+def wall_faces(monkeypatch):
+    """Wall face spans x in [0, 10] at y=0; counts real geometry probes."""
+    calls = {"n": 0}
+
+    def _fake(wall, link_inst, pt, faces_cache=None, prefer_n_link=None):
+        calls["n"] += 1
+        if 0.0 <= pt.X <= 10.0:
+            return "ref", XYZ(pt.X, 0.0, pt.Z), None
+        return None, None, None
+
+    monkeypatch.setattr(su, "_get_linked_wall_face_ref_and_point", _fake)
+    su.reset_socket_probe_stats()
+    return calls
+
+
+def test_probe_memoizes_by_wall_and_quantized_point(wall_faces):
+    probe = su._LinkFaceProbe(link_inst=object())
+    wall = _wall(1)
+    a = probe.probe(wall, XYZ(1.0, 0.5, 1.0))
+    b = probe.probe(wall, XYZ(1.0 + 1e-4, 0.5, 1.0))
+    assert a is b
+    probe.probe(_wall(2), XYZ(1.0, 0.5, 1.0))
+    probe.probe(wall, XYZ(1.0, 0.5, 1.0), prefer_n=XYZ(0.0, 1.0, 0.0))
+    assert probe.calls == 4
+    assert probe.misses == wall_faces["n"] == 3
+
+
+def test_resolve_steps_away_from_wall_end_and_reuses_probes(wall_faces):
+    probe = su._LinkFaceProbe(link_inst=object())
+    wall = _wall(1)
+    sym = object()
+    item = (wall, XYZ(0.1, 0.5, 1.0), XYZ(1.0, 0.0, 0.0), sym, 10.0)
+
+    plan, skip = su._resolve_socket_hosting(item, None, _Identity(), probe, None, 1.0, True, u"c")
+    assert skip is None
+    assert plan.link_ref == "ref"
+    assert plan.pt_host_on_face.X >= su.mm_to_ft(200)
+    assert plan.pt_host_on_face.Y == 0.0
+    assert plan.comment == u"c"
+
+    first = wall_faces["n"]
+    plan2, _ = su._resolve_socket_hosting(item, None, _Identity(), probe, None, 1.0, True, u"c")
+    assert wall_faces["n"] == first
+    assert plan2.pt_host_on_face.X == plan.pt_host_on_face.X
+    assert probe.calls > probe.misses
+
+
+def test_resolve_without_face_is_skipped_in_strict_mode(wall_faces):
+    probe = su._LinkFaceProbe(link_inst=object())
+    item = (_wall(1), XYZ(50.0, 0.5, 1.0), None, object(), 1.0)
+    plan, skip = su._resolve_socket_hosting(item, None, _Identity(), probe, None, 1.0, True, u"")
+    assert plan is None and skip == "no_face"
+
+    bad, skip = su._resolve_socket_hosting((None,), None, _Identity(), probe, None, 1.0, True, u"")
+    assert bad is None and skip == "no_place"
+
+
+def test_probe_stats_per_socket():
+    su.reset_socket_probe_stats()
+    su.SOCKET_PROBE_STATS.update(probes=40, geometry_probes=10, sockets=5)
+    stats = su.get_socket_probe_stats()
+    assert stats["probes_per_socket"] == 8.0
+    assert stats["geometry_probes_per_socket"] == 2.0
+    su.reset_socket_probe_stats()
+    assert su.get_socket_probe_stats()["probes_per_socket"] == 0.0
+
+
+def test_face_cache_shared_across_batches_per_link(wall_faces, fake_link):
+    inst = MockRevitLinkInstance(7, fake_link(hash_code=4242))
+    wall = _wall(1)
+    su._LinkFaceProbe(inst).probe(wall, XYZ(1.0, 0.5, 1.0))
+    second = su._LinkFaceProbe(inst)
+    second.probe(wall, XYZ(1.0, 0.5, 1.0))
+    assert second.misses == 0
+    assert wall_faces["n"] == 1
+
+    stats = su.get_link_face_cache_stats(inst)
+    assert stats["probes"]["hits"] == 1
+    assert stats["probes"]["misses"] == 1
+    assert stats["probes"]["hit_rate"] == 0.5
+
+    # Another instance of the same link shares faces but not link references.
+    copy = MockRevitLinkInstance(8, inst.GetLinkDocument())
+    su._LinkFaceProbe(copy).probe(wall, XYZ(1.0, 0.5, 1.0))
+    assert wall_faces["n"] == 2
+
+
+def test_strict_batches_share_cached_host_wall_index(wall_faces, monkeypatch):
+    host = object()
+    built = {"n": 0}
+    monkeypatch.setattr(su.wall_index, "_HOST_INDEXES", {})
+    monkeypatch.setattr(su.wall_index, "_wall_count", lambda doc: 3)
+
+    def _from_doc(doc):
+        built["n"] += 1
+        return "index"
+
+    monkeypatch.setattr(su.wall_index.WallSegmentIndex, "from_doc", staticmethod(_from_doc))
+    inst = MockRevitLinkInstance(9)
+    for _ in range(3):
+        result = su._place_socket_batch(host, inst, _Identity(), [(None,)], {}, {}, u"", strict_hosting=True)
+        assert result == (0, 0, 0, 0, 0, 1, 0)
+    assert built["n"] == 1
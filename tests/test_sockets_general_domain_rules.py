@@ -125,7 +125,7 @@ def test_calculate_allowed_path_skips_non_wall_and_filtered_wall_types(monkeypat
     monkeypatch.setattr(
         domain.su,
         "_is_room_outer_boundary_segment",
-        lambda link_doc, room, curve, probe_mm=200.0: bool(abs(float(getattr(curve, "Length", 0.0)) - 8.0) < 1e-6),
+        lambda link_doc, room, curve, probe_mm=200.0, opts=None: bool(abs(float(getattr(curve, "Length", 0.0)) - 8.0) < 1e-6),
     )
     monkeypatch.setattr(domain.su, "_is_facade_wall", lambda wall, patterns_rx=None: False)
     monkeypatch.setattr(domain.su, "_is_structural_wall", lambda wall: bool(getattr(wall, "is_structural", False)))
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Tests for the shared spatial-hash dedupe index."""
+
+import math
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+LIB = ROOT / "EOMTemplateTools.extension" / "lib"
+if str(LIB) not in sys.path:
+    sys.path.insert(0, str(LIB))
+
+import spatial_hash  # noqa: E402
+from spatial_hash import SpatialHash  # noqa: E402
+
+
+class _Pt(object):
+    def __init__(self, x, y, z=0.0):
+        self.X, self.Y, self.Z = x, y, z
+
+
+class _Loc(object):
+    def __init__(self, pt):
+        self.Point = pt
+
+
+class _Inst(object):
+    def __init__(self, x, y, z=0.0):
+        self.Location = _Loc(_Pt(x, y, z))
+
+
+def test_radius_queries_keep_insertion_order():
+    index = SpatialHash(1.0)
+    index.add(5.0, 5.0, 0.0, "c")
+    index.add(0.2, 0.0, 0.0, "a")
+    index.add(0.0, 0.3, 0.0, "b")
+    assert index.near(0.0, 0.0, 0.0, 0.5) == ["a", "b"]
+    # A radius larger than the cell still reaches the neighbouring cells.
+    assert index.near(0.0, 0.0, 0.0, 8.0) == ["c", "a", "b"]
+    assert index.first_near_point((0.0, 0.0, 0.0), 0.5) == "a"
+    assert not index.has_near(2.0, 2.0, 0.0, 0.5)
+
+
+def test_sphere_vs_cylinder_tolerance():
+    index = SpatialHash(2.0)
+    index.add_point(_Pt(0.0, 0.0, 1.5))
+    assert not index.has_near_point(_Pt(0.0, 0.0, 0.0), 1.0)
+    assert index.has_near_point(_Pt(0.0, 0.0, 0.0), 1.0, z_tol=2.0)
+    assert not index.has_near_point(_Pt(0.0, 0.0, -1.0), 1.0, z_tol=2.0)
+
+
+def test_remove_discard_and_pop():
+    index = SpatialHash(1.0)
+    a, b = object(), object()
+    index.add(0.0, 0.0, 0.0, a)
+    handle = index.add(0.1, 0.0, 0.0, b)
+    index.add(0.2, 0.0, 0.0, a)
+    assert len(index) == 3
+
+    assert index.discard(a)
+    assert index.items() == [b]
+    assert index.remove(handle)
+    assert not index.remove(handle)
+    assert len(index) == 0
+
+    index.add(0.0, 0.0, 0.0, "x")
+    index.add(0.1, 0.0, 0.0, "y")
+    assert index.pop_near_point((0.0, 0.0, 0.0), 0.5)
+    assert index.items() == ["y"]
+    assert not index.pop_near_point((9.0, 9.0, 0.0), 0.5)
+
+
+def test_from_instances_skips_elements_without_point():
+    insts = [_Inst(0.0, 0.0), _Inst(10.0, 0.0), object()]
+    index = SpatialHash.from_instances(insts, cell_ft=1.0)
+    assert len(index) == 2
+    assert index.first_near_point(_Pt(9.8, 0.1), 0.5) is insts[1]
+    assert index.discard(insts[1])
+    assert not index.has_near_point(_Pt(9.8, 0.1), 0.5)
+
+
+def _cluster_linear(points, tol_ft):
+    clusters = []
+    tol2 = tol_ft * tol_ft
+    for x, y in points:
+        for c in clusters:
+            if (x - c[0]) ** 2 + (y - c[1]) ** 2 <= tol2:
+                c[0] = (c[0] * c[2] + x) / (c[2] + 1.0)
+                c[1] = (c[1] * c[2] + y) / (c[2] + 1.0)
+                c[2] += 1.0
+                break
+        else:
+            clusters.append([x, y, 1.0])
+    return len(clusters)
+
+
+def test_cluster_count_matches_linear_pass():
+    rnd = random.Random(13)
+    for tol in (0.5, 1.5, 4.0):
+        pts = [(rnd.uniform(0, 40), rnd.uniform(0, 40)) for _ in range(400)]
+        assert spatial_hash.cluster_xy_count(pts, tol) == _cluster_linear(pts, tol)
+    assert spatial_hash.cluster_xy_count([], 1.0) == 0
+    assert spatial_hash.cluster_xy_count([(0, 0), (0, 0)], 0) == 2
+
+
+def test_time_savings_clustering_uses_hash():
+    import time_savings
+
+    pts = [(0.0, 0.0), (0.1, 0.0), (10.0, 0.0)]
+    assert time_savings._cluster_xy_points(pts, 0.5) == 2
+
+
+def test_socket_xyz_index_is_spatial_hash():
+    import socket_utils
+
+    index = socket_utils._XYZIndex(cell_ft=0.25)
+    assert isinstance(index, SpatialHash)
+    assert index.cell == 1.0
+    index.add(0.0, 0.0, 0.0)
+    assert index.has_near(0.5, 0.0, 0.0, 0.6)
+    assert not index.has_near(0.5, 0.0, 0.0, 0.4)
+
+
+def test_large_point_set_query_is_local():
+    index = SpatialHash(1.0)
+    for i in range(100):
+        for j in range(100):
+            index.add(float(i), float(j), 0.0, (i, j))
+    near = index.near(50.0, 50.0, 0.0, 1.0)
+    assert sorted(near) == [(49, 50), (50, 49), (50, 50), (50, 51), (51, 50)]
+    assert all(math.hypot(i - 50, j - 50) <= 1.0 for i, j in near)
@@ -3,6 +3,7 @@
 
 import os
 import sys
+from types import SimpleNamespace
 
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
@@ -17,9 +18,11 @@ if DOMAIN_DIR not in sys.path:
     sys.path.insert(0, DOMAIN_DIR)
 
 
+import adapters_geometry  # noqa: E402  pylint: disable=wrong-import-position
 import adapters_switches  # noqa: E402  pylint: disable=wrong-import-position
 import domain  # noqa: E402  pylint: disable=wrong-import-position
 import orchestrator  # noqa: E402  pylint: disable=wrong-import-position
+import wall_graph  # noqa: E402  pylint: disable=wrong-import-position
 
 
 class _IdentityTransform(object):
@@ -358,3 +361,56 @@ def test_calc_switch_position_from_separation_line_respects_inside_outside_fallb
     assert point_outside is not None
     assert point_inside.Y > 0
     assert point_outside.Y < 0
+
+
+class _XYZ(object):
+    def __init__(self, x, y, z):
+        self.X, self.Y, self.Z = float(x), float(y), float(z)
+
+
+class _LocationCurve(object):
+    def __init__(self, p0, p1):
+        self.Curve = SimpleNamespace(GetEndPoint=lambda i: p1 if i else p0)
+
+
+def _make_wall(wall_id, p0, p1):
+    wall = SimpleNamespace(Id=SimpleNamespace(IntegerValue=wall_id), Width=0.4)
+    wall.Location = _LocationCurve(_XYZ(p0[0], p0[1], 0.0), _XYZ(p1[0], p1[1], 0.0))
+    wall.record = SimpleNamespace(id=wall_id, element=wall, width=0.4,
+                                  p0=(p0[0], p0[1], 0.0), p1=(p1[0], p1[1], 0.0))
+    return wall
+
+
+def _use_wall_graph(monkeypatch, walls):
+    graph = wall_graph.WallGraph([w.record for w in walls])
+    monkeypatch.setattr(adapters_geometry, "DB", SimpleNamespace(XYZ=_XYZ, LocationCurve=_LocationCurve))
+    monkeypatch.setattr(adapters_geometry.wall_graph, "get_wall_graph", lambda doc: graph)
+
+
+def test_find_adjacent_wall_uses_collinear_walls_at_joint(monkeypatch):
+    start = _make_wall(1, (0.0, 0.0), (10.0, 0.0))
+    corner = _make_wall(2, (10.0, 0.0), (10.0, 6.0))
+    straight = _make_wall(3, (16.0, 0.0), (10.0, 0.0))
+    _use_wall_graph(monkeypatch, [start, corner, straight])
+
+    wall, p0, p1, _ = adapters_geometry.find_adjacent_wall(start, object(), _IdentityTransform(), 1)
+    assert wall is straight
+    assert (p0.X, p1.X) == (10.0, 16.0)
+    assert adapters_geometry.find_adjacent_wall(start, object(), _IdentityTransform(), -1)[0] is None
+
+
+def test_walk_along_connected_walls_follows_graph(monkeypatch):
+    start = _make_wall(1, (0.0, 0.0), (10.0, 0.0))
+    corner = _make_wall(2, (10.0, 0.0), (10.0, 1.0))
+    short_straight = _make_wall(3, (10.0, 0.0), (12.0, 0.0))
+    crossing = _make_wall(4, (12.0, -4.0), (12.0, 4.0))
+    far = _make_wall(5, (30.0, 0.0), (40.0, 0.0))
+    _use_wall_graph(monkeypatch, [start, corner, short_straight, crossing, far])
+
+    result = adapters_geometry._walk_along_connected_walls(
+        start, _XYZ(10.0, 0.0, 0.0), 3.0, object(), _IdentityTransform(), _XYZ(1.0, 0.0, 0.0))
+
+    # 2 ft along the straight wall, then the T-junction on the crossing wall.
+    assert result["wall"] is crossing
+    assert result["hops"] == 2
+    assert abs(result["t_on_wall"] - 1.0) < 1e-9
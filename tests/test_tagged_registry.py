@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""Tests for the per-document AUTO_EOM tagged-element registry."""
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import rollback_utils  # noqa: E402
+import tagged_registry as tr  # noqa: E402
+from mocks.revit_api import (  # noqa: E402
+    MockBuiltInCategory,
+    MockBuiltInParameter,
+    MockDocument,
+    MockElement,
+    MockElementId,
+    MockFamilyInstance,
+    MockFilteredElementCollector,
+)
+
+COMMENTS = MockBuiltInParameter.ALL_MODEL_INSTANCE_COMMENTS
+FIXTURES = MockBuiltInCategory.OST_ElectricalFixtures
+EQUIPMENT = MockBuiltInCategory.OST_ElectricalEquipment
+
+
+def _tag(elem, comment):
+    elem.set_parameter(COMMENTS, comment)
+    return elem
+
+
+def _instance(eid, comment, cat=FIXTURES):
+    return _tag(MockFamilyInstance(element_id=eid, category=cat), comment)
+
+
+def _other(eid, comment):
+    """Tagged element that is not a FamilyInstance (e.g. a detail line)."""
+    return _tag(MockElement(element_id=eid, category=FIXTURES), comment)
+
+
+def _comment(elem):
+    return elem.get_Parameter(COMMENTS).AsString()
+
+
+class _Event(object):
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def fire(self, args):
+        for h in self.handlers:
+            h(None, args)
+
+
+class _App(object):
+    def __init__(self):
+        self.DocumentChanged = _Event()
+
+    def GetHashCode(self):
+        return id(self)
+
+
+class _Changed(object):
+    def __init__(self, doc, added=(), modified=(), deleted=()):
+        self.doc = doc
+        self.ids = [[MockElementId(i) for i in ids] for ids in (added, modified, deleted)]
+
+    def GetDocument(self):
+        return self.doc
+
+    def GetAddedElementIds(self):
+        return self.ids[0]
+
+    def GetModifiedElementIds(self):
+        return self.ids[1]
+
+    def GetDeletedElementIds(self):
+        return self.ids[2]
+
+
+class _Doc(MockDocument):
+    def __init__(self, elements, app=None):
+        MockDocument.__init__(self, elements)
+        self.Application = app
+
+    def changed(self, **ids):
+        """Raise DocumentChanged as Revit does after a transaction."""
+        self.Application.DocumentChanged.fire(_Changed(self, **ids))
+
+
+class _Collector(MockFilteredElementCollector):
+    """FilteredElementCollector: WherePasses applies the Comments filter."""
+    docs = []
+
+    def __init__(self, doc):
+        MockFilteredElementCollector.__init__(self, doc)
+        self.doc = doc
+
+    def WherePasses(self, flt):
+        _Collector.docs.append(self.doc)
+        needle = flt.rule.needle.lower()
+        return [e for e in self._items if needle in _comment(e).lower()]
+
+
+class _Rule(object):
+    def __init__(self, provider, evaluator, needle, case_sensitive=True):
+        self.needle = needle
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = types.SimpleNamespace(
+        BuiltInParameter=MockBuiltInParameter,
+        FamilyInstance=MockFamilyInstance,
+        ElementId=MockElementId,
+        FilteredElementCollector=_Collector,
+        ParameterValueProvider=lambda pid: pid,
+        FilterStringContains=object,
+        FilterStringRule=_Rule,
+        ElementParameterFilter=lambda rule: types.SimpleNamespace(rule=rule),
+    )
+    monkeypatch.setattr(tr, "DB", db)
+    monkeypatch.setattr(tr, "_HOOKED_APPS", {})
+    _Collector.docs = []
+    tr.invalidate_registry()
+    yield db
+    tr.invalidate_registry()
+
+
+@pytest.fixture
+def model(fake_db):
+    elements = [
+        _instance(10, "AUTO_EOM:SOCKET:20260117_143022"),
+        _instance(11, "AUTO_EOM:SOCKET"),
+        _instance(12, "AUTO_EOM:PANEL_SHK", cat=EQUIPMENT),
+        _instance(13, "auto_eom:light"),
+        _instance(14, "note AUTO_EOM inside"),
+        _other(15, "AUTO_EOM:SOCKET"),
+    ]
+    doc = _Doc(elements, app=_App())
+    return doc, _Collector.docs
+
+
+def test_indexes_by_tool_tag_category_and_comment(model):
+    doc, _ = model
+    reg = tr.get_registry(doc)
+    assert len(reg) == 6
+    assert reg.ids(tool="socket") == {10, 11, 15}
+    assert reg.ids(contains="AUTO_EOM:SOCKET", instances_only=True) == {10, 11}
+    assert reg.ids(contains="auto_eom:socket", case_sensitive=True) == set()
+    assert reg.ids(categories=[EQUIPMENT]) == {12}
+    assert reg.ids(prefix="AUTO_EOM:SOCKET:2026") == {10}
+    assert reg.tag_counts() == {"AUTO_EOM:SOCKET": 3, "AUTO_EOM:PANEL_SHK": 1, "AUTO_EOM:LIGHT": 1}
+
+
+def test_queries_reuse_registry_without_collectors(model):
+    doc, scans = model
+    reg = tr.get_registry(doc)
+    for _ in range(5):
+        assert tr.get_registry(doc) is reg
+        tr.find_tagged(doc, "AUTO_EOM:SOCKET")
+    assert len(scans) == 1
+    assert len(doc.Application.DocumentChanged.handlers) == 1
+
+
+def test_created_and_deleted_ids_update_without_rescan(model):
+    doc, scans = model
+    reg = tr.get_registry(doc)
+    new = _instance(20, "AUTO_EOM:SOCKET")
+    doc.add(new)
+    assert tr.note_created(doc, [new]) == 1
+    assert tr.get_registry(doc) is reg
+    assert 20 in reg.ids(contains="AUTO_EOM:SOCKET")
+
+    doc.remove(10)
+    assert tr.note_deleted(doc, [MockElementId(10)]) == 1
+    assert tr.get_registry(doc) is reg
+    assert 10 not in reg.ids(tool="SOCKET")
+    assert len(scans) == 1
+
+
+def test_document_changed_keeps_registry_current(model):
+    doc, scans = model
+    reg = tr.get_registry(doc)
+    # One tagged element deleted and another created outside the tools.
+    doc.remove(11)
+    doc.add(_instance(21, "AUTO_EOM:LIGHT"))
+    doc.changed(added=[21], deleted=[11])
+    assert tr.get_registry(doc) is reg
+    assert reg.ids(tool="SOCKET") == {10, 15}
+    assert reg.ids(tool="LIGHT") == {13, 21}
+    # A tag removed from Comments by hand, another typed in.
+    _tag(doc.GetElement(14), "plain note")
+    doc.add(_instance(30, "AUTO_EOM:SOCKET"))
+    doc.changed(added=[30], modified=[14])
+    tr.get_registry(doc)
+    assert 14 not in reg.by_id
+    assert 30 in reg.ids(tool="SOCKET")
+    # Events for other documents are ignored.
+    other = _Doc([], app=doc.Application)
+    other.changed(deleted=[10])
+    assert 10 in reg.by_id
+    assert len(scans) == 1
+
+
+def test_rollback_sees_edited_comments(model, monkeypatch):
+    doc, scans = model
+    monkeypatch.setattr(rollback_utils, "DB", tr.DB)
+    tr.get_registry(doc)
+    _tag(doc.GetElement(10), "AUTO_EOM:LIGHT:20260117_143022")
+    _tag(doc.GetElement(11), "AUTO_EOM inside, not a tag")
+    doc.changed(modified=[10, 11])
+    assert [e.Id.IntegerValue for e in rollback_utils.find_tagged_elements(doc, tool_filter="SOCKET")] == [15]
+    assert [e.Id.IntegerValue for e in rollback_utils.find_tagged_elements(doc, tool_filter="LIGHT")] == [10, 13]
+    assert ("AUTO_EOM:SOCKET", 1) in rollback_utils.get_unique_tags(doc)
+    assert len(scans) == 1
+
+
+def test_registry_is_not_cached_without_document_changed(model):
+    doc, scans = model
+    doc.Application = None
+    reg = tr.get_registry(doc)
+    assert tr.get_registry(doc) is not reg
+    assert len(scans) == 2
+
+
+def test_deleted_elements_are_dropped_on_query(model):
+    doc, _ = model
+    reg = tr.get_registry(doc)
+    doc.GetElement(11).IsValidObject = False
+    assert reg.ids(tool="SOCKET") == {10, 15}
+    assert 11 not in reg.by_id
+
+
+def test_find_tagged_falls_back_for_foreign_tags(model):
+    doc, _ = model
+    assert tr.find_tagged(doc, "MY_TAG") is None
+    assert [e.Id.IntegerValue for e in tr.find_tagged(doc, "AUTO_EOM:SOCKET")] == [10, 11]
+    assert tr.find_tagged(doc, "AUTO_EOM", categories=EQUIPMENT)[0].Id.IntegerValue == 12
+
+
+def test_rollback_queries_use_registry(model, monkeypatch):
+    doc, scans = model
+    monkeypatch.setattr(rollback_utils, "DB", tr.DB)
+    socket_ids = [e.Id.IntegerValue for e in rollback_utils.find_tagged_elements(doc, tool_filter="SOCKET")]
+    assert socket_ids == [10, 11, 15]
+    # Unparseable comments are not rollback candidates.
+    assert len(rollback_utils.find_tagged_elements(doc)) == 5
+    assert rollback_utils.get_unique_tags(doc)[0] == ("AUTO_EOM:SOCKET", 3)
+    assert rollback_utils.get_unique_tools(doc) == ["LIGHT", "PANEL_SHK", "SOCKET"]
+    assert len(scans) == 1
+
+
+def test_parse_tag_is_shared():
+    assert rollback_utils.parse_tag is tr.parse_tag
+    assert tr.parse_tag("AUTO_EOM:SOCKET:20260117_143022")["timestamp"] == "20260117_143022"
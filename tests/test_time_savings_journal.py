@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Tests for the indexed time-savings journal (lib writer, lib/EOMHub readers)."""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+LIB = ROOT / "EOMTemplateTools.extension" / "lib"
+HUB_SRC = ROOT / "EOMHub" / "src"
+for p in (str(LIB), str(HUB_SRC)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import time_savings  # noqa: E402
+import time_savings_journal as journal  # noqa: E402
+
+
+def _entry(key, i):
+    return {"tool_key": key, "count": i, "minutes": float(i), "minutes_min": float(i), "minutes_max": float(i),
+            "timestamp": 1000.0 + i}
+
+
+def test_last_entry_comes_from_index(tmp_path, monkeypatch):
+    log = str(tmp_path / "eom_time_savings_log.jsonl")
+    for i in range(300):
+        key = "sockets_general" if i % 3 else "lights_center"
+        journal.append_entry(log, _entry(key, i), key)
+
+    index = journal.load_index(log)
+    assert index["size"] == Path(log).stat().st_size
+    assert set(index["tools"]) == {"sockets_general", "lights_center"}
+
+    # No reverse scan needed: the pointer is read directly.
+    monkeypatch.setattr(journal, "iter_entries_reversed", lambda *a, **k: iter(()))
+    assert journal.read_last_entry(log, "lights_center")["count"] == 297
+    assert journal.read_last_entry(log, "sockets_general")["count"] == 299
+    assert journal.read_last_entry(log, "missing") is None
+
+
+def test_lines_appended_without_index_are_read_from_tail(tmp_path):
+    log = str(tmp_path / "eom_time_savings_log.jsonl")
+    journal.append_entry(log, _entry("lights_center", 1), "lights_center")
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_entry("lights_center", 2)) + "\n")
+    assert journal.read_last_entry(log, "lights_center")["count"] == 2
+
+    # The next indexed append picks the foreign line up as well.
+    journal.append_entry(log, _entry("sockets_general", 3), "sockets_general")
+    assert journal.load_index(log)["tools"]["lights_center"]["offset"] > 0
+
+
+def test_legacy_log_without_index(tmp_path):
+    log = tmp_path / "eom_time_savings_log.jsonl"
+    log.write_text("".join(json.dumps(_entry("k%d" % (i % 5), i)) + "\n" for i in range(2000)), encoding="utf-8")
+    assert journal.read_last_entry(str(log), "k1", key_fn=lambda v: v)["count"] == 1996
+    entries = list(journal.iter_entries_reversed(str(log), block_size=97))
+    assert [e["count"] for e in entries] == list(range(1999, -1, -1))
+
+
+def test_segments_roll_and_keep_pointers(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "SEGMENT_MAX_BYTES", 2048)
+    monkeypatch.setattr(journal, "MAX_SEGMENTS", 2)
+    log = str(tmp_path / "eom_time_savings_log.jsonl")
+    journal.append_entry(log, _entry("rare", 0), "rare")
+    for i in range(1, 200):
+        journal.append_entry(log, _entry("often", i), "often")
+        if i == 20:
+            journal.append_entry(log, _entry("middle", i), "middle")
+
+    rolled = sorted(p.name for p in tmp_path.glob("eom_time_savings_log.*.jsonl"))
+    assert len(rolled) == 2
+    assert journal.read_last_entry(log, "often")["count"] == 199
+    # Entries in deleted segments disappear together with their pointers.
+    assert journal.read_last_entry(log, "rare") is None
+    assert "rare" not in journal.load_index(log)["tools"]
+
+
+def test_time_savings_log_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEMP", str(tmp_path))
+    monkeypatch.delenv("EOM_SESSION_ID", raising=False)
+    time_savings._append_time_saved_log_entry("lights_center", 3, 1.5, 1.0, 2.0)
+    entry = time_savings.get_last_time_saved_entry("lights_center")
+    assert entry["count"] == 3
+    assert (tmp_path / "eom_time_savings_log.jsonl.idx.json").exists()
+
+
+def _import_tools(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEMP", str(tmp_path))
+    monkeypatch.setenv("TMP", str(tmp_path))
+    monkeypatch.setenv("EOM_SESSION_ID", "session_test")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    import api.tools as tools
+
+    tools._MONITOR_ENDPOINT.clear()
+    return tools
+
+
+def test_hub_reads_journal_and_keeps_incremental_totals(tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    savings_file = tools._get_savings_file()
+    log = str(Path(savings_file).parent / "eom_time_savings_log_session_test.jsonl")
+    entry = dict(_entry("lights_center", 4), minutes_min=2.0, minutes_max=6.0, timestamp=time.time())
+    journal.append_entry(log, entry, "lights_center")
+
+    found = tools._find_time_savings_log_entry("lights_center", job_timestamp=None, source_path=savings_file)
+    assert found["minutes_max"] == 6.0
+    near = tools._find_time_savings_log_entry("lights_center", job_timestamp=entry["timestamp"] + 1)
+    assert near["count"] == 4
+
+    first = tools.add_time_saving("lights_center", 10)
+    assert first["totalSecondsMin"] == 120.0
+    second = tools.add_time_saving("sockets_general", {"min": 1, "max": 3})
+    assert second["executed"] == {"lights_center": 1, "sockets_general": 1}
+    assert [h["tool_id"] for h in second["history"]] == ["sockets_general", "lights_center"]
+
+    # History is appended to its own journal; the totals file stays small.
+    totals = json.loads(Path(savings_file).read_text(encoding="utf-8"))
+    assert "history" not in totals
+    assert totals["totalSecondsMax"] == 360.0 + 180.0
+    assert tools.get_time_savings()["history"][0]["tool_id"] == "sockets_general"
+
+
+def test_hub_migrates_legacy_history(tmp_path, monkeypatch):
+    tools = _import_tools(tmp_path, monkeypatch)
+    savings_file = Path(tools._get_savings_file())
+    savings_file.parent.mkdir(parents=True, exist_ok=True)
+    legacy = {"totalSeconds": 60, "totalSecondsMin": 60, "totalSecondsMax": 60, "executed": {"a": 1},
+              "history": [{"tool_id": "a", "minutes": 1, "timestamp": 1.0, "time": "00:00:01"}]}
+    savings_file.write_text(json.dumps(legacy), encoding="utf-8")
+    assert tools.get_time_savings()["history"][0]["tool_id"] == "a"
+
+    data = tools.add_time_saving("b", 2)
+    assert [h["tool_id"] for h in data["history"]] == ["b", "a"]
+    assert data["totalSeconds"] == 180.0
+
+    reset = tools.reset_time_savings()
+    assert tools.get_time_savings()["history"][0]["tool_id"] == "RESET"
+    assert reset["totalSeconds"] == 0
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Tests for the wall adjacency graph used by switch placement."""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import wall_graph  # noqa: E402
+from mocks.revit_api import MockFilteredElementCollector, MockLine, MockWall, MockXYZ  # noqa: E402
+
+MM = 1.0 / 304.8
+
+
+def _rec(wid, p0, p1, width=0.5):
+    return SimpleNamespace(id=wid, element="wall-%d" % wid, p0=p0 + (0.0,), p1=p1 + (0.0,), width=width)
+
+
+@pytest.fixture
+def graph():
+    # A corridor wall A split by a joint at x=10, a perpendicular wall C
+    # at that joint and a wall D that ends on the middle of B (T-junction).
+    return wall_graph.WallGraph([
+        _rec(1, (0.0, 0.0), (10.0, 0.0)),
+        _rec(2, (20.0, 0.0), (10.0 + 30 * MM, 0.0)),
+        _rec(3, (10.0, 0.0), (10.0, 8.0)),
+        _rec(4, (15.0, 5.0), (15.0, 0.05)),
+        SimpleNamespace(id=5, element="no-curve", p0=None, p1=None, width=0.5),
+    ])
+
+
+def test_walls_at_joint_in_document_order(graph):
+    hits = graph.walls_at(10.0, 0.0, 50 * MM)
+    assert [(e.id, end) for e, end in hits] == [(1, 1), (2, 1), (3, 0)]
+    assert graph.walls_at(10.0, 0.0, 10 * MM)[-1][0].id == 3
+    assert len(graph) == 4
+
+
+def test_collinear_and_adjacent(graph):
+    a = graph.edges[0]
+    assert [(e.id, end) for e, end in graph.collinear_at(10.0, 0.0, a.ux, a.uy, 50 * MM)] == [(1, 1), (2, 1)]
+    assert [e.id for e, _ in graph.adjacent(a, 1, 50 * MM)] == [2, 3]
+    assert graph.adjacent(a, 0, 50 * MM) == []
+
+
+def test_walls_near_finds_t_junction(graph):
+    assert [e.id for e in graph.walls_near(15.0, 0.0, 120 * MM)] == [2, 4]
+    assert [e.id for e in graph.walls_near(5.0, 3.0, 120 * MM)] == []
+
+
+def test_link_graph_built_once_from_snapshot(fake_link):
+    wall = MockWall(element_id=7, curve=MockLine(MockXYZ(0.0, 0.0, 0.0), MockXYZ(1.0, 0.0, 0.0)))
+    doc = fake_link([wall], hash_code=4242)
+    g = wall_graph.get_wall_graph(doc)
+    assert wall_graph.get_wall_graph(doc) is g
+    assert [e.wall for e, _ in g.walls_at(1.0, 0.0, 0.01)] == [wall]
+    assert MockFilteredElementCollector.scans == 1
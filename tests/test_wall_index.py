@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Tests for the grid wall index used by nearest-wall lookups."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+LIB = os.path.join(ROOT, "EOMTemplateTools.extension", "lib")
+if LIB not in sys.path:
+    sys.path.insert(0, LIB)
+
+import wall_index  # noqa: E402
+from mocks.revit_api import MockBoundingBox, MockDocument, MockLine, MockWall  # noqa: E402
+from mocks.revit_api import MockXYZ as XYZ  # noqa: E402
+
+
+def _wall(name, x0, y0, x1, y1, z0=0.0, z1=10.0):
+    curve = MockLine(XYZ(x0, y0, z0), XYZ(x1, y1, z0))
+    bbox = MockBoundingBox(XYZ(min(x0, x1), min(y0, y1), z0), XYZ(max(x0, x1), max(y0, y1), z1))
+    return MockWall(name, curve=curve, bbox=bbox)
+
+
+def _brute_nearest(walls, pt, max_d, z_pad):
+    best = (None, None)
+    for w in walls:
+        bb = w.get_BoundingBox(None)
+        if not (bb.Min.Z - z_pad <= pt.Z <= bb.Max.Z + z_pad):
+            continue
+        curve = w.Location.Curve
+        d = curve.Project(XYZ(pt.X, pt.Y, curve.GetEndPoint(0).Z)).Distance
+        if max_d is not None and d > max_d:
+            continue
+        if best[0] is None or d < best[1]:
+            best = (w, d)
+    return best[0]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index():
+    wall_index.invalidate_wall_index()
+    yield
+    wall_index.invalidate_wall_index()
+
+
+def _grid_walls(n):
+    walls = []
+    for i in range(n):
+        for j in range(n):
+            x, y = i * 12.0, j * 12.0
+            walls.append(_wall("h%d_%d" % (i, j), x, y, x + 10.0, y))
+            walls.append(_wall("v%d_%d" % (i, j), x, y, x, y + 10.0))
+    return walls
+
+
+def test_nearest_matches_linear_scan():
+    walls = _grid_walls(8)
+    index = wall_index.WallSegmentIndex(walls)
+    probes = [XYZ(3.3, 1.1, 5.0), XYZ(47.0, 50.5, 5.0), XYZ(90.0, 90.0, 5.0), XYZ(-3.0, 20.0, 5.0)]
+    for pt in probes:
+        for max_d in (1.0, 3.0, None):
+            wall, proj, d = index.nearest(pt, max_d, z_pad_ft=4.0)
+            assert wall is _brute_nearest(walls, pt, max_d, 4.0)
+            if wall is not None:
+                assert d <= (max_d if max_d is not None else d)
+                assert proj.Z == 0.0
+
+
+def test_nearest_respects_z_pad():
+    walls = [_wall("low", 0, 0, 10, 0, 0.0, 10.0), _wall("high", 0, 0.5, 10, 0.5, 30.0, 40.0)]
+    index = wall_index.WallSegmentIndex(walls)
+    assert index.nearest(XYZ(5, 0.6, 35.0), 2.0, z_pad_ft=4.0)[0].Name == "high"
+    assert index.nearest(XYZ(5, 0.6, 5.0), 2.0, z_pad_ft=4.0)[0].Name == "low"
+    assert index.nearest(XYZ(5, 0.6, 20.0), 2.0, z_pad_ft=4.0)[0] is None
+    assert index.nearest(XYZ(5, 0.6, 20.0), 2.0)[0].Name == "high"
+
+
+def test_in_box_keeps_document_order_and_has_no_cap():
+    walls = [_wall("w%d" % i, i * 0.5, 0, i * 0.5, 3.0) for i in range(9000)]
+    index = wall_index.WallSegmentIndex(walls)
+    assert len(index) == 9000
+    hits = [e.wall.Name for e in index.in_box(4490.0, -1.0, 4499.9, 1.0)]
+    assert hits == ["w%d" % i for i in range(8980, 9000)]
+    assert index.nearest(XYZ(4499.6, 1.0, 1.0), 1.0)[0].Name == "w8999"
+
+
+def test_host_index_cached_until_wall_count_changes():
+    doc = MockDocument([_wall("a", 0, 0, 10, 0)], hash_code=77)
+    first = wall_index.get_wall_index(doc)
+    assert wall_index.get_wall_index(doc) is first
+
+    doc.add(_wall("b", 0, 5, 10, 5))
+    second = wall_index.get_wall_index(doc)
+    assert second is not first and len(second) == 2
+
+    wall_index.invalidate_wall_index(doc)
+    assert wall_index.get_wall_index(doc) is not second
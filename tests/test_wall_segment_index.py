@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Tests for the XY room segment index (nearest wall and raycasts)."""
+import math
+import os
+import random
+import sys
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+if TESTS not in sys.path:
+    sys.path.insert(0, TESTS)
+
+from reference.wall_raycast import linear_nearest, linear_raycast, make_room, queries  # noqa: E402
+import segment_index  # noqa: E402
+from segment_index import RoomSegmentIndex  # noqa: E402
+
+
+def test_matches_linear_scan_on_large_rooms():
+    for seed in range(12):
+        center, segs = make_room(seed, 130)
+        index = RoomSegmentIndex(segs)
+        for x, y, ux, uy in queries(seed, center, 60):
+            assert index.raycast(x, y, ux, uy, 60.0) == linear_raycast(x, y, ux, uy, 60.0, segs)
+            assert index.nearest(x, y) == linear_nearest(x, y, segs)
+
+
+def test_nearest_with_predicate_and_far_points():
+    center, segs = make_room(3, 110)
+    index = RoomSegmentIndex(segs)
+
+    def columns(idx):
+        return segs[idx][2].startswith("column")
+
+    rnd = random.Random(5)
+    for _ in range(50):
+        x = center[0] + rnd.uniform(-200, 200)
+        y = center[1] + rnd.uniform(-200, 200)
+        assert index.nearest(x, y, accept=columns) == linear_nearest(x, y, segs, accept=columns)
+        assert index.nearest(x, y) == linear_nearest(x, y, segs)
+    assert index.nearest(center[0] + 500.0, center[1], max_dist=10.0) == (None, None, None)
+
+
+def test_axis_aligned_rays_from_outside_and_ties():
+    square = [((0.0, 0.0), (10.0, 0.0), "s"), ((10.0, 0.0), (10.0, 10.0), "e"),
+              ((10.0, 10.0), (0.0, 10.0), "n"), ((0.0, 10.0), (0.0, 0.0), "w"),
+              ((5.0, 5.0), (5.0, 5.0), "point")]
+    index = RoomSegmentIndex(square, cell_ft=1.0)
+    idx, d, hit = index.raycast(-5.0, 5.0, 1.0, 0.0, 30.0)
+    assert square[idx][2] == "w" and math.isclose(d, 5.0) and hit == (0.0, 5.0)
+    assert index.raycast(5.0, 5.0, 0.0, -1.0, 3.0) == (None, None, None)
+    # Corner hit: both walls at the same distance, the first one wins (as in the scan).
+    assert index.raycast(5.0, 5.0, 1.0 / math.sqrt(2), 1.0 / math.sqrt(2), 20.0)[0] == linear_raycast(
+        5.0, 5.0, 1.0 / math.sqrt(2), 1.0 / math.sqrt(2), 20.0, square)[0]
+    assert index.nearest(5.0, 5.0)[0] == 4  # degenerate segments still count, as in nearest_segment
+    assert RoomSegmentIndex([]).raycast(0.0, 0.0, 1.0, 0.0, 5.0) == (None, None, None)
+
+
+def test_room_segment_index_is_reused_for_the_same_segments():
+    _, segs = make_room(1, 100)
+    index = segment_index.room_segment_index(segs)
+    assert segment_index.room_segment_index(segs) is index
+    assert segment_index.room_segment_index(list(segs)) is index
+    segs[0] = ((0.0, 0.0), (1.0, 0.0), "moved")
+    changed = segment_index.room_segment_index(segs)
+    assert changed is not index and changed.ax[0] == 0.0 and changed.bx[0] == 1.0
+    unhashable = [((0.0, 0.0), (1.0, 0.0), ["payload"])]
+    assert len(segment_index.room_segment_index(unhashable)) == 1